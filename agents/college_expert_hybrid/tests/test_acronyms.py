@@ -7,13 +7,12 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from tools.tools import search_universities
-from tools.acronyms import ACRONYM_MAP
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO)
 
 def test_acronym_resolution():
-    """Test that acronyms resolve to specific universities."""
+    """Test that acronyms resolve to specific universities (KB alias index)."""
     
     test_cases = [
         ("USC", "university_of_southern_california"),
@@ -50,9 +49,9 @@ def test_acronym_resolution():
         
         print(f"   Resolved ID: {actual_id}")
         print(f"   Name: {first_uni.get('official_name')}")
-        print(f"   Search Type: {result.get('search_type')}")
+        print(f"   Alias Match: {first_uni.get('alias_match')}")
         
-        if actual_id == expected_id and result.get('search_type') == 'acronym_resolution':
+        if actual_id == expected_id and first_uni.get('alias_match'):
             # Verify profile data is populated
             strategic_profile = first_uni.get('strategic_profile', {})
             if strategic_profile:
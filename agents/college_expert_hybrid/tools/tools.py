@@ -416,63 +416,8 @@ def search_universities(
         if exclude_ids:
             data["exclude_ids"] = exclude_ids
 
-
-        # --- Acronym Resolution Start ---
-        from .acronyms import ACRONYM_MAP
-        upper_query = query.upper().strip()
-        
-        if upper_query in ACRONYM_MAP:
-            resolved_id = ACRONYM_MAP[upper_query]
-            logger.info(f"🔍 ACRONYM DETECTED: {query} -> {resolved_id}")
-            
-            # Use get_university to fetch the profile directly
-            uni_result = get_university(resolved_id)
-            
-            if uni_result["success"]:
-                 # Wrap it in a search result structure
-                uni_data = uni_result["university"]
-                
-                # Ensure the structure matches search output
-                # get_university returns the full profile object which matches what we extract below
-                # But we need to make sure we format it correctly for the agent
-                
-                # Re-construct the university object as search results have a specific structure
-                # The get_university returns the inner 'university' object directly
-                
-                # IMPORTANT: Detailed info is nested under 'profile' key in the API response
-                uni_profile = uni_data.get("profile", {})
-                
-                formatted_uni = {
-                    "university_id": uni_data.get("university_id"),
-                    "official_name": uni_data.get("official_name"),
-                    "location": uni_data.get("location", {}),
-                    "acceptance_rate": uni_data.get("acceptance_rate"),
-                    "market_position": uni_data.get("market_position"),
-                    "median_earnings_10yr": uni_data.get("median_earnings_10yr"),
-                    "score": 100, # Artificial high score for exact match
-                    
-                    # Key profile sections - Extract from 'profile' sub-dict
-                    "strategic_profile": uni_profile.get("strategic_profile", {}),
-                    "admissions_data": uni_profile.get("admissions_data", {}),
-                    "academic_structure": uni_profile.get("academic_structure", {}),
-                    "application_strategy": uni_profile.get("application_strategy", {}),
-                    "student_insights": uni_profile.get("student_insights", {}),
-                    "outcomes": uni_profile.get("outcomes", {}),
-                    "credit_policies": uni_profile.get("credit_policies", {})
-                }
-                
-                return {
-                    "success": True,
-                    "universities": [formatted_uni],
-                    "total": 1,
-                    "query": query,
-                    "search_type": "acronym_resolution",
-                    "filters": filters,
-                    "message": f"Resolved acronym '{query}' to {uni_data.get('official_name')}"
-                }
-            else:
-                 logger.warning(f"   Acronym {query} resolved to {resolved_id} but fetch failed.")
-        # --- Acronym Resolution End ---
+        # Acronyms/nicknames ("USC", "gatech") are resolved by the KB's alias
+        # index: an exact hit comes back first with alias_match=True.
         
         logger.info(f"="*60)
         logger.info(f"🔍 TOOL: search_universities")
@@ -527,6 +472,7 @@ def search_universities(
                     "market_position": uni.get("market_position"),
                     "median_earnings_10yr": uni.get("median_earnings_10yr"),
                     "score": uni.get("score", 0),
+                    "alias_match": uni.get("alias_match", False),
                     
                     # Key profile sections for analysis
                     "strategic_profile": profile.get("strategic_profile", {}),
@@ -1622,37 +1568,20 @@ def calculate_college_fit(
         
         logger.info(f"[FIT] University data success: {university_data.get('success')}")
         
-        # get_university returns {success, university}, where university contains the profile
+        # get_university returns {success, university}, where university contains the profile.
+        # The KB resolves acronyms/slugs/names on an id miss (alias index), so
+        # a miss here is final — no search round trip to recover.
         if not university_data.get('success') or not university_data.get('university'):
-            # RETRY LOGIC: If ID failed, try to search for the university
-            logger.info(f"[FIT] Direct ID lookup failed for {university_id}. Attempting search recovery...")
-            
-            # Convert ID to search query (e.g., "harvard_university" -> "harvard university")
-            search_query = university_id.replace('_', ' ').replace('slug', '').strip()
-            search_result = search_universities(search_query, limit=1)
-            
-            found_id = None
-            if search_result.get('success') and search_result.get('universities'):
-                first_match = search_result['universities'][0]
-                found_id = first_match.get('university_id')
-                logger.info(f"[FIT] Search recovery found: {found_id} for query '{search_query}'")
-            
-            if found_id and found_id != university_id:
-                # Retry with found ID
-                logger.info(f"[FIT] Retrying with found ID: {found_id}")
-                university_data = get_university(found_id)
-                university_id = found_id  # Update ID for storing later
-            
-            # Check again
-            if not university_data or not university_data.get('success') or not university_data.get('university'):
-                return {
-                    "success": False,
-                    "error": f"University not found: {university_id}",
-                    "message": "University data not available in knowledge base"
-                }
+            return {
+                "success": False,
+                "error": f"University not found: {university_id}",
+                "message": "University data not available in knowledge base"
+            }
 
         # The university object contains acceptance_rate at top level and profile key with detailed data
         university_obj = university_data.get('university', {})
+        # Store under the canonical id when the KB resolved an alias
+        university_id = university_obj.get('university_id') or university_id
         uni_profile = university_obj.get('profile', {})
         
         logger.info(f"[FIT] University profile keys: {list(uni_profile.keys())[:10] if uni_profile else 'None'}")
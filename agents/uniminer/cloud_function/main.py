@@ -15,8 +15,10 @@ Endpoints:
 
 import os
 import json
+import hashlib
 import logging
 import requests
+from collections import OrderedDict
 import functions_framework
 from typing import Any, Dict, List, Optional
 from flask import jsonify, request
@@ -351,8 +353,22 @@ def handle_get_research_profile():
         return jsonify({"success": False, "error": str(e)})
 
 
+# Quality reports keyed by SHA-256 of the raw request body. The UI
+# auto-validates on every load/select/re-check, usually with an unchanged
+# profile — those are answered without parsing or walking it again.
+_VALIDATE_CACHE_MAX = 256
+_validate_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+
 def handle_validate():
     """Validate a profile against schema and return quality report."""
+    raw = request.get_data(cache=True) or b""
+    key = hashlib.sha256(raw).hexdigest()
+    cached = _validate_cache.get(key)
+    if cached is not None:
+        _validate_cache.move_to_end(key)
+        return jsonify({**cached, "cached": True})
+
     data = request.get_json()
     profile = data.get("profile", {})
     
@@ -375,7 +391,7 @@ def handle_validate():
     ]
     missing_critical = [f for f in critical_fields if f in null_fields]
     
-    return jsonify({
+    report = {
         "valid": len(missing_critical) == 0,
         "quality_score": round(quality_score, 1),
         "total_fields": total,
@@ -383,7 +399,11 @@ def handle_validate():
         "null_field_count": null_count,
         "null_fields": null_fields[:100],
         "missing_critical": missing_critical
-    })
+    }
+    _validate_cache[key] = report
+    if len(_validate_cache) > _VALIDATE_CACHE_MAX:
+        _validate_cache.popitem(last=False)
+    return jsonify(report)
 
 
 def handle_fill_gaps():
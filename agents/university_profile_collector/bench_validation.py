@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark profile validation over the local research corpus.
+
+Compares three passes over the same files:
+  legacy   json.load + UniversityProfile.model_validate (the old helpers)
+  compiled TypeAdapter.validate_json over the raw bytes, cold cache
+  memoized second pass — every file answered from the content-hash cache
+
+Usage:
+    python bench_validation.py                 # research/
+    python bench_validation.py research_2026 --repeat 5
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).parent
+sys.path.insert(0, str(HERE))
+
+from model import UniversityProfile  # noqa: E402
+import profile_validation  # noqa: E402
+
+
+def _legacy(paths):
+    ok = 0
+    for p in paths:
+        try:
+            UniversityProfile.model_validate(json.loads(p.read_text(encoding="utf-8")))
+            ok += 1
+        except Exception:
+            pass
+    return ok
+
+
+def _fast(paths, cache):
+    return sum(profile_validation.validate_bytes(p.read_bytes(), cache=cache).valid
+               for p in paths)
+
+
+def _time(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("dir", nargs="?", default="research", help="corpus directory (relative to this script)")
+    ap.add_argument("--repeat", type=int, default=3, help="best-of-N timing (default 3)")
+    args = ap.parse_args()
+
+    paths = sorted((HERE / args.dir).glob("*.json"))
+    if not paths:
+        sys.exit(f"no *.json under {HERE / args.dir}")
+    total_mb = sum(p.stat().st_size for p in paths) / 1e6
+    print(f"Corpus: {len(paths)} profiles, {total_mb:.1f} MB ({args.dir})\n")
+
+    profile_validation._adapter()  # build outside the timed region, like a warm process
+
+    legacy_s, legacy_ok = _time(lambda: _legacy(paths), args.repeat)
+
+    def cold():
+        return _fast(paths, profile_validation.ValidationCache())
+    compiled_s, compiled_ok = _time(cold, args.repeat)
+
+    warm_cache = profile_validation.ValidationCache()
+    _fast(paths, warm_cache)
+    memo_s, memo_ok = _time(lambda: _fast(paths, warm_cache), args.repeat)
+
+    rows = [("legacy", legacy_s, legacy_ok), ("compiled", compiled_s, compiled_ok),
+            ("memoized", memo_s, memo_ok)]
+    print(f"{'mode':<10}{'total ms':>10}{'ms/profile':>12}{'speedup':>9}{'valid':>7}")
+    for name, secs, ok in rows:
+        print(f"{name:<10}{secs * 1000:>10.1f}{secs * 1000 / len(paths):>12.2f}"
+              f"{legacy_s / secs:>8.1f}x{ok:>7}")
+    if not legacy_ok == compiled_ok == memo_ok:
+        print("\nWARNING: verdicts differ between modes")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ import time
 # Add parent path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from model import UniversityProfile
+from profile_validation import validate_file
 
 # Configuration
 CLOUD_FUNCTION_URL = os.environ.get(
@@ -23,13 +23,9 @@ RESEARCH_DIR = Path(__file__).parent / "research"
 
 
 def is_valid_profile(filepath: Path) -> bool:
-    """Check if profile passes Pydantic validation."""
-    try:
-        data = json.loads(filepath.read_text(encoding='utf-8'))
-        UniversityProfile.model_validate(data)
-        return True
-    except:
-        return False
+    """Check if profile passes Pydantic validation (memoized by content hash)."""
+    is_valid, _ = validate_file(filepath)
+    return is_valid
 
 
 def ingest_via_cloud_function(profile: dict) -> dict:
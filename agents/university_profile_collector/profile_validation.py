@@ -0,0 +1,212 @@
+"""
+Fast-path UniversityProfile validation shared by the collector runners,
+validate_research.py, ingest_valid.py and save_profile.py.
+
+Two costs dominated the old per-script `validate_profile` helpers:
+
+1. json.load() built a full Python dict only for Pydantic to walk it again.
+   Here the compiled validator (a TypeAdapter built once per process) reads
+   the raw bytes directly via validate_json — no intermediate dict.
+2. The same unchanged profile was re-validated by every runner, the audit
+   scripts and the ingest pre-check. Results are memoized by the SHA-256 of
+   the file bytes, in memory and in a small JSON cache on disk
+   (PROFILE_VALIDATION_CACHE, default .validation_cache.json next to this
+   file), so a profile is validated once per schema version, ever.
+
+Cache entries are tied to a fingerprint of model.py: editing the schema
+invalidates every cached verdict.
+
+    from profile_validation import validate_file
+    ok, msg = validate_file("research/mit.json")
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).parent
+MODEL_PATH = HERE / "model.py"
+DEFAULT_CACHE_PATH = HERE / ".validation_cache.json"
+
+# Errors kept per cached verdict — enough for the longest report
+# (validate_research.py shows 3 + a "(+N more)" count).
+_MAX_STORED_ERRORS = 10
+_WRAPPER_KEY = b'"university_profile"'
+
+
+class ValidationResult(NamedTuple):
+    valid: bool
+    errors: List[str]
+    error_count: int
+    cached: bool = False
+
+    def message(self, limit: int = 3) -> str:
+        """The runners' historical '; '-joined 'loc: msg' summary."""
+        return "; ".join(self.errors[:limit])
+
+
+@lru_cache(maxsize=1)
+def _adapter():
+    """The compiled UniversityProfile validator, built once per process."""
+    from pydantic import TypeAdapter
+    from model import UniversityProfile
+    return TypeAdapter(UniversityProfile)
+
+
+@lru_cache(maxsize=1)
+def schema_fingerprint() -> str:
+    """Short hash of model.py — cached verdicts are only valid for it."""
+    try:
+        return hashlib.sha256(MODEL_PATH.read_bytes()).hexdigest()[:16]
+    except OSError:
+        return "unknown"
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _format_errors(exc) -> Tuple[List[str], int]:
+    if not hasattr(exc, "errors"):
+        return [str(exc)[:200]], 1
+    errs = exc.errors()
+    if errs and errs[0].get("type") == "json_invalid":
+        return [f"Invalid JSON: {errs[0].get('msg')}"], 1
+    formatted = [
+        f"{'.'.join(str(l) for l in err['loc'])}: {err['msg']}"
+        for err in errs[:_MAX_STORED_ERRORS]
+    ]
+    return formatted, len(errs)
+
+
+class ValidationCache:
+    """content-hash → verdict, optionally persisted as one JSON file.
+
+    Thread-safe (the runners validate from a ThreadPoolExecutor). Writes are
+    batched: the file is rewritten once at interpreter exit, or on save().
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("schema") == schema_fingerprint():
+            self._entries = data.get("results") or {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+            self.hits = self.misses = 0
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            payload = {"schema": schema_fingerprint(), "results": self._entries}
+            self._dirty = False
+        try:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload))
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist validation cache {self.path}: {e}")
+
+
+_default_cache: Optional[ValidationCache] = None
+
+
+def get_cache() -> ValidationCache:
+    """The process-wide cache (persisted unless PROFILE_VALIDATION_CACHE=off)."""
+    global _default_cache
+    if _default_cache is None:
+        setting = os.environ.get("PROFILE_VALIDATION_CACHE", "")
+        if setting.lower() == "off":
+            _default_cache = ValidationCache()
+        else:
+            _default_cache = ValidationCache(Path(setting) if setting else DEFAULT_CACHE_PATH)
+    return _default_cache
+
+
+def _validate_uncached(raw: bytes) -> ValidationResult:
+    try:
+        if _WRAPPER_KEY in raw:
+            # Wrapped {"university_profile": {...}} output: unwrap needs a
+            # parse anyway, so validate the dict.
+            data = json.loads(raw)
+            if isinstance(data, dict) and isinstance(data.get("university_profile"), dict):
+                data = data["university_profile"]
+            _adapter().validate_python(data)
+        else:
+            _adapter().validate_json(raw)
+        return ValidationResult(True, [], 0)
+    except json.JSONDecodeError as e:
+        return ValidationResult(False, [f"Invalid JSON: {e}"], 1)
+    except Exception as e:  # pydantic ValidationError (or a schema bug)
+        errors, count = _format_errors(e)
+        return ValidationResult(False, errors, count)
+
+
+def validate_bytes(raw: bytes, cache: Optional[ValidationCache] = None) -> ValidationResult:
+    """Validate raw profile JSON bytes, memoized by content hash."""
+    cache = cache if cache is not None else get_cache()
+    key = content_hash(raw)
+    entry = cache.get(key)
+    if entry is not None:
+        return ValidationResult(entry["valid"], entry["errors"], entry["error_count"], cached=True)
+    result = _validate_uncached(raw)
+    cache.put(key, {"valid": result.valid, "errors": result.errors,
+                    "error_count": result.error_count})
+    return result
+
+
+def validate_data(profile: Dict, cache: Optional[ValidationCache] = None) -> ValidationResult:
+    """Validate an in-memory profile dict (e.g. a workflow result).
+
+    Serialized with sorted keys so the hash matches regardless of key order.
+    """
+    raw = json.dumps(profile, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return validate_bytes(raw, cache=cache)
+
+
+def validate_file(file_path, cache: Optional[ValidationCache] = None) -> Tuple[bool, str]:
+    """Drop-in for the runners' validate_profile: (is_valid, error_message)."""
+    try:
+        raw = Path(file_path).read_bytes()
+    except OSError as e:
+        return False, f"Unreadable file: {e}"
+    result = validate_bytes(raw, cache=cache)
+    return result.valid, result.message()
@@ -48,7 +48,8 @@ ES_INDEX_NAME = 'knowledgebase_universities'
 # =============================================================================
 
 try:
-    from model import UniversityProfile
+    from model import UniversityProfile  # noqa: F401 — pydantic + schema importable
+    from profile_validation import validate_file
     VALIDATION_AVAILABLE = True
 except ImportError:
     print("⚠️ UniversityProfile model not available. Validation will be skipped.")
@@ -58,21 +59,7 @@ except ImportError:
 def validate_profile(file_path: str) -> tuple[bool, str]:
     if not VALIDATION_AVAILABLE:
         return True, "Validation skipped (model not available)"
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        if "university_profile" in data and isinstance(data.get("university_profile"), dict):
-            data = data["university_profile"]
-        UniversityProfile.model_validate(data)
-        return True, ""
-    except json.JSONDecodeError as e:
-        return False, f"Invalid JSON: {str(e)}"
-    except Exception as e:
-        if hasattr(e, 'errors'):
-            error_msg = "; ".join([f"{'.'.join(str(l) for l in err['loc'])}: {err['msg']}" for err in e.errors()[:3]])
-        else:
-            error_msg = str(e)[:200]
-        return False, error_msg
+    return validate_file(file_path)
 
 
 # =============================================================================
@@ -170,7 +170,8 @@ TOP_100_UNIVERSITIES = [
 # =============================================================================
 
 try:
-    from model import UniversityProfile
+    from model import UniversityProfile  # noqa: F401 — pydantic + schema importable
+    from profile_validation import validate_file
     VALIDATION_AVAILABLE = True
 except ImportError:
     print("⚠️ UniversityProfile model not available. Validation will be skipped.")
@@ -185,30 +186,7 @@ def validate_profile(file_path: str) -> tuple[bool, str]:
     """
     if not VALIDATION_AVAILABLE:
         return True, "Validation skipped (model not available)"
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Handle wrapped format {"university_profile": {...}}
-        if "university_profile" in data and isinstance(data.get("university_profile"), dict):
-            data = data["university_profile"]
-        
-        UniversityProfile.model_validate(data)
-        return True, ""
-        
-    except json.JSONDecodeError as e:
-        return False, f"Invalid JSON: {str(e)}"
-    except Exception as e:
-        # Pydantic validation error
-        details = []
-        if hasattr(e, 'errors'):
-            for err in e.errors()[:3]:  # First 3 errors
-                loc = ".".join(str(l) for l in err['loc'])
-                msg = err['msg']
-                details.append(f"{loc}: {msg}")
-        error_msg = "; ".join(details) if details else str(e)[:200]
-        return False, error_msg
+    return validate_file(file_path)
 
 
 # =============================================================================
@@ -41,16 +41,12 @@ def main():
     # --- 1. Pydantic shape (model.py) ---
     pyd_ok, pyd_err = True, ""
     try:
-        from model import UniversityProfile
-        UniversityProfile.model_validate(profile)
+        from profile_validation import validate_data
+        result = validate_data(profile)
+        if not result.valid:
+            pyd_ok, pyd_err = False, result.message(limit=6)
     except ImportError:
         pyd_err = "model.py not importable (skipped)"
-    except Exception as e:
-        pyd_ok = False
-        if hasattr(e, "errors"):
-            pyd_err = "; ".join(f"{'.'.join(str(l) for l in er['loc'])}: {er['msg']}" for er in e.errors()[:6])
-        else:
-            pyd_err = str(e)[:300]
 
     # --- 2. Ingest-boundary check (server) ---
     ing_errors, ing_warnings = [], []
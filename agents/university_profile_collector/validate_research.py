@@ -9,7 +9,8 @@ current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
 try:
-    from model import UniversityProfile
+    from model import UniversityProfile  # noqa: F401 — fail fast if the schema can't load
+    from profile_validation import get_cache, validate_bytes
 except ImportError as e:
     print(f"CRITICAL: Could not import model.py: {e}")
     sys.exit(1)
@@ -24,28 +25,20 @@ rows = []
 
 for f in files:
     fname = f.name
-    try:
-        data = json.loads(f.read_text())
-        UniversityProfile.model_validate(data)
+    # Compiled validator straight over the bytes; unchanged files are
+    # answered from the content-hash cache without re-validating.
+    result = validate_bytes(f.read_bytes())
+    if result.valid:
         rows.append([fname, "✅ PASS", ""])
-    except json.JSONDecodeError:
-         rows.append([fname, "❌ FAIL", "Invalid JSON format"])
-    except Exception as e:
-        # Pydantic validation error
-        error_msg = str(e).split('\n')[0] # First line of error usually generic
-        # Get detailed errors
-        details = []
-        if hasattr(e, 'errors'):
-            for err in e.errors():
-                loc = ".".join(str(l) for l in err['loc'])
-                msg = err['msg']
-                details.append(f"{loc}: {msg}")
-        
-        issue_summary = "; ".join(details[:3]) 
-        if len(details) > 3:
-            issue_summary += f" (+{len(details)-3} more)"
-            
-        rows.append([fname, "❌ FAIL", issue_summary])
+        continue
+
+    issue_summary = result.message()
+    if result.error_count > 3:
+        issue_summary += f" (+{result.error_count-3} more)"
+    rows.append([fname, "❌ FAIL", issue_summary])
+
+cache = get_cache()
+print(f"(validation cache: {cache.hits} hits, {cache.misses} validated)\n")
 
 # Print Table
 col_widths = [max(len(r[0]) for r in rows) + 2, 8, max(len(r[2]) for r in rows) + 2]
@@ -4,7 +4,7 @@ import logging
 import json
 import requests
 import google.generativeai as genai
-from counselor_tools import get_student_profile, get_college_list, get_all_fits, get_targeted_university_context
+from counselor_tools import get_student_profile_context, get_college_list, get_all_fits, get_targeted_university_context
 from gemini_fallback import send_message_with_fallback
 
 logger = logging.getLogger(__name__)
@@ -85,7 +85,7 @@ def chat_with_counselor(request):
             return {'success': False, 'error': 'Missing user_email or message'}
 
         # 1. Fetch Context
-        profile = get_student_profile(user_email)
+        profile_context = get_student_profile_context(user_email)
         college_list = get_college_list(user_email)
         fits = get_all_fits(user_email)
         
@@ -102,7 +102,7 @@ def chat_with_counselor(request):
         context_str = f"=== CURRENT DATE: {current_date} ({current_time}) ===\n"
         context_str += "(All deadline/scholarship guidance must be based on this date.)\n\n"
         
-        context_str += f"STUDENT PROFILE:\n{json.dumps(profile, indent=2, default=str)}\n\n"
+        context_str += f"STUDENT PROFILE:\n{profile_context or 'No profile on file.'}\n\n"
         
         context_str += f"COLLEGE LIST ({len(college_list)} schools):\n"
         context_str += json.dumps(college_list, indent=2, default=str)
@@ -30,6 +30,32 @@ def get_student_profile(user_email):
         logger.error(f"Error fetching profile: {e}")
         return None
 
+def get_student_profile_context(user_email):
+    """Fetch the student's compiled profile context (the bounded prompt text
+    Profile Manager builds for its own LLM calls) for use in a prompt.
+
+    Falls back to a JSON dump of the profile, minus the cached `llm_context`
+    record, when Profile Manager doesn't return the compiled text.
+    """
+    try:
+        url = f"{PROFILE_MANAGER_URL}/get-profile"
+        response = requests.get(url, params={'user_email': user_email, 'include_context': 'true'},
+                                headers=pm_auth_headers(), timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('profile_context'):
+                return data['profile_context']
+            profile = dict(data.get('profile') or {})
+            profile.pop('llm_context', None)
+            return json.dumps(profile, indent=2, default=str)
+        else:
+            logger.error(f"Failed to fetch profile context: {response.status_code} {response.text}")
+            return ''
+    except Exception as e:
+        logger.error(f"Error fetching profile context: {e}")
+        return ''
+
 def get_college_list(user_email):
     """Fetch user's college list from Profile Manager service."""
     try:
@@ -22,6 +22,9 @@ PROFILE_MANAGER_URL = os.getenv('PROFILE_MANAGER_URL')
 
 from request_auth import gate_request  # noqa: E402  (#223)
 from svc_auth import pm_auth_headers  # noqa: E402  (#223) outbound service identity
+import svc_auth  # noqa: E402
+
+svc_auth.warm_up()  # mint the PM token before the first request needs it
 
 
 def _claimed_emails(request) -> list:
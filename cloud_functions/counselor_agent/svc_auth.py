@@ -6,22 +6,16 @@ account (audience = the profile manager's URL). PM recognizes the runtime SA
 via TRUSTED_SERVICE_EMAILS and then honors the user_email this service
 forwards — counselor_agent itself verified the human at its own entry gate.
 
+Token lifetime is managed by service_tokens: refreshed ahead of expiry in the
+background, one fetch per audience under concurrency, and warmed at cold
+start (warm_up, called from main) so minting stays off user requests.
+
 Fails open by design: with no metadata server (local dev, unit tests) the
 headers are simply omitted; the backend's AUTH_MODE decides what that means.
 """
-import logging
 import os
-import time
-
-logger = logging.getLogger(__name__)
-
-# google-auth is imported lazily so test conftests that stub the `google`
-# package can still import counselor modules (headers are monkeypatched or
-# simply empty in tests; production always has the real package).
 
-# Tokens live 1h; refresh with 5 minutes of slack.
-_TOKEN_TTL_SECONDS = 55 * 60
-_cache = {}  # audience -> (token, fetched_at)
+import service_tokens
 
 
 def _audience() -> str:
@@ -31,19 +25,10 @@ def _audience() -> str:
 def pm_auth_headers() -> dict:
     """{'Authorization': 'Bearer <oidc>'} for profile-manager calls, or {}
     when no runtime credentials are available. Never raises."""
-    audience = _audience()
-    if not audience:
-        return {}
-    cached = _cache.get(audience)
-    now = time.monotonic()
-    if cached and now - cached[1] < _TOKEN_TTL_SECONDS:
-        return {'Authorization': f'Bearer {cached[0]}'}
-    try:
-        from google.auth.transport import requests as google_requests
-        from google.oauth2 import id_token as google_id_token
-        token = google_id_token.fetch_id_token(google_requests.Request(), audience)
-        _cache[audience] = (token, now)
-        return {'Authorization': f'Bearer {token}'}
-    except Exception as e:  # noqa: BLE001 — local dev / tests have no metadata server
-        logger.info(f"[SVC_AUTH] no service identity token available: {e}")
-        return {}
+    token = service_tokens.get_token(_audience())
+    return {'Authorization': f'Bearer {token}'} if token else {}
+
+
+def warm_up() -> list:
+    """Mint the profile-manager token in the background at cold start."""
+    return service_tokens.warm_up([_audience()])
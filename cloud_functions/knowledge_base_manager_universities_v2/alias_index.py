@@ -0,0 +1,245 @@
+"""
+Alias index: acronyms, nicknames, slugs, `_slug` ids and official names →
+canonical university_id.
+
+One dict, built from the KB's main docs (id + official_name only) and held
+in memory per instance, so every "that id missed, try something else"
+fallback — the get_university miss path, essay_copilot's candidate-id
+ladder, the hybrid agent's local ACRONYM_MAP and its search round trip in
+calculate_college_fit — collapses into one O(1) lookup here.
+
+Keys are normalized (`normalize_alias`) so ids and names share one key
+space: "university_of_texas_at_austin", "The University of Texas at Austin"
+and "university-of-texas-austin_slug" are all the same key.
+"""
+import logging
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Curated acronyms / nicknames → official name. Targets are resolved against
+# the KB's ids and names when the index is built, so an alias for a school
+# that isn't ingested simply doesn't resolve. Merged from KB v2's former
+# UNIVERSITY_ACRONYMS and the hybrid agent's tools/acronyms.py ACRONYM_MAP.
+CURATED_ALIASES = {
+    # California Schools
+    "ucb": "University of California Berkeley",
+    "uc berkeley": "University of California Berkeley",
+    "berkeley": "University of California Berkeley",
+    "cal": "University of California Berkeley",
+    "ucla": "University of California Los Angeles",
+    "ucsd": "University of California San Diego",
+    "uci": "University of California Irvine",
+    "ucsb": "University of California Santa Barbara",
+    "ucsc": "University of California Santa Cruz",
+    "ucr": "University of California Riverside",
+    "ucd": "University of California Davis",
+    "uc davis": "University of California Davis",
+    "ucm": "University of California Merced",
+    "usc": "University of Southern California",
+    "caltech": "California Institute of Technology",
+    "cal tech": "California Institute of Technology",
+    "stanford": "Stanford University",
+
+    # Ivy League
+    "mit": "Massachusetts Institute of Technology",
+    "harvard": "Harvard University",
+    "yale": "Yale University",
+    "princeton": "Princeton University",
+    "columbia": "Columbia University",
+    "penn": "University of Pennsylvania",
+    "upenn": "University of Pennsylvania",
+    "brown": "Brown University",
+    "dartmouth": "Dartmouth College",
+    "cornell": "Cornell University",
+
+    # Other Top Schools
+    "duke": "Duke University",
+    "northwestern": "Northwestern University",
+    "nyu": "New York University",
+    "stern": "New York University Stern School of Business",
+    "nyu stern": "New York University Stern School of Business",
+    "umich": "University of Michigan",
+    "michigan": "University of Michigan",
+    "ut austin": "University of Texas at Austin",
+    "ut": "University of Texas at Austin",
+    "gt": "Georgia Institute of Technology",
+    "gtech": "Georgia Institute of Technology",
+    "gatech": "Georgia Institute of Technology",
+    "georgia tech": "Georgia Institute of Technology",
+    "cmu": "Carnegie Mellon University",
+    "carnegie mellon": "Carnegie Mellon University",
+    "uiuc": "University of Illinois Urbana Champaign",
+    "unc": "University of North Carolina at Chapel Hill",
+    "uw": "University of Wisconsin Madison",  # ambiguous; Madison as primary
+    "wisconsin": "University of Wisconsin Madison",
+    "purdue": "Purdue University",
+    "uf": "University of Florida",
+    "ufl": "University of Florida",
+}
+
+# Too generic to expand inside a longer query ("Cal Poly", "UT Dallas"):
+# these resolve only when they are the whole query.
+WHOLE_QUERY_ONLY = frozenset({'cal', 'ut', 'uw', 'gt'})
+
+# Filler words dropped from keys: "University of Texas at Austin" and
+# "the_university_of_texas_austin" must meet on the same key.
+_FILLER = frozenset({'the', 'of', 'at'})
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Match priority when two sources claim one key: an id beats a curated
+# alias beats an official name.
+_PRIORITY = {'id': 0, 'alias': 1, 'name': 2}
+_SOURCE = {prio: source for source, prio in _PRIORITY.items()}
+
+# Longest curated alias, in tokens — bounds the n-gram scan in find_alias.
+_MAX_ALIAS_TOKENS = 3
+
+
+def normalize_alias(text: str) -> str:
+    """Canonical lookup key: lowercase, `&`→and, `_slug` suffix dropped,
+    punctuation/underscores/hyphens → spaces, filler words removed."""
+    if not text:
+        return ''
+    text = str(text).strip().lower().replace('&', ' and ')
+    if text.endswith('_slug') or text.endswith('-slug'):
+        text = text[:-5]
+    tokens = [t for t in _NON_ALNUM.split(text) if t and t not in _FILLER]
+    return ' '.join(tokens)
+
+
+def curated_aliases_for(official_name: str) -> List[str]:
+    """Curated acronyms/nicknames whose target is `official_name`."""
+    return list(_ALIASES_BY_NAME.get(normalize_alias(official_name), ()))
+
+
+def find_alias(query: str) -> Optional[str]:
+    """The longest curated alias appearing as a whole word/phrase in
+    `query` (None if none). O(tokens) — one dict probe per n-gram."""
+    tokens = normalize_alias(query).split()
+    if ' '.join(tokens) in _CURATED_KEYS:
+        return _CURATED_KEYS[' '.join(tokens)]
+    for n in range(min(_MAX_ALIAS_TOKENS, len(tokens)), 0, -1):
+        for i in range(len(tokens) - n + 1):
+            phrase = ' '.join(tokens[i:i + n])
+            if phrase in _CURATED_KEYS and phrase not in WHOLE_QUERY_ONLY:
+                return _CURATED_KEYS[phrase]
+    return None
+
+
+_CURATED_KEYS: Dict[str, str] = {normalize_alias(a): a for a in CURATED_ALIASES}
+_ALIASES_BY_NAME: Dict[str, List[str]] = {}
+for _alias, _name in CURATED_ALIASES.items():
+    _ALIASES_BY_NAME.setdefault(normalize_alias(_name), []).append(_alias)
+
+
+class AliasIndex:
+    """key → university_id, with ambiguous keys kept as candidate lists."""
+
+    def __init__(self, entries: Dict[str, tuple], names: Dict[str, str]):
+        # entries: key → (priority, ids tuple); names: id → official_name
+        self._ids = {key: ids[0] for key, (_, ids) in entries.items() if len(ids) == 1}
+        self._ambiguous = {key: list(ids) for key, (_, ids) in entries.items() if len(ids) > 1}
+        self._source = {key: _SOURCE[prio] for key, (prio, _) in entries.items()}
+        self.names = names
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, universities: Iterable[Dict]) -> 'AliasIndex':
+        """Index `universities` ([{university_id, official_name}]) plus the
+        curated aliases that resolve to one of them."""
+        entries: Dict[str, tuple] = {}
+        names: Dict[str, str] = {}
+
+        def add(key, uid, source):
+            if not key:
+                return
+            prio = _PRIORITY[source]
+            current = entries.get(key)
+            if current is None or prio < current[0]:
+                entries[key] = (prio, (uid,))
+            elif prio == current[0] and uid not in current[1]:
+                entries[key] = (prio, current[1] + (uid,))
+
+        for u in universities:
+            uid = u.get('university_id')
+            if not uid:
+                continue
+            names[uid] = u.get('official_name') or uid
+            add(normalize_alias(uid), uid, 'id')
+            add(normalize_alias(names[uid]), uid, 'name')
+
+        # Duplicate docs for one school ("harvard_university" and
+        # "harvard_university_slug") share every key; that's not real
+        # ambiguity — serve the id without the _slug suffix.
+        for key, (prio, ids) in list(entries.items()):
+            if len(ids) > 1 and len({normalize_alias(i) for i in ids}) == 1:
+                entries[key] = (prio, (min(ids, key=lambda i: (i.endswith('_slug'), len(i), i)),))
+
+        for alias, name in CURATED_ALIASES.items():
+            target = entries.get(normalize_alias(name))
+            if target and len(target[1]) == 1:
+                add(normalize_alias(alias), target[1][0], 'alias')
+
+        return cls(entries, names)
+
+    def resolve(self, text: str) -> Optional[Dict]:
+        """One lookup. Returns {university_id, official_name, matched_by}
+        ('id'|'alias'|'name'), {ambiguous: True, candidates: [...]}, or
+        None when nothing matches."""
+        if not text:
+            return None
+        if text in self.names:
+            return {"university_id": text, "official_name": self.names[text], "matched_by": "id"}
+        key = normalize_alias(text)
+        uid = self._ids.get(key)
+        if uid is not None:
+            return {"university_id": uid, "official_name": self.names.get(uid),
+                    "matched_by": self._source[key]}
+        if key in self._ambiguous:
+            return {"ambiguous": True, "candidates": [
+                {"university_id": i, "official_name": self.names.get(i)} for i in self._ambiguous[key]]}
+        return None
+
+
+# --- Per-instance cache -----------------------------------------------------
+# Built on first use from a projection read of the main docs and kept for
+# ALIAS_INDEX_TTL_S; ingest/delete call invalidate() so this instance sees
+# its own writes immediately (other instances catch up within the TTL).
+ALIAS_INDEX_TTL_S = 600
+
+_index: Optional[AliasIndex] = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index(load_universities) -> Optional[AliasIndex]:
+    """The cached index, (re)built via `load_universities()` when missing or
+    stale. A failed rebuild keeps serving the previous index."""
+    global _index, _built_at
+    if _index is not None and time.monotonic() - _built_at < ALIAS_INDEX_TTL_S:
+        return _index
+    with _lock:
+        if _index is not None and time.monotonic() - _built_at < ALIAS_INDEX_TTL_S:
+            return _index
+        try:
+            started = time.monotonic()
+            _index = AliasIndex.build(load_universities())
+            _built_at = time.monotonic()
+            logger.info(f"[ALIAS] index built: {len(_index)} universities "
+                        f"in {(_built_at - started) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"[ALIAS] index build failed: {e}")
+        return _index
+
+
+def invalidate():
+    """Drop the cached index; the next lookup rebuilds it."""
+    global _index
+    with _lock:
+        _index = None
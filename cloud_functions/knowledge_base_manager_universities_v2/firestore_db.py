@@ -19,6 +19,9 @@ VERSIONS_SUBCOLLECTION = "versions"
 # Global majors catalog (#303): union of majors across all profiles, one doc.
 MAJOR_CATALOG_COLLECTION = "major_catalog"
 MAJOR_CATALOG_DOC = "current"
+# Firestore caps a WriteBatch at 500 operations; a school needs at most 3
+# (snapshot, legacy archive, main doc), so chunks stay well under the cap.
+BATCH_MAX_OPS = 450
 
 
 class FirestoreDB:
@@ -241,6 +244,72 @@ class FirestoreDB:
         }
         return state_map.get(state, state.upper() if state else None)
     
+    def get_ingest_states(self, university_ids: List[str], year: int) -> Dict[str, Dict]:
+        """What an ingest of each school for `year` would overwrite — the
+        main doc's serving year/available_years and the `year` snapshot's
+        content_hash — in ONE field-mask get_all (no profile payloads).
+
+        Returns {university_id: {"main_exists", "main_year",
+        "available_years", "version_hash"}}; {} on failure, which callers
+        treat as "unknown → full ingest".
+        """
+        if not university_ids:
+            return {}
+        try:
+            refs = {}
+            for uid in university_ids:
+                for kind, ref in (('main', self.collection.document(uid)),
+                                  ('version', self._versions(uid).document(str(year)))):
+                    refs[ref.path] = (uid, kind, ref)
+            states = {uid: {"main_exists": False, "main_year": None,
+                            "available_years": [], "version_hash": None}
+                      for uid in university_ids}
+            # get_all returns snapshots in arbitrary order — match by path.
+            snaps = self.db.get_all(
+                [ref for _, _, ref in refs.values()],
+                field_paths=['data_year', 'available_years', 'content_hash'],
+            )
+            for snap in snaps:
+                if not snap.exists:
+                    continue
+                uid, kind, _ = refs[snap.reference.path]
+                data = snap.to_dict() or {}
+                if kind == 'main':
+                    states[uid].update(main_exists=True, main_year=data.get('data_year'),
+                                       available_years=data.get('available_years') or [])
+                else:
+                    states[uid]['version_hash'] = data.get('content_hash')
+            return states
+        except Exception as e:
+            logger.error(f"Get ingest states failed: {e}")
+            return {}
+
+    def get_diff_bases(self, bases: Dict[str, Optional[int]]) -> Dict[str, Dict]:
+        """Profiles to diff a refresh against, in one get_all: the
+        versions/{year} snapshot, or the main doc when year is None.
+
+        Returns {university_id: {"data_year", "profile"}}; best-effort —
+        a school missing from the result just gets no change_summary.
+        """
+        if not bases:
+            return {}
+        try:
+            refs = {}
+            for uid, year in bases.items():
+                ref = (self.collection.document(uid) if year is None
+                       else self._versions(uid).document(str(year)))
+                refs[ref.path] = (uid, ref)
+            found = {}
+            for snap in self.db.get_all([ref for _, ref in refs.values()],
+                                        field_paths=['data_year', 'profile']):
+                if snap.exists:
+                    uid, _ = refs[snap.reference.path]
+                    found[uid] = snap.to_dict() or {}
+            return found
+        except Exception as e:
+            logger.error(f"Get diff bases failed: {e}")
+            return {}
+
     def save_university(self, university_id: str, data: Dict, year: int) -> Dict:
         """Save a university snapshot for `year` and promote it to the main
         doc when it is the newest cycle (ADR 0002).
@@ -302,6 +371,94 @@ class FirestoreDB:
             logger.error(f"Save university failed: {e}")
             return {"saved": False, "promoted": False, "available_years": []}
 
+    def save_universities_bulk(self, docs: Dict[str, Dict], year: int) -> Dict[str, Dict]:
+        """Bulk counterpart of save_university for the bulk-ingest endpoint.
+
+        Same ADR 0002 rules (snapshot always written, main doc promoted only
+        for the newest year, legacy main docs archived first), but the main
+        docs are read in one get_all, available_years comes from the main
+        doc (kept in sync by every save/delete) instead of a versions stream
+        per school, and writes go out in WriteBatch commits. A school's ops
+        never straddle two commits, so a failed commit fails exactly the
+        schools in it.
+
+        Returns {university_id: save_university-shaped result}.
+        """
+        results: Dict[str, Dict] = {}
+        if not docs:
+            return results
+        try:
+            now = datetime.now(timezone.utc).isoformat()
+            main_refs = {uid: self.collection.document(uid) for uid in docs}
+            existing = {
+                snap.id: snap.to_dict()
+                for snap in self.db.get_all(list(main_refs.values()))
+                if snap.exists
+            }
+        except Exception as e:
+            logger.error(f"Bulk save read failed: {e}")
+            return {uid: {"saved": False, "promoted": False, "available_years": []} for uid in docs}
+
+        chunks: List[List] = [[]]
+        chunk_ops = 0
+        for uid, data in docs.items():
+            data['last_updated'] = now
+            data['data_year'] = year
+            main_ref = main_refs[uid]
+            current = existing.get(uid)
+            current_year = (current or {}).get('data_year')
+            years = set((current or {}).get('available_years') or [])
+            years.add(year)
+            ops = [('set', self._versions(uid).document(str(year)), data)]
+
+            if current is not None and current_year is None:
+                legacy_year = year - 1
+                legacy_ref = self._versions(uid).document(str(legacy_year))
+                # Pre-versioning docs are rare; a point read is fine here.
+                if not legacy_ref.get().exists:
+                    legacy_snapshot = dict(current)
+                    legacy_snapshot['data_year'] = legacy_year
+                    legacy_snapshot['vintage_estimated'] = True
+                    ops.append(('set', legacy_ref, legacy_snapshot))
+                years.add(legacy_year)
+
+            promoted = current_year is None or year >= current_year
+            available_years = sorted(years)
+            if promoted:
+                main_data = dict(data)
+                main_data['available_years'] = available_years
+                ops.append(('set', main_ref, main_data))
+            else:
+                ops.append(('update', main_ref, {'available_years': available_years}))
+
+            if chunk_ops + len(ops) > BATCH_MAX_OPS:
+                chunks.append([])
+                chunk_ops = 0
+            chunks[-1].append((uid, ops))
+            chunk_ops += len(ops)
+            results[uid] = {"saved": False, "promoted": promoted, "available_years": available_years}
+
+        for chunk in chunks:
+            batch = self.db.batch()
+            for _, ops in chunk:
+                for op, ref, payload in ops:
+                    getattr(batch, op)(ref, payload)
+            try:
+                batch.commit()
+            except Exception as e:
+                logger.error(f"Bulk save commit failed for {[uid for uid, _ in chunk]}: {e}")
+                for uid, _ in chunk:
+                    results[uid] = {"saved": False, "promoted": False, "available_years": []}
+                continue
+            for uid, _ in chunk:
+                results[uid]["saved"] = True
+
+        logger.info(
+            f"Bulk saved {sum(r['saved'] for r in results.values())}/{len(docs)} "
+            f"universities year={year} in {len(chunks)} batch(es)"
+        )
+        return results
+
     def delete_university(self, university_id: str, year: Optional[int] = None) -> bool:
         """Delete a university, or one cycle-year snapshot.
 
@@ -343,26 +500,103 @@ class FirestoreDB:
             logger.error(f"Delete university failed: {e}")
             return False
     
+    def list_alias_sources(self) -> List[Dict]:
+        """[{university_id, official_name}] for every main doc — a two-field
+        projection (no profiles), the alias index's whole input. Raises on
+        failure so alias_index keeps its previous index."""
+        docs = self.collection.select(['official_name']).stream()
+        return [{"university_id": doc.id,
+                 "official_name": (doc.to_dict() or {}).get('official_name')}
+                for doc in docs]
+
     def batch_get_universities(self, university_ids: List[str]) -> List[Dict]:
         """Get multiple universities by ID."""
         try:
             if not university_ids:
                 return []
             
-            # Firestore doesn't have native batch get with IDs, use document references
-            universities = []
-            for uid in university_ids:
-                doc = self.collection.document(uid).get()
+            # One get_all round trip; results come back unordered, so
+            # re-key them and answer in the caller's order.
+            ids = list(dict.fromkeys(university_ids))
+            found = {}
+            for doc in self.db.get_all([self.collection.document(uid) for uid in ids]):
                 if doc.exists:
                     data = doc.to_dict()
                     data['university_id'] = doc.id
-                    universities.append(data)
-            
-            return universities
+                    found[doc.id] = data
+            return [found[uid] for uid in ids if uid in found]
         except Exception as e:
             logger.error(f"Batch get universities failed: {e}")
             return []
     
+    def search_candidates(
+        self,
+        query: str,
+        filters: Dict = None,
+        exclude_ids: List[str] = None,
+    ) -> List[Dict]:
+        """Every university passing `filters`/`exclude_ids`, each with its
+        keyword `score` (0 when nothing matched), unsorted.
+
+        Note: Firestore doesn't support full-text search natively, so this
+        fetches the (Firestore-filtered) collection and scores in memory.
+        search_universities keeps the keyword matches; the semantic tier
+        (vector_index) re-ranks the whole candidate set.
+        """
+        query_lower = query.lower().strip()
+
+        # Start with base query
+        db_query = self.collection
+
+        # Apply Firestore-native filters (before fetching)
+        if filters:
+            if filters.get('state'):
+                db_query = db_query.where('location.state', '==', filters['state'])
+            if filters.get('type'):
+                db_query = db_query.where('location.type', '==', filters['type'])
+            if filters.get('market_position'):
+                db_query = db_query.where('market_position', '==', filters['market_position'])
+
+        # Fetch documents
+        docs = db_query.limit(500).stream()  # Fetch more for in-memory filtering
+
+        results = []
+        for doc in docs:
+            data = doc.to_dict()
+            university_id = doc.id
+
+            # Skip excluded IDs
+            if exclude_ids and university_id in exclude_ids:
+                continue
+
+            # Apply acceptance rate filters (ranges need in-memory filtering)
+            if filters:
+                acceptance_rate = data.get('acceptance_rate')
+                if acceptance_rate is not None:
+                    if filters.get('acceptance_rate_max') and acceptance_rate > filters['acceptance_rate_max']:
+                        continue
+                    if filters.get('acceptance_rate_min') and acceptance_rate < filters['acceptance_rate_min']:
+                        continue
+
+            data['university_id'] = university_id
+            data['score'] = self._calculate_match_score(data, query_lower)
+            results.append(data)
+        return results
+
+    @staticmethod
+    def sort_results(results: List[Dict], sort_by: str = "relevance") -> List[Dict]:
+        """Sort search results in place (and return them)."""
+        if sort_by in ["rank", "us_news_rank"]:
+            # Sort by US News rank (ascending, nulls last)
+            results.sort(key=lambda x: (x.get('us_news_rank') is None, x.get('us_news_rank') or 9999))
+        elif sort_by in ["selectivity", "acceptance_rate"]:
+            # Sort by acceptance rate (ascending, nulls last)
+            results.sort(key=lambda x: (x.get('acceptance_rate') is None, x.get('acceptance_rate') or 100))
+        else:
+            # Sort by relevance score (descending)
+            results.sort(key=lambda x: x.get('score', 0), reverse=True)
+        return results
+
     def search_universities(
         self, 
         query: str, 
@@ -372,76 +606,16 @@ class FirestoreDB:
         sort_by: str = "relevance"
     ) -> List[Dict]:
         """
-        Search universities using text matching and filters.
-        
-        Note: Firestore doesn't support full-text search natively.
-        This implementation:
-        1. Fetches all universities (or filtered subset)
-        2. Filters in-memory by matching query against searchable fields
-        3. Sorts results
-        
-        For production, consider:
-        - Algolia/Firebase Extensions for full-text search
-        - Cloud Firestore vector search (if available)
-        - Pre-computed keyword indexes
+        Search universities using text matching and filters (keyword tier).
+
+        Keeps the candidates whose keyword score is > 0, sorted by
+        `sort_by`. For the semantic/hybrid tiers see
+        main.search_universities + vector_index.
         """
         try:
-            query_lower = query.lower().strip()
-            
-            # Start with base query
-            db_query = self.collection
-            
-            # Apply Firestore-native filters (before fetching)
-            if filters:
-                if filters.get('state'):
-                    db_query = db_query.where('location.state', '==', filters['state'])
-                if filters.get('type'):
-                    db_query = db_query.where('location.type', '==', filters['type'])
-                if filters.get('market_position'):
-                    db_query = db_query.where('market_position', '==', filters['market_position'])
-            
-            # Fetch documents
-            docs = db_query.limit(500).stream()  # Fetch more for in-memory filtering
-            
-            results = []
-            for doc in docs:
-                data = doc.to_dict()
-                university_id = doc.id
-                
-                # Skip excluded IDs
-                if exclude_ids and university_id in exclude_ids:
-                    continue
-                
-                # Apply acceptance rate filters (ranges need in-memory filtering)
-                if filters:
-                    acceptance_rate = data.get('acceptance_rate')
-                    if acceptance_rate is not None:
-                        if filters.get('acceptance_rate_max') and acceptance_rate > filters['acceptance_rate_max']:
-                            continue
-                        if filters.get('acceptance_rate_min') and acceptance_rate < filters['acceptance_rate_min']:
-                            continue
-                
-                # Text matching
-                score = self._calculate_match_score(data, query_lower)
-                
-                if score > 0:
-                    data['university_id'] = university_id
-                    data['score'] = score
-                    results.append(data)
-            
-            # Sort results
-            if sort_by in ["rank", "us_news_rank"]:
-                # Sort by US News rank (ascending, nulls last)
-                results.sort(key=lambda x: (x.get('us_news_rank') is None, x.get('us_news_rank') or 9999))
-            elif sort_by in ["selectivity", "acceptance_rate"]:
-                # Sort by acceptance rate (ascending, nulls last)
-                results.sort(key=lambda x: (x.get('acceptance_rate') is None, x.get('acceptance_rate') or 100))
-            else:
-                # Sort by relevance score (descending)
-                results.sort(key=lambda x: x.get('score', 0), reverse=True)
-            
-            return results[:limit]
-            
+            results = [r for r in self.search_candidates(query, filters, exclude_ids)
+                       if r['score'] > 0]
+            return self.sort_results(results, sort_by)[:limit]
         except Exception as e:
             logger.error(f"Search universities failed: {e}", exc_info=True)
             return []
@@ -537,6 +711,24 @@ class FirestoreDB:
             logger.warning(f"[CATALOG] incremental update failed for {university_id}: {e}")
             return False
 
+    def update_major_catalog_for_schools(self, profiles: Dict[str, Dict]) -> bool:
+        """Fold many schools into the catalog with ONE read and ONE write —
+        the bulk-ingest path defers its catalog maintenance to this single
+        pass instead of rewriting the doc per school. Best-effort, like the
+        single-school hook."""
+        if not profiles:
+            return True
+        try:
+            catalog = self.get_major_catalog()
+            for university_id, profile in profiles.items():
+                catalog = major_catalog.add_school(catalog, university_id, profile)
+            catalog['updated_at'] = datetime.now(timezone.utc).isoformat()
+            self._catalog_ref().set(catalog)
+            return True
+        except Exception as e:
+            logger.warning(f"[CATALOG] bulk update failed for {len(profiles)} schools: {e}")
+            return False
+
     def health_check(self) -> Dict:
         """Check Firestore connectivity."""
         try:
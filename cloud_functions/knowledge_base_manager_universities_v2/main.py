@@ -8,6 +8,7 @@ import functions_framework
 import json
 import os
 import logging
+import time
 from flask import request
 from datetime import datetime, timezone
 from google import genai
@@ -18,6 +19,9 @@ from versioning import coerce_year, normalize_percentages, validate_profile
 from year_history import PROFILE_SECTIONS, build_history, project_profile_sections
 from major_facts import extract_major_facts
 import major_catalog
+from profile_diff import content_hash, section_changed, summarize_diff
+import alias_index
+import vector_index
 from request_auth import authenticate
 from gemini_fallback import generate_content_with_fallback
 
@@ -57,64 +61,30 @@ def compute_soft_fit_category(acceptance_rate) -> str:
 
 
 # --- University Acronym Mappings ---
-UNIVERSITY_ACRONYMS = {
-    # California Schools
-    "ucb": "University of California Berkeley",
-    "uc berkeley": "University of California Berkeley",
-    "berkeley": "University of California Berkeley",
-    "ucla": "University of California Los Angeles",
-    "ucsd": "University of California San Diego",
-    "uci": "University of California Irvine",
-    "ucsb": "University of California Santa Barbara",
-    "ucsc": "University of California Santa Cruz",
-    "ucr": "University of California Riverside",
-    "ucd": "University of California Davis",
-    "uc davis": "University of California Davis",
-    "usc": "University of Southern California",
-    "caltech": "California Institute of Technology",
-    "cal tech": "California Institute of Technology",
-    "stanford": "Stanford University",
-    
-    # Ivy League
-    "mit": "Massachusetts Institute of Technology",
-    "harvard": "Harvard University",
-    "yale": "Yale University",
-    "princeton": "Princeton University",
-    "columbia": "Columbia University",
-    "penn": "University of Pennsylvania",
-    "upenn": "University of Pennsylvania",
-    "brown": "Brown University",
-    "dartmouth": "Dartmouth College",
-    "cornell": "Cornell University",
-    
-    # Other Top Schools
-    "duke": "Duke University",
-    "northwestern": "Northwestern University",
-    "nyu": "New York University",
-    "stern": "New York University Stern School of Business",
-    "nyu stern": "New York University Stern School of Business",
-    "umich": "University of Michigan",
-    "michigan": "University of Michigan",
-    "ut austin": "University of Texas Austin",
-    "gtech": "Georgia Institute of Technology",
-    "georgia tech": "Georgia Institute of Technology",
-    "cmu": "Carnegie Mellon University",
-    "carnegie mellon": "Carnegie Mellon University",
-}
+# Curated alias table lives in alias_index (shared with the resolve action);
+# kept under its old name for existing importers.
+UNIVERSITY_ACRONYMS = alias_index.CURATED_ALIASES
 
 
 def expand_acronyms(query: str) -> str:
     """Expand common university acronyms in query to full names."""
-    query_lower = query.lower()
-    
-    # Check for exact matches first (for short acronyms)
-    for acronym, full_name in UNIVERSITY_ACRONYMS.items():
-        if query_lower == acronym or f" {acronym} " in f" {query_lower} ":
-            expanded = query + f" {full_name}"
-            logger.info(f"Expanded acronym '{acronym}' to: {expanded}")
-            return expanded
-    
-    return query
+    acronym = alias_index.find_alias(query)
+    if acronym is None:
+        return query
+    expanded = query + f" {UNIVERSITY_ACRONYMS[acronym]}"
+    logger.info(f"Expanded acronym '{acronym}' to: {expanded}")
+    return expanded
+
+
+def _alias_index():
+    """The instance's alias index (None only if the first build failed)."""
+    return alias_index.get_index(lambda: get_db().list_alias_sources())
+
+
+def resolve_university_id(name: str):
+    """Alias/acronym/slug/name → alias_index.resolve() result, or None."""
+    index = _alias_index()
+    return index.resolve(name) if index is not None else None
 
 
 # --- Write-path caller gate (#223) ---
@@ -158,14 +128,7 @@ def add_cors_headers(response, status_code=200):
 # --- Text Extraction ---
 def get_acronyms_for_university(official_name: str) -> list:
     """Get common acronyms/nicknames for a university based on its official name."""
-    acronyms = []
-    name_lower = official_name.lower()
-    
-    for acronym, full_name in UNIVERSITY_ACRONYMS.items():
-        if full_name.lower() == name_lower:
-            acronyms.append(acronym)
-    
-    return acronyms
+    return alias_index.curated_aliases_for(official_name)
 
 
 def create_university_summary(profile: dict) -> str:
@@ -279,21 +242,169 @@ def extract_keywords(profile: dict) -> list:
 
 
 # --- Ingest University Profile ---
-def ingest_university(profile: dict, year: int = None) -> dict:
+def _prepare_ingest(profile: dict, year: int):
+    """Normalize + validate one profile and build its Firestore doc.
+
+    Shared by the single and bulk ingest paths. Returns
+    (doc, errors, warnings); doc is None when errors block the ingest.
+    """
+    fixed = normalize_percentages(profile)
+    if fixed:
+        logger.info(f"[ingest:{profile.get('_id')}] normalized {fixed} fraction-style percent fields")
+    errors, warnings = validate_profile(profile, year)
+    if errors:
+        return None, errors, warnings
+    for w in warnings:
+        logger.warning(f"[ingest:{profile.get('_id')}] {w}")
+
+    university_id = profile.get('_id')
+    
+    metadata = profile.get('metadata') or {}
+    official_name = metadata.get('official_name', university_id) if isinstance(metadata, dict) else university_id
+    
+    # Handle location
+    location_raw = metadata.get('location') if isinstance(metadata, dict) else {}
+    location = {}
+    if isinstance(location_raw, dict):
+        location = location_raw
+    
+    location_display = ""
+    if isinstance(location_raw, dict):
+        city = location_raw.get('city', '')
+        state = location_raw.get('state', '')
+        if city and state:
+            location_display = f"{city}, {state}"
+    elif isinstance(location_raw, str):
+        location_display = location_raw
+    
+    # Create searchable content
+    searchable_text = create_searchable_text(profile)
+    keywords = extract_keywords(profile)
+    
+    # Extract admission stats
+    admissions_data = profile.get('admissions_data') or {}
+    current_status = admissions_data.get('current_status', {}) if isinstance(admissions_data, dict) else {}
+    acceptance_rate = current_status.get('overall_acceptance_rate') if isinstance(current_status, dict) else None
+    test_policy = current_status.get('test_policy_details', '') if isinstance(current_status, dict) else ''
+    
+    # Strategic profile
+    strategic_profile = profile.get('strategic_profile') or {}
+    market_position = strategic_profile.get('market_position', '') if isinstance(strategic_profile, dict) else ''
+    
+    # Outcomes
+    outcomes = profile.get('outcomes') or {}
+    median_earnings = outcomes.get('median_earnings_10yr') if isinstance(outcomes, dict) else None
+    
+    # US News rank
+    us_news_rank = strategic_profile.get('us_news_rank') if isinstance(strategic_profile, dict) else None
+    
+    # Fallback to extracting from rankings array
+    if us_news_rank is None and isinstance(strategic_profile, dict):
+        rankings = strategic_profile.get('rankings', []) or []
+        for ranking in rankings:
+            if isinstance(ranking, dict):
+                if ranking.get('source') == 'US News' and ranking.get('rank_category') == 'National Universities':
+                    us_news_rank = ranking.get('rank_overall') or ranking.get('rank_in_category')
+                    break
+    
+    # Generate summary
+    university_summary = create_university_summary(profile)
+    
+    # Compute soft fit category
+    soft_fit_category = compute_soft_fit_category(acceptance_rate)
+    logger.info(f"Soft fit category for {official_name}: {soft_fit_category} (acceptance rate: {acceptance_rate}%)")
+    
+    # Extract media
+    media = profile.get('media')
+    
+    doc = {
+        "university_id": university_id,
+        "official_name": official_name,
+        "location": location,
+        "location_display": location_display,
+        "searchable_text": searchable_text,
+        "keywords": keywords,
+        "summary": university_summary,
+        "acceptance_rate": acceptance_rate,
+        "soft_fit_category": soft_fit_category,
+        "test_policy": test_policy,
+        "market_position": market_position,
+        "median_earnings_10yr": median_earnings,
+        "us_news_rank": us_news_rank,
+        "media": media,
+        "profile": profile,
+        "content_hash": content_hash(profile),
+        "indexed_at": datetime.now(timezone.utc).isoformat(),
+        "last_updated": datetime.now(timezone.utc).isoformat()
+    }
+    return doc, errors, warnings
+
+
+def _plan_refresh(db, docs: dict, year: int, force: bool = False):
+    """Incremental refresh: drop unchanged profiles, diff the changed ones.
+
+    `docs` ({university_id: prepared doc}) is mutated: schools whose
+    versions/{year} snapshot already carries the same content_hash are
+    removed (nothing to write), and every remaining doc gets a
+    `change_summary` against what it replaces — the same-year snapshot, else
+    the current main doc (None for a first ingest). `force` re-writes
+    unchanged profiles too (e.g. after changing how docs are derived).
+
+    Returns (unchanged, catalog_current): {university_id: save_university-
+    shaped result} for the skipped schools, and the set of changed schools
+    whose catalog entry is already right (majors untouched relative to the
+    doc currently serving).
+    """
+    states = db.get_ingest_states(list(docs), year)
+    unchanged = {}
+    bases = {}
+    for university_id, doc in list(docs.items()):
+        state = states.get(university_id) or {}
+        if (not force and state.get('main_year') is not None
+                and state.get('version_hash') == doc['content_hash']):
+            docs.pop(university_id)
+            unchanged[university_id] = {
+                "saved": True,
+                "promoted": state['main_year'] == year,
+                "available_years": state.get('available_years') or [year],
+            }
+        elif state.get('version_hash') is not None:
+            bases[university_id] = year
+        elif state.get('main_exists'):
+            bases[university_id] = None
+
+    found = db.get_diff_bases(bases)
+    catalog_current = set()
+    for university_id, doc in docs.items():
+        base = found.get(university_id)
+        if base is None:
+            doc['change_summary'] = None
+            continue
+        summary = summarize_diff(base.get('profile'), doc['profile'],
+                                 base_year=base.get('data_year'))
+        doc['change_summary'] = summary
+        main_year = (states.get(university_id) or {}).get('main_year')
+        if (summary is not None and main_year is not None
+                and summary['base_year'] == main_year
+                and not section_changed(summary, 'academic_structure')):
+            catalog_current.add(university_id)
+    return unchanged, catalog_current
+
+
+def ingest_university(profile: dict, year: int = None, force: bool = False) -> dict:
     """Ingest a university profile into Firestore as a cycle-year snapshot.
 
     `year` is the admission cycle year (ADR 0002); when omitted it defaults
     to the current cycle. The snapshot always lands in versions/{year}; the
-    main serving doc is overwritten only when this is the newest year.
+    main doc is overwritten only when this is the newest year. A profile
+    identical (by content_hash) to the stored snapshot is a no-op unless
+    `force` is set.
     """
     try:
         db = get_db()
 
         year = coerce_year(year)
-        fixed = normalize_percentages(profile)
-        if fixed:
-            logger.info(f"[ingest:{profile.get('_id')}] normalized {fixed} fraction-style percent fields")
-        errors, warnings = validate_profile(profile, year)
+        doc, errors, warnings = _prepare_ingest(profile, year)
         if errors:
             return {
                 "success": False,
@@ -301,88 +412,26 @@ def ingest_university(profile: dict, year: int = None) -> dict:
                 "validation_errors": errors,
                 "validation_warnings": warnings,
             }
-        for w in warnings:
-            logger.warning(f"[ingest:{profile.get('_id')}] {w}")
-
-        university_id = profile.get('_id')
-        
-        metadata = profile.get('metadata') or {}
-        official_name = metadata.get('official_name', university_id) if isinstance(metadata, dict) else university_id
-        
-        # Handle location
-        location_raw = metadata.get('location') if isinstance(metadata, dict) else {}
-        location = {}
-        if isinstance(location_raw, dict):
-            location = location_raw
-        
-        location_display = ""
-        if isinstance(location_raw, dict):
-            city = location_raw.get('city', '')
-            state = location_raw.get('state', '')
-            if city and state:
-                location_display = f"{city}, {state}"
-        elif isinstance(location_raw, str):
-            location_display = location_raw
-        
-        # Create searchable content
-        searchable_text = create_searchable_text(profile)
-        keywords = extract_keywords(profile)
-        
-        # Extract admission stats
-        admissions_data = profile.get('admissions_data') or {}
-        current_status = admissions_data.get('current_status', {}) if isinstance(admissions_data, dict) else {}
-        acceptance_rate = current_status.get('overall_acceptance_rate') if isinstance(current_status, dict) else None
-        test_policy = current_status.get('test_policy_details', '') if isinstance(current_status, dict) else ''
-        
-        # Strategic profile
-        strategic_profile = profile.get('strategic_profile') or {}
-        market_position = strategic_profile.get('market_position', '') if isinstance(strategic_profile, dict) else ''
-        
-        # Outcomes
-        outcomes = profile.get('outcomes') or {}
-        median_earnings = outcomes.get('median_earnings_10yr') if isinstance(outcomes, dict) else None
-        
-        # US News rank
-        us_news_rank = strategic_profile.get('us_news_rank') if isinstance(strategic_profile, dict) else None
-        
-        # Fallback to extracting from rankings array
-        if us_news_rank is None and isinstance(strategic_profile, dict):
-            rankings = strategic_profile.get('rankings', []) or []
-            for ranking in rankings:
-                if isinstance(ranking, dict):
-                    if ranking.get('source') == 'US News' and ranking.get('rank_category') == 'National Universities':
-                        us_news_rank = ranking.get('rank_overall') or ranking.get('rank_in_category')
-                        break
-        
-        # Generate summary
-        university_summary = create_university_summary(profile)
-        
-        # Compute soft fit category
-        soft_fit_category = compute_soft_fit_category(acceptance_rate)
-        logger.info(f"Soft fit category for {official_name}: {soft_fit_category} (acceptance rate: {acceptance_rate}%)")
-        
-        # Extract media
-        media = profile.get('media')
-        
-        doc = {
-            "university_id": university_id,
-            "official_name": official_name,
-            "location": location,
-            "location_display": location_display,
-            "searchable_text": searchable_text,
-            "keywords": keywords,
-            "summary": university_summary,
-            "acceptance_rate": acceptance_rate,
-            "soft_fit_category": soft_fit_category,
-            "test_policy": test_policy,
-            "market_position": market_position,
-            "median_earnings_10yr": median_earnings,
-            "us_news_rank": us_news_rank,
-            "media": media,
-            "profile": profile,
-            "indexed_at": datetime.now(timezone.utc).isoformat(),
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        university_id = doc['university_id']
+        official_name = doc['official_name']
+
+        docs = {university_id: doc}
+        unchanged, catalog_current = _plan_refresh(db, docs, year, force=force)
+        if university_id in unchanged:
+            skipped = unchanged[university_id]
+            logger.info(f"Unchanged university: {official_name} (year {year}) — no writes")
+            return {
+                "success": True,
+                "university_id": university_id,
+                "official_name": official_name,
+                "year": year,
+                "unchanged": True,
+                "content_hash": doc['content_hash'],
+                "promoted_to_current": skipped["promoted"],
+                "available_years": skipped["available_years"],
+                "validation_warnings": warnings,
+                "message": f"{official_name} is unchanged for cycle {year}; nothing written"
+            }
 
         save_result = db.save_university(university_id, doc, year=year)
         if not save_result.get("saved"):
@@ -391,12 +440,14 @@ def ingest_university(profile: dict, year: int = None) -> dict:
                 "error": f"Failed to save {official_name} (year {year})",
             }
         logger.info(f"Indexed university: {official_name} (year {year})")
+        alias_index.invalidate()  # a new id/name must resolve on this instance now
 
         # Maintain the global major catalog (#303). Only the CURRENT-serving
-        # profile contributes (promoted ingests); best-effort with a belt-and-
-        # suspenders guard here too — a catalog failure must never fail the
-        # ingest (the university is already saved).
-        if save_result.get("promoted", True):
+        # profile contributes (promoted ingests), and only when its majors
+        # may have moved; best-effort with a belt-and-suspenders guard here
+        # too — a catalog failure must never fail the ingest (the university
+        # is already saved).
+        if save_result.get("promoted", True) and university_id not in catalog_current:
             try:
                 db.update_major_catalog_for_school(university_id, profile)
             except Exception as e:  # noqa: BLE001
@@ -407,6 +458,9 @@ def ingest_university(profile: dict, year: int = None) -> dict:
             "university_id": university_id,
             "official_name": official_name,
             "year": year,
+            "unchanged": False,
+            "content_hash": doc['content_hash'],
+            "change_summary": doc['change_summary'],
             "promoted_to_current": save_result.get("promoted", False),
             "available_years": save_result.get("available_years", []),
             "validation_warnings": warnings,
@@ -418,16 +472,195 @@ def ingest_university(profile: dict, year: int = None) -> dict:
         raise
 
 
+# --- Bulk Ingest ---
+# Per-request cap: keeps the JSON body well under the platform's request
+# size limit (profiles run ~50-100 KB) and bounds one request's latency.
+BULK_INGEST_MAX_PROFILES = 50
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def bulk_ingest_universities(profiles: list, year: int = None, force: bool = False) -> dict:
+    """Ingest many profiles for one cycle year in a single request.
+
+    Each profile is prepared exactly as ingest_university would, unchanged
+    ones are skipped (_plan_refresh), then the rest are written with
+    batched commits (firestore_db.save_universities_bulk) and the major
+    catalog is updated once at the end instead of once per school.
+    Per-school results carry the same keys as the single-ingest response
+    plus `prepare_ms`; `timing` reports the shared diff/write/catalog phases.
+    """
+    started = time.perf_counter()
+    db = get_db()
+    year = coerce_year(year)
+
+    results = []
+    docs = {}
+    position = {}
+    for profile in profiles:
+        t0 = time.perf_counter()
+        if not isinstance(profile, dict):
+            results.append({"success": False, "error": "profile must be a JSON object",
+                            "validation_errors": ["profile must be a JSON object"]})
+            continue
+        university_id = profile.get('_id')
+        if university_id and university_id in docs:
+            results.append({"success": False, "university_id": university_id,
+                            "error": "duplicate _id in bulk request"})
+            continue
+        doc, errors, warnings = _prepare_ingest(profile, year)
+        if errors:
+            results.append({
+                "success": False,
+                "university_id": university_id,
+                "error": "Profile failed validation: " + "; ".join(errors),
+                "validation_errors": errors,
+                "validation_warnings": warnings,
+                "prepare_ms": _elapsed_ms(t0),
+            })
+            continue
+        docs[university_id] = doc
+        position[university_id] = len(results)
+        results.append({"university_id": university_id,
+                        "official_name": doc['official_name'],
+                        "validation_warnings": warnings,
+                        "prepare_ms": _elapsed_ms(t0)})
+    prepare_ms = _elapsed_ms(started)
+
+    t0 = time.perf_counter()
+    prepared = dict(docs)
+    unchanged, catalog_current = _plan_refresh(db, docs, year, force=force)
+    for university_id, skipped in unchanged.items():
+        results[position[university_id]].update({
+            "success": True,
+            "year": year,
+            "unchanged": True,
+            "content_hash": prepared[university_id]['content_hash'],
+            "promoted_to_current": skipped["promoted"],
+            "available_years": skipped["available_years"],
+        })
+    diff_ms = _elapsed_ms(t0)
+
+    t0 = time.perf_counter()
+    saves = db.save_universities_bulk(docs, year=year)
+    write_ms = _elapsed_ms(t0)
+    if any(r.get("saved") for r in saves.values()):
+        alias_index.invalidate()
+
+    promoted_profiles = {}
+    for university_id, doc in docs.items():
+        save_result = saves.get(university_id) or {}
+        entry = results[position[university_id]]
+        if not save_result.get("saved"):
+            entry.update({"success": False,
+                          "error": f"Failed to save {doc['official_name']} (year {year})"})
+            continue
+        entry.update({
+            "success": True,
+            "year": year,
+            "unchanged": False,
+            "content_hash": doc['content_hash'],
+            "change_summary": doc['change_summary'],
+            "promoted_to_current": save_result.get("promoted", False),
+            "available_years": save_result.get("available_years", []),
+        })
+        if save_result.get("promoted") and university_id not in catalog_current:
+            promoted_profiles[university_id] = doc['profile']
+
+    # One catalog pass for the whole batch (#303 rules: only promoted
+    # profiles whose majors may have moved contribute; failure never fails
+    # the ingest).
+    t0 = time.perf_counter()
+    catalog_updated = db.update_major_catalog_for_schools(promoted_profiles)
+    catalog_ms = _elapsed_ms(t0)
+
+    ok = sum(1 for r in results if r.get("success"))
+    logger.info(f"Bulk ingest year={year}: {ok}/{len(results)} ok, {len(unchanged)} unchanged "
+                f"(prepare {prepare_ms}ms, diff {diff_ms}ms, write {write_ms}ms, "
+                f"catalog {catalog_ms}ms)")
+    return {
+        "success": ok == len(results),
+        "year": year,
+        "results": results,
+        "summary": {"total": len(results), "ok": ok, "failed": len(results) - ok,
+                    "unchanged": len(unchanged)},
+        "catalog_updated": catalog_updated,
+        "timing": {
+            "prepare_ms": prepare_ms,
+            "diff_ms": diff_ms,
+            "write_ms": write_ms,
+            "catalog_ms": catalog_ms,
+            "total_ms": _elapsed_ms(started),
+        },
+    }
+
+
 # --- Search Universities ---
+def _rank_semantic(candidates: list, vector_scores: dict, search_type: str) -> list:
+    """Re-score keyword candidates with the vector tier.
+
+    semantic: cosine similarity alone, over every indexed candidate.
+    hybrid:   reciprocal-rank fusion of the keyword ranking (matches only)
+              and the vector ranking — a strong name/term hit and a strong
+              meaning match both surface.
+    Each row keeps `keyword_score` / `semantic_score` for transparency.
+    """
+    by_id = {c['university_id']: c for c in candidates}
+    semantic_rank = sorted((uid for uid in by_id if uid in vector_scores),
+                           key=lambda uid: vector_scores[uid], reverse=True)
+    if search_type == "semantic":
+        fused = {uid: vector_scores[uid] for uid in semantic_rank}
+    else:
+        keyword_rank = sorted((uid for uid, c in by_id.items() if c['score'] > 0),
+                              key=lambda uid: by_id[uid]['score'], reverse=True)
+        fused = vector_index.rrf([keyword_rank, semantic_rank])
+    results = []
+    for uid, score in fused.items():
+        row = by_id[uid]
+        row['keyword_score'] = row['score']
+        row['semantic_score'] = round(vector_scores[uid], 4) if uid in vector_scores else None
+        row['score'] = round(score, 6)
+        results.append(row)
+    return results
+
+
+def _pin_alias_hit(db, query: str, results: list, limit: int,
+                   filters: dict = None, exclude_ids: list = None) -> list:
+    """Put the school the whole query names ("USC", "georgia tech",
+    "Stanford University") first, marked `alias_match`. A school outside the
+    ranked page is fetched only when there are no filters to vouch for."""
+    hit = resolve_university_id(query)
+    if not hit or hit.get('ambiguous') or hit['university_id'] in (exclude_ids or []):
+        return results
+    university_id = hit['university_id']
+    row = next((r for r in results if r.get('university_id') == university_id), None)
+    if row is None:
+        if filters:
+            return results
+        row = db.get_university(university_id)
+        if not row:
+            return results
+    row['alias_match'] = True
+    rest = [r for r in results if r.get('university_id') != university_id]
+    return [row] + rest[:max(limit - 1, 0)]
+
+
 def search_universities(query: str, limit: int = 10, filters: dict = None, search_type: str = "keyword", exclude_ids: list = None, sort_by: str = "relevance") -> dict:
     """
-    Search universities using text matching.
-    
+    Search universities.
+
     Args:
         query: Search query text
         limit: Maximum results to return
         filters: Optional filters (e.g., {"state": "CA", "acceptance_rate_max": 30})
-        search_type: "keyword" or "hybrid" (both use same logic in Firestore)
+        search_type: "keyword" (substring scoring), "semantic" (embedding
+            similarity via vector_index) or "hybrid" (both, fused by
+            reciprocal rank). Without a loaded vector index, semantic and
+            hybrid degrade to keyword; `search_type_used` says which ran.
+            A query that names one school outright (alias index) pins it
+            first with `alias_match`.
         exclude_ids: List of university_ids to exclude from results
         sort_by: Sort order - "relevance", "rank", "selectivity", "acceptance_rate"
     """
@@ -437,20 +670,34 @@ def search_universities(query: str, limit: int = 10, filters: dict = None, searc
         # Expand acronyms in query
         expanded_query = expand_acronyms(query)
         
-        logger.info(f"Executing search for: {query} (expanded: {expanded_query})")
-        
-        results = db.search_universities(
-            query=expanded_query,
-            limit=limit,
-            filters=filters,
-            exclude_ids=exclude_ids,
-            sort_by=sort_by
-        )
+        logger.info(f"Executing {search_type} search for: {query} (expanded: {expanded_query})")
+
+        vector_scores = None
+        if search_type in ("semantic", "hybrid"):
+            # Embed the user's words, not the acronym expansion — the
+            # expansion only exists to help substring matching.
+            vector_scores = vector_index.query_scores(query)
+
+        if vector_scores is None:
+            search_type_used = "keyword"
+            results = db.search_universities(
+                query=expanded_query,
+                limit=limit,
+                filters=filters,
+                exclude_ids=exclude_ids,
+                sort_by=sort_by
+            )
+        else:
+            search_type_used = search_type
+            candidates = db.search_candidates(expanded_query, filters=filters, exclude_ids=exclude_ids)
+            results = _rank_semantic(candidates, vector_scores, search_type)
+            results = db.sort_results(results, sort_by)[:limit]
+        results = _pin_alias_hit(db, query, results, limit, filters, exclude_ids)
         
         # Format results to match ES version
         formatted_results = []
         for r in results:
-            formatted_results.append({
+            row = {
                 "university_id": r.get('university_id'),
                 "official_name": r.get('official_name'),
                 "location": r.get('location'),
@@ -463,14 +710,21 @@ def search_universities(query: str, limit: int = 10, filters: dict = None, searc
                 "media": r.get('media'),
                 "score": r.get('score', 0),
                 "profile": r.get('profile')
-            })
+            }
+            if search_type_used != "keyword":
+                row["keyword_score"] = r.get('keyword_score')
+                row["semantic_score"] = r.get('semantic_score')
+            if r.get('alias_match'):
+                row["alias_match"] = True
+            formatted_results.append(row)
         
-        logger.info(f"Search '{query}' returned {len(formatted_results)} results")
+        logger.info(f"Search '{query}' ({search_type_used}) returned {len(formatted_results)} results")
         
         return {
             "success": True,
             "query": query,
             "search_type": search_type,
+            "search_type_used": search_type_used,
             "filters": filters,
             "total": len(formatted_results),
             "results": formatted_results
@@ -565,6 +819,10 @@ def get_university(university_id: str, year: int = None, sections: list = None)
     section names are ALL typos is an error (marked `invalid_sections` for
     the HTTP layer to 400); valid-but-absent sections are simply omitted and
     visible via `sections_returned`.
+
+    An id that misses is resolved through the alias index ("usc",
+    "harvard_university_slug", "Stanford University"); the response then
+    carries the canonical `university_id` plus `resolved_from`.
     """
     try:
         db = get_db()
@@ -579,7 +837,26 @@ def get_university(university_id: str, year: int = None, sections: list = None)
 
         data = db.get_university(university_id, year=year)
 
+        # An id miss is one alias-index lookup (acronym, slug, `_slug` id,
+        # official name) instead of the callers' candidate-id ladders.
+        resolved_from = None
+        candidates = None
+        if not data:
+            hit = resolve_university_id(university_id)
+            if hit and hit.get('ambiguous'):
+                candidates = hit['candidates']
+            elif hit and hit['university_id'] != university_id:
+                resolved_from = university_id
+                university_id = hit['university_id']
+                data = db.get_university(university_id, year=year)
+
         if not data:
+            if candidates:
+                return {
+                    "success": False,
+                    "error": f"University {university_id} is ambiguous",
+                    "candidates": candidates,
+                }
             if year is not None:
                 available = db.get_available_years(university_id)
                 if available:
@@ -603,6 +880,8 @@ def get_university(university_id: str, year: int = None, sections: list = None)
 
         profile = data.get('profile')
         extra = {}
+        if resolved_from is not None:
+            extra['resolved_from'] = resolved_from
         if sections is not None:
             projected, returned, unknown = project_profile_sections(profile, sections)
             extra['sections_returned'] = returned
@@ -635,6 +914,92 @@ def get_university(university_id: str, year: int = None, sections: list = None)
         return {"success": False, "error": str(e)}
 
 
+# --- Batch get ---
+def get_universities_batch(university_ids: list, sections: list = None) -> dict:
+    """Several universities in one call, keyed by the ids the caller sent.
+
+    Ids that miss (stale slugs in saved lists) get one alias-index lookup
+    each, then a single follow-up read; those entries carry `resolved_from`.
+    `sections` projects every profile exactly as get_university does, so a
+    caller that only needs e.g. essay prompts doesn't pull full profiles;
+    an all-typo section list is marked `invalid_sections`.
+    """
+    if sections is not None and not any(s in PROFILE_SECTIONS for s in sections):
+        return {
+            "success": False,
+            "invalid_sections": True,
+            "error": (f"No valid section names in {sections}; "
+                      f"valid sections: {list(PROFILE_SECTIONS)}"),
+            "universities": [],
+        }
+    try:
+        db = get_db()
+        universities_raw = db.batch_get_universities(university_ids)
+
+        found = {u.get('university_id') for u in universities_raw}
+        resolved_from = {}
+        for uid in university_ids:
+            if uid in found:
+                continue
+            hit = resolve_university_id(uid)
+            if hit and hit.get('university_id') and hit['university_id'] not in found:
+                resolved_from.setdefault(hit['university_id'], uid)
+        if resolved_from:
+            universities_raw += db.batch_get_universities(list(resolved_from))
+
+        universities = []
+        for u in universities_raw:
+            profile = u.get('profile')
+            logo_url = u.get('logo_url') or (profile.get('logo_url') if profile else None)
+            if sections is not None:
+                profile, _, _ = project_profile_sections(profile, sections)
+            universities.append({
+                "university_id": u.get('university_id'),
+                "official_name": u.get('official_name'),
+                "location": u.get('location'),
+                "acceptance_rate": u.get('acceptance_rate'),
+                "soft_fit_category": u.get('soft_fit_category'),
+                "us_news_rank": u.get('us_news_rank'),
+                "summary": u.get('summary'),
+                "media": u.get('media'),
+                "profile": profile,
+                "data_year": u.get('data_year'),
+                "last_updated": u.get('last_updated'),
+                "content_hash": u.get('content_hash'),
+                "logo_url": logo_url,
+            })
+            if u.get('university_id') in resolved_from:
+                universities[-1]["resolved_from"] = resolved_from[u['university_id']]
+
+        return {"success": True, "universities": universities}
+    except Exception as e:
+        logger.error(f"Batch get failed: {e}")
+        return {"success": False, "error": str(e), "universities": []}
+
+
+# --- Resolve aliases ---
+def resolve_universities(names: list) -> dict:
+    """Map each name (acronym, nickname, slug, `_slug` id, official name) to
+    its canonical university_id via the in-memory alias index.
+
+    `resolved` is keyed by the input string; a value is the
+    alias_index.resolve() result — {university_id, official_name,
+    matched_by} or {ambiguous, candidates} — or None when nothing matches.
+    """
+    try:
+        index = _alias_index()
+        if index is None:
+            return {"success": False, "error": "Alias index unavailable"}
+        return {
+            "success": True,
+            "resolved": {name: index.resolve(name) for name in names},
+            "indexed_universities": len(index),
+        }
+    except Exception as e:
+        logger.error(f"Resolve failed: {e}")
+        return {"success": False, "error": str(e)}
+
+
 # --- University History (two-axis year view) ---
 def get_university_history(university_id: str, sections: list = None, years: list = None) -> dict:
     """Per-year view of one university (see year_history.build_history).
@@ -944,6 +1309,8 @@ def delete_university(university_id: str, year: int = None) -> dict:
         scope = f"{university_id} (cycle {year})" if year is not None else university_id
         if success:
             logger.info(f"Deleted university: {scope}")
+            if year is None:
+                alias_index.invalidate()
             return {
                 "success": True,
                 "message": f"Successfully deleted {scope}"
@@ -1063,6 +1430,20 @@ def knowledge_base_manager_universities_v2_http_entry(req):
                     limit=int(raw_limit) if raw_limit else None,
                     min_schools=int(raw_min) if raw_min else 1,
                     query=req.args.get('q') or req.args.get('query'))
+            elif action == 'resolve':
+                # One alias → canonical id: ?action=resolve&q=usc
+                name = (req.args.get('q') or req.args.get('name') or '').strip()
+                if not name:
+                    return add_cors_headers(
+                        {"success": False, "error": "action=resolve requires a 'q' parameter"}, 400)
+                result = resolve_universities([name])
+                if result.get('success'):
+                    hit = result['resolved'][name]
+                    if hit is None:
+                        result = {"success": False, "query": name,
+                                  "error": f"No university matches '{name}'"}
+                    else:
+                        result = {"success": not hit.get('ambiguous'), "query": name, **hit}
             elif action in ('history', 'majors'):
                 return add_cors_headers(
                     {"success": False, "error": f"action={action} requires an 'id' parameter"}, 400)
@@ -1107,16 +1488,50 @@ def knowledge_base_manager_universities_v2_http_entry(req):
                 query = data.get('query', '')
                 limit = data.get('limit', 10)
                 filters = data.get('filters', {})
-                search_type = data.get('search_type', 'semantic')
+                # Default is hybrid: pure 'semantic' ranking loses exact-name
+                # lookups, and hybrid still answers keyword-only when no
+                # vector index is loaded.
+                search_type = data.get('search_type', 'hybrid')
                 exclude_ids = data.get('exclude_ids', [])
                 sort_by = data.get('sort_by', 'relevance')
                 result = search_universities(query, limit, filters, search_type, exclude_ids, sort_by)
                 return add_cors_headers(result)
             
+            # Batch resolve — {"action": "resolve", "names": ["usc", ...]}
+            if data.get('action') == 'resolve':
+                names = data.get('names')
+                if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+                    return add_cors_headers(
+                        {"success": False, "error": "resolve requires a 'names' list of strings"}, 400)
+                return add_cors_headers(resolve_universities(names))
+
+            # Bulk ingest — {"action": "bulk-ingest", "profiles": [...], "year": N,
+            # "force": bool}. Same write gate as single ingest; per-school outcomes are in
+            # `results`, so a partial failure is still a 200.
+            if data.get('action') == 'bulk-ingest':
+                allow, rejection = gate_write(req)
+                if not allow:
+                    return add_cors_headers(*rejection)
+                profiles = data.get('profiles')
+                if not isinstance(profiles, list) or not profiles:
+                    return add_cors_headers(
+                        {"success": False, "error": "bulk-ingest requires a non-empty 'profiles' list"}, 400)
+                if len(profiles) > BULK_INGEST_MAX_PROFILES:
+                    return add_cors_headers(
+                        {"success": False,
+                         "error": f"bulk-ingest accepts at most {BULK_INGEST_MAX_PROFILES} profiles per request"}, 413)
+                try:
+                    year = coerce_year(data.get('year'))
+                except ValueError as e:
+                    return add_cors_headers({"success": False, "error": f"Invalid year: {e}"}, 400)
+                return add_cors_headers(bulk_ingest_universities(
+                    profiles, year=year, force=bool(data.get('force'))))
+
             # Ingest request — optional 'year' files the snapshot under that
             # admission cycle (defaults to the current cycle, ADR 0002).
             # 'year' is an envelope field: a bare-profile POST (no 'profile'
-            # wrapper) can't carry one and gets the current cycle.
+            # wrapper) can't carry one and gets the current cycle. 'force'
+            # (envelope too) re-writes a profile whose content_hash matches.
             elif 'profile' in data or '_id' in data:
                 allow, rejection = gate_write(req)
                 if not allow:
@@ -1126,7 +1541,8 @@ def knowledge_base_manager_universities_v2_http_entry(req):
                     year = coerce_year(data.get('year')) if 'profile' in data else coerce_year(None)
                 except ValueError as e:
                     return add_cors_headers({"success": False, "error": f"Invalid year: {e}"}, 400)
-                result = ingest_university(profile, year=year)
+                force = bool(data.get('force')) if 'profile' in data else False
+                result = ingest_university(profile, year=year, force=force)
                 if result.get("success"):
                     status = 200
                 elif result.get("validation_errors"):
@@ -1153,31 +1569,13 @@ def knowledge_base_manager_universities_v2_http_entry(req):
                 if not university_ids:
                     return add_cors_headers({"success": True, "universities": []})
                 
-                try:
-                    db = get_db()
-                    universities_raw = db.batch_get_universities(university_ids)
-                    
-                    universities = []
-                    for u in universities_raw:
-                        universities.append({
-                            "university_id": u.get('university_id'),
-                            "official_name": u.get('official_name'),
-                            "location": u.get('location'),
-                            "acceptance_rate": u.get('acceptance_rate'),
-                            "soft_fit_category": u.get('soft_fit_category'),
-                            "us_news_rank": u.get('us_news_rank'),
-                            "summary": u.get('summary'),
-                            "media": u.get('media'),
-                            "profile": u.get('profile'),
-                            "data_year": u.get('data_year'),
-                            "last_updated": u.get('last_updated'),
-                            "logo_url": u.get('logo_url') or (u.get('profile', {}).get('logo_url') if u.get('profile') else None)
-                        })
-                    
-                    return add_cors_headers({"success": True, "universities": universities})
-                except Exception as e:
-                    logger.error(f"Batch get failed: {e}")
-                    return add_cors_headers({"success": False, "error": str(e), "universities": []}, 500)
+                sections = data.get('sections')
+                if isinstance(sections, str):
+                    sections = [s.strip() for s in sections.split(',') if s.strip()]
+                result = get_universities_batch(university_ids, sections=sections)
+                if result.pop('invalid_sections', False):
+                    return add_cors_headers(result, 400)
+                return add_cors_headers(result, 200 if result.get('success') else 500)
             
             else:
                 return add_cors_headers({"error": "Invalid request. Provide 'query' for search or 'profile' for ingest."}, 400)
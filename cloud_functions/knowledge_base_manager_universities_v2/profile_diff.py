@@ -0,0 +1,101 @@
+"""
+Content hashing + structural diffs for incremental KB refresh.
+
+A yearly or ad-hoc refresh re-ingests every profile, but most are unchanged.
+Every stored snapshot carries `content_hash` (SHA-256 of the canonical JSON of
+the normalized profile), so ingest can tell an unchanged profile from a
+changed one with a field-mask read and skip the writes entirely. A changed
+profile records a compact `change_summary` — which top-level sections and
+field paths moved — so downstream consumers (major catalog, fit staleness)
+only redo work for what actually changed.
+
+Everything here is pure (dict in / dict out), like major_catalog.py.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+# Field paths kept per change_summary — enough to eyeball a refresh without
+# bloating the doc (values are deliberately NOT stored; the snapshots are).
+MAX_CHANGED_FIELDS = 50
+
+
+def content_hash(profile: Dict) -> str:
+    """SHA-256 of the profile's canonical JSON (sorted keys, no whitespace),
+    so key order and formatting never register as a change."""
+    canonical = json.dumps(profile, sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def deep_diff(old: Any, new: Any, path: str = "") -> tuple:
+    """Recursively compare two objects and return changes, additions, removals.
+
+    Mirrors agents/uniminer/cloud_function/main.py deep_diff (kept in sync by
+    hand — different service, no shared package).
+    """
+    changes = []
+    additions = []
+    removals = []
+
+    if type(old) != type(new):
+        changes.append({"field": path, "old": old, "new": new, "type": "type_change"})
+        return changes, additions, removals
+
+    if isinstance(old, dict):
+        old_keys = set(old.keys())
+        new_keys = set(new.keys())
+
+        for key in new_keys - old_keys:
+            new_path = f"{path}.{key}" if path else key
+            additions.append({"field": new_path, "value": new[key]})
+
+        for key in old_keys - new_keys:
+            new_path = f"{path}.{key}" if path else key
+            removals.append({"field": new_path, "old_value": old[key]})
+
+        for key in old_keys & new_keys:
+            new_path = f"{path}.{key}" if path else key
+            if old[key] != new[key]:
+                if isinstance(old[key], dict) and isinstance(new[key], dict):
+                    c, a, r = deep_diff(old[key], new[key], new_path)
+                    changes.extend(c)
+                    additions.extend(a)
+                    removals.extend(r)
+                elif isinstance(old[key], list) and isinstance(new[key], list):
+                    if old[key] != new[key]:
+                        changes.append({"field": new_path, "old": old[key], "new": new[key], "type": "list_change"})
+                else:
+                    changes.append({"field": new_path, "old": old[key], "new": new[key], "type": "value_change"})
+
+    return changes, additions, removals
+
+
+def summarize_diff(old_profile: Optional[Dict], new_profile: Dict,
+                   base_year: Optional[int] = None) -> Optional[Dict]:
+    """The change_summary stored on a snapshot: what moved since `old_profile`.
+
+    Returns None when there is no base to compare against (first ingest) —
+    readers treat that as "everything changed".
+    """
+    if not isinstance(old_profile, dict):
+        return None
+    changes, additions, removals = deep_diff(old_profile, new_profile or {})
+    fields = sorted({c['field'] for c in changes}
+                    | {a['field'] for a in additions}
+                    | {r['field'] for r in removals})
+    return {
+        "base_year": base_year,
+        "base_hash": content_hash(old_profile),
+        "changed_sections": sorted({f.split('.', 1)[0] for f in fields if f}),
+        "changed_fields": fields[:MAX_CHANGED_FIELDS],
+        "counts": {"changed": len(changes), "added": len(additions),
+                   "removed": len(removals)},
+    }
+
+
+def section_changed(change_summary: Optional[Dict], section: str) -> bool:
+    """True unless the summary proves `section` is untouched."""
+    if not change_summary:
+        return True
+    return section in (change_summary.get('changed_sections') or [])
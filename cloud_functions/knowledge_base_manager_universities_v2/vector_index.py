@@ -0,0 +1,386 @@
+"""
+Local vector index — the semantic tier of university search.
+
+Firestore has no full-text or vector search, so search_universities was
+substring scoring only ("keyword" and "hybrid" were the same thing). The old
+ES deployment had 768-dim Gemini embeddings; this brings that back without an
+external search service:
+
+- Artifact: `vectors.npy` (float16, L2-normalized rows, n × dim — ~1.5 KB a
+  school at 768 dims) + `index.json` (ids, per-school content_hash, embedder
+  model). Built offline by scripts/build_search_index.py, which re-embeds
+  only schools whose content_hash changed.
+- Loaded ONCE per instance with np.load(mmap_mode='r') from
+  KB_VECTOR_INDEX_DIR, or downloaded from KB_VECTOR_INDEX_GCS
+  (gs://bucket/prefix) into /tmp first.
+- Search is brute-force cosine: one matrix-vector product. At KB scale
+  (hundreds of schools) that is well under a millisecond, so there is no
+  IVF/ANN layer to tune or lose recall to.
+- Embedders are pluggable (set_embedder). By default the embedder is chosen
+  from the index's recorded model, so queries and documents always share a
+  vector space: GeminiEmbedder in production, HashingEmbedder (deterministic,
+  offline) for tests and local builds.
+
+numpy is optional at import time: without it (or without a configured
+index) get_index() returns None and search falls back to keyword scoring.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+GEMINI_EMBEDDING_MODEL = 'text-embedding-004'
+EMBEDDING_DIM = 768
+# Reciprocal-rank-fusion constant (Cormack et al.); 60 is the standard
+# choice and keeps one list's #1 from drowning the other list.
+RRF_K = 60
+# Per-document text budget — the embedding model truncates long inputs, so
+# put the descriptive sections first and stop here.
+MAX_EMBED_CHARS = 8000
+VECTORS_FILE = 'vectors.npy'
+META_FILE = 'index.json'
+# A failed/unconfigured load is retried after this long, not per request.
+LOAD_RETRY_SECONDS = 300
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+# Dropped by HashingEmbedder — they would otherwise dominate every vector.
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in into is it its near of on or '
+    'our that the their this to was were with who will which strong'.split())
+
+
+def _flatten(value, out: List[str]):
+    if isinstance(value, str):
+        if value.strip():
+            out.append(value.strip())
+    elif isinstance(value, list):
+        for item in value:
+            _flatten(item, out)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _flatten(v, out)
+
+
+def embedding_text(profile: Dict) -> str:
+    """The text a school is embedded from: identity, character, programs.
+
+    Admissions numbers are left out on purpose — they are filters, not
+    meaning, and they churn every cycle.
+    """
+    profile = profile or {}
+    metadata = profile.get('metadata') or {}
+    strategic = profile.get('strategic_profile') or {}
+    parts: List[str] = []
+
+    name = metadata.get('official_name')
+    if name:
+        parts.append(str(name))
+    location = metadata.get('location')
+    if isinstance(location, dict):
+        where = ', '.join(str(location[k]) for k in ('city', 'state') if location.get(k))
+        kind = location.get('type')
+        if where or kind:
+            parts.append(f"{kind or 'University'} in {where}".strip())
+        if location.get('setting'):
+            parts.append(f"Setting: {location['setting']}")
+    for key in ('executive_summary', 'market_position', 'admissions_philosophy', 'campus_dynamics'):
+        _flatten(strategic.get(key), parts)
+
+    structure = profile.get('academic_structure') or {}
+    programs = []
+    for college in structure.get('colleges') or []:
+        if not isinstance(college, dict):
+            continue
+        if college.get('name'):
+            programs.append(str(college['name']))
+        for major in college.get('majors') or []:
+            if isinstance(major, dict) and major.get('name'):
+                programs.append(str(major['name']))
+    if programs:
+        parts.append('Programs: ' + ', '.join(programs))
+
+    _flatten((profile.get('student_insights') or {}).get('insights'), parts)
+    return '\n'.join(parts)[:MAX_EMBED_CHARS]
+
+
+# ---------------------------------------------------------------- embedders
+
+class HashingEmbedder:
+    """Deterministic, dependency-free embedder: signed feature hashing of
+    word unigrams + bigrams (stopwords dropped, sublinear term frequency).
+    No network — for tests and offline builds; its vectors only make sense
+    against an index built with the same dim."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f'hashing-{dim}'
+
+    def embed(self, texts: List[str], task: str = 'RETRIEVAL_DOCUMENT') -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            tokens = [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in _STOPWORDS]
+            counts: Dict[str, int] = {}
+            for feature in tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]:
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                digest = hashlib.sha1(feature.encode('utf-8')).digest()
+                bucket = int.from_bytes(digest[:4], 'big') % self.dim
+                weight = 1.0 + math.log(count)
+                vec[bucket] += weight if digest[4] & 1 else -weight
+            vectors.append(vec)
+        return vectors
+
+
+class GeminiEmbedder:
+    """Gemini text embeddings (the model the ES deployment used)."""
+
+    # embed_content accepts up to 100 inputs per call.
+    BATCH = 100
+
+    def __init__(self, model: str = GEMINI_EMBEDDING_MODEL, dim: int = EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+        return self._client
+
+    def embed(self, texts: List[str], task: str = 'RETRIEVAL_DOCUMENT') -> List[List[float]]:
+        from google.genai import types
+        client = self._get_client()
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.BATCH):
+            result = client.models.embed_content(
+                model=self.model,
+                contents=texts[start:start + self.BATCH],
+                config=types.EmbedContentConfig(task_type=task, output_dimensionality=self.dim),
+            )
+            vectors.extend(list(e.values) for e in result.embeddings)
+        return vectors
+
+
+def embedder_for_model(model: str, dim: int = EMBEDDING_DIM):
+    """The embedder that produced an index recorded as `model`."""
+    if model and model.startswith('hashing-'):
+        return HashingEmbedder(int(model.split('-', 1)[1]))
+    return GeminiEmbedder(model or GEMINI_EMBEDDING_MODEL, dim)
+
+
+_embedder_override = None
+
+
+def set_embedder(embedder):
+    """Plug in an embedder for queries (None → derive from the index)."""
+    global _embedder_override
+    _embedder_override = embedder
+    _embed_query.cache_clear()
+
+
+# ------------------------------------------------------------------- index
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """ids + an (n × dim) float16 matrix of unit vectors."""
+
+    def __init__(self, ids: List[str], vectors, model: str,
+                 hashes: Optional[Dict[str, str]] = None):
+        if np is None:
+            raise RuntimeError('numpy is required for the vector index')
+        if len(ids) != len(vectors):
+            raise ValueError(f'{len(ids)} ids for {len(vectors)} vectors')
+        self.ids = list(ids)
+        self.vectors = vectors
+        self.model = model
+        self.hashes = dict(hashes or {})
+        self._position = {uid: i for i, uid in enumerate(self.ids)}
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1]) if len(self.ids) else 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector(self, university_id: str):
+        i = self._position.get(university_id)
+        return None if i is None else self.vectors[i]
+
+    def scores(self, query_vector) -> Dict[str, float]:
+        """Cosine similarity of every indexed school to the query."""
+        if not self.ids:
+            return {}
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0 or q.shape[0] != self.dim:
+            return {}
+        sims = np.asarray(self.vectors, dtype=np.float32) @ (q / norm)
+        return {uid: float(s) for uid, s in zip(self.ids, sims)}
+
+    def search(self, query_vector, k: int = 10) -> List[Tuple[str, float]]:
+        ranked = sorted(self.scores(query_vector).items(), key=lambda kv: kv[1], reverse=True)
+        return ranked[:k]
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str, Optional[str]]], embedder,
+              previous: Optional['VectorIndex'] = None, batch_size: int = 64) -> Tuple['VectorIndex', int]:
+        """Index (university_id, text, content_hash) items.
+
+        Vectors from `previous` are reused for schools whose content_hash is
+        unchanged (and whose index used the same model). Returns
+        (index, number_of_schools_embedded).
+        """
+        items = list(items)
+        reusable = previous if previous is not None and previous.model == embedder.model else None
+        rows: Dict[str, object] = {}
+        pending = []
+        for uid, text, digest in items:
+            if reusable is not None and digest and reusable.hashes.get(uid) == digest:
+                rows[uid] = np.asarray(reusable.vector(uid), dtype=np.float32)
+            else:
+                pending.append((uid, text))
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            vectors = embedder.embed([text for _, text in chunk], task='RETRIEVAL_DOCUMENT')
+            for (uid, _), vec in zip(chunk, vectors):
+                rows[uid] = np.asarray(vec, dtype=np.float32)
+
+        ids = [uid for uid, _, _ in items]
+        dim = len(next(iter(rows.values()))) if rows else 0
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        for i, uid in enumerate(ids):
+            matrix[i] = rows[uid]
+        vectors = _normalize_rows(matrix).astype(np.float16)
+        hashes = {uid: digest for uid, _, digest in items if digest}
+        return cls(ids, vectors, embedder.model, hashes), len(pending)
+
+    def save(self, directory) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / VECTORS_FILE, np.asarray(self.vectors, dtype=np.float16))
+        (directory / META_FILE).write_text(json.dumps({
+            'model': self.model,
+            'dim': self.dim,
+            'count': len(self.ids),
+            'ids': self.ids,
+            'content_hashes': self.hashes,
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }))
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> 'VectorIndex':
+        directory = Path(directory)
+        meta = json.loads((directory / META_FILE).read_text())
+        vectors = np.load(directory / VECTORS_FILE, mmap_mode='r' if mmap else None)
+        return cls(meta['ids'], vectors, meta['model'], meta.get('content_hashes'))
+
+
+# ----------------------------------------------------- per-instance loading
+
+_index: Optional[VectorIndex] = None
+_index_checked_at: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def _download_from_gcs(uri: str, dest: Path) -> Path:
+    from google.cloud import storage
+    bucket_name, _, prefix = uri[len('gs://'):].partition('/')
+    bucket = storage.Client().bucket(bucket_name)
+    dest.mkdir(parents=True, exist_ok=True)
+    for name in (META_FILE, VECTORS_FILE):
+        blob_name = f"{prefix.rstrip('/')}/{name}" if prefix else name
+        bucket.blob(blob_name).download_to_filename(str(dest / name))
+    return dest
+
+
+def _load_configured() -> Optional[VectorIndex]:
+    local_dir = os.getenv('KB_VECTOR_INDEX_DIR')
+    gcs_uri = os.getenv('KB_VECTOR_INDEX_GCS')
+    if local_dir:
+        return VectorIndex.load(local_dir)
+    if gcs_uri:
+        return VectorIndex.load(_download_from_gcs(gcs_uri, Path('/tmp/kb_vector_index')))
+    return None
+
+
+def get_index() -> Optional[VectorIndex]:
+    """The instance's index, loaded on first use; None when unavailable."""
+    global _index, _index_checked_at
+    if _index is not None or np is None:
+        return _index
+    now = time.monotonic()
+    if _index_checked_at is not None and now - _index_checked_at < LOAD_RETRY_SECONDS:
+        return None
+    with _index_lock:
+        if _index is None and (_index_checked_at is None
+                               or now - _index_checked_at >= LOAD_RETRY_SECONDS):
+            _index_checked_at = now
+            try:
+                _index = _load_configured()
+                if _index is not None:
+                    logger.info(f"[VECTOR] loaded {len(_index)} vectors ({_index.model}, dim {_index.dim})")
+            except Exception as e:  # noqa: BLE001 — search must degrade, not fail
+                logger.warning(f"[VECTOR] index load failed; keyword search only: {e}")
+    return _index
+
+
+def set_index(index: Optional[VectorIndex]):
+    """Install an index directly (tests, warm-up); None forces a reload."""
+    global _index, _index_checked_at
+    _index = index
+    _index_checked_at = None
+    _embed_query.cache_clear()
+
+
+@lru_cache(maxsize=512)
+def _embed_query(model: str, dim: int, query: str):
+    embedder = _embedder_override or embedder_for_model(model, dim)
+    if embedder.model != model:
+        raise ValueError(f"query embedder {embedder.model} does not match index model {model}")
+    return tuple(embedder.embed([query], task='RETRIEVAL_QUERY')[0])
+
+
+def query_scores(query: str) -> Optional[Dict[str, float]]:
+    """{university_id: cosine} for every indexed school, or None when the
+    semantic tier is unavailable (no numpy/index, or the embedder failed)."""
+    index = get_index()
+    if index is None or not query or not query.strip():
+        return None
+    try:
+        return index.scores(_embed_query(index.model, index.dim, query.strip()))
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"[VECTOR] query embedding failed; keyword search only: {e}")
+        return None
+
+
+def rrf(rankings: List[List[str]], k: int = RRF_K) -> Dict[str, float]:
+    """Reciprocal rank fusion: sum of 1 / (k + rank) over every list an id
+    appears in (ranks are 1-based)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, uid in enumerate(ranking, start=1):
+            fused[uid] = fused.get(uid, 0.0) + 1.0 / (k + rank)
+    return fused
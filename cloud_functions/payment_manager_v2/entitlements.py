@@ -0,0 +1,96 @@
+"""
+Entitlement service layer for Payment Manager V2: the merged purchases +
+credits view, cached per instance.
+
+check-access, purchases, subscription-status and the pre-read in use-credit
+used to read purchases/data on every request. They now read through a
+short-TTL in-process cache of users/{uid}/entitlements/data — the projection
+doc save_purchases / save_credits mirror into (and profile_manager_v2's
+credit ledger keeps current). A hit costs no Firestore round trip.
+
+Every write path re-reads fresh (never read-modify-writes a cached copy),
+and Stripe webhooks and the user-facing mutations drop the user's entry once
+they've written, so this instance serves its own changes immediately; other
+instances catch up within ENTITLEMENT_CACHE_TTL_S, and check-access re-reads
+before it denies. Free users without a purchase record are cached too — for
+them a miss is the common case.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from firestore_db import _norm, get_payment_db
+
+logger = logging.getLogger(__name__)
+
+ENTITLEMENT_CACHE_TTL_S = float(os.getenv('ENTITLEMENT_CACHE_TTL_SECONDS', '30'))
+
+_cache = {}  # normalized email -> (fetched_at_monotonic, entitlements)
+_lock = threading.Lock()
+
+
+def _load(db, user_id: str) -> Dict:
+    """Projection read; users that predate it are read from purchases/data
+    once and backfilled."""
+    view = db.get_entitlements(user_id) or {}
+    if not view.get('purchases'):
+        purchases = db.get_purchases(user_id)
+        view['purchases'] = purchases
+        if purchases:
+            db.save_entitlements(user_id, {'purchases': purchases})
+    return view
+
+
+def get_entitlements(user_id: str, fresh: bool = False, db=None) -> Dict:
+    """
+    Merged entitlement view for a user.
+
+    Args:
+        user_id: User's email address
+        fresh: Bypass the cache (and refill it)
+        db: PaymentFirestoreDB to read through (defaults to get_payment_db())
+
+    Returns:
+        {'purchases': dict | None, 'credits': dict | None, ...}. Raises when
+        the projection can't be read.
+    """
+    key = _norm(user_id)
+    now = time.monotonic()
+    cached = _cache.get(key)
+    if cached and not fresh and now - cached[0] < ENTITLEMENT_CACHE_TTL_S:
+        return cached[1]
+    view = _load(db or get_payment_db(), user_id)
+    with _lock:
+        _cache[key] = (now, view)
+    return view
+
+
+def get_purchases(user_id: str, fresh: bool = False, db=None) -> Optional[Dict]:
+    """The purchases half of the view (a copy), or None for a new user."""
+    purchases = get_entitlements(user_id, fresh=fresh, db=db).get('purchases')
+    return dict(purchases) if purchases else None
+
+
+def note_purchases(user_id: str, purchases: Optional[Dict]) -> None:
+    """Record a purchase record this instance just committed."""
+    key = _norm(user_id)
+    with _lock:
+        if not purchases:
+            _cache.pop(key, None)
+            return
+        cached = _cache.get(key)
+        view = dict(cached[1]) if cached else {}
+        view['purchases'] = dict(purchases)
+        _cache[key] = (time.monotonic(), view)
+
+
+def invalidate_cache(user_id: Optional[str] = None) -> None:
+    """Drop the cache entry for `user_id`, or all entries if None."""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(_norm(user_id), None)
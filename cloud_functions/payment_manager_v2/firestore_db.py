@@ -67,7 +67,11 @@ class PaymentFirestoreDB:
             doc_ref = self.db.collection('users').document(user_id).collection('purchases').document('data')
             purchases_data['updated_at'] = datetime.now(timezone.utc).isoformat()
             purchases_data['user_email'] = user_id
-            doc_ref.set(purchases_data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, purchases_data, merge=True)
+            batch.set(self._entitlements_ref(user_id),
+                      {'purchases': purchases_data, 'updated_at': purchases_data['updated_at']}, merge=True)
+            batch.commit()
             logger.info(f"[PaymentFirestore] Saved purchases for {user_id}")
             return True
             
@@ -92,13 +96,94 @@ class PaymentFirestoreDB:
         try:
             doc_ref = self.db.collection('users').document(_norm(user_id)).collection('credits').document('data')
             credits_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-            doc_ref.set(credits_data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, credits_data, merge=True)
+            batch.set(self._entitlements_ref(user_id),
+                      {'credits': credits_data, 'updated_at': credits_data['updated_at']}, merge=True)
+            batch.commit()
             logger.info(f"[PaymentFirestore] Saved credits for {user_id}")
             return True
         except Exception as e:
             logger.error(f"[PaymentFirestore] Error saving credits: {e}")
             return False
     
+    # ==================== ENTITLEMENTS ====================
+
+    def _entitlements_ref(self, user_id: str):
+        return self.db.collection('users').document(_norm(user_id)).collection('entitlements').document('data')
+
+    def get_entitlements(self, user_id: str) -> Optional[Dict]:
+        """Merged entitlement projection: {'purchases': {...}, 'credits': {...}}.
+
+        save_purchases / save_credits mirror into it here; profile_manager_v2
+        mirrors its credit ledger writes. Unlike the other getters this RAISES
+        on a read failure, so a blip is never cached as "no purchases".
+        """
+        doc = self._entitlements_ref(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def save_entitlements(self, user_id: str, data: Dict) -> bool:
+        """Merge fields into the entitlements projection (backfill path)."""
+        try:
+            data['updated_at'] = datetime.now(timezone.utc).isoformat()
+            self._entitlements_ref(user_id).set(data, merge=True)
+            return True
+        except Exception as e:
+            logger.error(f"[PaymentFirestore] Error saving entitlements: {e}")
+            return False
+
+    def use_purchase_credit(self, user_id: str, total_field: str, used_field: str,
+                            default_total: int, defaults: Dict,
+                            college_usage: Optional[tuple] = None) -> Dict:
+        """
+        Consume one purchase credit in a single transaction.
+
+        One read of purchases/data, the availability check, then an Increment
+        of `used_field` (plus the per-college unlock) mirrored into the
+        entitlements projection. Concurrent uses can't both spend the last
+        credit or overwrite each other's counters.
+
+        Args:
+            user_id: User's email address
+            total_field: Allowance field (e.g. 'fit_analysis_credits')
+            used_field: Usage counter (e.g. 'fit_analysis_used')
+            default_total: Allowance when the field is unset
+            defaults: Purchase record to create for a user without one
+            college_usage: Optional (college_id, credit_type) to mark unlocked
+
+        Returns:
+            {'status': 'applied' | 'insufficient', 'remaining': int,
+             'purchases': dict}. Raises on transaction failure.
+        """
+        user_id = _norm(user_id)
+        doc_ref = self.db.collection('users').document(user_id).collection('purchases').document('data')
+
+        @firestore.transactional
+        def _use(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            current = snapshot.to_dict() if snapshot.exists else dict(defaults)
+            total = current.get(total_field, default_total)
+            used = current.get(used_field, 0)
+            if total - used <= 0:
+                return {'status': 'insufficient', 'remaining': 0, 'purchases': current}
+
+            now = datetime.now(timezone.utc).isoformat()
+            updates = {used_field: firestore.Increment(1) if snapshot.exists and isinstance(used, int) else used + 1,
+                       'updated_at': now, 'user_email': user_id}
+            projected = {**current, used_field: used + 1, 'updated_at': now, 'user_email': user_id}
+            if college_usage:
+                college_id, credit_type = college_usage
+                updates['college_usage'] = {college_id: {credit_type: True}}
+                usage = {**current.get('college_usage', {})}
+                usage[college_id] = {**usage.get(college_id, {}), credit_type: True}
+                projected['college_usage'] = usage
+            transaction.set(doc_ref, updates if snapshot.exists else projected, merge=True)
+            transaction.set(self._entitlements_ref(user_id),
+                            {'purchases': projected, 'updated_at': now}, merge=True)
+            return {'status': 'applied', 'remaining': total - (used + 1), 'purchases': projected}
+
+        return _use(self.db.transaction())
+
     def add_purchase_record(self, user_id: str, purchase_details: Dict) -> bool:
         """
         Add a purchase record to user's purchase history.
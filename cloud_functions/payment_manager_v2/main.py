@@ -18,6 +18,11 @@ from datetime import datetime, timezone, timedelta
 from flask import jsonify
 import stripe
 from firestore_db import get_payment_db
+from entitlements import (
+    get_purchases as get_entitled_purchases,
+    invalidate_cache as invalidate_entitlements,
+    note_purchases,
+)
 from email_service import (
     send_welcome_email,
     send_payment_failed_email,
@@ -95,11 +100,15 @@ def add_cors_headers(response_data, status_code=200):
     return (jsonify(response_data), status_code, headers)
 
 
-def get_user_purchases(user_id):
-    """Get user's current purchases and usage limits from Firestore"""
+def get_user_purchases(user_id, fresh=False):
+    """Get user's current purchases and usage limits.
+
+    Served from the per-instance entitlement cache (see entitlements.py);
+    read-modify-write callers pass fresh=True so they never save back a
+    stale copy.
+    """
     try:
-        db = get_payment_db()
-        purchases = db.get_purchases(user_id)
+        purchases = get_entitled_purchases(user_id, fresh=fresh, db=get_payment_db())
         if purchases:
             return purchases
         return get_default_purchases()
@@ -153,7 +162,7 @@ def update_user_purchases(user_id, grants, purchase_details):
         db = get_payment_db()
         
         # Get current purchases
-        current = get_user_purchases(user_id)
+        current = get_user_purchases(user_id, fresh=True)
         
         # Store Stripe IDs if available
         if 'stripe_customer_id' in purchase_details and purchase_details['stripe_customer_id']:
@@ -240,7 +249,7 @@ def update_user_purchases(user_id, grants, purchase_details):
         
         # Also update fit_analysis_credits in purchases to match
         current['fit_analysis_credits'] = new_remaining
-
+        invalidate_entitlements(user_id)
         
         logger.info(f"[PaymentManagerV2] Updated purchases and credits for {user_id}")
         return True
@@ -747,6 +756,7 @@ def handle_subscription_lifecycle_webhooks(event):
                         if period_end:
                             purchases['subscription_current_period_end'] = period_end
                         db.save_purchases(user_email, purchases)
+                        invalidate_entitlements(user_email)
                         logger.info(f"Synced subscription flags for {user_email}")
             except Exception as e:
                 logger.error(f"Error updating user for subscription {subscription_id}: {e}")
@@ -776,6 +786,7 @@ def handle_subscription_lifecycle_webhooks(event):
                             'subscription_active': False,
                             'subscription_plan': None
                         })
+                        invalidate_entitlements(user_email)
                         
                         logger.info(f"Deactivated subscription for {user_email}")
                         
@@ -857,6 +868,7 @@ def handle_subscription_lifecycle_webhooks(event):
                             purchases['updated_at'] = datetime.now(timezone.utc).isoformat()
                             
                             db.save_purchases(user_email, purchases)
+                            invalidate_entitlements(user_email)
                             logger.info(f"Updated payment failure status for {user_email}")
                             
                             # Send payment failed email
@@ -877,7 +889,7 @@ def handle_cancel_subscription(request, user_id):
     """Cancel subscription at period end"""
     try:
         db = get_payment_db()
-        purchases = get_user_purchases(user_id)
+        purchases = get_user_purchases(user_id, fresh=True)
         subscription_id = purchases.get('stripe_subscription_id')
         
         if not subscription_id:
@@ -892,6 +904,7 @@ def handle_cancel_subscription(request, user_id):
             purchases['subscription_cancel_at_period_end'] = True
             purchases['updated_at'] = datetime.now(timezone.utc).isoformat()
             db.save_purchases(user_id, purchases)
+            invalidate_entitlements(user_id)
             
             cancel_at = purchases.get('subscription_current_period_end') or purchases.get('subscription_end_date')
             
@@ -932,7 +945,7 @@ def handle_reactivate_subscription(request, user_id):
     """Reactivate a scheduled cancellation"""
     try:
         db = get_payment_db()
-        purchases = get_user_purchases(user_id)
+        purchases = get_user_purchases(user_id, fresh=True)
         subscription_id = purchases.get('stripe_subscription_id')
         
         if not subscription_id:
@@ -947,6 +960,7 @@ def handle_reactivate_subscription(request, user_id):
             purchases['subscription_cancel_at_period_end'] = False
             purchases['updated_at'] = datetime.now(timezone.utc).isoformat()
             db.save_purchases(user_id, purchases)
+            invalidate_entitlements(user_id)
             
             return add_cors_headers({
                 'success': True,
@@ -1048,11 +1062,18 @@ def handle_use_credit(request, user_id):
         }
         
         total_field, used_field, default_total = CREDIT_FIELD_MAP[credit_type]
-        total_credits = purchases.get(total_field, default_total)
-        used_credits = purchases.get(used_field, 0)
-        available = total_credits - used_credits
+        college_usage = None
+        if college_id and credit_type in ['fit_analysis', 'essay_strategy', 'app_readiness']:
+            college_usage = (college_id, credit_type)
+        
+        # One transaction: check + Increment, so concurrent uses can't both
+        # spend the last credit or overwrite each other's counters.
+        result = db.use_purchase_credit(user_id, total_field, used_field, default_total,
+                                        defaults=get_default_purchases(),
+                                        college_usage=college_usage)
+        note_purchases(user_id, result.get('purchases'))
         
-        if available <= 0:
+        if result['status'] == 'insufficient':
             return add_cors_headers({
                 'error': 'No credits available',
                 'credit_type': credit_type,
@@ -1060,22 +1081,8 @@ def handle_use_credit(request, user_id):
                 'upgrade_required': True
             }, 403)
         
-        # Increment used counter
-        purchases[used_field] = used_credits + 1
-        purchases['updated_at'] = datetime.now(timezone.utc).isoformat()
-        
-        if college_id and credit_type in ['fit_analysis', 'essay_strategy', 'app_readiness']:
-            if 'college_usage' not in purchases:
-                purchases['college_usage'] = {}
-            if college_id not in purchases['college_usage']:
-                purchases['college_usage'][college_id] = {}
-            purchases['college_usage'][college_id][credit_type] = True
-        
-        db.save_purchases(user_id, purchases)
-        
-        # Calculate remaining credits after usage
-        remaining = total_credits - (used_credits + 1)
-
+        # Remaining credits after usage
+        remaining = result['remaining']
         
         # Send low credits email if fit_analysis credits are running low (5 or fewer)
         LOW_CREDITS_THRESHOLD = 5
@@ -1097,6 +1104,41 @@ def handle_use_credit(request, user_id):
         return add_cors_headers({'error': 'Failed to use credit'}, 500)
 
 
+def _evaluate_access(purchases, feature, college_id):
+    """(has_access, reason) for a feature against a purchase record."""
+    has_access = False
+    reason = ''
+    
+    if feature == 'explorer':
+        has_access = purchases.get('explorer_access', False)
+        reason = 'Explorer Pass required' if not has_access else ''
+        
+    elif feature == 'add_college':
+        available = purchases.get('college_slots', 2) - purchases.get('college_slots_used', 0)
+        has_access = available > 0
+        reason = f'{available} slots available' if has_access else 'No college slots available'
+        
+    elif feature == 'fit_analysis':
+        available = purchases.get('fit_analysis_credits', 3) - purchases.get('fit_analysis_used', 0)
+        has_access = available > 0
+        if college_id and purchases.get('college_usage', {}).get(college_id, {}).get('fit_analysis'):
+            has_access = True
+            reason = 'Already unlocked for this college'
+        else:
+            reason = f'{available} analyses available' if has_access else 'No fit analyses available'
+            
+    elif feature == 'ai_chat':
+        if purchases.get('ai_unlimited'):
+            has_access = True
+            reason = 'Unlimited access'
+        else:
+            available = purchases.get('ai_messages_limit', 30) - purchases.get('ai_messages_used', 0)
+            has_access = available > 0
+            reason = f'{available} messages remaining' if has_access else 'No messages available'
+    
+    return has_access, reason
+
+
 def handle_check_access(request, user_id):
     """Check if user has access to a specific feature"""
     try:
@@ -1104,37 +1146,12 @@ def handle_check_access(request, user_id):
         feature = data.get('feature') or request.args.get('feature')
         college_id = data.get('college_id') or request.args.get('college_id')
         
-        purchases = get_user_purchases(user_id)
-        
-        has_access = False
-        reason = ''
-        
-        if feature == 'explorer':
-            has_access = purchases.get('explorer_access', False)
-            reason = 'Explorer Pass required' if not has_access else ''
-            
-        elif feature == 'add_college':
-            available = purchases.get('college_slots', 2) - purchases.get('college_slots_used', 0)
-            has_access = available > 0
-            reason = f'{available} slots available' if has_access else 'No college slots available'
-            
-        elif feature == 'fit_analysis':
-            available = purchases.get('fit_analysis_credits', 3) - purchases.get('fit_analysis_used', 0)
-            has_access = available > 0
-            if college_id and purchases.get('college_usage', {}).get(college_id, {}).get('fit_analysis'):
-                has_access = True
-                reason = 'Already unlocked for this college'
-            else:
-                reason = f'{available} analyses available' if has_access else 'No fit analyses available'
-                
-        elif feature == 'ai_chat':
-            if purchases.get('ai_unlimited'):
-                has_access = True
-                reason = 'Unlimited access'
-            else:
-                available = purchases.get('ai_messages_limit', 30) - purchases.get('ai_messages_used', 0)
-                has_access = available > 0
-                reason = f'{available} messages remaining' if has_access else 'No messages available'
+        has_access, reason = _evaluate_access(get_user_purchases(user_id), feature, college_id)
+        if not has_access:
+            # Never deny from cache: the purchase may have landed on another
+            # instance since this entry was read.
+            has_access, reason = _evaluate_access(get_user_purchases(user_id, fresh=True),
+                                                  feature, college_id)
         
         return add_cors_headers({
             'success': True,
@@ -1,15 +1,31 @@
 """
 College list management operations.
 Handles adding/removing universities to/from user's college list (Launchpad).
+
+Reads are served from a materialized per-user view,
+users/{uid}/college_list_view/data, instead of joining the list stream, the
+full fit docs and a KB batch call on every request. The view keeps three
+lean sections keyed by university_id:
+
+    items  the rendered college_list fields (VIEW_ITEM_FIELDS)
+    fits   fit_category / match_percentage (VIEW_FIT_FIELDS)
+    kb     the KB enrichment columns, stamped with fetched_at
+
+firestore_db mirrors list and fit writes into items/fits in the same batch
+as the source write. KB enrichment is filled here: on the read after an add,
+when an entry outlives VIEW_KB_TTL_SECONDS, and when check-fit-recomputation
+sees a college's KB content_hash move (apply_kb_refresh). A missing or
+partial view (users who predate it, cleared test accounts) is rebuilt from
+the source collections; check_college_list_view diffs the two.
 """
 
 import logging
 import os
 import requests
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Optional
 
-from firestore_db import get_db
+from firestore_db import VIEW_FIT_FIELDS, VIEW_ITEM_FIELDS, get_db
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +37,10 @@ KNOWLEDGE_BASE_UNIVERSITIES_URL = os.getenv(
     "https://knowledge-base-manager-universities-v2-pfnwjfp26a-ue.a.run.app"
 )
 
+# KB enrichment older than this is re-fetched on read even without a refresh
+# event, so a KB edit that never shows up as fit staleness still lands.
+VIEW_KB_TTL_SECONDS = int(os.getenv("COLLEGE_LIST_VIEW_KB_TTL_SECONDS", str(24 * 3600)))
+
 
 def add_university_to_list(user_id: str, university_id: str, university_data: dict) -> dict:
     """
@@ -116,6 +136,7 @@ def get_college_list(user_id: str) -> List[Dict]:
     
     This mirrors the ES backend's handle_get_college_list() which fetches
     logo_url, location, and other data from the knowledgebase_universities index.
+    One view-doc read on the warm path; see the module docstring.
     
     Args:
         user_id: User's email
@@ -125,116 +146,236 @@ def get_college_list(user_id: str) -> List[Dict]:
     """
     try:
         db = get_db()
-        items = db.get_college_list(user_id)
-
-        if not items:
-            return []
-
-        # Personalized fits (cached) for this student, keyed by university_id —
-        # so each list item can carry the student's REAL reach/target/safety
-        # (fit_category) instead of only the population-level soft_fit_category.
-        # Read-only: no recompute, no LLM, no credit spend.
-        try:
-            fits_by_id = {f.get('university_id'): f for f in (db.get_all_fits(user_id) or [])}
-        except Exception as e:
-            logger.warning(f"[COLLEGE_LIST] Could not load fits for join: {e}")
-            fits_by_id = {}
-
-        # Collect university IDs for batch lookup
-        university_ids = [item.get('university_id') for item in items if item.get('university_id')]
-        
-        # Fetch enrichment data from knowledge base API
-        university_data = {}
-        if university_ids:
-            try:
-                # Call the knowledge base API to get university details (batch get via POST)
-                response = requests.post(
-                    KNOWLEDGE_BASE_UNIVERSITIES_URL,
-                    json={"university_ids": university_ids},
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success') and data.get('universities'):
-                        for uni in data['universities']:
-                            uni_id = uni.get('university_id')
-                            if uni_id:
-                                # Extract location string from location object
-                                location = uni.get('location', {})
-                                location_str = None
-                                if isinstance(location, dict):
-                                    city = location.get('city', '')
-                                    state = location.get('state', '')
-                                    if city and state:
-                                        location_str = f"{city}, {state}"
-                                    elif state:
-                                        location_str = state
-                                elif isinstance(location, str):
-                                    location_str = location
-                                
-                                # Get logo_url from profile if available
-                                profile = uni.get('profile', {}) or {}
-                                logo_url = uni.get('logo_url') or profile.get('logo_url')
-                                
-                                university_data[uni_id] = {
-                                    'location': location_str,
-                                    'acceptance_rate': uni.get('acceptance_rate'),
-                                    'soft_fit_category': uni.get('soft_fit_category'),
-                                    'us_news_rank': uni.get('us_news_rank'),
-                                    'summary': uni.get('summary'),
-                                    'logo_url': logo_url,
-                                    'media': uni.get('media')
-                                }
-                        logger.info(f"[COLLEGE_LIST] Enriched {len(university_data)} universities with KB data")
-                else:
-                    logger.warning(f"[COLLEGE_LIST] KB batch-get returned {response.status_code}")
-                    
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"[COLLEGE_LIST] Could not fetch university KB data: {e}")
-            except Exception as e:
-                logger.warning(f"[COLLEGE_LIST] Error parsing KB response: {e}")
-        
-        # Enrich items with knowledge base data
-        enriched_items = []
-        for item in items:
-            uni_id = item.get('university_id')
-            uni_info = university_data.get(uni_id, {})
-            fit = fits_by_id.get(uni_id) or {}
-
-            # Build enriched item
-            enriched_item = {
-                'university_id': uni_id,
-                'university_name': item.get('university_name'),
-                'status': item.get('status', 'favorites'),
-                'category': item.get('category'),
-                'order': item.get('order'),
-                'added_at': item.get('added_at'),
-                'notes': item.get('notes') or item.get('student_notes'),
-                # Enriched fields from knowledge base
-                'location': uni_info.get('location') or item.get('location'),
-                'acceptance_rate': uni_info.get('acceptance_rate') or item.get('acceptance_rate'),
-                'soft_fit_category': uni_info.get('soft_fit_category') or item.get('soft_fit_category'),
-                'us_news_rank': uni_info.get('us_news_rank') or item.get('us_news_rank'),
-                'summary': uni_info.get('summary') or item.get('summary'),
-                'logo_url': uni_info.get('logo_url') or item.get('logo_url'),
-                # Personalized fit (when computed) — the student's real band, kept
-                # distinct from the population-level soft_fit_category above.
-                'fit_category': fit.get('fit_category'),
-                'match_percentage': fit.get('match_percentage') or fit.get('match_score'),
-                # Per-school major decision (#281) — previously stripped by this
-                # whitelist, which broke the Launchpad round-trip.
-                'selected_major': item.get('selected_major'),
-                'major_choice': item.get('major_choice'),
-            }
-            enriched_items.append(enriched_item)
-        
-        return enriched_items
+        view = _load_view(db, user_id)
+        if view is None:
+            view = build_college_list_view(user_id, db=db)
+        else:
+            _fill_kb(db, user_id, view)
+        return _join_rows(view)
     except Exception as e:
         logger.error(f"[COLLEGE_LIST] Get list failed: {e}")
         return []
 
 
+def build_college_list_view(user_id: str, db=None) -> Dict:
+    """Rebuild the view from college_list, college_fits and the KB, save it,
+    and return it. The fallback for a missing or partial view."""
+    db = db or get_db()
+    items = db.get_college_list(user_id)
+
+    # Personalized fits (cached) for this student, keyed by university_id —
+    # so each list item can carry the student's REAL reach/target/safety
+    # (fit_category) instead of only the population-level soft_fit_category.
+    # Read-only: no recompute, no LLM, no credit spend.
+    try:
+        fits = db.get_all_fits(user_id) or []
+    except Exception as e:
+        logger.warning(f"[COLLEGE_LIST] Could not load fits for join: {e}")
+        fits = []
+
+    view = {
+        'items': {
+            item['university_id']: _pick(item, VIEW_ITEM_FIELDS)
+            for item in items or [] if item.get('university_id')
+        },
+        'fits': {
+            fit['university_id']: _pick(fit, VIEW_FIT_FIELDS)
+            for fit in fits if fit.get('university_id')
+        },
+        'complete': True,
+    }
+    view['kb'] = _fetch_kb_enrichment(list(view['items'])) or {}
+    try:
+        db.save_college_list_view(user_id, dict(view))
+    except Exception as e:
+        logger.warning(f"[COLLEGE_LIST] Could not save rebuilt view: {e}")
+    return view
+
+
+def check_college_list_view(user_id: str, repair: bool = False) -> Dict:
+    """Diff the stored view's items/fits against the source collections.
+
+    Returns {'consistent', 'missing', 'extra', 'mismatched'} — ids the view
+    lacks, ids it has that the sources don't, and ids whose mirrored fields
+    differ. KB enrichment isn't compared (it's a cache with its own TTL).
+    With repair=True an inconsistent view is rebuilt.
+    """
+    db = get_db()
+    view = _load_view(db, user_id) or {}
+    source = {
+        'items': {i['university_id']: _pick(i, VIEW_ITEM_FIELDS)
+                  for i in db.get_college_list(user_id) if i.get('university_id')},
+        'fits': {f['university_id']: _pick(f, VIEW_FIT_FIELDS)
+                 for f in db.get_all_fits(user_id) if f.get('university_id')},
+    }
+    report = {'missing': [], 'extra': [], 'mismatched': []}
+    for section, expected in source.items():
+        stored = view.get(section) or {}
+        report['missing'] += [f"{section}/{k}" for k in sorted(set(expected) - set(stored))]
+        report['extra'] += [f"{section}/{k}" for k in sorted(set(stored) - set(expected))]
+        report['mismatched'] += [f"{section}/{k}" for k in sorted(set(expected) & set(stored))
+                                 if expected[k] != stored[k]]
+    report['consistent'] = bool(view) and not any(report.values())
+    if repair and not report['consistent']:
+        build_college_list_view(user_id, db=db)
+        report['repaired'] = True
+    return report
+
+
+def apply_kb_refresh(user_id: str, universities: Dict[str, Dict]) -> int:
+    """KB refresh event: `universities` are current KB docs (as fetched for
+    fit staleness). Rewrites the view's enrichment for listed colleges whose
+    content_hash moved; returns how many rows changed."""
+    db = get_db()
+    view = _load_view(db, user_id)
+    if view is None:
+        return 0  # next read rebuilds with fresh KB data anyway
+    kb = view.get('kb') or {}
+    changed = {
+        uid: _kb_row(uni)
+        for uid, uni in (universities or {}).items()
+        if uid in (view.get('items') or {})
+        and (kb.get(uid) or {}).get('content_hash') != uni.get('content_hash')
+    }
+    if changed:
+        db.merge_college_list_view(user_id, {'kb': changed})
+    return len(changed)
+
+
+def _load_view(db, user_id: str) -> Optional[Dict]:
+    """The stored view, or None when it is missing, partial (only mirrored
+    writes, never built) or unreadable."""
+    try:
+        view = db.get_college_list_view(user_id)
+    except Exception as e:
+        logger.warning(f"[COLLEGE_LIST] View read failed, rebuilding: {e}")
+        return None
+    if isinstance(view, dict) and view.get('complete') is True:
+        return view
+    return None
+
+
+def _fill_kb(db, user_id: str, view: Dict) -> None:
+    """Fetch enrichment for listed colleges that have none yet (just added)
+    or whose entry is past VIEW_KB_TTL_SECONDS, in one KB call."""
+    kb = view.setdefault('kb', {})
+    now = datetime.now(timezone.utc).timestamp()
+    wanted = [
+        uid for uid in (view.get('items') or {})
+        if now - (kb.get(uid) or {}).get('fetched_at', 0) >= VIEW_KB_TTL_SECONDS
+    ]
+    if not wanted:
+        return
+    fresh = _fetch_kb_enrichment(wanted)
+    if fresh is None:
+        return  # KB down — serve what we have, retry next read
+    kb.update(fresh)
+    db.merge_college_list_view(user_id, {'kb': fresh})
+
+
+def _fetch_kb_enrichment(university_ids: List[str]) -> Optional[Dict[str, Dict]]:
+    """One KB batch call → {university_id: enrichment row}. Colleges the KB
+    doesn't know get an empty row so they aren't re-asked every read; a
+    failed call returns None."""
+    if not university_ids:
+        return {}
+    try:
+        # Call the knowledge base API to get university details (batch get via POST)
+        response = requests.post(
+            KNOWLEDGE_BASE_UNIVERSITIES_URL,
+            json={"university_ids": university_ids},
+            timeout=10
+        )
+        if response.status_code != 200:
+            logger.warning(f"[COLLEGE_LIST] KB batch-get returned {response.status_code}")
+            return None
+        data = response.json()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"[COLLEGE_LIST] Could not fetch university KB data: {e}")
+        return None
+    except Exception as e:
+        logger.warning(f"[COLLEGE_LIST] Error parsing KB response: {e}")
+        return None
+
+    now = datetime.now(timezone.utc).timestamp()
+    rows = {uid: {'fetched_at': now} for uid in university_ids}
+    for uni in (data.get('universities') or []) if data.get('success') else []:
+        uni_id = uni.get('university_id')
+        if uni_id:
+            rows[uni.get('resolved_from') or uni_id] = _kb_row(uni, now)
+    logger.info(f"[COLLEGE_LIST] Enriched {len(rows)} universities with KB data")
+    return rows
+
+
+def _kb_row(uni: Dict, fetched_at: Optional[float] = None) -> Dict:
+    """The enrichment columns get_college_list renders, from one KB doc."""
+    # Extract location string from location object
+    location = uni.get('location', {})
+    location_str = None
+    if isinstance(location, dict):
+        city = location.get('city', '')
+        state = location.get('state', '')
+        if city and state:
+            location_str = f"{city}, {state}"
+        elif state:
+            location_str = state
+    elif isinstance(location, str):
+        location_str = location
+
+    # Get logo_url from profile if available
+    profile = uni.get('profile', {}) or {}
+    return {
+        'location': location_str,
+        'acceptance_rate': uni.get('acceptance_rate'),
+        'soft_fit_category': uni.get('soft_fit_category'),
+        'us_news_rank': uni.get('us_news_rank'),
+        'summary': uni.get('summary'),
+        'logo_url': uni.get('logo_url') or profile.get('logo_url'),
+        'content_hash': uni.get('content_hash'),
+        'fetched_at': fetched_at if fetched_at is not None else datetime.now(timezone.utc).timestamp(),
+    }
+
+
+def _pick(doc: Dict, fields) -> Dict:
+    return {k: doc[k] for k in fields if k in doc}
+
+
+def _join_rows(view: Dict) -> List[Dict]:
+    """Join the view's sections into the rows the API returns, in university_id
+    order (the order the college_list stream used to come back in)."""
+    fits_by_id = view.get('fits') or {}
+    kb = view.get('kb') or {}
+    rows = []
+    for uni_id, item in sorted((view.get('items') or {}).items()):
+        uni_info = kb.get(uni_id) or {}
+        fit = fits_by_id.get(uni_id) or {}
+        rows.append({
+            'university_id': uni_id,
+            'university_name': item.get('university_name'),
+            'status': item.get('status', 'favorites'),
+            'category': item.get('category'),
+            'order': item.get('order'),
+            'added_at': item.get('added_at'),
+            'notes': item.get('notes') or item.get('student_notes'),
+            # Enriched fields from knowledge base
+            'location': uni_info.get('location') or item.get('location'),
+            'acceptance_rate': uni_info.get('acceptance_rate') or item.get('acceptance_rate'),
+            'soft_fit_category': uni_info.get('soft_fit_category') or item.get('soft_fit_category'),
+            'us_news_rank': uni_info.get('us_news_rank') or item.get('us_news_rank'),
+            'summary': uni_info.get('summary') or item.get('summary'),
+            'logo_url': uni_info.get('logo_url') or item.get('logo_url'),
+            # Personalized fit (when computed) — the student's real band, kept
+            # distinct from the population-level soft_fit_category above.
+            'fit_category': fit.get('fit_category'),
+            'match_percentage': fit.get('match_percentage') or fit.get('match_score'),
+            # Per-school major decision (#281) — previously stripped by this
+            # whitelist, which broke the Launchpad round-trip.
+            'selected_major': item.get('selected_major'),
+            'major_choice': item.get('major_choice'),
+        })
+    return rows
+
+
 def update_list_item(user_id: str, university_id: str, updates: dict) -> dict:
     """
     Update college list item.
@@ -0,0 +1,221 @@
+"""
+Essay copilot suggestions: windowed input and an LRU of answers.
+
+The editor asks for a pointer over and over while a student writes, and every
+request used to ship the whole essay to Gemini uncached — even when the text
+was identical to the last ask, or differed only in whitespace.
+
+A request is now reduced to what the coach actually needs: the trailing
+WINDOW_CHARS of the text before the cursor, whitespace-collapsed and cut back
+to a word boundary. Answers are cached by (prompt, window, action) in a
+per-instance LRU, so a student pausing on text we've already seen gets the
+suggestion back instantly with no model call.
+
+Bursts are debounced in the editor (EssayHelpPage waits out a pause and
+aborts the request it replaces), not here. A server-side debounce slept on
+every miss and, at the function's concurrency of 1, never had a newer
+request on the same instance to coalesce with.
+
+``stats()`` reports the hit rate and the Gemini calls saved by the cache;
+the admin-only ``copilot-suggest-stats`` route serves it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from google.genai import types
+
+import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+MODEL = "gemini-2.5-flash-lite"
+WINDOW_CHARS = int(os.getenv('COPILOT_WINDOW_CHARS', '1500'))
+CACHE_SIZE = int(os.getenv('COPILOT_CACHE_SIZE', '2048'))
+ACTIONS = ('suggest', 'complete', 'expand')
+
+_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+_stats = {'requests': 0, 'hits': 0, 'gemini_calls': 0}
+_lock = threading.Lock()
+
+
+def reset() -> None:
+    with _lock:
+        _cache.clear()
+        for k in _stats:
+            _stats[k] = 0
+
+
+def stats() -> Dict:
+    """Counters plus hit rate and Gemini calls saved since the instance started."""
+    with _lock:
+        s = dict(_stats)
+    s['hit_rate'] = round(s['hits'] / s['requests'], 4) if s['requests'] else 0.0
+    s['gemini_calls_saved'] = s['hits']
+    s['cache_entries'] = len(_cache)
+    return s
+
+
+def normalize_window(text: str, cursor: Optional[int] = None) -> str:
+    """The whitespace-collapsed trailing WINDOW_CHARS before the cursor."""
+    text = text or ''
+    if cursor is not None and 0 <= cursor < len(text):
+        text = text[:cursor]
+    text = ' '.join(text.split())
+    if len(text) > WINDOW_CHARS:
+        text = text[-WINDOW_CHARS:]
+        space = text.find(' ')
+        if 0 <= space < len(text) - 1:
+            text = text[space + 1:]  # don't open mid-word
+    return text
+
+
+def _cache_key(prompt_text: str, window: str, action: str) -> str:
+    raw = json.dumps([' '.join((prompt_text or '').split()), window, action])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _cached(key: str) -> Optional[Dict]:
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+        return hit
+
+
+def _store(key: str, result: Dict) -> None:
+    with _lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def suggest(prompt_text: str, current_text: str, action: str = "suggest",
+            cursor: Optional[int] = None) -> Dict:
+    """Copilot suggestion for the text before the cursor.
+
+    Returns {'success', 'suggestions', 'type', 'cached'}.
+    """
+    if action not in ACTIONS:
+        action = "expand"
+    window = normalize_window(current_text, cursor)
+    key = _cache_key(prompt_text, window, action)
+    with _lock:
+        _stats['requests'] += 1
+
+    hit = _cached(key)
+    if hit is not None:
+        return {**hit, 'cached': True}
+
+    with _lock:
+        _stats['gemini_calls'] += 1
+    try:
+        result = {"success": True, "suggestions": _generate(prompt_text, window, action), "type": action}
+    except Exception as e:
+        logger.error(f"[ESSAY_COPILOT] Copilot suggestion failed: {e}", exc_info=True)
+        return {"success": False, "error": str(e), "suggestions": []}
+    _store(key, result)
+    return {**result, 'cached': False}
+
+
+def _generate(prompt_text: str, current_text: str, action: str) -> list:
+    # For 'suggest', we want multiple coaching pointers
+    if action == "suggest":
+        system_prompt = f"""The student is writing a college essay for this prompt: "{prompt_text}"
+
+What they've written so far: "{current_text}"
+
+As a writing coach, give 3 different POINTERS to help them decide what to write next. DO NOT write sentences for them. Instead provide:
+
+1. REFLECTION POINTER: Ask a question about their feelings, realizations, or growth related to what they just wrote
+   Example: "What did you learn about yourself in that moment?"
+
+2. DETAIL POINTER: Suggest adding sensory details or specifics
+   Example: "Can you describe what you saw, heard, or felt physically?"
+
+3. CONNECTION POINTER: Suggest how to connect this to the bigger picture (their goals, the university, their growth)
+   Example: "How does this connect to why you want to study [their intended major]?"
+
+Keep each pointer to ONE short question or prompt. These should push the student to think, not give them the answer.
+
+Return ONLY a JSON array of 3 coaching pointers:
+["Reflection: What did...", "Detail: Describe...", "Connection: How does..."]"""
+
+        response = llm_gateway.generate(
+            model=MODEL,
+            contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
+            config=types.GenerateContentConfig(
+                temperature=0.8,
+                max_output_tokens=512
+            )
+        )
+
+        text = response.text.strip()
+        # Clean markdown if present
+        if text.startswith("```"):
+            text = text.split("```")[1]
+            if text.startswith("json"):
+                text = text[4:]
+        text = text.strip()
+
+        suggestions = json.loads(text)
+        if not isinstance(suggestions, list):
+            suggestions = [suggestions]
+
+        # Normalize: ensure all items are plain strings (LLM sometimes returns objects)
+        normalized = []
+        for s in suggestions[:3]:
+            if isinstance(s, dict):
+                normalized.append(s.get('prompt', s.get('pointer', s.get('suggestion', str(s)))))
+            else:
+                normalized.append(str(s))
+
+        logger.info(f"[ESSAY_COPILOT] Generated {len(normalized)} suggestions")
+        return normalized
+
+    # For complete and expand, single coaching response
+    action_prompts = {
+        "complete": f"""The student is finishing a sentence for this essay prompt: "{prompt_text}"
+
+Current text: "{current_text}"
+
+As a coach, give ONE guiding question to help them complete their thought authentically. DO NOT write the completion for them.
+Example: "What was the result of that action?" or "How did that make you feel?"
+Keep it to one short question.""",
+
+        "expand": f"""The student is writing a college essay for this prompt: "{prompt_text}"
+
+Current text: "{current_text}"
+
+As a coach, give ONE guiding prompt to help them deepen their last point. DO NOT write it for them. Instead ask:
+- A question about specifics they could add (who, what, where, when)
+- A question about the emotional impact or lesson learned
+- A connection to make to their future goals
+
+Keep it to one clear, thought-provoking question."""
+    }
+
+    response = llm_gateway.generate(
+        model=MODEL,
+        contents=[types.Content(role="user", parts=[types.Part(text=action_prompts[action])])],
+        config=types.GenerateContentConfig(
+            temperature=0.7,
+            max_output_tokens=256
+        )
+    )
+
+    suggestion = response.text.strip()
+
+    # Clean up quotes if present
+    if suggestion.startswith('"') and suggestion.endswith('"'):
+        suggestion = suggestion[1:-1]
+
+    logger.info(f"[ESSAY_COPILOT] Generated {action} suggestion")
+    return [suggestion]
@@ -4,9 +4,11 @@ Handles free tier, pro subscriptions, credit packs, and usage tracking.
 """
 
 import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from firestore_db import get_db
+from entitlements import get_credits as get_entitled_credits, invalidate_cache, note_credits
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +20,16 @@ CREDIT_PACK_SIZE = 10
 CREDIT_PACK_PRICE = 9.00  # $9 for 10 credits
 
 
-def get_user_credits(user_id: str) -> Dict:
+def get_user_credits(user_id: str, fresh: bool = False) -> Dict:
     """
     Get user's credit balance and tier info.
     
+    Served from the per-instance entitlement cache when warm (see
+    entitlements.py); `fresh` forces a read of the projection.
+    
     Args:
         user_id: User's email address
+        fresh: Bypass the entitlement cache
         
     Returns:
         Dict with credit information:
@@ -39,12 +45,12 @@ def get_user_credits(user_id: str) -> Dict:
         }
     """
     try:
-        db = get_db()
-        credits = db.get_credits(user_id)
+        credits = get_entitled_credits(user_id, fresh=fresh, db=get_db())
 
         if not credits:
             # Initialize for new user — only on a CONFIRMED missing document.
             credits = initialize_user_credits(user_id)
+            invalidate_cache(user_id)
 
         return credits
 
@@ -85,7 +91,6 @@ def initialize_user_credits(user_id: str, tier: str = "free") -> Dict:
             "subscription_active": tier == "pro",
             "subscription_expires": None,
             "subscription_plan": None,
-            "credit_history": [],
             "created_at": datetime.utcnow().isoformat(),
             "last_updated": datetime.utcnow().isoformat()
         }
@@ -124,6 +129,10 @@ def check_credits_available(user_id: str, credits_needed: int = 1) -> Dict:
     """
     try:
         credits = get_user_credits(user_id)
+        if not credits.get('error') and int(credits.get('credits_remaining') or 0) < credits_needed:
+            # Never refuse from cache: a purchase may have landed on another
+            # instance (or in payment_manager_v2) since this entry was read.
+            credits = get_user_credits(user_id, fresh=True)
         if credits.get('error') == 'credits_read_failed':
             # #298: distinguish "can't read the ledger right now" from "broke" —
             # a paying user must see a retryable failure, not an upsell.
@@ -134,7 +143,7 @@ def check_credits_available(user_id: str, credits_needed: int = 1) -> Dict:
                 "error": "credits_read_failed",
                 "retryable": True,
             }
-        credits_remaining = credits.get('credits_remaining', 0)
+        credits_remaining = int(credits.get('credits_remaining') or 0)
 
         return {
             "has_credits": credits_remaining >= credits_needed,
@@ -153,73 +162,92 @@ def check_credits_available(user_id: str, credits_needed: int = 1) -> Dict:
         }
 
 
-def deduct_credit(user_id: str, credit_count: int = 1, reason: str = "fit_analysis") -> Dict:
+def _charge_key(idempotency_key: Optional[str], kind: str) -> str:
+    """Ledger document id. Callers pass a key stable across retries of the
+    same charge; without one every call is a distinct entry."""
+    if idempotency_key:
+        return str(idempotency_key).replace('/', '_')[:500]
+    return f"{kind}_{uuid.uuid4().hex}"
+
+
+def _apply_entry(user_id: str, entry_id: str, delta: int, entry: Dict,
+                 set_fields: Dict = None) -> Dict:
+    """Run a ledger entry, initializing the credits doc on a confirmed-missing
+    record. Transaction/read failures come back as the #298 retryable marker —
+    never as a write of fresh defaults. The committed balance refreshes this
+    instance's entitlement cache."""
+    db = get_db()
+    try:
+        result = db.apply_credit_entry(user_id, entry_id, delta, entry=entry, set_fields=set_fields)
+        if result.get('status') == 'missing':
+            credits = get_user_credits(user_id, fresh=True)
+            if credits.get('error') == 'credits_read_failed':
+                return {'status': 'error'}
+            result = db.apply_credit_entry(user_id, entry_id, delta, entry=entry, set_fields=set_fields)
+        note_credits(user_id, result.get('credits'))
+        return result
+    except Exception as e:
+        logger.error(f"[CREDITS] Ledger write failed for {user_id} ({entry_id}): {e}")
+        return {'status': 'error'}
+
+
+def deduct_credit(user_id: str, credit_count: int = 1, reason: str = "fit_analysis",
+                  idempotency_key: str = None) -> Dict:
     """
     Deduct credit(s) from user's balance.
     
+    One transaction: balance check, Increment of the counters and a
+    credit_ledger entry keyed by `idempotency_key`. Replaying a key returns
+    the original outcome without charging again.
+    
     Args:
         user_id: User's email address
         credit_count: Number of credits to deduct
         reason: Reason for deduction
+        idempotency_key: Stable id for this charge (e.g. derived from the
+            artifact being billed); omitted → a fresh key
         
     Returns:
         {
             "success": bool,
             "credits_remaining": int,
             "credits_deducted": int,
-            "reason": str
+            "reason": str,
+            "duplicate": bool
         }
     """
     try:
-        db = get_db()
-        credits = get_user_credits(user_id)
+        credit_count = int(credit_count)
+        entry_id = _charge_key(idempotency_key, 'deduct')
+        result = _apply_entry(user_id, entry_id, -credit_count, {'reason': reason})
+        status = result.get('status')
 
-        if credits.get('error') == 'credits_read_failed':
+        if status == 'error':
             # #298: never mutate/save on a read failure; surface it as-is.
             return {"success": False, "error": "credits_read_failed",
                     "retryable": True}
 
-        # Ensure credit values are integers (may be stored as strings in Firestore)
-        credits_remaining = int(credits.get('credits_remaining', 0))
-        credits_used = int(credits.get('credits_used', 0))
-        credit_count = int(credit_count)
-        
-        # Check if enough credits
-        if credits_remaining < credit_count:
+        if status == 'insufficient':
             logger.warning(f"[CREDITS] Insufficient credits for {user_id}")
             return {
                 "success": False,
                 "error": "Insufficient credits",
-                "credits_remaining": credits_remaining,
+                "credits_remaining": result.get('credits_remaining'),
                 "credits_needed": credit_count
             }
         
-        # Deduct credits
-        credits['credits_used'] = credits_used + credit_count
-        credits['credits_remaining'] = credits_remaining - credit_count
-        credits['last_updated'] = datetime.utcnow().isoformat()
-        
-        # Add to history
-        if 'credit_history' not in credits:
-            credits['credit_history'] = []
-        
-        credits['credit_history'].append({
-            'date': datetime.utcnow().isoformat(),
-            'amount': -credit_count,
-            'reason': reason,
-            'balance_after': credits['credits_remaining']
-        })
-        
-        # Save to Firestore
-        db.save_credits(user_id, credits)
-        
-        logger.info(f"[CREDITS] Deducted {credit_count} credits from {user_id}, remaining: {credits['credits_remaining']}")
+        duplicate = status == 'duplicate'
+        if duplicate:
+            logger.info(f"[CREDITS] Charge {entry_id} already applied for {user_id} — not charged again")
+        else:
+            logger.info(f"[CREDITS] Deducted {credit_count} credits from {user_id}, remaining: {result.get('credits_remaining')}")
         
         return {
             "success": True,
-            "credits_remaining": credits['credits_remaining'],
-            "credits_deducted": credit_count,
-            "reason": reason
+            "credits_remaining": result.get('credits_remaining'),
+            "credits_deducted": 0 if duplicate else credit_count,
+            "reason": reason,
+            "duplicate": duplicate
         }
         
     except Exception as e:
@@ -230,7 +258,8 @@ def deduct_credit(user_id: str, credit_count: int = 1, reason: str = "fit_analys
         }
 
 
-def add_credits(user_id: str, credit_count: int, source: str = "credit_pack") -> Dict:
+def add_credits(user_id: str, credit_count: int, source: str = "credit_pack",
+                idempotency_key: str = None) -> Dict:
     """
     Add credits to user's balance (from pack purchase or subscription).
     
@@ -238,6 +267,8 @@ def add_credits(user_id: str, credit_count: int, source: str = "credit_pack") ->
         user_id: User's email address
         credit_count: Number of credits to add
         source: Source of credits ("credit_pack", "subscription", "bonus")
+        idempotency_key: Stable id for this grant (e.g. a payment id);
+            replaying it adds nothing
         
     Returns:
         {
@@ -248,35 +279,21 @@ def add_credits(user_id: str, credit_count: int, source: str = "credit_pack") ->
         }
     """
     try:
-        db = get_db()
-        credits = get_user_credits(user_id)
-        
-        # Add credits
-        credits['credits_total'] += credit_count
-        credits['credits_remaining'] += credit_count
-        credits['last_updated'] = datetime.utcnow().isoformat()
-        
-        # Add to history
-        if 'credit_history' not in credits:
-            credits['credit_history'] = []
-        
-        credits['credit_history'].append({
-            'date': datetime.utcnow().isoformat(),
-            'amount': credit_count,
-            'source': source,
-            'balance_after': credits['credits_remaining']
-        })
-        
-        # Save to Firestore
-        db.save_credits(user_id, credits)
-        
-        logger.info(f"[CREDITS] Added {credit_count} credits to {user_id} from {source}")
+        credit_count = int(credit_count)
+        result = _apply_entry(user_id, _charge_key(idempotency_key, 'add'), credit_count,
+                              {'source': source})
+        if result.get('status') not in ('applied', 'duplicate'):
+            return {"success": False, "error": "credits_read_failed", "retryable": True}
+
+        duplicate = result['status'] == 'duplicate'
+        logger.info(f"[CREDITS] Added {0 if duplicate else credit_count} credits to {user_id} from {source}")
         
         return {
             "success": True,
-            "credits_added": credit_count,
-            "credits_remaining": credits['credits_remaining'],
-            "source": source
+            "credits_added": 0 if duplicate else credit_count,
+            "credits_remaining": result.get('credits_remaining'),
+            "source": source,
+            "duplicate": duplicate
         }
         
     except Exception as e:
@@ -287,7 +304,8 @@ def add_credits(user_id: str, credit_count: int, source: str = "credit_pack") ->
         }
 
 
-def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_type: str = 'monthly') -> Dict:
+def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_type: str = 'monthly',
+                         idempotency_key: str = None) -> Dict:
     """
     Upgrade user to Monthly or Season Pass tier.
     
@@ -295,6 +313,7 @@ def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_ty
         user_id: User's email address
         subscription_expires: ISO format expiration date
         plan_type: "monthly" or "season_pass"
+        idempotency_key: Stable id for this upgrade (e.g. a payment id)
         
     Returns:
         {
@@ -305,9 +324,6 @@ def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_ty
         }
     """
     try:
-        db = get_db()
-        credits = get_user_credits(user_id)
-        
         # Determine credits to add
         if plan_type == 'season_pass':
             new_credits = SEASON_PASS_CREDITS
@@ -324,35 +340,24 @@ def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_ty
                 expiry_date = datetime.utcnow() + timedelta(days=30)
             subscription_expires = expiry_date.isoformat()
         
-        # Update credits - tier should be the plan name for frontend detection
-        credits['tier'] = plan_type  # 'monthly' or 'season_pass' (not 'pro')
-        credits['subscription_active'] = True
-        credits['subscription_expires'] = subscription_expires
-        credits['subscription_plan'] = plan_type
-        credits['credits_total'] += new_credits
-        credits['credits_remaining'] += new_credits
-        credits['last_updated'] = datetime.utcnow().isoformat()
-        
-        # Add to history
-        if 'credit_history' not in credits:
-            credits['credit_history'] = []
-        
-        credits['credit_history'].append({
-            'date': datetime.utcnow().isoformat(),
-            'amount': new_credits,
-            'source': f'subscription_{plan_type}',
-            'balance_after': credits['credits_remaining']
-        })
-        
-        # Save to Firestore
-        db.save_credits(user_id, credits)
+        # Tier should be the plan name for frontend detection
+        result = _apply_entry(user_id, _charge_key(idempotency_key, 'upgrade'), new_credits,
+                              {'source': f'subscription_{plan_type}'},
+                              set_fields={
+                                  'tier': plan_type,  # 'monthly' or 'season_pass' (not 'pro')
+                                  'subscription_active': True,
+                                  'subscription_expires': subscription_expires,
+                                  'subscription_plan': plan_type,
+                              })
+        if result.get('status') not in ('applied', 'duplicate'):
+            return {"success": False, "error": "credits_read_failed", "retryable": True}
         
         logger.info(f"[CREDITS] Upgraded {user_id} to {plan_type}, added {new_credits} credits")
         
         return {
             "success": True,
             "tier": plan_type,  # Return plan_type, not 'pro'
-            "credits_added": new_credits,
+            "credits_added": 0 if result['status'] == 'duplicate' else new_credits,
             "subscription_expires": subscription_expires,
             "subscription_plan": plan_type
         }
@@ -363,3 +368,16 @@ def upgrade_subscription(user_id: str, subscription_expires: str = None, plan_ty
             "success": False,
             "error": str(e)
         }
+
+
+def get_credit_history(user_id: str, limit: int = 50) -> Dict:
+    """
+    Recent credit changes, newest first: credit_ledger entries, followed by
+    any entries from the legacy in-document credit_history array.
+    """
+    db = get_db()
+    entries = db.list_credit_ledger(user_id, limit=limit)
+    if len(entries) < limit:
+        legacy = (db.get_credits(user_id) or {}).get('credit_history') or []
+        entries += list(reversed(legacy))[:limit - len(entries)]
+    return {"success": True, "history": entries}
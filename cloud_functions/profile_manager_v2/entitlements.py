@@ -0,0 +1,109 @@
+"""
+Entitlement service layer: the merged purchases + credits view, cached per
+instance.
+
+Free reads (the credits badge, pre-flight credit gates) used to read
+credits/data on every request. They now read through a short-TTL in-process
+cache of users/{uid}/entitlements/data — one projection doc that both
+services keep current:
+
+    credits    mirrored by save_credits and, inside the same transaction,
+               by apply_credit_entry (this service) and by payment_manager_v2's
+               credits sync
+    purchases  mirrored by payment_manager_v2's save_purchases
+
+A cache hit costs no Firestore round trip. Billed paths stay exact: the
+deduction itself is one transaction with one batched read, and its result is
+written back here (note_credits) so this instance never serves its own stale
+balance. Other instances catch up within ENTITLEMENT_CACHE_TTL_S; a gate that
+would deny re-reads first (see credits.check_credits_available), so a purchase
+made elsewhere is never refused from cache.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from firestore_db import credit_projection, get_db
+
+logger = logging.getLogger(__name__)
+
+ENTITLEMENT_CACHE_TTL_S = float(os.getenv('ENTITLEMENT_CACHE_TTL_SECONDS', '30'))
+
+_cache = {}  # user_id -> (fetched_at_monotonic, entitlements)
+_lock = threading.Lock()
+
+
+def _has_credits(view: Dict) -> bool:
+    # A partial mirror (e.g. only tier fields from a downgrade) isn't a balance.
+    return isinstance(view.get('credits'), dict) and 'credits_remaining' in view['credits']
+
+
+def _load(db, user_id: str) -> Dict:
+    """Projection read; users that predate it are read from credits/data once
+    and backfilled with its balance and plan fields. Raises on a read failure."""
+    view = db.get_entitlements(user_id) or {}
+    if not _has_credits(view):
+        credits = credit_projection(db.get_credits(user_id))
+        view['credits'] = credits
+        if credits:
+            db.save_entitlements(user_id, {'credits': credits})
+    return view
+
+
+def get_entitlements(user_id: str, fresh: bool = False, db=None) -> Dict:
+    """
+    Merged entitlement view for a user.
+
+    Only views holding a balance are cached: a new user's miss is always
+    re-read, so credits are never initialized over a balance another
+    instance just wrote.
+
+    Args:
+        user_id: User's email
+        fresh: Bypass the cache (and refill it)
+        db: FirestoreDB to read through (defaults to get_db())
+
+    Returns:
+        {'credits': dict | None, 'purchases': dict | None, ...}. Raises when
+        Firestore can't be read — callers decide how a blip surfaces.
+    """
+    now = time.monotonic()
+    cached = _cache.get(user_id)
+    if cached and not fresh and now - cached[0] < ENTITLEMENT_CACHE_TTL_S:
+        return cached[1]
+    view = _load(db or get_db(), user_id)
+    if _has_credits(view):
+        with _lock:
+            _cache[user_id] = (now, view)
+    return view
+
+
+def get_credits(user_id: str, fresh: bool = False, db=None) -> Optional[Dict]:
+    """The credits half of the view (a copy), or None for a new user."""
+    credits = get_entitlements(user_id, fresh=fresh, db=db).get('credits')
+    return dict(credits) if credits else None
+
+
+def note_credits(user_id: str, credits: Optional[Dict]) -> None:
+    """Record a balance this instance just committed, so the next free read
+    sees it without a round trip. Anything partial just drops the entry."""
+    with _lock:
+        cached = _cache.get(user_id)
+        if not credits or 'credits_remaining' not in credits:
+            _cache.pop(user_id, None)
+            return
+        view = dict(cached[1]) if cached else {}
+        view['credits'] = dict(credits)
+        _cache[user_id] = (time.monotonic(), view)
+
+
+def invalidate_cache(user_id: Optional[str] = None) -> None:
+    """Drop the cache entry for `user_id`, or all entries if None."""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
@@ -5,16 +5,35 @@ Provides AI-powered essay writing assistance:
 - Essay starters generation based on student profile + fit analysis + university profile
 - Writing copilot suggestions (completion, next sentence, feedback)
 - Draft feedback and authenticity checks
+
+The starter, hook-context, outline and chat endpoints all need the same
+three inputs — student profile, fit analysis, university profile. They are
+loaded by load_essay_context in one concurrent wave. The KB fetch asks only
+for the sections these prompts read (ESSAY_KB_SECTIONS), and the canonical
+id it resolves is reused for the fit lookup.
+
+Only the KB profile is memoized (per university, ESSAY_KB_TTL_SECONDS): it is
+the slow read and the same for every student. The profile and fit are two
+Firestore point reads and are re-read on every call. A per-user memo of the
+whole context served stale data for its full TTL whenever the write landed on
+another instance, and kept a context that had no fit yet after the fit was
+computed.
 """
 
 import os
 import logging
 import json
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from google import genai
+import llm_gateway
 from google.genai import types
 from firestore_db import get_db  # Use Firestore instead of ES
+import essay_drafts
+import copilot_suggestions
+from profile_context import get_profile_context
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +45,20 @@ KNOWLEDGE_BASE_UNIVERSITIES_URL = os.getenv(
     "https://knowledge-base-manager-universities-v2-pfnwjfp26a-ue.a.run.app"
 )
 
+# Top-level KB profile sections the essay prompts actually read.
+ESSAY_KB_SECTIONS = (
+    'metadata',
+    'strategic_profile',
+    'academic_structure',
+    'application_process',
+    'student_insights',
+)
+ESSAY_KB_TTL_SECONDS = int(os.getenv('ESSAY_KB_TTL_SECONDS', '300'))
+ESSAY_KB_CACHE_SIZE = 256
+
+_kb_profiles: 'OrderedDict[str, tuple]' = OrderedDict()  # university -> (loaded_at, profile)
+_kb_profiles_lock = threading.Lock()
+
 
 def normalize_university_id(university_id: str) -> str:
     """Normalize university ID for consistent matching."""
@@ -48,37 +81,44 @@ def normalize_university_id(university_id: str) -> str:
     return normalized
 
 
-def fetch_university_profile(university_id: str, max_retries: int = 3) -> dict | None:
-    """Fetch full university profile from knowledge base."""
-    candidate_ids = [
-        university_id.strip(),
-        f"{university_id.strip()}_slug",
-        university_id.lower().strip(),
-        f"{university_id.lower().strip()}_slug"
-    ]
-    
-    for uid in candidate_ids:
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(
-                    f"{KNOWLEDGE_BASE_UNIVERSITIES_URL}?university_id={uid}",
-                    timeout=30
-                )
-                data = response.json()
-                
-                if data.get('success') and data.get('university'):
-                    logger.info(f"[ESSAY_COPILOT] Found university: {uid}")
-                    return data['university']
-                    
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"[ESSAY_COPILOT] Error fetching {uid} (attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"[ESSAY_COPILOT] Unexpected error: {e}")
-                break
-    
+def fetch_university_profile(university_id: str, max_retries: int = 3,
+                             sections: tuple = None) -> dict | None:
+    """Fetch full university profile from knowledge base.
+
+    One GET per attempt: the KB resolves acronyms, `_slug` ids and official
+    names itself (alias index) and returns the canonical `university_id`,
+    so there is no candidate-id ladder here. Only transport errors retry;
+    a clean "not found" is final. `sections` projects the profile down to
+    those top-level sections.
+    """
+    uid = (university_id or '').strip()
+    params = {'university_id': uid}
+    if sections:
+        params['sections'] = ','.join(sections)
+    for attempt in range(max_retries):
+        try:
+            response = requests.get(
+                KNOWLEDGE_BASE_UNIVERSITIES_URL,
+                params=params,
+                timeout=30
+            )
+            data = response.json()
+            if data.get('success') and data.get('university'):
+                university = data['university']
+                if university.get('resolved_from'):
+                    logger.info(f"[ESSAY_COPILOT] Resolved {uid} -> {university.get('university_id')}")
+                return university
+            break
+
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"[ESSAY_COPILOT] Error fetching {uid} (attempt {attempt+1}): {e}")
+            if attempt < max_retries - 1:
+                time.sleep(1)
+
+        except Exception as e:
+            logger.error(f"[ESSAY_COPILOT] Unexpected error: {e}")
+            break
+
     logger.warning(f"[ESSAY_COPILOT] University not found: {university_id}")
     return None
 
@@ -111,6 +151,64 @@ def get_fit_analysis(user_email: str, university_id: str) -> dict | None:
         return None
 
 
+def _essay_university_profile(university_id: str) -> dict | None:
+    """KB profile (ESSAY_KB_SECTIONS) for the essay prompts, memoized per
+    university for ESSAY_KB_TTL_SECONDS. Misses are not memoized."""
+    key = (university_id or '').strip().lower()
+    now = time.time()
+    with _kb_profiles_lock:
+        cached = _kb_profiles.get(key)
+        if cached and now - cached[0] < ESSAY_KB_TTL_SECONDS:
+            _kb_profiles.move_to_end(key)
+            return cached[1]
+
+    university_profile = fetch_university_profile(university_id, sections=ESSAY_KB_SECTIONS)
+    if university_profile is not None:
+        with _kb_profiles_lock:
+            _kb_profiles[key] = (now, university_profile)
+            _kb_profiles.move_to_end(key)
+            while len(_kb_profiles) > ESSAY_KB_CACHE_SIZE:
+                _kb_profiles.popitem(last=False)
+    return university_profile
+
+
+def load_essay_context(user_email: str, university_id: str) -> dict:
+    """Student profile, fit analysis and university profile for one essay.
+
+    The three reads run concurrently. If the fit misses under the requested
+    id, it is retried once under the canonical id the KB resolved. The
+    profile and fit are always read fresh; only the KB profile comes from
+    the per-university memo.
+
+    Returns {'university_id', 'student_profile', 'fit_analysis',
+    'university_profile'}; the id is canonical when the KB knew the school.
+    """
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        profile_f = pool.submit(get_student_profile, user_email)
+        fit_f = pool.submit(get_fit_analysis, user_email, university_id)
+        university_f = pool.submit(_essay_university_profile, university_id)
+        student_profile = profile_f.result()
+        fit_analysis = fit_f.result()
+        university_profile = university_f.result()
+
+    canonical_id = (university_profile or {}).get('university_id') or university_id
+    if fit_analysis is None and canonical_id not in (university_id, normalize_university_id(university_id)):
+        fit_analysis = get_fit_analysis(user_email, canonical_id)
+
+    return {
+        'university_id': canonical_id,
+        'student_profile': student_profile,
+        'fit_analysis': fit_analysis,
+        'university_profile': university_profile,
+    }
+
+
+def reset_essay_kb_cache() -> None:
+    """Forget memoized KB profiles (tests, KB re-ingest)."""
+    with _kb_profiles_lock:
+        _kb_profiles.clear()
+
+
 def get_starter_context(
     user_email: str,
     university_id: str,
@@ -122,33 +220,17 @@ def get_starter_context(
     Uses profile, university, and fit data to generate personalized guidance.
     """
     try:
-        # Fetch all context data
-        student_profile = get_student_profile(user_email)
-        fit_analysis = get_fit_analysis(user_email, university_id)
-        university_profile = fetch_university_profile(university_id)
+        context = load_essay_context(user_email, university_id)
+        student_profile = context['student_profile']
+        fit_analysis = context['fit_analysis']
+        university_profile = context['university_profile']
         
         # Build context summary for LLM
         context_parts = []
         
         if student_profile:
-            activities = student_profile.get('activities', [])
-            activities_str = ', '.join([
-                a.get('name', str(a)) if isinstance(a, dict) else str(a) 
-                for a in activities[:6]
-            ])
-            awards = student_profile.get('honors_awards', student_profile.get('awards', []))
-            awards_str = ', '.join([
-                a.get('name', str(a)) if isinstance(a, dict) else str(a) 
-                for a in awards[:4]
-            ])
-            interests = student_profile.get('academic_interests', [])
-            interests_str = ', '.join(interests[:4]) if interests else ''
-            
-            context_parts.append(f"""STUDENT PROFILE:
-- Activities: {activities_str}
-- Awards: {awards_str}
-- Academic Interests: {interests_str}
-- Intended Major: {student_profile.get('intended_major', 'Not specified')}""")
+            profile_context = get_profile_context(user_email, student_profile, surface='essay_starter_context')
+            context_parts.append(f"STUDENT PROFILE:\n{profile_context}")
         
         if university_profile:
             profile_data = university_profile.get('profile', university_profile)
@@ -197,8 +279,7 @@ Examples of good pointers:
 - "The Goizueta Business School's focus on community-minded leadership aligns with your Key Club work - explore how"
 """
 
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model="gemini-2.5-flash-lite",
             contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
             config=types.GenerateContentConfig(
@@ -272,10 +353,10 @@ def generate_essay_starters(
         dict with 'success', 'starters' (list of 3 openers), and 'context_used'
     """
     try:
-        # Fetch all context data
-        student_profile = get_student_profile(user_email)
-        fit_analysis = get_fit_analysis(user_email, university_id)
-        university_profile = fetch_university_profile(university_id)
+        context = load_essay_context(user_email, university_id)
+        student_profile = context['student_profile']
+        fit_analysis = context['fit_analysis']
+        university_profile = context['university_profile']
         
         # Build context for LLM
         context_parts = []
@@ -283,16 +364,8 @@ def generate_essay_starters(
         
         # Student profile context
         if student_profile:
-            # Extract key student info
-            student_summary = {
-                "name": student_profile.get("full_name", ""),
-                "intended_major": student_profile.get("intended_major", ""),
-                "interests": student_profile.get("academic_interests", []),
-                "activities": student_profile.get("activities", []),
-                "achievements": student_profile.get("honors_awards", []),
-                "personal_qualities": student_profile.get("personal_qualities", [])
-            }
-            context_parts.append(f"STUDENT PROFILE:\n{json.dumps(student_summary, indent=2, default=str)}")
+            profile_context = get_profile_context(user_email, student_profile, surface='essay_starters')
+            context_parts.append(f"STUDENT PROFILE:\n{profile_context}")
             context_used.append("student_profile")
         
         # Fit analysis context (essay angles, recommendations)
@@ -319,7 +392,12 @@ def generate_essay_starters(
                 "culture": profile_data.get("student_life", {}).get("campus_culture", ""),
                 "research": profile_data.get("academic_structure", {}).get("research_opportunities", [])[:5],
                 "notable_faculty": profile_data.get("academics", {}).get("notable_faculty", [])[:3],
-                "essay_tips": profile_data.get("student_insights", {}).get("essay_tips", [])
+                "essay_tips": profile_data.get("student_insights", {}).get("essay_tips", []),
+                "admissions_philosophy": profile_data.get("strategic_profile", {}).get("admissions_philosophy", ""),
+                "essay_requirements": [
+                    r.get("details") for r in profile_data.get("application_process", {}).get("supplemental_requirements", [])
+                    if isinstance(r, dict) and r.get("requirement_type") == "Essays"
+                ][:3]
             }
             context_parts.append(f"UNIVERSITY PROFILE:\n{json.dumps(uni_context, indent=2, default=str)}")
             context_used.append("university_profile")
@@ -356,8 +434,7 @@ Return ONLY a JSON array of exactly 3 coaching hooks (not complete essay sentenc
 ["Hook 1: Recall the moment when...", "Hook 2: What did it feel like when...", "Hook 3: Try opening with..."]"""
 
         # Call Gemini
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model="gemini-2.5-flash-lite",
             contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
             config=types.GenerateContentConfig(
@@ -425,7 +502,8 @@ def get_copilot_suggestion(
     current_text: str,
     action: str = "suggest",
     university_id: str = "",
-    user_email: str = ""
+    user_email: str = "",
+    cursor: int = None
 ) -> dict:
     """
     Get real-time copilot suggestions while writing.
@@ -435,127 +513,13 @@ def get_copilot_suggestion(
     - "suggest": Suggest 3 different next sentence options
     - "expand": Expand on the current thought
     
+    Only the text just before the cursor is sent and answers are cached
+    (see copilot_suggestions); the editor debounces bursts.
+    
     Returns:
-        dict with 'success', 'suggestions' (list for suggest, single for others), 'type'
+        dict with 'success', 'suggestions' (list for suggest, single for others), 'type', 'cached'
     """
-    try:
-        # For 'suggest', we want multiple coaching pointers
-        if action == "suggest":
-            system_prompt = f"""The student is writing a college essay for this prompt: "{prompt_text}"
-
-What they've written so far: "{current_text}"
-
-As a writing coach, give 3 different POINTERS to help them decide what to write next. DO NOT write sentences for them. Instead provide:
-
-1. REFLECTION POINTER: Ask a question about their feelings, realizations, or growth related to what they just wrote
-   Example: "What did you learn about yourself in that moment?"
-   
-2. DETAIL POINTER: Suggest adding sensory details or specifics
-   Example: "Can you describe what you saw, heard, or felt physically?"
-   
-3. CONNECTION POINTER: Suggest how to connect this to the bigger picture (their goals, the university, their growth)
-   Example: "How does this connect to why you want to study [their intended major]?"
-
-Keep each pointer to ONE short question or prompt. These should push the student to think, not give them the answer.
-
-Return ONLY a JSON array of 3 coaching pointers:
-["Reflection: What did...", "Detail: Describe...", "Connection: How does..."]"""
-            
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            response = client.models.generate_content(
-                model="gemini-2.5-flash-lite",
-                contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
-                config=types.GenerateContentConfig(
-                    temperature=0.8,
-                    max_output_tokens=512
-                )
-            )
-            
-            text = response.text.strip()
-            # Clean markdown if present
-            if text.startswith("```"):
-                text = text.split("```")[1]
-                if text.startswith("json"):
-                    text = text[4:]
-            text = text.strip()
-            
-            suggestions = json.loads(text)
-            if not isinstance(suggestions, list):
-                suggestions = [suggestions]
-            
-            # Normalize: ensure all items are plain strings (LLM sometimes returns objects)
-            normalized = []
-            for s in suggestions[:3]:
-                if isinstance(s, dict):
-                    normalized.append(s.get('prompt', s.get('pointer', s.get('suggestion', str(s)))))
-                else:
-                    normalized.append(str(s))
-            
-            logger.info(f"[ESSAY_COPILOT] Generated {len(normalized)} suggestions")
-            
-            return {
-                "success": True,
-                "suggestions": normalized,
-                "type": action
-            }
-        
-        else:
-            # For complete and expand, single coaching response
-            action_prompts = {
-                "complete": f"""The student is finishing a sentence for this essay prompt: "{prompt_text}"
-
-Current text: "{current_text}"
-
-As a coach, give ONE guiding question to help them complete their thought authentically. DO NOT write the completion for them.
-Example: "What was the result of that action?" or "How did that make you feel?"
-Keep it to one short question.""",
-
-                "expand": f"""The student is writing a college essay for this prompt: "{prompt_text}"
-
-Current text: "{current_text}"
-
-As a coach, give ONE guiding prompt to help them deepen their last point. DO NOT write it for them. Instead ask:
-- A question about specifics they could add (who, what, where, when)
-- A question about the emotional impact or lesson learned
-- A connection to make to their future goals
-
-Keep it to one clear, thought-provoking question."""
-            }
-            
-            if action not in action_prompts:
-                action = "expand"
-            
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            response = client.models.generate_content(
-                model="gemini-2.5-flash-lite",
-                contents=[types.Content(role="user", parts=[types.Part(text=action_prompts[action])])],
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    max_output_tokens=256
-                )
-            )
-            
-            suggestion = response.text.strip()
-            
-            # Clean up quotes if present
-            if suggestion.startswith('"') and suggestion.endswith('"'):
-                suggestion = suggestion[1:-1]
-            
-            logger.info(f"[ESSAY_COPILOT] Generated {action} suggestion")
-            
-            return {
-                "success": True,
-                "suggestions": [suggestion],
-                "type": action
-            }
-        
-    except Exception as e:
-        logger.error(f"[ESSAY_COPILOT] Copilot suggestion failed: {e}", exc_info=True)
-        return {
-            "success": False,
-            "error": str(e),
-            "suggestions": []
-        }
+    return copilot_suggestions.suggest(prompt_text, current_text, action, cursor=cursor)
 
 
 def essay_chat(
@@ -581,11 +545,12 @@ def essay_chat(
     """
     try:
         # Fetch complete context
-        student_profile = get_student_profile(user_email)
-        university_profile = fetch_university_profile(university_id)
+        context = load_essay_context(user_email, university_id)
+        student_profile = context['student_profile']
+        university_profile = context['university_profile']
         
         # Get fit analysis if available
-        fit_analysis = get_fit_analysis(user_email, university_id)
+        fit_analysis = context['fit_analysis']
         if not fit_analysis:
             logger.warning(f"[ESSAY_CHAT] Fit analysis not found for {university_id}")
         
@@ -593,26 +558,8 @@ def essay_chat(
         context_parts = []
         
         if student_profile:
-            # Complete student profile
-            activities = student_profile.get('activities', [])
-            activities_str = ', '.join([a.get('name', a) if isinstance(a, dict) else str(a) for a in activities[:8]])
-            qualities = student_profile.get('personal_qualities', [])[:5]
-            qualities_str = ', '.join([q.get('name', q) if isinstance(q, dict) else str(q) for q in qualities])
-            awards = student_profile.get('awards', [])[:5]
-            awards_str = ', '.join([a.get('name', a) if isinstance(a, dict) else str(a) for a in awards])
-            interests = student_profile.get('academic_interests', [])
-            interests_str = ', '.join([i if isinstance(i, str) else str(i) for i in interests])
-            
-            context_parts.append(f"""COMPLETE STUDENT PROFILE:
-- Name: {student_profile.get('name', 'Not specified')}
-- Grade: {student_profile.get('grade', 'Not specified')}
-- GPA: {student_profile.get('gpa', 'Not specified')}
-- Intended Major: {student_profile.get('intended_major', 'Not specified')}
-- Academic Interests: {interests_str}
-- Career Goals: {student_profile.get('career_goals', 'Not specified')}
-- Key Activities: {activities_str}
-- Personal Qualities: {qualities_str}
-- Awards/Honors: {awards_str}""")
+            profile_context = get_profile_context(user_email, student_profile, surface='essay_chat')
+            context_parts.append(f"COMPLETE STUDENT PROFILE:\n{profile_context}")
         
         if university_profile:
             profile_data = university_profile.get('profile', university_profile)
@@ -656,8 +603,7 @@ CRITICAL RULES:
 4. Keep the response concise (2-4 sentences max)
 5. Suggest how they might incorporate accurate information into their essay"""
 
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model="gemini-2.5-flash-lite",
             contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
             config=types.GenerateContentConfig(
@@ -720,8 +666,7 @@ Provide feedback in this exact JSON format:
 
 Be encouraging but honest. Focus on specific, actionable feedback."""
 
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model="gemini-2.5-flash-lite",
             contents=[types.Content(role="user", parts=[types.Part(text=system_prompt)])],
             config=types.GenerateContentConfig(
@@ -758,10 +703,6 @@ Be encouraging but honest. Focus on specific, actionable feedback."""
         }
 
 
-# Essay Draft Index
-ES_ESSAY_DRAFTS_INDEX = os.getenv("ES_ESSAY_DRAFTS_INDEX", "essay_drafts")
-
-
 def save_essay_draft(
     user_email: str,
     university_id: str,
@@ -773,82 +714,38 @@ def save_essay_draft(
     version_name: str = ""
 ) -> dict:
     """
-    Save essay draft to Elasticsearch.
-    Supports multiple versions per prompt.
-    
     Save essay draft to Firestore.
+    Supports multiple versions per prompt. Each save stores only the edit
+    since the last one (see essay_drafts).
     
     Returns:
         dict with 'success' and 'draft_id'
     """
     try:
-        from firestore_db import get_db
-        db = get_db()
-        
-        # Create unique draft ID
-        draft_id = f"prompt_{prompt_index}_v{version}"
-        
-        # Build draft document
-        draft = {
-            "university_id": university_id,
-            "prompt_index": prompt_index,
-            "prompt_text": prompt_text,
-            "draft_text": draft_text,
-            "notes": notes or [],
-            "version": version,
-            "version_name": version_name or (f"Version {version + 1}" if version > 0 else "Main Draft"),
-            "word_count": len(draft_text.split()) if draft_text else 0,
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        
-        # Save to Firestore (will merge with existing or create new)
-        success = db.save_conversation(user_email, draft_id, draft)  # Reusing conversation storage
-        
-        logger.info(f"[ESSAY_COPILOT] Saved draft: {draft_id}, {draft['word_count']} words")
-        
-        return {
-            "success": success,
-            "draft_id": draft_id,
-            "version": version,
-            "word_count": draft['word_count']
-        }
-        
+        return essay_drafts.save_draft(user_email, university_id, prompt_index, prompt_text,
+                                       draft_text, notes, version, version_name)
     except Exception as e:
         logger.error(f"[ESSAY_COPILOT] Draft save failed: {e}")
         return {
             "success": False,
             "error": str(e)
         }
+
+
 def get_essay_drafts(
     user_email: str,
     university_id: str = None
 ) -> dict:
     """
-    Get all essay drafts for a user from Firestore.
+    Get essay draft metadata for a user from Firestore (no draft text —
+    fetch a version's text with get_essay_draft).
     Optionally filter by university_id.
     
     Returns:
         dict with 'drafts' list
     """
     try:
-        from firestore_db import get_db
-        db = get_db()
-        
-        # Get all conversations (which include essay drafts)
-        all_conversations = db.list_conversations(user_email)
-        
-        # Filter for essay drafts (those starting with "prompt_")
-        drafts = []
-        for conv in all_conversations:
-            conv_id = conv.get('conversation_id', '')
-            if conv_id.startswith('prompt_'):
-                # Check university filter if provided
-                if university_id and conv.get('university_id') != university_id:
-                    continue
-                drafts.append(conv)
-        
-        # Sort by updated_at descending
-        drafts.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+        drafts = essay_drafts.list_drafts(user_email, university_id)
         
         logger.info(f"[ESSAY_COPILOT] Retrieved {len(drafts)} drafts for {user_email}")
         
@@ -867,6 +764,30 @@ def get_essay_drafts(
         }
 
 
+def get_essay_draft(
+    user_email: str,
+    university_id: str,
+    prompt_index: int,
+    version: int = 0
+) -> dict:
+    """
+    Get one draft version, text reconstructed from its snapshot + deltas.
+    
+    Returns:
+        dict with 'draft' (None if it doesn't exist)
+    """
+    try:
+        draft = essay_drafts.get_draft(user_email, university_id, prompt_index, version)
+        return {"success": True, "draft": draft}
+    except Exception as e:
+        logger.error(f"[ESSAY_COPILOT] Get draft failed: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "draft": None
+        }
+
+
 def generate_essay_outline(user_email: str, university_id: str, prompt_text: str, selected_hook: str = None, word_limit: int = None) -> dict:
     """
     Generate a personalized essay outline based on prompt, profile, and selected hook.
@@ -882,33 +803,20 @@ def generate_essay_outline(user_email: str, university_id: str, prompt_text: str
         dict with outline structure, word counts, and writing tips
     """
     try:
-        db = get_db()
+        context = load_essay_context(user_email, university_id)
         
-        # Get student profile from Firestore
-        profile_doc = db.get_profile(user_email)
+        profile_doc = context['student_profile']
         if not profile_doc:
             return {
                 "success": False,
                 "error": "Student profile not found"
             }
         
-        # Extract key profile information
-        profile_summary = {
-            "name": profile_doc.get("full_name", "Student"),
-            "grade": profile_doc.get("grade", ""),
-            "interests": profile_doc.get("interests", []),
-            "activities": profile_doc.get("extracurriculars", []),
-            "achievements": profile_doc.get("achievements", []),
-            "intended_major": profile_doc.get("intended_major", ""),
-            "background": {
-                "ethnicity": profile_doc.get("ethnicity", ""),
-                "first_gen": profile_doc.get("first_generation", False),
-                "income_level": profile_doc.get("income_level", "")
-            }
-        }
+        # Bounded, deduplicated profile context (cached on the profile doc)
+        profile_context = get_profile_context(user_email, profile_doc, surface='essay_outline')
         
-        # Get university profile for additional context
-        university_profile = fetch_university_profile(university_id)
+        # University profile for additional context
+        university_profile = context['university_profile']
         university_name = "the university"
         if university_profile:
             university_name = university_profile.get('profile', {}).get('metadata', {}).get('official_name', university_name)
@@ -953,8 +861,6 @@ def generate_essay_outline(user_email: str, university_id: str, prompt_text: str
             num_body_paras = 2
         
         # Build Gemini prompt
-        profile_json = json.dumps(profile_summary, indent=2, default=str)
-        
         system_prompt = f"""You are an expert college essay coach. Generate a detailed essay outline for a student.
 
 ESSAY PROMPT:
@@ -963,7 +869,7 @@ ESSAY PROMPT:
 WORD LIMIT: {word_limit} words total (CRITICAL: outline must sum to EXACTLY {word_limit} words)
 
 STUDENT PROFILE:
-{profile_json}
+{profile_context}
 
 UNIVERSITY: {university_name}
 
@@ -1025,8 +931,7 @@ Return ONLY valid JSON in this format:
 }}"""
 
         # Call Gemini
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model="gemini-2.5-flash-lite",
             contents=system_prompt,
             config=types.GenerateContentConfig(
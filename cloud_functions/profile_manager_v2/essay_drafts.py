@@ -0,0 +1,205 @@
+"""
+Essay draft store: a base snapshot plus compact text deltas per save.
+
+Drafts used to be written whole (draft_text and all) on every autosave into
+the generic chat_conversations collection, and listed by streaming every one
+of those docs back. Autosave fires constantly and each prompt can carry
+several versions across 10+ schools, so that was many near-identical copies
+of long essays, stored and transferred over and over.
+
+Layout, per (university, prompt, version):
+
+    users/{uid}/essay_drafts/{draft_id}             header — metadata only
+    users/{uid}/essay_drafts/{draft_id}/revisions/  {seq:06d} docs:
+        {'seq', 'snapshot': <full text>}                  or
+        {'seq', 'at', 'del', 'ins'}    splice: replace text[at:at+del] by ins
+
+A save diffs the new text against the head (common prefix/suffix, so an edit
+costs its own size) and writes one revision plus the header fields that
+changed. Every SNAPSHOT_EVERY deltas, or when a delta would rewrite most of
+the essay, it writes a fresh snapshot instead and drops the revisions before
+it. Reading a version replays the latest snapshot and the deltas after it.
+
+The head text of recently saved drafts is cached per instance (keyed by the
+header's head seq), so an autosave burst doesn't replay the chain each time.
+
+Two saves can race (two tabs, an autosave next to an explicit save). The write
+is a compare-and-set on the header's head: a save whose head moved underneath
+it re-reads the header and re-diffs against the new head, up to SAVE_ATTEMPTS
+times, so a seq is never written twice and no delta lands on the wrong base.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from firestore_db import get_db
+
+logger = logging.getLogger(__name__)
+
+# Deltas between snapshots; bounds the replay a cold read pays.
+SNAPSHOT_EVERY = int(os.getenv('ESSAY_DRAFT_SNAPSHOT_EVERY', '25'))
+# A delta inserting more than this share of the new text is stored as a
+# snapshot — it is nearly as big, and it shortens the chain.
+SNAPSHOT_RATIO = 0.5
+HEAD_CACHE_SIZE = 256
+# Compare-and-set attempts per save before giving up on a contended draft.
+SAVE_ATTEMPTS = 5
+
+_heads: 'OrderedDict[Tuple[str, str], Tuple[int, str]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def draft_key(university_id: str, prompt_index: int, version: int) -> str:
+    return f"{university_id}__prompt_{prompt_index}_v{version}"
+
+
+def reset_cache() -> None:
+    with _lock:
+        _heads.clear()
+
+
+# ---- Deltas ----------------------------------------------------------------
+
+
+def make_delta(old: str, new: str) -> Optional[Dict]:
+    """One splice turning `old` into `new`, or None when they're equal."""
+    if old == new:
+        return None
+    prefix = len(os.path.commonprefix([old, new]))
+    limit = min(len(old), len(new)) - prefix
+    suffix = 0
+    while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return {'at': prefix, 'del': len(old) - prefix - suffix,
+            'ins': new[prefix:len(new) - suffix]}
+
+
+def apply_delta(text: str, delta: Dict) -> str:
+    at = delta['at']
+    return text[:at] + delta['ins'] + text[at + delta['del']:]
+
+
+def replay(revisions: List[Dict]) -> str:
+    """Text after applying revisions in order (the first must be a snapshot)."""
+    text = None
+    for rev in revisions:
+        if 'snapshot' in rev:
+            text = rev['snapshot']
+        elif text is None:
+            raise ValueError(f"revision {rev.get('seq')} has no snapshot before it")
+        else:
+            text = apply_delta(text, rev)
+    if text is None:
+        raise ValueError("no snapshot in revision chain")
+    return text
+
+
+# ---- Store -----------------------------------------------------------------
+
+
+def _head_text(db, user_id: str, draft_id: str, header: Dict) -> str:
+    head = header.get('head')
+    with _lock:
+        cached = _heads.get((user_id, draft_id))
+    if cached and cached[0] == head:
+        return cached[1]
+    text = replay(db.get_essay_draft_revisions(user_id, draft_id, header.get('snapshot_seq', 0)))
+    _remember(user_id, draft_id, head, text)
+    return text
+
+
+def _remember(user_id: str, draft_id: str, head: int, text: str) -> None:
+    with _lock:
+        _heads[(user_id, draft_id)] = (head, text)
+        _heads.move_to_end((user_id, draft_id))
+        while len(_heads) > HEAD_CACHE_SIZE:
+            _heads.popitem(last=False)
+
+
+def save_draft(user_id: str, university_id: str, prompt_index: int, prompt_text: str,
+               draft_text: str, notes: list = None, version: int = 0,
+               version_name: str = "") -> Dict:
+    """Save one autosave/explicit save. Returns {'success', 'draft_id',
+    'version', 'word_count', 'revision'} — revision is 'snapshot', 'delta'
+    or None when only metadata changed."""
+    db = get_db()
+    draft_id = draft_key(university_id, prompt_index, version)
+    text = draft_text or ''
+    meta = {
+        'university_id': university_id,
+        'prompt_index': prompt_index,
+        'prompt_text': prompt_text,
+        'version': version,
+        'version_name': version_name or (f"Version {version + 1}" if version > 0 else "Main Draft"),
+        'notes': notes or [],
+        'word_count': len(text.split()),
+    }
+
+    status, kind = 'conflict', None
+    for _attempt in range(SAVE_ATTEMPTS):
+        now = datetime.utcnow().isoformat()
+        header = db.get_essay_draft_header(user_id, draft_id)
+        patch = {k: v for k, v in meta.items() if (header or {}).get(k) != v}
+        patch['updated_at'] = now
+
+        revision, prune, kind = None, (), None
+        if header is None:
+            patch.update(created_at=now, head=0, snapshot_seq=0, deltas_since_snapshot=0)
+            revision, kind = {'seq': 0, 'snapshot': text}, 'snapshot'
+        else:
+            delta = make_delta(_head_text(db, user_id, draft_id, header), text)
+            if delta is not None:
+                seq = header['head'] + 1
+                since = header.get('deltas_since_snapshot', 0) + 1
+                if since > SNAPSHOT_EVERY or len(delta['ins']) > SNAPSHOT_RATIO * max(len(text), 1):
+                    revision, kind = {'seq': seq, 'snapshot': text}, 'snapshot'
+                    prune = range(header.get('snapshot_seq', 0), seq)
+                    patch.update(snapshot_seq=seq, deltas_since_snapshot=0)
+                else:
+                    revision, kind = {'seq': seq, **delta}, 'delta'
+                    patch['deltas_since_snapshot'] = since
+                patch['head'] = seq
+
+        if revision is not None:
+            revision['saved_at'] = now
+        status = db.write_essay_draft(user_id, draft_id, patch, revision, prune,
+                                      expected_head=header['head'] if header else None)
+        if status != 'conflict':
+            break
+        logger.info(f"[ESSAY_DRAFTS] Concurrent save on {draft_id}; retrying against the new head")
+
+    success = status == 'written'
+    if success and revision is not None:
+        _remember(user_id, draft_id, revision['seq'], text)
+    logger.info(f"[ESSAY_DRAFTS] Saved {draft_id} ({kind or 'metadata only'}), {meta['word_count']} words")
+    return {
+        'success': success,
+        'draft_id': draft_id,
+        'version': version,
+        'word_count': meta['word_count'],
+        'revision': kind,
+    }
+
+
+def list_drafts(user_id: str, university_id: str = None) -> List[Dict]:
+    """Draft metadata (no text), most recently updated first."""
+    drafts = get_db().list_essay_draft_headers(user_id, university_id)
+    drafts.sort(key=lambda d: d.get('updated_at') or '', reverse=True)
+    return drafts
+
+
+def get_draft(user_id: str, university_id: str, prompt_index: int, version: int = 0) -> Optional[Dict]:
+    """One version with its reconstructed draft_text, or None."""
+    db = get_db()
+    draft_id = draft_key(university_id, prompt_index, version)
+    header = db.get_essay_draft_header(user_id, draft_id)
+    if header is None:
+        return None
+    text = _head_text(db, user_id, draft_id, header)
+    public = {k: v for k, v in header.items()
+              if k not in ('head', 'snapshot_seq', 'deltas_since_snapshot')}
+    return {'draft_id': draft_id, **public, 'draft_text': text}
@@ -0,0 +1,231 @@
+"""
+Essay tracker sync: college list → tracker entries, incrementally.
+
+The sync-essay-tracker route used to walk the whole college list on every
+dashboard load — one KB profile GET per non-UC school, in sequence, full
+profiles — and then stream the user's entire tracker (every draft's text
+included) just to learn which prompts already had entries.
+
+A marker doc, users/{uid}/essay_tracker_sync/state, now records what the last
+sync covered:
+
+    schools     {university_id: {data_year, content_hash, checked_at}} for
+                each non-UC school whose KB prompts were synced
+    uc_schools  sorted UC short names the shared PIQs were synced for
+    synced_at
+
+A sync diffs the college list against it and fetches only schools that are
+new to the list or whose entry is older than SYNC_RECHECK_SECONDS (KB edits
+can't be seen without asking the KB, so entries are re-checked on a slow
+clock, the same way the college list view ages its KB columns). Those are
+fetched in ONE KB batch call projected to `application_process`; a school
+whose data_year and content_hash haven't moved is re-stamped without
+re-reading its prompts. ``full=True`` ignores the marker, so a full resync of
+15 schools is still a single KB round trip.
+
+Entries stay create-only, as before: FirestoreDB.sync_essay_tracker reads
+just the candidate ids and commits new entries and the updated marker in one
+batch. Schools dropped from the list leave the marker (their entries are kept)
+so re-adding one syncs it again.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from firestore_db import get_db
+from fit_staleness import batch_fetch_universities
+
+logger = logging.getLogger(__name__)
+
+# KB profile sections the sync reads (essay prompts live in application_process).
+ESSAY_SYNC_SECTIONS = ('application_process',)
+
+# A synced school is re-checked against the KB after this long.
+SYNC_RECHECK_SECONDS = int(os.getenv("ESSAY_SYNC_RECHECK_SECONDS", str(7 * 24 * 3600)))
+
+# Hardcoded UC Personal Insight Questions (2025-2026) - All UC schools share these 8 prompts
+UC_PIQ_PROMPTS = [
+    {"prompt": "Describe an example of your leadership experience in which you have positively influenced others, helped resolve disputes or contributed to group efforts over time.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "Every person has a creative side, and it can be expressed in many ways: problem solving, original and innovative thinking, and artistically, to name a few. Describe how you express your creative side.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "What would you say is your greatest talent or skill? How have you developed and demonstrated that talent over time?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "Describe how you have taken advantage of a significant educational opportunity or worked to overcome an educational barrier you have faced.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "Describe the most significant challenge you have faced and the steps you have taken to overcome this challenge. How has this challenge affected your academic achievement?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "Think about an academic subject that inspires you. Describe how you have furthered this interest inside and/or outside of the classroom.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "What have you done to make your school or your community a better place?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+    {"prompt": "Beyond what has already been shared in your application, what do you believe makes you a strong candidate for admissions to the University of California?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
+]
+
+# (substring of official name, substring of id) -> UC short name
+_UC_SHORT_NAMES = (
+    ('Los Angeles', 'los_angeles', 'UCLA'),
+    ('San Diego', 'san_diego', 'UCSD'),
+    ('Berkeley', 'berkeley', 'UC Berkeley'),
+    ('Davis', 'davis', 'UC Davis'),
+    ('Irvine', 'irvine', 'UCI'),
+    ('Santa Barbara', 'santa_barbara', 'UCSB'),
+    ('Santa Cruz', 'santa_cruz', 'UCSC'),
+    ('Riverside', 'riverside', 'UCR'),
+    ('Merced', 'merced', 'UC Merced'),
+)
+
+
+def uc_short_name(university_id: str, university_name: str) -> Optional[str]:
+    """"UCLA", "UC Berkeley", … for a UC campus (the official name when the
+    campus isn't recognised); None for a non-UC school."""
+    if not ('university_of_california' in university_id.lower() or
+            university_name.startswith('University of California')):
+        return None
+    for name_part, id_part, short in _UC_SHORT_NAMES:
+        if name_part in university_name or id_part in university_id:
+            return short
+    return university_name
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _is_fresh(entry: Optional[Dict], now: datetime) -> bool:
+    try:
+        checked = datetime.fromisoformat(entry['checked_at'])
+    except (TypeError, KeyError, ValueError):
+        return False
+    if checked.tzinfo is None:
+        checked = checked.replace(tzinfo=timezone.utc)
+    return (now - checked).total_seconds() < SYNC_RECHECK_SECONDS
+
+
+def _essay_prompts(uni_data: Dict) -> List:
+    """Essay prompts from a KB doc - check multiple possible locations."""
+    profile_data = uni_data.get('profile') or uni_data
+    return (
+        (profile_data.get('application_process') or {}).get('essay_prompts', []) or
+        (uni_data.get('application_process') or {}).get('essay_prompts', []) or
+        uni_data.get('essay_prompts', [])
+    )
+
+
+def _school_essays(university_id: str, university_name: str, uni_data: Dict) -> List[Dict]:
+    essays = []
+    seen_prompts = set()  # (university_id, prompt_text[:50]) to avoid duplicates
+    for prompt in _essay_prompts(uni_data):
+        if not isinstance(prompt, dict):
+            continue
+        prompt_text = prompt.get('prompt', '') or prompt.get('prompt_text', '')
+        if not prompt_text:
+            continue
+        dedup_key = (university_id, prompt_text[:50].strip().lower())
+        if dedup_key in seen_prompts:
+            continue
+        seen_prompts.add(dedup_key)
+
+        prompt_copy = dict(prompt)
+        prompt_copy['university_id'] = university_id
+        prompt_copy['university_name'] = university_name
+        prompt_copy['type'] = prompt.get('type', 'Supplement')
+        essays.append(prompt_copy)
+    return essays
+
+
+def sync_essay_tracker(user_id: str, full: bool = False,
+                       fetch_batch: Callable = batch_fetch_universities) -> Dict:
+    """
+    Bring the user's essay tracker up to date with their college list.
+
+    Args:
+        user_id: User's email
+        full: Ignore the sync marker and re-check every school
+        fetch_batch: KB batch fetcher (injectable for tests)
+
+    Returns:
+        Dict with success, essays_synced (prompts considered this run),
+        schools_fetched, total_essays and the tracker's essays
+    """
+    db = get_db()
+    college_list = db.get_college_list(user_id)
+    if not college_list:
+        return {'success': True, 'message': 'No colleges in list',
+                'essays_synced': 0, 'schools_fetched': 0, 'essays': []}
+
+    previous = {} if full else (db.get_essay_tracker_sync_state(user_id) or {})
+    prev_schools = previous.get('schools') or {}
+    now = _now()
+
+    uc_schools = set()
+    non_uc = {}  # university_id -> display name, in list order
+    for college in college_list:
+        university_id = college.get('university_id') or ''
+        if not university_id:
+            continue
+        university_name = college.get('university_name') or university_id.replace('_', ' ').title()
+        short = uc_short_name(university_id, university_name)
+        if short:
+            # UC schools only use the 8 shared PIQs, no school-specific supplements
+            uc_schools.add(short)
+        else:
+            non_uc[university_id] = university_name
+
+    all_essays = []
+    if uc_schools and sorted(uc_schools) != previous.get('uc_schools'):
+        uc_display_name = f"UC Application ({', '.join(sorted(uc_schools))})"
+        logger.info(f"[ESSAY_SYNC] Adding 8 UC PIQs for: {uc_display_name}")
+        for prompt in UC_PIQ_PROMPTS:
+            prompt_copy = dict(prompt)
+            prompt_copy['university_id'] = 'uc_system'
+            prompt_copy['university_name'] = uc_display_name
+            prompt_copy['selection_rule'] = {'required': 4, 'of': 8}
+            all_essays.append(prompt_copy)
+
+    # Carry forward still-listed schools; re-check only new or aged ones.
+    schools = {uid: prev_schools[uid] for uid in non_uc if uid in prev_schools}
+    to_fetch = [uid for uid in non_uc if not _is_fresh(schools.get(uid), now)]
+
+    fetched = {}
+    if to_fetch:
+        for doc in fetch_batch(to_fetch, sections=list(ESSAY_SYNC_SECTIONS)).values():
+            # A stale slug comes back under its canonical id + resolved_from.
+            asked = doc.get('resolved_from') or doc.get('university_id')
+            if asked in non_uc:
+                fetched[asked] = doc
+
+    for university_id in to_fetch:
+        uni_data = fetched.get(university_id)
+        if not uni_data:
+            # Not marked, so the next sync tries it again.
+            logger.warning(f"[ESSAY_SYNC] No KB data for {university_id}")
+            schools.pop(university_id, None)
+            continue
+        entry = {'data_year': uni_data.get('data_year'),
+                 'content_hash': uni_data.get('content_hash'),
+                 'checked_at': now.isoformat()}
+        prior = schools.get(university_id)
+        schools[university_id] = entry
+        if (prior and prior.get('content_hash') and
+                (prior.get('data_year'), prior.get('content_hash')) ==
+                (entry['data_year'], entry['content_hash'])):
+            continue  # KB unchanged since the last sync — nothing new to add
+        essays = _school_essays(university_id, non_uc[university_id], uni_data)
+        if essays:
+            logger.info(f"[ESSAY_SYNC] Found {len(essays)} prompts for {non_uc[university_id]}")
+        else:
+            logger.info(f"[ESSAY_SYNC] No essay prompts found for {university_id}")
+        all_essays.extend(essays)
+
+    state = {'schools': schools, 'uc_schools': sorted(uc_schools)}
+    if all_essays or state != {'schools': prev_schools, 'uc_schools': previous.get('uc_schools') or []}:
+        state['synced_at'] = now.isoformat()
+        if not db.sync_essay_tracker(user_id, all_essays, sync_state=state):
+            return {'success': False, 'error': 'Failed to write essay tracker'}
+
+    essays = db.get_essay_tracker(user_id)
+    logger.info(f"[ESSAY_SYNC] Synced {len(all_essays)} prompts from {len(to_fetch)} KB lookups, "
+                f"tracker has {len(essays)} essays for {user_id}")
+    return {
+        'success': True,
+        'essays_synced': len(all_essays),
+        'schools_fetched': len(to_fetch),
+        'total_essays': len(essays),
+        'essays': essays,
+    }
@@ -3,8 +3,10 @@ File processing utilities for student profile documents.
 Handles PDF, DOCX, and text file extraction and cleaning.
 """
 
+import hashlib
 import io
 import logging
+
 import fitz  # PyMuPDF
 from pypdf import PdfReader
 from docx import Document
@@ -12,7 +14,8 @@ from docx import Document
 logger = logging.getLogger(__name__)
 
 
-def extract_text_from_file_content(file_content, filename):
+
+def extract_text_from_file_content(file_content, filename, user_id=None):
     """
     Extract text from file content based on extension.
     Uses PyMuPDF (fitz) for PDFs which produces clean, properly formatted text.
@@ -20,6 +23,8 @@ def extract_text_from_file_content(file_content, filename):
     Args:
         file_content: Binary file content
         filename: Original filename with extension
+        user_id: Owner of the document; PDF text is cached under their GCS
+            prefix when given, and not cached at all otherwise
         
     Returns:
         Extracted text string or None if extraction fails
@@ -28,7 +33,7 @@ def extract_text_from_file_content(file_content, filename):
         file_ext = filename.split('.')[-1].lower() if '.' in filename else ''
         
         if file_ext == 'pdf':
-            return _extract_pdf_text(file_content, filename)
+            return _extract_pdf_text(file_content, filename, user_id)
         elif file_ext == 'docx':
             return _extract_docx_text(file_content)
         elif file_ext in ['txt', 'text', 'md', 'csv']:
@@ -42,73 +47,128 @@ def extract_text_from_file_content(file_content, filename):
         return None
 
 
-def _extract_pdf_text(file_content, filename):
-    """Extract text from a PDF.
+def _extract_pdf_text(file_content, filename, user_id=None):
+    """Extract text from a PDF, consulting the extracted-text cache first.
 
-    PyMuPDF (fitz) is tried first for its high-quality layout extraction, but
-    it raises on some otherwise-readable PDFs (e.g. 'code=7: cycle in
-    resources', reproducible even on the latest PyMuPDF). When PyMuPDF fails or
-    yields no text we fall back to pypdf, which parses those files cleanly.
-    See issue #185.
+    Cleaned pages from iter_pdf_pages are joined with blank lines. The result
+    is cached in GCS next to the user's document, tagged with the sha256 of
+    the bytes, so re-processing the same document skips parsing entirely.
+    The cache lives under the user's prefix so the document delete and the
+    profile reset remove it with everything else the user owns.
     """
-    text = _extract_pdf_text_pymupdf(file_content, filename)
-    if text and text.strip():
-        return text
+    digest = hashlib.sha256(file_content).hexdigest() if user_id else None
+    if digest:
+        cached = _read_text_cache(user_id, filename, digest)
+        if cached is not None:
+            logger.info(f"[PDF_EXTRACTION] Cache hit for {filename} ({len(cached)} chars)")
+            return cached
+
+    text = "\n\n".join(iter_pdf_pages(file_content, filename))
+    if not text.strip():
+        logger.error(f"[PDF_EXTRACTION] No text extracted from {filename}")
+        return None
 
-    logger.warning(
-        f"[PDF_EXTRACTION] PyMuPDF produced no text for {filename}; "
-        f"falling back to pypdf"
-    )
-    return _extract_pdf_text_pypdf(file_content, filename)
+    logger.info(f"[PDF_EXTRACTION] Extracted {len(text)} chars from {filename}")
+    if digest:
+        _write_text_cache(user_id, filename, digest, text)
+    return text
 
 
-def _extract_pdf_text_pymupdf(file_content, filename):
-    """Extract text from PDF using PyMuPDF. Returns None on failure."""
-    try:
-        pdf_doc = fitz.open(stream=file_content, filetype="pdf")
-        text_parts = []
+def iter_pdf_pages(file_content, filename=""):
+    """Yield the cleaned text of each non-empty page, in page order.
 
-        for page_num, page in enumerate(pdf_doc):
-            # Extract text with proper layout preservation
-            page_text = page.get_text("text")  # "text" mode preserves paragraphs
-            if page_text.strip():
-                text_parts.append(page_text)
+    PyMuPDF (fitz) is used for its layout-preserving extraction, but it raises
+    on some otherwise-readable PDFs (e.g. 'code=7: cycle in resources',
+    reproducible even on the latest PyMuPDF; see issue #185). Fallback to
+    pypdf is per page: a page fitz can't read (or reads as empty) is taken
+    from pypdf, and only if fitz can't open the file at all does the whole
+    document go through pypdf.
 
-        pdf_doc.close()
+    Extraction is serial. A process pool for long documents was tried and
+    removed: forking from the multithreaded function process risks deadlock,
+    and the service runs on one vCPU, so there was nothing to parallelise.
+    """
+    try:
+        doc = fitz.open(stream=file_content, filetype="pdf")
+    except Exception as e:
+        logger.warning(f"[PDF_EXTRACTION] PyMuPDF can't open {filename} ({e}); falling back to pypdf")
+        yield from _iter_pypdf_pages(file_content, filename)
+        return
 
-        # Join pages with double newlines for clear separation
-        text = "\n\n".join(text_parts)
+    try:
+        yield from _iter_page_range(doc, file_content, 0, doc.page_count, filename)
+    finally:
+        doc.close()
+
+
+class _PypdfPages:
+    """pypdf reader over the same bytes, opened only if a page needs it."""
+
+    def __init__(self, file_content):
+        self.file_content = file_content
+        self._reader = None
+
+    def text(self, page_num):
+        if self._reader is None:
+            self._reader = PdfReader(io.BytesIO(self.file_content))
+        return self._reader.pages[page_num].extract_text() or ""
+
+
+def _iter_page_range(doc, file_content, start, stop, filename):
+    """Cleaned text for pages [start, stop) of an open fitz document, with
+    per-page pypdf fallback."""
+    fallback = _PypdfPages(file_content)
+    for page_num in range(start, stop):
+        try:
+            page_text = doc[page_num].get_text("text")  # "text" mode preserves paragraphs
+        except Exception as e:
+            logger.warning(f"[PDF_EXTRACTION] PyMuPDF failed on page {page_num + 1} of {filename}: {e}")
+            page_text = ""
+        if not page_text.strip():
+            try:
+                page_text = fallback.text(page_num)
+            except Exception as e:
+                logger.warning(f"[PDF_EXTRACTION] pypdf failed on page {page_num + 1} of {filename}: {e}")
+                continue
+        page_text = clean_extracted_text(page_text)
+        if page_text:
+            yield page_text
+
+
+def _iter_pypdf_pages(file_content, filename):
+    """Cleaned page texts via pypdf alone (fitz couldn't open the file)."""
+    try:
+        reader = PdfReader(io.BytesIO(file_content))
+    except Exception as e:
+        logger.error(f"[PDF_EXTRACTION] pypdf failed for {filename}: {e}")
+        return
+    for page_num, page in enumerate(reader.pages):
+        try:
+            page_text = clean_extracted_text(page.extract_text() or "")
+        except Exception as e:
+            logger.warning(f"[PDF_EXTRACTION] pypdf failed on page {page_num + 1} of {filename}: {e}")
+            continue
+        if page_text:
+            yield page_text
 
-        # Clean up any remaining word-per-line formatting issues
-        text = clean_extracted_text(text)
 
-        logger.info(f"[PDF_EXTRACTION] PyMuPDF extracted {len(text)} chars from {filename}")
-        return text
+# --- Extracted-text cache (GCS, per user document, tagged with the sha256) ---
 
+def _read_text_cache(user_id, filename, digest):
+    try:
+        from gcs_storage import get_cached_extracted_text
+        return get_cached_extracted_text(user_id, filename, digest)
     except Exception as e:
-        logger.error(f"[PDF_EXTRACTION] PyMuPDF failed for {filename}: {e}")
+        logger.debug(f"[PDF_EXTRACTION] Text cache unavailable: {e}")
         return None
 
 
-def _extract_pdf_text_pypdf(file_content, filename):
-    """Fallback PDF extractor using pypdf. Returns None on failure."""
+def _write_text_cache(user_id, filename, digest, text):
     try:
-        reader = PdfReader(io.BytesIO(file_content))
-        text_parts = []
-
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            if page_text.strip():
-                text_parts.append(page_text)
-
-        text = clean_extracted_text("\n\n".join(text_parts))
-
-        logger.info(f"[PDF_EXTRACTION] pypdf extracted {len(text)} chars from {filename}")
-        return text
-
+        from gcs_storage import save_cached_extracted_text
+        save_cached_extracted_text(user_id, filename, digest, text)
     except Exception as e:
-        logger.error(f"[PDF_EXTRACTION] pypdf failed for {filename}: {e}")
-        return None
+        logger.debug(f"[PDF_EXTRACTION] Text cache unavailable: {e}")
 
 
 def _extract_docx_text(file_content):
@@ -5,6 +5,8 @@ Provides clean interface for all profile manager database operations.
 
 import os
 import hashlib
+import random
+import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
@@ -26,13 +28,68 @@ NOTES_COLLECTIONS = frozenset({
     'aid_packages',
 })
 
+# College-list fields mirrored into the materialized college_list_view doc —
+# exactly what college_list.get_college_list renders per row. Anything else on
+# a list item (decision, essay state, …) stays on the item doc only.
+VIEW_ITEM_FIELDS = (
+    'university_name', 'status', 'category', 'order', 'added_at', 'notes',
+    'student_notes', 'location', 'acceptance_rate', 'soft_fit_category',
+    'us_news_rank', 'summary', 'logo_url', 'selected_major', 'major_choice',
+)
+VIEW_FIT_FIELDS = ('fit_category', 'match_percentage', 'match_score')
+
+# credits/data fields mirrored into the entitlements projection — the balance
+# and plan, nothing else. The legacy in-document credit_history array (and any
+# other bookkeeping) stays on credits/data only.
+CREDIT_PROJECTION_FIELDS = (
+    'user_id', 'tier', 'credits_total', 'credits_used', 'credits_remaining',
+    'subscription_active', 'subscription_expires', 'subscription_plan',
+    'last_updated', 'updated_at',
+)
+
+# Chat store layout (see CHAT STORE below). The marker tells subcollection-
+# backed headers apart from legacy ones holding a JSON `messages` blob.
+CHAT_MESSAGES_STORE = 'subcollection'
+CHAT_LIST_FIELDS = (
+    'conversation_id', 'title', 'message_count', 'created_at', 'updated_at',
+    'university_id', 'university_name', 'conversation_type',
+)
+
+# Writes per batched commit for every multi-document write in this module
+# (chat messages, tracker syncs, workflow stat flushes). Firestore caps a
+# batch at 500 operations; this leaves headroom.
+WRITE_BATCH_LIMIT = 450
+
+# Essay draft headers as listed (metadata only — text lives in revisions/).
+ESSAY_DRAFT_LIST_FIELDS = (
+    'university_id', 'prompt_index', 'version', 'version_name', 'notes',
+    'word_count', 'created_at', 'updated_at',
+)
+
 # How many recent ISO-week buckets to return per workflow_stat. Bounds the
 # payload (and the surface the "Trending" math needs); the frontend's isoWeekKey
-# must match _iso_week_key below so this/last-week line up across the boundary.
+# must match iso_week_key below so this/last-week line up across the boundary.
 WORKFLOW_WEEKS_KEEP = 8
 
+# Counter shards per workflow signature. Each flush of buffered runs lands on
+# one random shard, so concurrent instances rarely contend on the same doc.
+WORKFLOW_STAT_SHARDS = int(os.getenv('WORKFLOW_STAT_SHARDS', '10'))
+
+
+def _norm(user_id):
+    """Canonicalize the email used as a Firestore document id (same as
+    payment_manager_v2, which writes the same entitlements doc)."""
+    return (user_id or "").strip().lower()
+
+
+def credit_projection(credits: Optional[Dict]) -> Optional[Dict]:
+    """The CREDIT_PROJECTION_FIELDS of a credits doc, or None for no doc."""
+    if credits is None:
+        return None
+    return {k: v for k, v in credits.items() if k in CREDIT_PROJECTION_FIELDS}
+
 
-def _iso_week_key(dt: datetime) -> str:
+def iso_week_key(dt: datetime) -> str:
     """ISO-week key 'YYYY-Www' for a datetime (matches JS isoWeekKey in
     utils/research.js and Python's isocalendar, so write-side and read-side
     agree on which bucket "this week" is)."""
@@ -157,7 +214,51 @@ class FirestoreDB:
         except Exception as e:
             logger.error(f"[Firestore] Error deleting file metadata: {e}")
             return False
-    
+
+    # ==================== UPLOAD JOBS ====================
+    # users/{email}/upload_jobs/{job_id} — one per accepted upload; the job
+    # id is the file's content hash (see upload_pipeline).
+
+    def get_upload_job(self, user_id: str, job_id: str) -> Optional[Dict]:
+        """Get an upload job."""
+        try:
+            doc = self.db.collection('users').document(user_id).collection('upload_jobs').document(job_id).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error(f"[Firestore] Error getting upload job {job_id}: {e}")
+            return None
+
+    def save_upload_job(self, user_id: str, job_id: str, job: Dict) -> bool:
+        """Create (or replace) an upload job."""
+        try:
+            self.db.collection('users').document(user_id).collection('upload_jobs').document(job_id).set(job)
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error saving upload job {job_id}: {e}")
+            return False
+
+    def update_upload_job(self, user_id: str, job_id: str, fields: Dict) -> bool:
+        """Partial update; dotted keys ('stages.extract') touch one stage."""
+        try:
+            self.db.collection('users').document(user_id).collection('upload_jobs').document(job_id).update(fields)
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error updating upload job {job_id}: {e}")
+            return False
+
+    def delete_upload_jobs_for_file(self, user_id: str, filename: str) -> int:
+        """Drop the jobs for a deleted document so re-uploading it reprocesses."""
+        try:
+            jobs_ref = self.db.collection('users').document(user_id).collection('upload_jobs')
+            deleted = 0
+            for doc in jobs_ref.where(filter=FieldFilter('filename', '==', filename)).stream():
+                doc.reference.delete()
+                deleted += 1
+            return deleted
+        except Exception as e:
+            logger.error(f"[Firestore] Error deleting upload jobs for {filename}: {e}")
+            return 0
+
     # ==================== CREDITS ====================
     
     def get_credits(self, user_id: str) -> Optional[Dict]:
@@ -171,24 +272,195 @@ class FirestoreDB:
             return None
     
     def save_credits(self, user_id: str, credits_data: Dict) -> bool:
-        """Save user's credit information."""
+        """Save user's credit information (mirrored into the entitlements projection)."""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('credits').document('data')
-            doc_ref.set(credits_data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, credits_data, merge=True)
+            batch.set(self._entitlements_ref(user_id),
+                      {'credits': credit_projection(credits_data),
+                       'updated_at': datetime.utcnow().isoformat()}, merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Saved credits for {user_id}")
             return True
         except Exception as e:
             logger.error(f"[Firestore] Error saving credits: {e}")
             return False
-    
+
+    def apply_credit_entry(self, user_id: str, entry_id: str, delta: int,
+                           entry: Dict = None, set_fields: Dict = None) -> Dict:
+        """Apply one credit change atomically and record it in the ledger.
+
+        One transaction: read the ledger entry (idempotency) and the balance,
+        then Increment the counters on credits/data and create
+        credits/data/credit_ledger/{entry_id}. Replaying an entry_id is a
+        no-op, so billing retries can't double-charge; concurrent charges
+        can't lose updates; the write size doesn't grow with account age.
+
+        Args:
+            user_id: User's email address
+            entry_id: Idempotency key — the ledger document id
+            delta: Credits to add (>0) or deduct (<0)
+            entry: Extra ledger fields (reason/source, ...)
+            set_fields: Plain fields to set on the credits doc alongside
+
+        Both documents are fetched in one get_all, so a billed action costs
+        exactly one transactional read. The new counters are also written to
+        the entitlements projection and returned as 'credits' (the post-write
+        CREDIT_PROJECTION_FIELDS; the pre-write ones for 'insufficient').
+
+        Returns:
+            {'status': 'applied' | 'duplicate' | 'insufficient' | 'missing',
+             'credits_remaining': int | None, 'credits': dict | None}.
+            Raises on transaction failure.
+        """
+        credits_ref = self.db.collection('users').document(user_id).collection('credits').document('data')
+        ledger_ref = credits_ref.collection('credit_ledger').document(entry_id)
+
+        @firestore.transactional
+        def _apply(transaction):
+            snapshots = {snap.reference.path: snap
+                         for snap in transaction.get_all([ledger_ref, credits_ref])}
+            existing = snapshots.get(ledger_ref.path)
+            if existing is not None and existing.exists:
+                return {'status': 'duplicate', 'credits': None,
+                        'credits_remaining': (existing.to_dict() or {}).get('balance_after')}
+            snapshot = snapshots.get(credits_ref.path)
+            if snapshot is None or not snapshot.exists:
+                return {'status': 'missing', 'credits_remaining': None, 'credits': None}
+            current = snapshot.to_dict() or {}
+            remaining = int(current.get('credits_remaining') or 0)
+            if delta < 0 and remaining < -delta:
+                return {'status': 'insufficient', 'credits_remaining': remaining,
+                        'credits': credit_projection(current)}
+
+            def counter(field, change):
+                # Legacy docs may hold counters as strings; Increment on a
+                # string fails, so those are rewritten as ints (once).
+                value = current.get(field)
+                if isinstance(value, int) or value is None:
+                    return firestore.Increment(change)
+                return int(value) + change
+
+            now = datetime.utcnow().isoformat()
+            updates = {'credits_remaining': counter('credits_remaining', delta), 'last_updated': now}
+            projected = {**credit_projection(current), 'credits_remaining': remaining + delta,
+                         'last_updated': now}
+            if delta < 0:
+                updates['credits_used'] = counter('credits_used', -delta)
+                projected['credits_used'] = int(current.get('credits_used') or 0) - delta
+            else:
+                updates['credits_total'] = counter('credits_total', delta)
+                projected['credits_total'] = int(current.get('credits_total') or 0) + delta
+            updates.update(set_fields or {})
+            projected.update(credit_projection(set_fields or {}))
+            transaction.update(credits_ref, updates)
+            transaction.set(self._entitlements_ref(user_id),
+                            {'credits': projected, 'updated_at': now}, merge=True)
+            transaction.create(ledger_ref, {
+                **(entry or {}),
+                'idempotency_key': entry_id,
+                'amount': delta,
+                'balance_after': remaining + delta,
+                'date': now,
+            })
+            return {'status': 'applied', 'credits_remaining': remaining + delta, 'credits': projected}
+
+        result = _apply(self.db.transaction())
+        logger.info(f"[Firestore] Credit entry {entry_id} for {user_id}: {result['status']}")
+        return result
+
+    def list_credit_ledger(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """Most recent credit ledger entries, newest first."""
+        try:
+            ledger = (self.db.collection('users').document(user_id).collection('credits')
+                      .document('data').collection('credit_ledger'))
+            docs = ledger.order_by('date', direction=firestore.Query.DESCENDING).limit(limit).stream()
+            return [doc.to_dict() for doc in docs]
+        except Exception as e:
+            logger.error(f"[Firestore] Error listing credit ledger: {e}")
+            return []
+
+    # ==================== ENTITLEMENTS ====================
+
+    def _entitlements_ref(self, user_id: str):
+        return self.db.collection('users').document(_norm(user_id)).collection('entitlements').document('data')
+
+    def get_entitlements(self, user_id: str) -> Optional[Dict]:
+        """Merged entitlement projection: {'credits': {...}, 'purchases': {...}}.
+
+        credits/data is mirrored here by save_credits and apply_credit_entry;
+        payment_manager_v2 mirrors purchases/data and its credits sync. Unlike
+        the other getters this RAISES on a read failure, so a blip is never
+        mistaken for a new user (#298).
+        """
+        doc = self._entitlements_ref(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def save_entitlements(self, user_id: str, data: Dict) -> bool:
+        """Merge fields into the entitlements projection (backfill path)."""
+        try:
+            data['updated_at'] = datetime.utcnow().isoformat()
+            self._entitlements_ref(user_id).set(data, merge=True)
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error saving entitlements: {e}")
+            return False
+
+    # ==================== COLLEGE LIST VIEW ====================
+
+    def _college_list_view_ref(self, user_id: str):
+        return self.db.collection('users').document(user_id).collection('college_list_view').document('data')
+
+    @staticmethod
+    def _view_patch(section: str, university_id: str, data: Optional[Dict], fields) -> Dict:
+        """Merge payload for one row of one view section; data=None deletes it."""
+        if data is None:
+            row = firestore.DELETE_FIELD
+        else:
+            row = {k: data[k] for k in fields if k in data}
+        return {section: {university_id: row}, 'updated_at': datetime.utcnow().isoformat()}
+
+    def get_college_list_view(self, user_id: str) -> Optional[Dict]:
+        """Materialized college list: {'items': {id: …}, 'fits': {id: …},
+        'kb': {id: …}, 'complete': bool}. List and fit writes below mirror
+        into it in the same batch; college_list joins it into rows. RAISES on a
+        read failure so the caller rebuilds instead of serving an empty list."""
+        doc = self._college_list_view_ref(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def save_college_list_view(self, user_id: str, view: Dict) -> bool:
+        """Overwrite the view (the rebuild path)."""
+        try:
+            view['updated_at'] = datetime.utcnow().isoformat()
+            self._college_list_view_ref(user_id).set(view)
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error saving college list view: {e}")
+            return False
+
+    def merge_college_list_view(self, user_id: str, data: Dict) -> bool:
+        """Merge rows into the view's sections (KB enrichment refreshes)."""
+        try:
+            data['updated_at'] = datetime.utcnow().isoformat()
+            self._college_list_view_ref(user_id).set(data, merge=True)
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error merging college list view: {e}")
+            return False
+
     # ==================== COLLEGE LIST ====================
     
     def add_to_college_list(self, user_id: str, university_id: str, data: Dict) -> bool:
-        """Add university to user's college list."""
+        """Add university to user's college list (mirrored into the view)."""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('college_list').document(university_id)
             data['added_at'] = datetime.utcnow().isoformat()
-            doc_ref.set(data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, data, merge=True)
+            batch.set(self._college_list_view_ref(user_id),
+                      self._view_patch('items', university_id, data, VIEW_ITEM_FIELDS), merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Added {university_id} to college list")
             return True
         except Exception as e:
@@ -225,17 +497,26 @@ class FirestoreDB:
                        .collection('college_list').document(university_id))
             if not doc_ref.get().exists:
                 return False
-            doc_ref.set(data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, data, merge=True)
+            batch.set(self._college_list_view_ref(user_id),
+                      self._view_patch('items', university_id, data, VIEW_ITEM_FIELDS), merge=True)
+            batch.commit()
             return True
         except Exception as e:
             logger.error(f"[Firestore] Error updating college list item: {e}")
             return False
     
     def remove_from_college_list(self, user_id: str, university_id: str) -> bool:
-        """Remove university from college list."""
+        """Remove university from college list (and its view row)."""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('college_list').document(university_id)
-            doc_ref.delete()
+            patch = self._view_patch('items', university_id, None, ())
+            patch['kb'] = {university_id: firestore.DELETE_FIELD}
+            batch = self.db.batch()
+            batch.delete(doc_ref)
+            batch.set(self._college_list_view_ref(user_id), patch, merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Removed {university_id} from college list")
             return True
         except Exception as e:
@@ -247,7 +528,11 @@ class FirestoreDB:
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('college_list').document(university_id)
             status_data['status_updated_at'] = datetime.utcnow().isoformat()
-            doc_ref.update(status_data)
+            batch = self.db.batch()
+            batch.update(doc_ref, status_data)
+            batch.set(self._college_list_view_ref(user_id),
+                      self._view_patch('items', university_id, status_data, VIEW_ITEM_FIELDS), merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Updated application status for {university_id}: {status_data.get('status', 'unknown')}")
             return True
         except Exception as e:
@@ -347,6 +632,75 @@ class FirestoreDB:
             logger.error(f"[Firestore] Error updating essay status: {e}")
             return False
     
+    # ==================== ESSAY DRAFTS (snapshot + deltas) ====================
+    # essay_drafts/{draft_id} is a metadata header (no text); its revisions/
+    # subcollection holds a snapshot followed by small splice deltas. The
+    # delta logic lives in essay_drafts.py — these methods only move docs.
+
+    def _essay_draft_ref(self, user_id: str, draft_id: str):
+        return self.db.collection('users').document(user_id).collection('essay_drafts').document(draft_id)
+
+    def get_essay_draft_header(self, user_id: str, draft_id: str) -> Optional[Dict]:
+        """Draft header, or None if the draft doesn't exist. RAISES on a read
+        failure — a save must never mistake a blip for a new draft and
+        overwrite its revision chain."""
+        doc = self._essay_draft_ref(user_id, draft_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def list_essay_draft_headers(self, user_id: str, university_id: str = None) -> List[Dict]:
+        """Header fields only (ESSAY_DRAFT_LIST_FIELDS) — never text."""
+        try:
+            query = self.db.collection('users').document(user_id).collection('essay_drafts')
+            if university_id:
+                query = query.where(filter=FieldFilter('university_id', '==', university_id))
+            docs = query.select(list(ESSAY_DRAFT_LIST_FIELDS)).stream()
+            return [{'draft_id': doc.id, **doc.to_dict()} for doc in docs]
+        except Exception as e:
+            logger.error(f"[Firestore] Error listing essay drafts: {e}")
+            return []
+
+    def get_essay_draft_revisions(self, user_id: str, draft_id: str, from_seq: int) -> List[Dict]:
+        """Revisions with seq >= from_seq, oldest first. RAISES on failure."""
+        docs = (self._essay_draft_ref(user_id, draft_id).collection('revisions')
+                .where(filter=FieldFilter('seq', '>=', from_seq)).order_by('seq').stream())
+        return [doc.to_dict() for doc in docs]
+
+    def write_essay_draft(self, user_id: str, draft_id: str, header: Dict,
+                          revision: Optional[Dict] = None, prune_seqs=(),
+                          expected_head: Optional[int] = None) -> str:
+        """One transaction: the new revision (if the text changed), the header
+        fields that changed, and deletes for revisions a new snapshot made
+        unreachable — applied only if the header's head is still
+        `expected_head` (None: the draft must not exist yet). The revision is
+        created, never overwritten, so two concurrent saves can't both write
+        the same seq.
+
+        Returns:
+            'written', 'conflict' (another save moved the head first — re-read
+            and retry) or 'error'.
+        """
+        try:
+            ref = self._essay_draft_ref(user_id, draft_id)
+            revisions = ref.collection('revisions')
+
+            @firestore.transactional
+            def _write(transaction):
+                snapshot = ref.get(transaction=transaction)
+                current = (snapshot.to_dict() or {}).get('head') if snapshot.exists else None
+                if current != expected_head:
+                    return 'conflict'
+                if revision is not None:
+                    transaction.create(revisions.document(f"{revision['seq']:06d}"), revision)
+                for seq in prune_seqs:
+                    transaction.delete(revisions.document(f"{seq:06d}"))
+                transaction.set(ref, header, merge=True)
+                return 'written'
+
+            return _write(self.db.transaction())
+        except Exception as e:
+            logger.error(f"[Firestore] Error writing essay draft {draft_id}: {e}")
+            return 'error'
+
     # ==================== FINANCIAL AID PACKAGES ====================
     
     def save_aid_package(self, user_id: str, university_id: str, aid_data: Dict) -> bool:
@@ -387,11 +741,15 @@ class FirestoreDB:
     # ==================== COLLEGE FITS ====================
     
     def save_college_fit(self, user_id: str, university_id: str, fit_data: Dict) -> bool:
-        """Save college fit analysis."""
+        """Save college fit analysis (its band is mirrored into the list view)."""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('college_fits').document(university_id)
             fit_data['computed_at'] = datetime.utcnow().isoformat()
-            doc_ref.set(fit_data, merge=True)
+            batch = self.db.batch()
+            batch.set(doc_ref, fit_data, merge=True)
+            batch.set(self._college_list_view_ref(user_id),
+                      self._view_patch('fits', university_id, fit_data, VIEW_FIT_FIELDS), merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Saved fit for {university_id}")
             return True
         except Exception as e:
@@ -419,10 +777,14 @@ class FirestoreDB:
             return []
     
     def delete_college_fit(self, user_id: str, university_id: str) -> bool:
-        """Delete college fit analysis."""
+        """Delete college fit analysis (and its view row)."""
         try:
             doc_ref = self.db.collection('users').document(user_id).collection('college_fits').document(university_id)
-            doc_ref.delete()
+            batch = self.db.batch()
+            batch.delete(doc_ref)
+            batch.set(self._college_list_view_ref(user_id),
+                      self._view_patch('fits', university_id, None, ()), merge=True)
+            batch.commit()
             logger.info(f"[Firestore] Deleted fit for {university_id}")
             return True
         except Exception as e:
@@ -651,203 +1013,198 @@ class FirestoreDB:
             logger.error(f"[Firestore] Error deleting conversation: {e}")
             return False
     
-    # ==================== FIT CHAT CONVERSATIONS ====================
-    
-    def save_fit_conversation(self, user_id: str, conversation_id: str, conversation_data: Dict) -> bool:
-        """Save fit chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('fit_chat_conversations').document(conversation_id)
-            conversation_data['updated_at'] = datetime.utcnow().isoformat()
-            doc_ref.set(conversation_data, merge=True)
-            logger.info(f"[Firestore] Saved fit conversation {conversation_id}")
+    # ==================== CHAT STORE (fit / profile / university / counselor) ====================
+    # A conversation is a small header doc plus a `messages` subcollection,
+    # one doc per message keyed by its zero-padded position. Clients post the
+    # whole transcript on every turn; a save reads only the header's
+    # message_count (field mask) and writes the messages past it, so a turn
+    # costs O(new messages) instead of re-serializing the transcript into one
+    # JSON field. Listing selects header fields only. Headers written before
+    # this layout still carry a `messages` blob; they're read as-is and moved
+    # to the subcollection on their next save.
+
+    def _chat_ref(self, user_id: str, collection: str, conversation_id: str):
+        return self.db.collection('users').document(user_id).collection(collection).document(conversation_id)
+
+    def _commit_writes(self, writes: List[tuple]) -> None:
+        """Commit (op, ref, data) writes in batches under Firestore's 500 cap."""
+        for i in range(0, len(writes), WRITE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for op, ref, data in writes[i:i + WRITE_BATCH_LIMIT]:
+                if op == 'delete':
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data, merge=True)
+            batch.commit()
+
+    def _save_chat(self, user_id: str, collection: str, conversation_id: str,
+                   conversation_data: Dict) -> bool:
+        """Upsert a conversation from its full transcript (conversation_data
+        ['messages']). Messages already stored are assumed unchanged, except
+        the last one, which is rewritten (a regenerated or streamed reply).
+        A shorter transcript than stored rewrites from the start."""
+        try:
+            ref = self._chat_ref(user_id, collection, conversation_id)
+            header = dict(conversation_data)
+            messages = header.pop('messages', None) or []
+            if isinstance(messages, str):  # legacy callers sent the JSON blob
+                messages = json.loads(messages)
+
+            snap = ref.get(field_paths=['message_count', 'created_at', 'messages_store'])
+            existing = (snap.to_dict() or {}) if snap.exists else {}
+            stored = existing.get('message_count') or 0
+            if existing.get('messages_store') != CHAT_MESSAGES_STORE:
+                stored = 0  # legacy blob (or new) — write every message
+                if existing:
+                    header['messages'] = firestore.DELETE_FIELD
+            start = max(stored - 1, 0) if len(messages) >= stored else 0
+
+            now = datetime.utcnow().isoformat()
+            header.update({
+                'message_count': len(messages),
+                'messages_store': CHAT_MESSAGES_STORE,
+                'updated_at': now,
+                'created_at': existing.get('created_at') or header.get('created_at') or now,
+            })
+            msgs = ref.collection('messages')
+            writes = [('set', msgs.document(f"{i:06d}"), {**messages[i], 'seq': i})
+                      for i in range(start, len(messages))]
+            writes += [('delete', msgs.document(f"{i:06d}"), None)
+                       for i in range(len(messages), stored)]
+            # Header last: its message_count never runs ahead of stored messages.
+            writes.append(('set', ref, header))
+            self._commit_writes(writes)
+            logger.info(f"[Firestore] Saved {collection}/{conversation_id} "
+                        f"({len(messages) - start} message writes)")
             return True
         except Exception as e:
-            logger.error(f"[Firestore] Error saving fit conversation: {e}")
+            logger.error(f"[Firestore] Error saving {collection}/{conversation_id}: {e}")
             return False
-    
-    def get_fit_conversation(self, user_id: str, conversation_id: str) -> Optional[Dict]:
-        """Get fit chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('fit_chat_conversations').document(conversation_id)
-            doc = doc_ref.get()
-            return doc.to_dict() if doc.exists else None
+
+    def _get_chat(self, user_id: str, collection: str, conversation_id: str) -> Optional[Dict]:
+        """Header plus `messages` (a list of message dicts)."""
+        try:
+            ref = self._chat_ref(user_id, collection, conversation_id)
+            doc = ref.get()
+            if not doc.exists:
+                return None
+            conversation = doc.to_dict()
+            if conversation.get('messages_store') == CHAT_MESSAGES_STORE:
+                messages = []
+                for m in ref.collection('messages').order_by('seq').stream():
+                    msg = m.to_dict()
+                    msg.pop('seq', None)
+                    messages.append(msg)
+                conversation['messages'] = messages
+            else:
+                legacy = conversation.get('messages') or []
+                conversation['messages'] = json.loads(legacy) if isinstance(legacy, str) else legacy
+            return conversation
         except Exception as e:
-            logger.error(f"[Firestore] Error getting fit conversation: {e}")
+            logger.error(f"[Firestore] Error getting {collection}/{conversation_id}: {e}")
             return None
-    
-    def list_fit_conversations(self, user_id: str, university_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
-        """List user's fit chat conversations, optionally filtered by university."""
+
+    def _list_chats(self, user_id: str, collection: str, limit: int,
+                    id_field: str = 'conversation_id', university_id: Optional[str] = None) -> List[Dict]:
+        """Header fields only (CHAT_LIST_FIELDS), most recent first."""
         try:
-            convs_ref = self.db.collection('users').document(user_id).collection('fit_chat_conversations')
-            
-            # Filter by university if provided
+            query = self.db.collection('users').document(user_id).collection(collection)
             if university_id:
-                query = convs_ref.where(filter=FieldFilter('university_id', '==', university_id))
-            else:
-                query = convs_ref
-            
-            # Order by updated_at descending and limit
-            docs = query.order_by('updated_at', direction=firestore.Query.DESCENDING).limit(limit).stream()
-            return [{'conversation_id': doc.id, **doc.to_dict()} for doc in docs]
+                query = query.where(filter=FieldFilter('university_id', '==', university_id))
+            docs = (query.select(list(CHAT_LIST_FIELDS))
+                    .order_by('updated_at', direction=firestore.Query.DESCENDING)
+                    .limit(limit).stream())
+            return [{id_field: doc.id, **doc.to_dict()} for doc in docs]
         except Exception as e:
-            logger.error(f"[Firestore] Error listing fit conversations: {e}")
+            logger.error(f"[Firestore] Error listing {collection}: {e}")
             return []
-    
-    def delete_fit_conversation(self, user_id: str, conversation_id: str) -> bool:
-        """Delete fit chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('fit_chat_conversations').document(conversation_id)
-            doc_ref.delete()
-            logger.info(f"[Firestore] Deleted fit conversation {conversation_id}")
+
+    def _delete_chat(self, user_id: str, collection: str, conversation_id: str) -> bool:
+        """Delete the header and every message doc."""
+        try:
+            ref = self._chat_ref(user_id, collection, conversation_id)
+            writes = [('delete', m, None) for m in ref.collection('messages').list_documents()]
+            writes.append(('delete', ref, None))
+            self._commit_writes(writes)
+            logger.info(f"[Firestore] Deleted {collection}/{conversation_id}")
             return True
         except Exception as e:
-            logger.error(f"[Firestore] Error deleting fit conversation: {e}")
+            logger.error(f"[Firestore] Error deleting {collection}/{conversation_id}: {e}")
             return False
-    
+
+    # ==================== FIT CHAT CONVERSATIONS ====================
+
+    def save_fit_conversation(self, user_id: str, conversation_id: str, conversation_data: Dict) -> bool:
+        """Save fit chat conversation (conversation_data['messages'] is the transcript)."""
+        return self._save_chat(user_id, 'fit_chat_conversations', conversation_id, conversation_data)
+
+    def get_fit_conversation(self, user_id: str, conversation_id: str) -> Optional[Dict]:
+        """Get fit chat conversation."""
+        return self._get_chat(user_id, 'fit_chat_conversations', conversation_id)
+
+    def list_fit_conversations(self, user_id: str, university_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """List user's fit chat conversations, optionally filtered by university."""
+        return self._list_chats(user_id, 'fit_chat_conversations', limit, university_id=university_id)
+
+    def delete_fit_conversation(self, user_id: str, conversation_id: str) -> bool:
+        """Delete fit chat conversation."""
+        return self._delete_chat(user_id, 'fit_chat_conversations', conversation_id)
+
     # ==================== PROFILE CHAT (SELF-DISCOVERY) CONVERSATIONS ====================
     # Supports multiple conversations per user, matching fit_chat pattern
-    
+
     def save_profile_conversation(self, user_id: str, conversation_id: str, conversation_data: Dict) -> bool:
         """Save profile chat (Self-Discovery) conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('profile_chat_conversations').document(conversation_id)
-            conversation_data['updated_at'] = datetime.utcnow().isoformat()
-            doc_ref.set(conversation_data, merge=True)
-            logger.info(f"[Firestore] Saved profile conversation {conversation_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error saving profile conversation: {e}")
-            return False
-    
+        return self._save_chat(user_id, 'profile_chat_conversations', conversation_id, conversation_data)
+
     def get_profile_conversation(self, user_id: str, conversation_id: str) -> Optional[Dict]:
         """Get profile chat (Self-Discovery) conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('profile_chat_conversations').document(conversation_id)
-            doc = doc_ref.get()
-            return doc.to_dict() if doc.exists else None
-        except Exception as e:
-            logger.error(f"[Firestore] Error getting profile conversation: {e}")
-            return None
-    
+        return self._get_chat(user_id, 'profile_chat_conversations', conversation_id)
+
     def list_profile_conversations(self, user_id: str, limit: int = 20) -> List[Dict]:
         """List user's profile chat (Self-Discovery) conversations."""
-        try:
-            convs_ref = self.db.collection('users').document(user_id).collection('profile_chat_conversations')
-            docs = convs_ref.order_by('updated_at', direction=firestore.Query.DESCENDING).limit(limit).stream()
-            return [{'conversation_id': doc.id, **doc.to_dict()} for doc in docs]
-        except Exception as e:
-            logger.error(f"[Firestore] Error listing profile conversations: {e}")
-            return []
-    
+        return self._list_chats(user_id, 'profile_chat_conversations', limit)
+
     def delete_profile_conversation(self, user_id: str, conversation_id: str) -> bool:
         """Delete profile chat (Self-Discovery) conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('profile_chat_conversations').document(conversation_id)
-            doc_ref.delete()
-            logger.info(f"[Firestore] Deleted profile conversation {conversation_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error deleting profile conversation: {e}")
-            return False
+        return self._delete_chat(user_id, 'profile_chat_conversations', conversation_id)
 
-    
     # ==================== UNIVERSITY CHAT CONVERSATIONS ====================
-    
+
     def save_university_conversation(self, user_id: str, university_id: str, conversation_data: Dict) -> bool:
         """Save university chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('university_chat_conversations').document(university_id)
-            conversation_data['updated_at'] = datetime.utcnow().isoformat()
-            doc_ref.set(conversation_data, merge=True)
-            logger.info(f"[Firestore] Saved university conversation for {user_id}/{university_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error saving university conversation: {e}")
-            return False
-    
+        return self._save_chat(user_id, 'university_chat_conversations', university_id, conversation_data)
+
     def get_university_conversation(self, user_id: str, university_id: str) -> Optional[Dict]:
         """Get university chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('university_chat_conversations').document(university_id)
-            doc = doc_ref.get()
-            return doc.to_dict() if doc.exists else None
-        except Exception as e:
-            logger.error(f"[Firestore] Error getting university conversation: {e}")
-            return None
-    
+        return self._get_chat(user_id, 'university_chat_conversations', university_id)
+
     def list_university_conversations(self, user_id: str, limit: int = 20) -> List[Dict]:
         """List user's university chat conversations."""
-        try:
-            convs_ref = self.db.collection('users').document(user_id).collection('university_chat_conversations')
-            docs = convs_ref.order_by('updated_at', direction=firestore.Query.DESCENDING).limit(limit).stream()
-            return [{'university_id': doc.id, **doc.to_dict()} for doc in docs]
-        except Exception as e:
-            logger.error(f"[Firestore] Error listing university conversations: {e}")
-            return []
-    
+        return self._list_chats(user_id, 'university_chat_conversations', limit, id_field='university_id')
+
     def clear_university_conversation(self, user_id: str, university_id: str) -> bool:
         """Clear university chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('university_chat_conversations').document(university_id)
-            doc_ref.delete()
-            logger.info(f"[Firestore] Cleared university conversation for {user_id}/{university_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error clearing university conversation: {e}")
-            return False
-    
+        return self._delete_chat(user_id, 'university_chat_conversations', university_id)
+
     # ==================== COUNSELOR CHAT CONVERSATIONS ====================
-    
+
     def save_counselor_conversation(self, user_id: str, conversation_id: str, conversation_data: Dict) -> bool:
         """Save counselor chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('counselor_chat_conversations').document(conversation_id)
-            conversation_data['updated_at'] = datetime.utcnow().isoformat()
-            if 'created_at' not in conversation_data:
-                # Check if exists to preserve created_at
-                existing = doc_ref.get()
-                if existing.exists:
-                    conversation_data['created_at'] = existing.to_dict().get('created_at', conversation_data['updated_at'])
-                else:
-                    conversation_data['created_at'] = conversation_data['updated_at']
-            doc_ref.set(conversation_data, merge=True)
-            logger.info(f"[Firestore] Saved counselor conversation {conversation_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error saving counselor conversation: {e}")
-            return False
-    
+        return self._save_chat(user_id, 'counselor_chat_conversations', conversation_id, conversation_data)
+
     def get_counselor_conversation(self, user_id: str, conversation_id: str) -> Optional[Dict]:
         """Get counselor chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('counselor_chat_conversations').document(conversation_id)
-            doc = doc_ref.get()
-            return doc.to_dict() if doc.exists else None
-        except Exception as e:
-            logger.error(f"[Firestore] Error getting counselor conversation: {e}")
-            return None
-    
+        return self._get_chat(user_id, 'counselor_chat_conversations', conversation_id)
+
     def list_counselor_conversations(self, user_id: str, limit: int = 20) -> List[Dict]:
         """List user's counselor chat conversations, ordered by most recent first."""
-        try:
-            convs_ref = self.db.collection('users').document(user_id).collection('counselor_chat_conversations')
-            docs = convs_ref.order_by('updated_at', direction=firestore.Query.DESCENDING).limit(limit).stream()
-            return [{'conversation_id': doc.id, **doc.to_dict()} for doc in docs]
-        except Exception as e:
-            logger.error(f"[Firestore] Error listing counselor conversations: {e}")
-            return []
-    
+        return self._list_chats(user_id, 'counselor_chat_conversations', limit)
+
     def delete_counselor_conversation(self, user_id: str, conversation_id: str) -> bool:
         """Delete counselor chat conversation."""
-        try:
-            doc_ref = self.db.collection('users').document(user_id).collection('counselor_chat_conversations').document(conversation_id)
-            doc_ref.delete()
-            logger.info(f"[Firestore] Deleted counselor conversation {conversation_id}")
-            return True
-        except Exception as e:
-            logger.error(f"[Firestore] Error deleting counselor conversation: {e}")
-            return False
-    
+        return self._delete_chat(user_id, 'counselor_chat_conversations', conversation_id)
+
     # ==================== ROADMAP TASKS ====================
     
     def save_roadmap_task(self, user_id: str, task_id: str, task_data: Dict) -> bool:
@@ -965,37 +1322,110 @@ class FirestoreDB:
     # Root collection keyed by a workflow's tool-sequence signature. Aggregate
     # ONLY: tool sequence + kind + run count. Never any user text/PII — this is
     # readable across users to power the Popular Workflows view.
+    #
+    # Runs are queued by save-research (workflow_stats.py) and written here by
+    # the Cloud Tasks callback as sharded counters,
+    # workflow_stats/{signature}/workflow_stat_shards/{n}.
+    # The rollup folds non-zero shards back into the root doc (the root holds
+    # the total, shards only runs not yet folded), then runs the ordered
+    # top-N query on the roots. Readers get a precomputed top-N snapshot doc
+    # (workflow_stats_snapshot/top) rather than querying the counters.
+    # The shard query needs the collection-group index on `count` that
+    # deploy_profile_manager_v2 enables.
 
-    def upsert_workflow_stat(self, signature: str, tools: List[str], kind: str = None) -> bool:
-        """Increment the run count for a workflow signature (atomic).
-
-        Also increments a per-ISO-week bucket (`weeks['YYYY-Www']`) so the app
-        can flag "Trending" workflows. The week bucket uses a nested Increment so
-        the write stays a single atomic, read-free merge; it carries only counts
-        (PII-free, like the rest of this cross-user aggregate)."""
-        try:
-            now = datetime.utcnow()
-            ref = self.db.collection('workflow_stats').document(signature)
-            ref.set({
-                'signature': signature,
-                'tools': tools or [],
-                'kind': kind or 'note',
-                'count': firestore.Increment(1),
-                'weeks': {_iso_week_key(now): firestore.Increment(1)},
-                'updated_at': now.isoformat(),
-            }, merge=True)
+    def add_workflow_stat_runs(self, runs: Dict[str, Dict],
+                               shards: int = WORKFLOW_STAT_SHARDS) -> bool:
+        """Apply queued run counts: {signature: {tools, kind, count,
+        weeks: {'YYYY-Www': n}, updated_at}}. Each signature's runs go to one
+        random shard as atomic Increments (read-free merges), all in one batch
+        per WRITE_BATCH_LIMIT signatures."""
+        try:
+            batch, pending = self.db.batch(), 0
+            for signature, run in runs.items():
+                ref = (self.db.collection('workflow_stats').document(signature)
+                       .collection('workflow_stat_shards').document(str(random.randrange(max(1, shards)))))
+                batch.set(ref, {
+                    'signature': signature,
+                    'tools': run.get('tools') or [],
+                    'kind': run.get('kind') or 'note',
+                    'count': firestore.Increment(run.get('count', 0)),
+                    'weeks': {week: firestore.Increment(n) for week, n in (run.get('weeks') or {}).items()},
+                    'updated_at': run.get('updated_at') or datetime.utcnow().isoformat(),
+                }, merge=True)
+                pending += 1
+                if pending == WRITE_BATCH_LIMIT:
+                    batch.commit()
+                    batch, pending = self.db.batch(), 0
+            if pending:
+                batch.commit()
             return True
         except Exception as e:
-            logger.error(f"[Firestore] Error upserting workflow stat: {e}")
+            logger.error(f"[Firestore] Error adding workflow stat runs: {e}")
             return False
 
+    def fold_workflow_stat_shards(self) -> int:
+        """Move unfolded runs from the counter shards into their root docs.
+
+        Only shards with count > 0 are read — those flushed since the last
+        fold — never the full history. Each signature folds in one
+        transaction that re-reads its root and shards, so two instances
+        folding at once can't count a run twice. Returns the signatures
+        folded."""
+        try:
+            dirty: Dict[str, List] = {}
+            query = (self.db.collection_group('workflow_stat_shards')
+                     .where(filter=FieldFilter('count', '>', 0)))
+            for doc in query.stream():
+                signature = (doc.to_dict() or {}).get('signature')
+                if signature:
+                    dirty.setdefault(signature, []).append(doc.reference)
+
+            for signature, shard_refs in dirty.items():
+                root_ref = self.db.collection('workflow_stats').document(signature)
+
+                @firestore.transactional
+                def _fold(transaction, root_ref=root_ref, shard_refs=shard_refs):
+                    snaps = {snap.reference.path: snap
+                             for snap in transaction.get_all([root_ref, *shard_refs])}
+                    root = snaps.get(root_ref.path)
+                    total = (root.to_dict() or {}) if root is not None and root.exists else {}
+                    total = {'signature': signature, 'count': total.get('count') or 0,
+                             'weeks': dict(total.get('weeks') or {}), 'tools': total.get('tools') or [],
+                             'kind': total.get('kind') or 'note', 'updated_at': total.get('updated_at') or ''}
+                    for ref in shard_refs:
+                        snap = snaps.get(ref.path)
+                        part = (snap.to_dict() or {}) if snap is not None and snap.exists else {}
+                        if not part.get('count'):
+                            continue  # folded by another instance meanwhile
+                        total['count'] += part['count']
+                        for week, n in (part.get('weeks') or {}).items():
+                            total['weeks'][week] = total['weeks'].get(week, 0) + (n or 0)
+                        if (part.get('updated_at') or '') >= total['updated_at']:
+                            total.update({'tools': part.get('tools') or total['tools'],
+                                          'kind': part.get('kind') or total['kind'],
+                                          'updated_at': part.get('updated_at') or ''})
+                        transaction.update(ref, {'count': 0, 'weeks': {}})
+                    transaction.set(root_ref, total)
+
+                _fold(self.db.transaction())
+            if dirty:
+                logger.info(f"[Firestore] Folded workflow stat shards for {len(dirty)} workflows")
+            return len(dirty)
+        except Exception as e:
+            logger.error(f"[Firestore] Error folding workflow stat shards: {e}")
+            return 0
+
     def get_popular_workflows(self, limit: int = 20) -> List[Dict]:
-        """Top workflows by run count (descending). Ties broken deterministically
-        by recency (in Python, so no composite index is required). The per-week
+        """Top workflows by run count (descending), after folding pending
+        shard runs into the root docs. Ties broken deterministically by
+        recency (in Python, so no composite index is required). The per-week
         bucket map in the RETURNED payload is trimmed to the most-recent
-        WORKFLOW_WEEKS_KEEP weeks (the stored doc keeps every week — ~52 small
-        ints/year, negligible against Firestore's 1 MiB doc limit; what we cap is
-        read bandwidth + the surface the trend math needs)."""
+        WORKFLOW_WEEKS_KEEP weeks (the stored doc keeps every week — what we
+        cap is read bandwidth + the surface the trend math needs).
+
+        Backs the snapshot refresh, not requests; the get-popular-workflows
+        route serves the snapshot."""
+        self.fold_workflow_stat_shards()
         try:
             q = (self.db.collection('workflow_stats')
                  .order_by('count', direction=firestore.Query.DESCENDING)
@@ -1016,6 +1446,27 @@ class FirestoreDB:
             logger.error(f"[Firestore] Error getting popular workflows: {e}")
             return []
 
+    def get_workflow_stats_snapshot(self) -> Optional[Dict]:
+        """The precomputed top-N doc ({workflows, generated_at}), or None."""
+        try:
+            doc = self.db.collection('workflow_stats_snapshot').document('top').get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error(f"[Firestore] Error getting workflow stats snapshot: {e}")
+            return None
+
+    def save_workflow_stats_snapshot(self, workflows: List[Dict]) -> bool:
+        """Replace the precomputed top-N doc."""
+        try:
+            self.db.collection('workflow_stats_snapshot').document('top').set({
+                'workflows': workflows,
+                'generated_at': datetime.utcnow().isoformat(),
+            })
+            return True
+        except Exception as e:
+            logger.error(f"[Firestore] Error saving workflow stats snapshot: {e}")
+            return False
+
     # ==================== ESSAY TRACKER ====================
 
     def get_essay_tracker(self, user_id: str) -> List[Dict]:
@@ -1027,50 +1478,89 @@ class FirestoreDB:
             logger.error(f"[Firestore] Error getting essay tracker: {e}")
             return []
     
-    def sync_essay_tracker(self, user_id: str, essays: List[Dict]) -> bool:
+    @staticmethod
+    def essay_tracker_id(essay: Dict) -> str:
+        """Deterministic tracker doc id: university + md5 of the prompt's first
+        100 chars (hashlib, since Python's hash() changes between runs)."""
+        prompt_text = essay.get('prompt_text') or essay.get('prompt') or ''
+        prompt_hash = hashlib.md5(prompt_text[:100].encode()).hexdigest()[:8]
+        return f"{essay.get('university_id', 'shared')}_{prompt_hash}"
+
+    def _essay_tracker_sync_ref(self, user_id: str):
+        return self.db.collection('users').document(user_id).collection('essay_tracker_sync').document('state')
+
+    def get_essay_tracker_sync_state(self, user_id: str) -> Optional[Dict]:
+        """The incremental-sync marker (see essay_tracker_sync), or None.
+        A failed read is logged and treated as no marker — the caller then
+        resyncs in full, which is slower but never wrong."""
+        try:
+            doc = self._essay_tracker_sync_ref(user_id).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error(f"[Firestore] Error getting essay tracker sync state: {e}")
+            return None
+
+    def sync_essay_tracker(self, user_id: str, essays: List[Dict],
+                           sync_state: Optional[Dict] = None) -> bool:
         """
         Sync essay prompts to user's tracker.
         Creates new entries for prompts not already tracked.
-        
+
+        Only the candidate ids are read (one get_all, no content) rather than
+        streaming the whole tracker with every draft in it. New entries and
+        `sync_state` — the marker essay_tracker_sync diffs against — are
+        committed in one batch, so the marker never claims a school whose
+        prompts didn't land.
+
         Args:
             user_id: User's email
             essays: List of essay dicts with university_id, prompt, word_limit, etc.
+            sync_state: Marker doc to write with the entries (overwrites)
         """
         try:
-            batch = self.db.batch()
             tracker_ref = self.db.collection('users').document(user_id).collection('essay_tracker')
-            
-            # Get existing essays to avoid duplicates
-            existing = {doc.id: doc.to_dict() for doc in tracker_ref.stream()}
-            
+            candidates = {}
             for essay in essays:
-                # Create unique ID from university + prompt hash
-                # Use hashlib for deterministic hashing (Python's hash() changes between runs)
-                prompt_text = essay.get('prompt_text') or essay.get('prompt') or ''
-                prompt_hash = hashlib.md5(prompt_text[:100].encode()).hexdigest()[:8]
-                essay_id = f"{essay.get('university_id', 'shared')}_{prompt_hash}"
-                
-                if essay_id not in existing:
-                    doc_ref = tracker_ref.document(essay_id)
-                    essay_data = {
-                        'university_id': essay.get('university_id'),
-                        'university_name': essay.get('university_name'),
-                        'prompt_text': essay.get('prompt'),
-                        'prompt_type': essay.get('type', 'supplement'),
-                        'word_limit': essay.get('word_limit'),
-                        'is_required': essay.get('required', True),
-                        'selection_rule': essay.get('selection_rule'),  # e.g., {"required": 4, "of": 8}
-                        'status': 'not_started',
-                        'word_count': 0,
-                        'content': '',
-                        'brainstorming_questions': essay.get('brainstorming_questions', []),
-                        'created_at': datetime.utcnow().isoformat(),
-                        'updated_at': datetime.utcnow().isoformat()
-                    }
-                    batch.set(doc_ref, essay_data)
-            
-            batch.commit()
-            logger.info(f"[Firestore] Synced {len(essays)} essays for {user_id}")
+                candidates.setdefault(self.essay_tracker_id(essay), essay)
+
+            existing = set()
+            if candidates:
+                refs = [tracker_ref.document(essay_id) for essay_id in candidates]
+                existing = {snap.id for snap in self.db.get_all(refs, field_paths=['status'])
+                            if snap.exists}
+
+            now = datetime.utcnow().isoformat()
+            writes = []
+            for essay_id, essay in candidates.items():
+                if essay_id in existing:
+                    continue
+                writes.append((tracker_ref.document(essay_id), {
+                    'university_id': essay.get('university_id'),
+                    'university_name': essay.get('university_name'),
+                    'prompt_text': essay.get('prompt'),
+                    'prompt_type': essay.get('type', 'supplement'),
+                    'word_limit': essay.get('word_limit'),
+                    'is_required': essay.get('required', True),
+                    'selection_rule': essay.get('selection_rule'),  # e.g., {"required": 4, "of": 8}
+                    'status': 'not_started',
+                    'word_count': 0,
+                    'content': '',
+                    'brainstorming_questions': essay.get('brainstorming_questions', []),
+                    'created_at': now,
+                    'updated_at': now
+                }))
+            if sync_state is not None:
+                writes.append((self._essay_tracker_sync_ref(user_id), sync_state))
+
+            # One batch in practice; a list big enough to pass the 500-write
+            # cap is chunked with the marker in the last chunk.
+            for i in range(0, len(writes), WRITE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for ref, data in writes[i:i + WRITE_BATCH_LIMIT]:
+                    batch.set(ref, data)
+                batch.commit()
+            created = len(writes) - (sync_state is not None)
+            logger.info(f"[Firestore] Synced {len(essays)} essays ({created} new) for {user_id}")
             return True
         except Exception as e:
             logger.error(f"[Firestore] Error syncing essay tracker: {e}")
@@ -1109,78 +1599,61 @@ class FirestoreDB:
             logger.error(f"[Firestore] Error getting scholarship tracker: {e}")
             return []
     
-    def sync_scholarship_tracker(self, user_id: str, scholarships: List[Dict], user_profile: Dict = None) -> bool:
+    def _scholarship_tracker_sync_ref(self, user_id: str):
+        return self.db.collection('users').document(user_id).collection('scholarship_tracker_sync').document('state')
+
+    def get_scholarship_tracker_sync_state(self, user_id: str) -> Optional[Dict]:
+        """The incremental-sync marker (see scholarship_engine), or None.
+        A failed read is logged and treated as no marker — the caller then
+        reseeds from the tracker, which is slower but never wrong."""
+        try:
+            doc = self._scholarship_tracker_sync_ref(user_id).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error(f"[Firestore] Error getting scholarship tracker sync state: {e}")
+            return None
+
+    def sync_scholarship_tracker(self, user_id: str, creates: Dict[str, Dict],
+                                 eligibility_updates: Dict[str, str],
+                                 sync_state: Optional[Dict] = None) -> bool:
         """
-        Sync scholarships to user's tracker with eligibility indicators.
-        
+        Apply one scholarship sync: new tracker entries, re-evaluated
+        eligibility indicators on existing ones, and the sync marker — all
+        in one batch, so the marker never runs ahead of the tracker.
+
         Args:
             user_id: User's email
-            scholarships: List of scholarship dicts from university data
-            user_profile: Optional user profile for eligibility calculation
+            creates: {scholarship_id: full tracker doc} for new entries
+            eligibility_updates: {scholarship_id: eligibility_indicator}
+            sync_state: Marker doc to write with them (overwrites)
         """
         try:
-            batch = self.db.batch()
             tracker_ref = self.db.collection('users').document(user_id).collection('scholarship_tracker')
-            
-            # Get existing to avoid duplicates
-            existing = {doc.id: doc.to_dict() for doc in tracker_ref.stream()}
-            
-            for scholarship in scholarships:
-                # Create unique ID
-                scholarship_id = f"{scholarship.get('university_id', 'general')}_{hash(scholarship.get('name', '')[:30]) % 100000}"
-                
-                if scholarship_id not in existing:
-                    doc_ref = tracker_ref.document(scholarship_id)
-                    
-                    # Calculate potential eligibility
-                    eligibility = self._calculate_eligibility(scholarship, user_profile)
-                    
-                    scholarship_data = {
-                        'university_id': scholarship.get('university_id'),
-                        'university_name': scholarship.get('university_name'),
-                        'scholarship_name': scholarship.get('name'),
-                        'type': scholarship.get('type', 'Need'),  # Need, Merit, Specific
-                        'amount': scholarship.get('amount'),
-                        'deadline': scholarship.get('deadline'),
-                        'benefits': scholarship.get('benefits'),
-                        'application_method': scholarship.get('application_method'),
-                        'application_required': 'automatic' not in (scholarship.get('application_method', '').lower()),
-                        'status': 'not_applied',  # not_applied, applied, received, not_eligible
-                        'eligibility_indicator': eligibility,
-                        'notes': '',
-                        'created_at': datetime.utcnow().isoformat(),
-                        'updated_at': datetime.utcnow().isoformat()
-                    }
-                    batch.set(doc_ref, scholarship_data)
-            
-            batch.commit()
-            logger.info(f"[Firestore] Synced {len(scholarships)} scholarships for {user_id}")
+            now = datetime.utcnow().isoformat()
+            writes = [(tracker_ref.document(sid), data, False) for sid, data in creates.items()]
+            writes += [(tracker_ref.document(sid),
+                        {'eligibility_indicator': indicator, 'updated_at': now}, True)
+                       for sid, indicator in eligibility_updates.items()]
+            if sync_state is not None:
+                writes.append((self._scholarship_tracker_sync_ref(user_id), sync_state, False))
+
+            # One batch in practice; past the 500-write cap it's chunked with
+            # the marker in the last chunk.
+            for i in range(0, len(writes), WRITE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for ref, data, merge in writes[i:i + WRITE_BATCH_LIMIT]:
+                    if merge:
+                        batch.set(ref, data, merge=True)
+                    else:
+                        batch.set(ref, data)
+                batch.commit()
+            logger.info(f"[Firestore] Synced scholarships for {user_id}: {len(creates)} new, "
+                        f"{len(eligibility_updates)} re-evaluated")
             return True
         except Exception as e:
             logger.error(f"[Firestore] Error syncing scholarship tracker: {e}")
             return False
     
-    def _calculate_eligibility(self, scholarship: Dict, user_profile: Dict) -> str:
-        """Calculate eligibility indicator based on scholarship type and profile."""
-        if not user_profile:
-            return 'unknown'
-        
-        scholarship_type = scholarship.get('type', '').lower()
-        
-        if 'need' in scholarship_type:
-            # Check if need-based eligibility indicators are present
-            return 'may_qualify'  # Conservative: assume most students may qualify
-        elif 'merit' in scholarship_type:
-            # Check GPA/test scores if available
-            gpa = user_profile.get('gpa', {}).get('unweighted', 0)
-            if gpa >= 3.8:
-                return 'likely_eligible'
-            elif gpa >= 3.5:
-                return 'may_qualify'
-            return 'unknown'
-        
-        return 'may_qualify'
-    
     def update_scholarship_status(self, user_id: str, scholarship_id: str, status: str, notes: str = None) -> bool:
         """Update scholarship application status."""
         try:
@@ -1220,6 +1693,9 @@ class FirestoreDB:
                 return {'ok': False, 'reason': 'not_found'}
             updated_at = datetime.utcnow().isoformat()
             doc_ref.update({'notes': notes, 'updated_at': updated_at})
+            if collection == 'college_list':
+                self.merge_college_list_view(
+                    user_id, self._view_patch('items', item_id, {'notes': notes}, ('notes',)))
             logger.info(f"[Firestore] Updated notes on {collection}/{item_id} for {user_id}")
             return {'ok': True, 'updated_at': updated_at}
         except Exception as e:
@@ -1252,8 +1728,11 @@ class FirestoreDB:
             'profile',
             'roadmap_tasks',
             'essay_tracker',
+            'essay_tracker_sync',
             'scholarship_tracker',
+            'scholarship_tracker_sync',
             'college_list',
+            'college_list_view',
             'aid_packages',
             'tasks',  # legacy alias used by some endpoints
         )
@@ -19,6 +19,20 @@ FIT_CREDIT_COST = 1
 FIT_CREDIT_REASON = 'fit_analysis'
 
 
+def fit_charge_key(data: Dict, payload: Dict):
+    """Ledger idempotency key for a fit charge: the caller's explicit
+    idempotency_key scoped to the university being charged, else the computed
+    fit itself (university + calculated_at) — a retried deduction for the same
+    fit never charges twice, and one key reused for another university is a
+    new charge. None (fresh key) when neither is available."""
+    if data.get('idempotency_key'):
+        return f"{FIT_CREDIT_REASON}:{data.get('university_id') or ''}:{data['idempotency_key']}"
+    calculated_at = (payload.get('fit_analysis') or {}).get('calculated_at')
+    if calculated_at:
+        return f"{FIT_CREDIT_REASON}:{data.get('university_id')}:{calculated_at}"
+    return None
+
+
 def run_compute_single_fit(data: Dict, compute_and_save: Callable[[], Tuple[Dict, int]]) -> Tuple[Dict, int]:
     """Run the billed compute-single-fit sequence. Returns (payload, status).
 
@@ -87,7 +101,8 @@ def run_compute_single_fit(data: Dict, compute_and_save: Callable[[], Tuple[Dict
         payload['billing_note'] = 'fallback analysis — not charged'
         return payload, status
 
-    deducted = deduct_credit(user_email, FIT_CREDIT_COST, FIT_CREDIT_REASON)
+    deducted = deduct_credit(user_email, FIT_CREDIT_COST, FIT_CREDIT_REASON,
+                             idempotency_key=fit_charge_key(data, payload))
     if not deducted.get('success'):
         # Fit already computed and saved — ship it, but make the revenue
         # leak loud (#296 review F4).
@@ -9,13 +9,13 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Optional
 
-from google import genai
 from google.genai import types
 from firestore_db import get_db
 from profile_operations import get_student_profile
+from profile_context import get_profile_context
 from fit_analysis import get_fit_analysis
 from essay_copilot import fetch_university_profile
-from gemini_fallback import generate_content_with_fallback
+import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +60,6 @@ def fit_chat(user_id: str, university_id: str, question: str, conversation_histo
         university_name = fit_data.get('university_name', university_id)
         
         # Build context with profile and fit data
-        # Remove internal/metadata fields that aren't useful for the LLM
-        fields_to_exclude = ['indexed_at', 'updated_at', 'created_at', '_id', 'embedding', 'chunk_id']
-        profile_summary = {k: v for k, v in user_profile.items() if k not in fields_to_exclude and v}
-        
         # Extract key fit fields
         fit_summary = {
             "university_name": university_name,
@@ -87,14 +83,14 @@ def fit_chat(user_id: str, university_id: str, question: str, conversation_histo
         else:
             logger.warning(f"[FIT_CHAT] Could not fetch university profile for {university_id}")
         
-        profile_json = json.dumps(profile_summary, indent=2, default=str)
+        profile_context = get_profile_context(user_id, user_profile, surface='fit_chat')
         fit_json = json.dumps(fit_summary, indent=2, default=str)
         university_json = json.dumps(university_summary, indent=2, default=str) if university_summary else "Not available"
         
         system_prompt = f"""You are a college admissions advisor helping a student understand their fit with {university_name}. Answer questions using ONLY the data provided below.
 
 STUDENT PROFILE:
-{profile_json}
+{profile_context}
 
 FIT ANALYSIS FOR {university_name}:
 {fit_json}
@@ -156,10 +152,8 @@ Return a JSON object with this structure:
         
         # Call Gemini with JSON mode (auto-falls back to another model if the
         # primary is overloaded, so a 503 doesn't kill the chat).
-        client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-        response = generate_content_with_fallback(
-            client,
-            contents=contents,
+        response = llm_gateway.generate(
+            contents,
             config=types.GenerateContentConfig(
                 temperature=0.7,
                 max_output_tokens=2048,
@@ -237,23 +231,16 @@ def save_fit_chat_conversation(user_id: str, university_id: str, university_name
         if not title:
             title = f"Chat with {university_name}"
         
-        # Build document
+        # Build document. The store appends only the messages it hasn't seen
+        # and keeps created_at on updates.
         conversation_data = {
             "university_id": university_id,
             "university_name": university_name,
             "conversation_id": conversation_id,
             "title": title,
-            "messages": json.dumps(messages),
-            "message_count": len(messages),
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "messages": messages,
         }
         
-        # Check if updating existing - preserve created_at
-        existing = db.get_fit_conversation(user_id, conversation_id)
-        if existing:
-            conversation_data["created_at"] = existing.get('created_at', conversation_data["created_at"])
-        
         # Save to Firestore
         success = db.save_fit_conversation(user_id, conversation_id, conversation_data)
         
@@ -348,12 +335,7 @@ def load_fit_chat_conversation(user_id: str, conversation_id: str) -> dict:
                 "error": "Conversation not found"
             }
         
-        # Parse messages
-        messages = []
-        try:
-            messages = json.loads(conversation.get("messages", "[]"))
-        except:
-            pass
+        messages = conversation.get("messages") or []
         
         logger.info(f"[CHAT_HISTORY] Loaded conversation {conversation_id} for {user_id}")
         
@@ -9,11 +9,12 @@ import logging
 import json
 import requests
 from datetime import datetime
-from google import genai
+import llm_gateway
 from google.genai import types
 from firestore_db import get_db
 from essay_copilot import fetch_university_profile
 from fit_staleness import build_kb_provenance
+from profile_context import get_profile_context
 
 logger = logging.getLogger(__name__)
 
@@ -117,8 +118,6 @@ def parse_student_profile_llm(profile_content):
             logger.warning("[FIT_COMP] No GEMINI_API_KEY found")
             return None
         
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
         prompt = f"""Extract the following fields from this student profile. 
 Return ONLY valid JSON with these exact keys (use null for missing values):
 
@@ -142,7 +141,7 @@ STUDENT PROFILE:
 
 Return ONLY the JSON object, no markdown formatting."""
 
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model='gemini-2.5-flash-lite',
             contents=prompt
         )
@@ -201,10 +200,15 @@ def parse_student_profile(profile_content):
     return {}
 
 
-def calculate_fit_with_llm(student_profile_text, university_data, intended_major='', student_profile_json=None):
+def calculate_fit_with_llm(student_profile_text, university_data, intended_major='', student_profile_json=None,
+                           include_profile_json=True):
     """
     COMPLETE fit calculation with Gemini LLM including 8-category comprehensive analysis.
     This is the EXACT implementation from profile_manager_es.
+
+    `student_profile_json` also drives the no-scores test_strategy override;
+    pass include_profile_json=False when `student_profile_text` is already the
+    compiled profile context, so the fields aren't sent twice.
     """
     try:
         # Log inputs
@@ -251,7 +255,7 @@ def calculate_fit_with_llm(student_profile_text, university_data, intended_major
         
         # Also serialize student profile JSON if available
         student_profile_json_str = ""
-        if student_profile_json:
+        if student_profile_json and include_profile_json:
             student_profile_json_str = json.dumps(student_profile_json, default=str)
             logger.info(f"[FIT_COMP] Student profile JSON size: {len(student_profile_json_str)} chars")
         
@@ -492,10 +496,9 @@ You have access to COMPLETE university data. Generate recommendations across ALL
 
         # Call Gemini with retry logic
         max_retries = 2
-        client = genai.Client(api_key=GEMINI_API_KEY)
         for attempt in range(max_retries + 1):
             try:
-                response = client.models.generate_content(
+                response = llm_gateway.generate(
                     model='gemini-2.5-flash-lite',
                     contents=prompt
                 )
@@ -862,22 +865,19 @@ def calculate_fit_for_college(user_id, university_id, intended_major=''):
             logger.warning(f"[FIT_COMP] No profile found for user: {user_id}")
             return None
         
-        # Pass the ENTIRE student profile as JSON to the LLM
-        # Remove internal/metadata fields that aren't useful
+        # Structured fields, for the deterministic post-processing checks
         fields_to_exclude = ['indexed_at', 'updated_at', 'created_at', '_id', 'embedding', 'chunk_id', 'user_id']
         profile_data_clean = {k: v for k, v in profile_doc.items() if k not in fields_to_exclude and v}
         
-        # Also get the content field for backwards compatibility
-        profile_content = profile_doc.get('raw_content') or profile_doc.get('content', '')
+        # The prompt gets the bounded compiled context (structured fields +
+        # compacted document notes) instead of raw_content + a full JSON dump.
+        profile_content = get_profile_context(user_id, profile_doc, surface='fit')
         if not profile_content or len(profile_content.strip()) < 50:
             logger.info(f"[FIT_COMP] Building profile content from flat fields for {user_id}")
             profile_content = build_profile_content_from_fields(profile_doc)
         
         # Log profile summary
-        logger.info(f"[FIT_COMP] Student profile has {len(profile_data_clean)} fields, content length: {len(profile_content)}")
-        
-        # Parse student profile (for legacy code compatibility)
-        student_profile = parse_student_profile(profile_content)
+        logger.info(f"[FIT_COMP] Student profile has {len(profile_data_clean)} fields, context length: {len(profile_content)}")
         
         # Fetch university data via KB API
         university_data = fetch_university_profile(university_id)
@@ -902,8 +902,10 @@ def calculate_fit_for_college(user_id, university_id, intended_major=''):
             }
         
         # Calculate comprehensive fit using PURE LLM reasoning
-        # Pass BOTH the text content AND the full profile JSON
-        fit_analysis = calculate_fit_with_llm(profile_content, university_data, intended_major, profile_data_clean)
+        # The compiled context already carries every structured field; the JSON
+        # is passed only for the post-processing score checks
+        fit_analysis = calculate_fit_with_llm(profile_content, university_data, intended_major, profile_data_clean,
+                                              include_profile_json=False)
 
         # Stamp which KB vintage produced this fit (+ its load-bearing
         # inputs) so staleness is detectable after yearly KB refreshes.
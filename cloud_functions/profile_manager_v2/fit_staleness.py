@@ -14,6 +14,11 @@ Severity rules (design §2):
              test-policy change.
   minor    — within-tier rate drift; cost-of-attendance drift under 10%.
   unknown  — the fit predates provenance stamping (legacy doc).
+
+Same-cycle refreshes: the KB stamps every doc with `content_hash` and skips
+unchanged re-ingests, so a fit whose kb_content_hash still matches is
+current without diffing; a mismatch within the same data_year is diffed
+like a new cycle but only reported when a load-bearing input moved.
 """
 
 import hashlib
@@ -112,6 +117,7 @@ def build_kb_provenance(university_data: Dict) -> Dict:
     return {
         'kb_data_year': (university_data or {}).get('data_year'),
         'kb_last_updated': (university_data or {}).get('last_updated'),
+        'kb_content_hash': (university_data or {}).get('content_hash'),
         'input_snapshot': {
             'acceptance_rate': _acceptance_rate(university_data),
             'test_policy': _test_policy(university_data),
@@ -153,8 +159,13 @@ def classify_kb_changes(fit_doc: Dict, university_data: Dict) -> Optional[Dict]:
         })
         return entry
 
+    same_cycle_refresh = False
     if current_year is not None and fit_year >= current_year:
-        return None  # fit is current
+        fit_hash = fit_doc.get('kb_content_hash')
+        current_hash = (university_data or {}).get('content_hash')
+        if fit_year > current_year or not fit_hash or not current_hash or fit_hash == current_hash:
+            return None  # fit is current
+        same_cycle_refresh = True  # re-ingested within the cycle — diff inputs
 
     changes = entry['changes']
 
@@ -206,6 +217,11 @@ def classify_kb_changes(fit_doc: Dict, university_data: Dict) -> Optional[Dict]:
             'severity': 'material' if drift >= 0.10 else 'minor',
         })
 
+    # An in-cycle refresh that left every load-bearing input alone doesn't
+    # make the fit stale.
+    if not changes and same_cycle_refresh:
+        return None
+
     # Stale year but nothing load-bearing moved — still report (the vintage
     # chip needs it), as a single minor entry.
     if not changes:
@@ -241,14 +257,22 @@ def mark_suppressed(kb_updates: List[Dict], college_list: List[Dict]) -> List[Di
     return kb_updates
 
 
-def _batch_fetch_universities(university_ids: List[str]) -> Dict[str, Dict]:
-    """One KB batch call → {university_id: university_doc}."""
+def batch_fetch_universities(university_ids: List[str],
+                             sections: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """One KB batch call → {university_id: university_doc}.
+
+    `sections` projects each doc's profile down to those top-level sections
+    on the KB side (the envelope — data_year, content_hash — is unchanged).
+    """
     if not university_ids:
         return {}
+    payload = {'university_ids': list(university_ids)}
+    if sections:
+        payload['sections'] = list(sections)
     try:
         resp = requests.post(
             KNOWLEDGE_BASE_UNIVERSITIES_URL,
-            json={'university_ids': university_ids},
+            json=payload,
             timeout=30,
         )
         resp.raise_for_status()
@@ -264,7 +288,7 @@ def _batch_fetch_universities(university_ids: List[str]) -> Dict[str, Dict]:
 
 
 def get_kb_updates(fits: List[Dict],
-                   fetch_batch=_batch_fetch_universities) -> List[Dict]:
+                   fetch_batch=batch_fetch_universities) -> List[Dict]:
     """kb_updates[] for a user's saved fits. `fetch_batch` injectable for tests.
 
     Note: the batch endpoint's docs don't include data_year yet on old
@@ -12,6 +12,15 @@ logger = logging.getLogger(__name__)
 # GCS configuration
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "college-counselling-478115-student-profiles")
 
+# Extracted-text cache: derived text for an uploaded document, stored under
+# the owner's prefix next to the document ({user_id}/_extracted_text/v1/
+# {filename}.txt) so deleting the document or resetting the profile removes
+# it too. The sha256 of the bytes it was extracted from is kept in the blob
+# metadata; re-processing identical bytes skips PDF parsing entirely. Bump
+# the version when extraction output changes.
+EXTRACTED_TEXT_DIR = "_extracted_text"
+EXTRACTED_TEXT_PREFIX = f"{EXTRACTED_TEXT_DIR}/v1"
+
 # Initialize storage client
 _storage_client = None
 
@@ -49,6 +58,11 @@ def get_storage_path(user_id: str, filename: str) -> str:
     return f"{user_id}/{filename}"
 
 
+def get_extracted_text_path(user_id: str, filename: str) -> str:
+    """GCS path of the cached extracted text for a user's document."""
+    return f"{user_id}/{EXTRACTED_TEXT_PREFIX}/{filename}.txt"
+
+
 def upload_file_to_gcs(user_id: str, filename: str, file_content: bytes, content_type: str = None) -> dict:
     """
     Upload file to GCS.
@@ -147,6 +161,11 @@ def delete_file_from_gcs(user_id: str, filename: str) -> dict:
         blob_path = get_storage_path(user_id, filename)
         blob = bucket.blob(blob_path)
         
+        # Derived text goes with the document, whether or not it still exists.
+        cache_blob = bucket.blob(get_extracted_text_path(user_id, filename))
+        if cache_blob.exists():
+            cache_blob.delete()
+
         if blob.exists():
             blob.delete()
             logger.info(f"[GCS] Deleted file: {blob_path}")
@@ -169,6 +188,76 @@ def delete_file_from_gcs(user_id: str, filename: str) -> dict:
         }
 
 
+def get_cached_extracted_text(user_id: str, filename: str, content_hash: str):
+    """
+    Read cached extracted text for a user's document.
+    
+    Args:
+        user_id: User's email address
+        filename: Document filename
+        content_hash: sha256 hex digest of the document bytes
+        
+    Returns:
+        The cached text, or None on a miss, a hash mismatch (the file was
+        replaced) or any error
+    """
+    try:
+        blob = get_storage_bucket().get_blob(get_extracted_text_path(user_id, filename))
+        if blob is None or (blob.metadata or {}).get('content_sha256') != content_hash:
+            return None
+        return blob.download_as_bytes().decode('utf-8')
+    except Exception as e:
+        logger.warning(f"[GCS] Extracted-text cache read failed: {e}")
+        return None
+
+
+def save_cached_extracted_text(user_id: str, filename: str, content_hash: str, text: str) -> bool:
+    """
+    Store extracted text for a user's document.
+    
+    Args:
+        user_id: User's email address
+        filename: Document filename
+        content_hash: sha256 hex digest of the document bytes
+        text: Cleaned extracted text
+        
+    Returns:
+        True if written
+    """
+    try:
+        blob = get_storage_bucket().blob(get_extracted_text_path(user_id, filename))
+        blob.metadata = {'content_sha256': content_hash}
+        blob.upload_from_string(text.encode('utf-8'), content_type='text/plain; charset=utf-8')
+        return True
+    except Exception as e:
+        logger.warning(f"[GCS] Extracted-text cache write failed: {e}")
+        return False
+
+
+def delete_cached_extracted_text(user_id: str) -> int:
+    """
+    Delete every cached extracted text under a user's prefix, including any
+    left behind by documents removed outside delete_file_from_gcs.
+    
+    Args:
+        user_id: User's email address
+        
+    Returns:
+        Number of cache blobs deleted
+    """
+    try:
+        deleted = 0
+        for blob in get_storage_bucket().list_blobs(prefix=f"{user_id}/{EXTRACTED_TEXT_DIR}/"):
+            blob.delete()
+            deleted += 1
+        if deleted:
+            logger.info(f"[GCS] Deleted {deleted} extracted-text cache entries for {user_id}")
+        return deleted
+    except Exception as e:
+        logger.error(f"[GCS] Extracted-text cache delete failed: {e}")
+        return 0
+
+
 def list_user_files(user_id: str) -> list:
     """
     List all files for a user in GCS.
@@ -187,6 +276,8 @@ def list_user_files(user_id: str) -> list:
         
         files = []
         for blob in blobs:
+            if blob.name.startswith(f"{prefix}{EXTRACTED_TEXT_DIR}/"):
+                continue  # derived text, not an uploaded document
             files.append({
                 "filename": blob.name.replace(prefix, ""),
                 "size": blob.size,
@@ -10,7 +10,7 @@ gate, so a student with an empty balance still gets the free answers free.
 """
 
 import logging
-from typing import Callable, Dict, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
 from credits import check_credits_available, deduct_credit
 
@@ -19,8 +19,29 @@ logger = logging.getLogger(__name__)
 GENERATION_CREDIT_COST = 1
 
 
+def generation_charge_key(reason: str, payload: Dict, idempotency_key: Optional[str] = None,
+                          artifact_id: Optional[str] = None):
+    """Ledger idempotency key for a generation charge: the caller's explicit
+    key scoped to the artifact being charged (`artifact_id`, else the
+    generated artifact's university_id), else the generated artifact itself
+    (its generated_at and, when present, university_id). A client key reused
+    for a different university is a new charge. None (fresh key) when neither
+    is available."""
+    artifact = next((value for value in payload.values()
+                     if isinstance(value, dict) and value.get('generated_at')), None)
+    if idempotency_key:
+        if artifact_id is None:
+            artifact_id = (artifact or {}).get('university_id')
+        return f"{reason}:{artifact_id or ''}:{idempotency_key}"
+    if artifact:
+        return f"{reason}:{artifact.get('university_id') or ''}:{artifact['generated_at']}"
+    return None
+
+
 def run_billed_generation(user_email: str, reason: str,
-                          generate: Callable[[], Tuple[Dict, int]]) -> Tuple[Dict, int]:
+                          generate: Callable[[], Tuple[Dict, int]],
+                          idempotency_key: Optional[str] = None,
+                          artifact_id: Optional[str] = None) -> Tuple[Dict, int]:
     """Run a billed generation sequence. Returns (payload, status).
 
     Args:
@@ -31,6 +52,11 @@ def run_billed_generation(user_email: str, reason: str,
             Returns (payload, status); success is status 200 with
             payload['success'] True. Only invoked after the credit gate
             passes; the deduction fires only when it succeeds.
+        idempotency_key: optional client key for this charge; a retried
+            request carrying the same key is never charged twice.
+        artifact_id: server-side identity of the artifact being charged
+            (the university for per-school artifacts); the client key only
+            dedupes charges for the same artifact.
     """
     credit_check = check_credits_available(user_email, GENERATION_CREDIT_COST)
     if credit_check.get('error') == 'credits_read_failed':
@@ -55,7 +81,9 @@ def run_billed_generation(user_email: str, reason: str,
         # Failed generation or save (LLM/persistence) — never charge.
         return payload, status
 
-    deducted = deduct_credit(user_email, GENERATION_CREDIT_COST, reason)
+    deducted = deduct_credit(user_email, GENERATION_CREDIT_COST, reason,
+                             idempotency_key=generation_charge_key(reason, payload, idempotency_key,
+                                                                     artifact_id))
     if not deducted.get('success'):
         # Artifact already generated and saved — ship it, but make the
         # revenue leak loud (same rule as fit_billing, #296 review F4).
@@ -0,0 +1,218 @@
+"""Process-wide Gemini gateway: pooled clients, single-flight, per-model limits.
+
+Every LLM call site used to build a fresh ``genai.Client(api_key=...)`` per
+request (or re-run ``genai.configure`` for the legacy SDK), so no connection
+was ever reused and client setup sat on the hot path. Routing calls through
+here instead gives:
+
+  * one pooled client per API key for the life of the instance;
+  * single-flight — identical requests already in flight (same key, model
+    chain, contents and config) share one upstream call and its result, so a
+    double-click or a retrying frontend doesn't pay twice;
+  * a concurrency limit per model (LLM_MAX_CONCURRENT_PER_MODEL). A call
+    that can't get a slot within LLM_GATE_TIMEOUT_S fails as a capacity
+    error, so the fallback chain moves on to the next model's pool;
+  * per-call latency / token metrics, logged and aggregated per model
+    (``metrics()``).
+
+Two entry points, both on the pooled ``google-genai`` clients:
+  * generate — walks a model chain through
+    ``gemini_fallback.generate_content_with_fallback``; a service that calls
+    it must ship gemini_fallback.py too.
+  * generate_legacy — one model, no fallback, for the call sites written
+    against ``google.generativeai``. That SDK only takes its key through the
+    process-wide ``genai.configure``, so two keys in flight at once would
+    race; the key travels with the pooled client instead.
+The SDK is imported lazily.
+
+Kept self-contained — these Cloud Functions deploy independently and share no
+common package, so an identical copy lives in each service that calls Gemini.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENT_PER_MODEL", "16"))
+GATE_TIMEOUT_S = float(os.getenv("LLM_GATE_TIMEOUT_S", "60"))
+
+_lock = threading.Lock()
+_clients = {}      # api_key -> google-genai Client
+_gates = {}        # model -> BoundedSemaphore
+_inflight = {}     # flight key -> _Flight
+_metrics = {}      # model -> counters
+
+
+def reset():
+    """Drop pooled clients, gates and metrics (tests, key rotation)."""
+    with _lock:
+        _clients.clear()
+        _gates.clear()
+        _inflight.clear()
+        _metrics.clear()
+
+
+def metrics():
+    """Per-model counters since start: calls, errors, coalesced, latency and tokens."""
+    with _lock:
+        return {model: dict(m) for model, m in _metrics.items()}
+
+
+def client(api_key=None):
+    """The pooled google-genai client for ``api_key`` (default GEMINI_API_KEY)."""
+    from google import genai  # noqa: WPS433 — lazy: conftests stub the google package
+
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    with _lock:
+        pooled = _clients.get(key)
+        if pooled is None:
+            pooled = _clients[key] = genai.Client(api_key=key)
+        return pooled
+
+
+def generate(contents, *, config=None, model=None, models=None, api_key=None):
+    """``client.models.generate_content`` through the gateway.
+
+    ``model`` pins a single model; otherwise ``models`` (or the default chain)
+    is walked on capacity errors. Returns the response or re-raises.
+    """
+    try:
+        from gemini_fallback import DEFAULT_MODEL_CHAIN, generate_content_with_fallback  # noqa: WPS433
+    except ImportError as e:
+        raise RuntimeError(
+            "llm_gateway.generate needs gemini_fallback.py deployed in this service; "
+            "use generate_legacy for a single-model call") from e
+
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    chain = (model,) if model else tuple(models or DEFAULT_MODEL_CHAIN)
+    gated = _GatedClient(client(key))
+    return _single_flight(
+        _flight_key(key, chain, contents, config), chain[0],
+        lambda: generate_content_with_fallback(gated, contents=contents, config=config, models=chain),
+    )
+
+
+def generate_legacy(contents, *, model, api_key=None, system_instruction=None):
+    """One ``model`` call, no fallback chain, on the pooled client for
+    ``api_key``. Returns the response (``.text``) or re-raises."""
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    config = {"system_instruction": system_instruction} if system_instruction else None
+    gated = _GatedClient(client(key))
+    return _single_flight(
+        _flight_key(key, (model,), contents, system_instruction), model,
+        lambda: gated.models.generate_content(model=model, contents=contents, config=config),
+    )
+
+
+# ---- Internals -------------------------------------------------------------
+
+
+def _flight_key(api_key, chain, contents, config):
+    raw = repr((api_key, chain, contents, config)).encode("utf-8", "replace")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _single_flight(key, model, fn):
+    with _lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        _bump(model, coalesced=1)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:  # noqa: BLE001 — handed to followers, then re-raised
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def _gate(model):
+    with _lock:
+        gate = _gates.get(model)
+        if gate is None:
+            gate = _gates[model] = threading.BoundedSemaphore(MAX_CONCURRENT_PER_MODEL)
+        return gate
+
+
+def _gated_call(model, fn):
+    gate = _gate(model)
+    if not gate.acquire(timeout=GATE_TIMEOUT_S):
+        _bump(model, errors=1)
+        # Worded as a capacity error so the fallback chain tries the next pool.
+        raise RuntimeError(f"RESOURCE_EXHAUSTED: local concurrency limit for {model}")
+    start = time.monotonic()
+    try:
+        response = fn()
+    except Exception:
+        _record(model, time.monotonic() - start, None, failed=True)
+        raise
+    finally:
+        gate.release()
+    _record(model, time.monotonic() - start, response)
+    return response
+
+
+class _GatedModels:
+    def __init__(self, models):
+        self._models = models
+
+    def generate_content(self, *, model, contents, config):
+        return _gated_call(model, lambda: self._models.generate_content(
+            model=model, contents=contents, config=config))
+
+
+class _GatedClient:
+    """Client facade whose ``models.generate_content`` runs inside the model's gate."""
+
+    def __init__(self, inner):
+        self.models = _GatedModels(inner.models)
+
+
+def _token_count(usage, field):
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else 0
+
+
+def _record(model, elapsed, response, failed=False):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = _token_count(usage, "prompt_token_count")
+    output_tokens = _token_count(usage, "candidates_token_count")
+    ms = elapsed * 1000
+    _bump(model, calls=1, errors=int(failed), latency_ms_total=ms,
+          prompt_tokens=prompt_tokens, output_tokens=output_tokens, latency_ms_max=ms)
+    logger.info("[LLM] %s %s in %.0fms (tokens in=%d out=%d)",
+                model, "failed" if failed else "ok", ms, prompt_tokens, output_tokens)
+
+
+def _bump(model, latency_ms_max=None, **deltas):
+    with _lock:
+        m = _metrics.setdefault(model, {
+            "calls": 0, "errors": 0, "coalesced": 0, "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0, "prompt_tokens": 0, "output_tokens": 0,
+        })
+        for name, delta in deltas.items():
+            m[name] += delta
+        if latency_ms_max is not None:
+            m["latency_ms_max"] = max(m["latency_ms_max"], latency_ms_max)
+
+# Deployed by the auto-deploy pipeline; an identical copy lives in each LLM-calling service.
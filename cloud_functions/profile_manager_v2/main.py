@@ -7,6 +7,7 @@ NO Flask app -  follows ES pattern with direct request handling.
 import os
 import logging
 import json
+import secrets
 from datetime import datetime
 import functions_framework
 from flask import jsonify, request
@@ -14,12 +15,12 @@ from flask import jsonify, request
 # Import all modules  
 from firestore_db import get_db, NOTES_COLLECTIONS
 from profile_operations import (
-    process_and_index_profile,
     index_student_profile,
     get_student_profile,
     cleanup_profile_on_document_delete,
     update_profile_field
 )
+from upload_pipeline import submit_upload, get_upload_status, run_upload_job
 from majors import (
     save_onboarding_profile,
     set_intended_majors,
@@ -30,13 +31,16 @@ from request_auth import gate_request
 from gcs_storage import (
     download_file_from_gcs,
     delete_file_from_gcs,
+    delete_cached_extracted_text,
     list_user_files
 )
 from college_list import (
     add_university_to_list,
     remove_university_from_list,
     get_college_list,
-    update_list_item
+    update_list_item,
+    apply_kb_refresh,
+    check_college_list_view,
 )
 from fit_analysis import (
     save_fit_analysis,
@@ -47,12 +51,14 @@ from fit_analysis import (
 )
 from credits import (
     get_user_credits,
+    get_credit_history,
     check_credits_available,
     deduct_credit,
     add_credits,
     upgrade_subscription
 )
 from profile_chat import profile_chat
+from profile_context import client_profile, get_profile_context
 from fit_chat_firestore import (
     fit_chat,
     save_fit_chat_conversation,
@@ -67,10 +73,15 @@ from essay_copilot import (
     get_draft_feedback,
     save_essay_draft,
     get_essay_drafts,
+    get_essay_draft,
     get_starter_context,
     fetch_university_profile,
     generate_essay_outline
 )
+import copilot_suggestions
+import essay_tracker_sync
+import scholarship_engine
+import workflow_stats
 from fit_billing import run_compute_single_fit
 from fit_computation import calculate_fit_for_college
 from major_llm import (
@@ -82,7 +93,7 @@ from major_llm import (
     get_college_major_chances_payload,
     stamp_door_flags,
 )
-from fit_staleness import get_kb_updates, mark_suppressed
+from fit_staleness import get_kb_updates, mark_suppressed, batch_fetch_universities
 from email_service import send_signup_welcome_email
 
 # Configure logging
@@ -122,19 +133,6 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 logger.info(f"[INIT] Profile Manager V2 (Firestore) starting...")
 logger.info(f"[INIT] Project: {GCP_PROJECT_ID}, Bucket: {GCS_BUCKET_NAME}")
 
-# Hardcoded UC Personal Insight Questions (2025-2026) - All UC schools share these 8 prompts
-UC_PIQ_PROMPTS = [
-    {"prompt": "Describe an example of your leadership experience in which you have positively influenced others, helped resolve disputes or contributed to group efforts over time.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "Every person has a creative side, and it can be expressed in many ways: problem solving, original and innovative thinking, and artistically, to name a few. Describe how you express your creative side.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "What would you say is your greatest talent or skill? How have you developed and demonstrated that talent over time?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "Describe how you have taken advantage of a significant educational opportunity or worked to overcome an educational barrier you have faced.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "Describe the most significant challenge you have faced and the steps you have taken to overcome this challenge. How has this challenge affected your academic achievement?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "Think about an academic subject that inspires you. Describe how you have furthered this interest inside and/or outside of the classroom.", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "What have you done to make your school or your community a better place?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-    {"prompt": "Beyond what has already been shared in your application, what do you believe makes you a strong candidate for admissions to the University of California?", "word_limit": 350, "type": "UC PIQ", "required": False, "note": "Choose 4 of 8 PIQs"},
-]
-
-
 # ============== CORS HELPER ==============
 
 def add_cors_headers(response_data, status_code=200):
@@ -153,6 +151,14 @@ def add_cors_headers(response_data, status_code=200):
 # clear-test-data carries its own X-Admin-Token gate (a credential already).
 _AUTH_EXEMPT_ROUTES = {'health', 'clear-test-data'}
 
+def _has_admin_token(request) -> bool:
+    """True when X-Admin-Token matches the QA_ADMIN_TOKEN secret — the gate
+    for admin/QA-only routes (clear-test-data, copilot-suggest-stats)."""
+    expected = os.getenv('QA_ADMIN_TOKEN', '')
+    return bool(expected) and secrets.compare_digest(
+        request.headers.get('X-Admin-Token', ''), expected
+    )
+
 
 def _claimed_emails(request) -> list:
     """EVERY user identity this request references — the gate must check the
@@ -177,6 +183,10 @@ def _claimed_emails(request) -> list:
 @functions_framework.http
 def profile_manager_v2_http_entry(request):
     """HTTP Cloud Function entry point - ES pattern."""
+    return _handle_request(request)
+
+
+def _handle_request(request):
 
     # Enable CORS
     if request.method == 'OPTIONS':
@@ -195,7 +205,7 @@ def profile_manager_v2_http_entry(request):
     # X-User-Email is only honored when it matches a verified user token or
     # arrives from a trusted service that verified the human upstream.
     if resource_type not in _AUTH_EXEMPT_ROUTES:
-        allow, _identity, rejection = gate_request(request, _claimed_emails(request))
+        allow, identity, rejection = gate_request(request, _claimed_emails(request))
         if not allow:
             body, status = rejection
             return add_cors_headers(body, status)
@@ -229,20 +239,56 @@ def profile_manager_v2_http_entry(request):
                 filename = file.filename
                 content_type = file.content_type
                 
-                logger.info(f"[UPLOAD] Processing {filename} for {user_email}")
+                logger.info(f"[UPLOAD] Accepting {filename} for {user_email}")
                 
-                result = process_and_index_profile(
+                # Async: stores the file, queues extraction + Gemini + merge,
+                # returns the job id (poll /get-upload-status). Identical
+                # bytes already queued/indexed come back as duplicate.
+                result = submit_upload(
                     user_id=user_email,
                     filename=filename,
                     file_content=file_content,
-                    file_metadata={'content_type': content_type}
+                    content_type=content_type
                 )
                 
-                return add_cors_headers(result, 200 if result.get('success') else 500)
+                return add_cors_headers(result, 202 if result.get('success') else 500)
             except Exception as e:
                 logger.error(f"[UPLOAD] Error: {e}", exc_info=True)
                 return add_cors_headers({'success': False, 'error': str(e)}, 500)
         
+        # --- UPLOAD STATUS (per-stage progress of an upload job) ---
+        elif resource_type == 'get-upload-status' and request.method == 'GET':
+            user_email = request.args.get('user_email') or request.headers.get('X-User-Email')
+            job_id = request.args.get('job_id')
+            if not user_email or not job_id:
+                return add_cors_headers({'error': 'user_email and job_id required'}, 400)
+            result = get_upload_status(user_email, job_id)
+            return add_cors_headers(result, 200 if result.get('success') else 404)
+        
+        # --- UPLOAD WORKER (Cloud Tasks callback; runs one queued job) ---
+        elif resource_type == 'process-upload-job' and request.method == 'POST':
+            data = request.get_json() or {}
+            user_email = data.get('user_email')
+            job_id = data.get('job_id')
+            if not user_email or not job_id:
+                return add_cors_headers({'error': 'user_email and job_id required'}, 400)
+            result = run_upload_job(user_email, job_id)
+            # Non-2xx makes Cloud Tasks retry the job.
+            return add_cors_headers(result, 200 if result.get('success') else 500)
+        
+        # --- WORKFLOW STATS WORKER (Cloud Tasks callback; applies queued runs) ---
+        elif resource_type == 'process-workflow-stats' and request.method == 'POST':
+            # The shared counters take runs from the queue only, never
+            # straight from a signed-in user.
+            if identity.get('kind') == 'user':
+                return add_cors_headers({'success': False, 'error': 'forbidden'}, 403)
+            runs = (request.get_json(silent=True) or {}).get('runs')
+            if not isinstance(runs, dict):
+                return add_cors_headers({'error': 'runs required'}, 400)
+            # Non-2xx makes Cloud Tasks retry the write.
+            success = workflow_stats.apply_runs(runs)
+            return add_cors_headers({'success': success}, 200 if success else 500)
+        
         # --- LIST PROFILES ---
         elif resource_type == 'list-profiles' and request.method == 'GET':
             user_email = request.args.get('user_email')
@@ -311,9 +357,11 @@ def profile_manager_v2_http_entry(request):
             if request.method == 'POST':
                 data = request.get_json()
                 user_id = data.get('user_email') or data.get('user_id')
+                include_context = data.get('include_context')
             else:
                 # GET request - use query parameters
                 user_id = request.args.get('user_email') or request.args.get('user_id')
+                include_context = request.args.get('include_context')
             
             if not user_id:
                 return add_cors_headers({'error': 'user_email or user_id required'}, 400)
@@ -323,12 +371,17 @@ def profile_manager_v2_http_entry(request):
             if profile:
                 # Match ES format - return singular 'profile' not arrays
                 # Also include 'content' field for frontend markdown display
-                return add_cors_headers({
+                body = {
                     'success': True,
-                    'profile': profile,
+                    'profile': client_profile(profile),
                     'content': profile.get('raw_content', ''),  # Frontend expects this
                     'filename': profile.get('original_filename')
-                })
+                }
+                # Service callers building prompts (counselor chat) ask for the
+                # compiled context instead of dumping the profile doc.
+                if str(include_context).lower() in ('1', 'true'):
+                    body['profile_context'] = get_profile_context(user_id, profile, surface='get-profile')
+                return add_cors_headers(body)
             else:
                 return add_cors_headers({
                     'success': False,
@@ -392,7 +445,7 @@ def profile_manager_v2_http_entry(request):
             )
             merged = get_student_profile(user_id) if result.get('success') else None
             return add_cors_headers(
-                {**result, 'profile': merged},
+                {**result, 'profile': client_profile(merged)},
                 200 if result.get('success') else 400,
             )
 
@@ -409,7 +462,7 @@ def profile_manager_v2_http_entry(request):
             if profile:
                 return add_cors_headers({
                     'success': True,
-                    'profiles': [profile],
+                    'profiles': [client_profile(profile)],
                     'total': 1
                 })
             else:
@@ -450,8 +503,8 @@ def profile_manager_v2_http_entry(request):
             university_id = data.get('university_id')
             if not user_email or not university_id:
                 return add_cors_headers({'error': 'user_email and university_id required'}, 400)
-            # Single attempt: the caller's own timeout beats the default 4-id x
-            # 3-retry x 30s ladder, and a KB miss degrades to matched=False anyway.
+            # Single attempt: the caller's own timeout beats 3 transport
+            # retries x 30s, and a KB miss degrades to matched=False anyway.
             envelope = fetch_university_profile(university_id, max_retries=1)
             result = set_major_choice(
                 user_email, university_id,
@@ -591,6 +644,22 @@ def profile_manager_v2_http_entry(request):
                 'college_list': universities  # Frontend expects 'college_list' not 'universities'
             })
         
+        # Diff the materialized college_list_view against its source
+        # collections; repair=true rebuilds an inconsistent view.
+        elif resource_type == 'check-college-list-view' and request.method in ['GET', 'POST']:
+            if request.method == 'POST':
+                data = request.get_json() or {}
+                user_email = data.get('user_email')
+                repair = data.get('repair') is True
+            else:
+                user_email = request.args.get('user_email')
+                repair = request.args.get('repair') == 'true'
+
+            if not user_email:
+                return add_cors_headers({'error': 'user_email required'}, 400)
+
+            return add_cors_headers({'success': True, **check_college_list_view(user_email, repair=repair)})
+
         elif resource_type == 'remove-from-list' and request.method in ['POST', 'DELETE']:
             data = request.get_json()
             user_email = data.get('user_email')
@@ -681,7 +750,19 @@ def profile_manager_v2_http_entry(request):
 
             profile = get_student_profile(user_email) or {}
             fits = get_all_fits(user_email)
-            kb_updates = get_kb_updates(fits)
+            # Keep the KB docs staleness fetched: they double as the college
+            # list view's KB refresh event, at no extra KB call.
+            kb_docs = {}
+
+            def _fetch_kb(ids):
+                kb_docs.update(batch_fetch_universities(ids))
+                return kb_docs
+
+            kb_updates = get_kb_updates(fits, fetch_batch=_fetch_kb)
+            try:
+                apply_kb_refresh(user_email, kb_docs)
+            except Exception as e:
+                logger.warning(f"[CHECK_FIT_RECOMPUTATION] College list view KB refresh failed: {e}")
 
             # Application-clock guardrail (design §3f, #206): colleges the
             # student has already applied to (or heard back from) get no
@@ -811,8 +892,15 @@ def profile_manager_v2_http_entry(request):
             if not user_email:
                 return add_cors_headers({'error': 'user_email required'}, 400)
             
+            # Scope the client's key to what is being charged (reason,
+            # university, amount) — one key reused for another charge is a
+            # new charge, never a free "duplicate".
+            idempotency_key = data.get('idempotency_key')
+            if idempotency_key:
+                idempotency_key = f"{reason}:{data.get('university_id') or ''}:{credit_count}:{idempotency_key}"
             # Call with correct parameter order: user_id, credit_count, reason
-            result = deduct_credit(user_email, credit_count, reason)
+            result = deduct_credit(user_email, credit_count, reason,
+                                   idempotency_key=idempotency_key)
             return add_cors_headers(result)
         
         elif resource_type == 'add-credits' and request.method == 'POST':
@@ -824,7 +912,8 @@ def profile_manager_v2_http_entry(request):
             if not user_email or credits is None:
                 return add_cors_headers({'error': 'user_email and credits required'}, 400)
             
-            result = add_credits(user_email, credits, source)
+            result = add_credits(user_email, credits, source,
+                                 idempotency_key=data.get('idempotency_key'))
             return add_cors_headers(result)
         
         elif resource_type == 'upgrade-subscription' and request.method == 'POST':
@@ -835,9 +924,21 @@ def profile_manager_v2_http_entry(request):
             if not user_email or not tier:
                 return add_cors_headers({'error': 'user_email and tier required'}, 400)
             
-            result = upgrade_subscription(user_email, plan_type=tier)
+            result = upgrade_subscription(user_email, plan_type=tier,
+                                          idempotency_key=data.get('idempotency_key'))
             return add_cors_headers(result)
         
+        elif resource_type == 'get-credit-history' and request.method == 'GET':
+            user_email = request.args.get('user_email')
+            if not user_email:
+                return add_cors_headers({'error': 'user_email required'}, 400)
+            try:
+                limit = int(request.args.get('limit') or 50)
+            except (TypeError, ValueError):
+                limit = 50
+            limit = max(1, min(limit, 200))
+            return add_cors_headers(get_credit_history(user_email, limit))
+        
         # --- PROFILE CHAT ---
         elif resource_type == 'profile-chat' and request.method == 'POST':
             data = request.get_json() or {}
@@ -943,7 +1044,6 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'success': False, 'error': 'messages required'}, 400)
             
             db = get_db()
-            import json
             
             # Generate conversation ID if not provided (new conversation)
             if not conversation_id:
@@ -959,16 +1059,11 @@ def profile_manager_v2_http_entry(request):
             if not title:
                 title = f"Self-Discovery {datetime.utcnow().strftime('%b %d')}"
             
-            # Preserve created_at if updating existing
-            existing = db.get_profile_conversation(user_email, conversation_id)
-            created_at = existing.get('created_at') if existing else datetime.utcnow().isoformat()
-            
+            # The store appends only new messages and keeps created_at.
             conversation_data = {
                 'conversation_id': conversation_id,
                 'title': title,
-                'messages': json.dumps(messages),
-                'message_count': len(messages),
-                'created_at': created_at
+                'messages': messages,
             }
             success = db.save_profile_conversation(user_email, conversation_id, conversation_data)
             return add_cors_headers({
@@ -1021,10 +1116,9 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'success': False, 'error': 'user_email and conversation_id required'}, 400)
             
             db = get_db()
-            import json
             conversation = db.get_profile_conversation(user_email, conversation_id)
             if conversation:
-                messages = json.loads(conversation.get('messages', '[]'))
+                messages = conversation.get('messages') or []
                 return add_cors_headers({
                     'success': True,
                     'conversation': {
@@ -1071,11 +1165,9 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'success': False, 'error': 'user_email and university_id required'}, 400)
             
             db = get_db()
-            import json
             conversation_data = {
                 'university_name': university_name,
-                'messages': json.dumps(messages),
-                'message_count': len(messages)
+                'messages': messages,
             }
             success = db.save_university_conversation(user_email, university_id, conversation_data)
             return add_cors_headers({
@@ -1096,10 +1188,9 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'success': False, 'error': 'user_email and university_id required'}, 400)
             
             db = get_db()
-            import json
             conversation = db.get_university_conversation(user_email, university_id)
             if conversation:
-                messages = json.loads(conversation.get('messages', '[]'))
+                messages = conversation.get('messages') or []
                 return add_cors_headers({
                     'success': True,
                     'university_name': conversation.get('university_name'),
@@ -1124,7 +1215,6 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'success': False, 'error': 'user_email required'}, 400)
             
             db = get_db()
-            import json
             
             # Generate conversation ID if not provided
             if not conversation_id:
@@ -1372,11 +1462,12 @@ def profile_manager_v2_http_entry(request):
             success = db.save_research(user_email, research_id, research_data)
             # Aggregate into the cross-user Popular Workflows stats using ONLY
             # allowlisted tool names (no free-form/PII text, safe doc id), and only
-            # for genuine multi-step workflows (>= 2 known tools).
+            # for genuine multi-step workflows (>= 2 known tools). Queued — the
+            # shared counters are written by a Cloud Tasks callback, not this request.
             if success:
                 agg_tools = [s['tool'] for s in workflow if s.get('tool') in _KNOWN_WORKFLOW_TOOLS]
                 if len(agg_tools) >= 2:
-                    db.upsert_workflow_stat('>'.join(agg_tools), agg_tools, kind)
+                    workflow_stats.record('>'.join(agg_tools), agg_tools, kind)
             return add_cors_headers({
                 'success': success,
                 'research_id': research_id,
@@ -1456,8 +1547,7 @@ def profile_manager_v2_http_entry(request):
             except (TypeError, ValueError):
                 limit = 20
             limit = max(1, min(limit, 50))
-            db = get_db()
-            workflows = db.get_popular_workflows(limit=limit)
+            workflows = workflow_stats.popular(limit=limit)
             return add_cors_headers({'success': True, 'workflows': workflows, 'count': len(workflows)})
 
         # --- ESSAY SAVE ---
@@ -1611,11 +1701,13 @@ def profile_manager_v2_http_entry(request):
             prompt_text = data.get('prompt_text')
             current_text = data.get('current_text', '')
             action = data.get('action', 'suggest')
+            user_email = data.get('user_email') or request.headers.get('X-User-Email') or ''
             
             if not prompt_text:
                 return add_cors_headers({'error': 'prompt_text required'}, 400)
             
-            result = get_copilot_suggestion(prompt_text, current_text, action)
+            result = get_copilot_suggestion(prompt_text, current_text, action,
+                                            user_email=user_email, cursor=data.get('cursor'))
             return add_cors_headers(result, 200 if result.get('success') else 500)
         
         # Essay feedback
@@ -1655,9 +1747,18 @@ def profile_manager_v2_http_entry(request):
             if not user_email or not university_id:
                 return add_cors_headers({'error': 'user_email and university_id required'}, 400)
             
-            result = get_copilot_suggestion(user_email, university_id, current_text)
+            result = get_copilot_suggestion(data.get('prompt_text', ''), current_text,
+                                            data.get('action', 'suggest'),
+                                            university_id=university_id, user_email=user_email,
+                                            cursor=data.get('cursor'))
             return add_cors_headers(result, 200 if result.get('success') else 500)
         
+        # Instance-wide cache counters: admin/QA callers only.
+        elif resource_type == 'copilot-suggest-stats' and request.method == 'GET':
+            if not _has_admin_token(request):
+                return add_cors_headers({'success': False, 'error': 'forbidden'}, 403)
+            return add_cors_headers({'success': True, **copilot_suggestions.stats()}, 200)
+        
         elif resource_type == 'draft-feedback' and request.method == 'POST':
             data = request.get_json()
             user_email = data.get('user_email') or request.headers.get('X-User-Email')
@@ -1734,6 +1835,29 @@ def profile_manager_v2_http_entry(request):
             
             result = get_essay_drafts(user_email, university_id)
             return add_cors_headers(result, 200 if result.get('success') else 500)
+
+        elif resource_type == 'get-essay-draft' and request.method in ['GET', 'POST']:
+            if request.method == 'GET':
+                data = request.args
+                user_email = data.get('user_email')
+            else:
+                data = request.get_json() or {}
+                user_email = data.get('user_email') or request.headers.get('X-User-Email')
+            university_id = data.get('university_id')
+
+            if not user_email or not university_id:
+                return add_cors_headers({'error': 'user_email and university_id required'}, 400)
+
+            try:
+                prompt_index = int(data.get('prompt_index', 0))
+                version = int(data.get('version', 0))
+            except (TypeError, ValueError):
+                return add_cors_headers({'error': 'prompt_index and version must be integers'}, 400)
+
+            result = get_essay_draft(user_email, university_id, prompt_index, version)
+            if result.get('success') and result.get('draft') is None:
+                return add_cors_headers({'success': False, 'error': 'Draft not found'}, 404)
+            return add_cors_headers(result, 200 if result.get('success') else 500)
         
         elif resource_type == 'get-starter-context' and request.method == 'POST':
             data = request.get_json()
@@ -1771,11 +1895,12 @@ def profile_manager_v2_http_entry(request):
                     deleted_counts['profile'] = 1
                     logger.info(f"[RESET_ALL_PROFILE] Deleted profile for {user_id}")
                 
-                # 2. Delete all GCS files
+                # 2. Delete all GCS files, then any extracted text left over
                 files = list_user_files(user_id)
                 for file in files:
                     delete_file_from_gcs(user_id, file['filename'])
                     deleted_counts['files'] += 1
+                delete_cached_extracted_text(user_id)
                 
                 # 3. Delete all fit analyses
                 fits_list = get_all_fits(user_id)  # Returns list directly
@@ -1851,7 +1976,11 @@ def profile_manager_v2_http_entry(request):
         
         # --- SYNC ESSAY TRACKER ---
         elif resource_type == 'sync-essay-tracker' and request.method == 'POST':
-            """Sync essay prompts from user's college list to their essay tracker."""
+            """Sync essay prompts from user's college list to their essay tracker.
+
+            Incremental against the user's sync marker (see essay_tracker_sync);
+            `full: true` re-checks every school in one KB batch call.
+            """
             data = request.get_json() or {}
             user_email = data.get('user_email')
             
@@ -1859,139 +1988,8 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'error': 'user_email required'}, 400)
             
             try:
-                db = get_db()
-                
-                # Get user's college list
-                college_list = db.get_college_list(user_email)
-                
-                if not college_list:
-                    return add_cors_headers({
-                        'success': True,
-                        'message': 'No colleges in list',
-                        'essays_synced': 0,
-                        'essays': []
-                    })
-                
-                all_essays = []
-                uc_schools = []  # Collect all UC school names for grouping
-                seen_prompts = set()  # Track (university_id, prompt_text[:50]) to avoid duplicates
-                
-                # First pass: identify all UC schools and collect non-UC schools
-                non_uc_colleges = []
-                for college in college_list:
-                    university_id = college.get('university_id', '')
-                    university_name = college.get('university_name', university_id.replace('_', ' ').title())
-                    
-                    # Check if this is a UC school by ID or name
-                    is_uc_school = (
-                        'university_of_california' in university_id.lower() or
-                        university_name.startswith('University of California')
-                    )
-                    
-                    if is_uc_school:
-                        # Extract short name (e.g., "UCLA", "UCSD", "UC Berkeley")
-                        short_name = university_name
-                        if 'Los Angeles' in university_name or 'los_angeles' in university_id:
-                            short_name = 'UCLA'
-                        elif 'San Diego' in university_name or 'san_diego' in university_id:
-                            short_name = 'UCSD'
-                        elif 'Berkeley' in university_name or 'berkeley' in university_id:
-                            short_name = 'UC Berkeley'
-                        elif 'Davis' in university_name or 'davis' in university_id:
-                            short_name = 'UC Davis'
-                        elif 'Irvine' in university_name or 'irvine' in university_id:
-                            short_name = 'UCI'
-                        elif 'Santa Barbara' in university_name or 'santa_barbara' in university_id:
-                            short_name = 'UCSB'
-                        elif 'Santa Cruz' in university_name or 'santa_cruz' in university_id:
-                            short_name = 'UCSC'
-                        elif 'Riverside' in university_name or 'riverside' in university_id:
-                            short_name = 'UCR'
-                        elif 'Merced' in university_name or 'merced' in university_id:
-                            short_name = 'UC Merced'
-                        uc_schools.append(short_name)
-                        # SKIP UC schools from supplemental essay collection
-                        # UC schools only use the 8 shared PIQs, no school-specific supplements
-                    else:
-                        # Only add non-UC schools to the processing list
-                        non_uc_colleges.append(college)
-                
-                # Add UC PIQs if user has any UC schools
-                if uc_schools:
-                    # Create display name showing all UC schools
-                    uc_display_name = f"UC Application ({', '.join(sorted(set(uc_schools)))})"
-                    logger.info(f"[ESSAY_SYNC] Adding 8 UC PIQs for: {uc_display_name}")
-                    
-                    for prompt in UC_PIQ_PROMPTS:
-                        prompt_copy = dict(prompt)
-                        prompt_copy['university_id'] = 'uc_system'
-                        prompt_copy['university_name'] = uc_display_name
-                        prompt_copy['selection_rule'] = {'required': 4, 'of': 8}
-                        all_essays.append(prompt_copy)
-                
-                # Process non-UC colleges - fetch essays from KB
-                for college in non_uc_colleges:
-                    university_id = college.get('university_id')
-                    university_name = college.get('university_name', university_id.replace('_', ' ').title())
-                    
-                    # Fetch university profile from KB
-                    uni_data = fetch_university_profile(university_id)
-                    
-                    if not uni_data:
-                        logger.warning(f"[ESSAY_SYNC] No KB data for {university_id}")
-                        continue
-                    
-                    # Get essay prompts - check multiple possible locations
-                    profile_data = uni_data.get('profile', uni_data)
-                    essay_prompts = (
-                        profile_data.get('application_process', {}).get('essay_prompts', []) or
-                        uni_data.get('application_process', {}).get('essay_prompts', []) or
-                        uni_data.get('essay_prompts', [])
-                    )
-                    
-                    if not essay_prompts:
-                        logger.info(f"[ESSAY_SYNC] No essay prompts found for {university_id}")
-                        continue
-                    
-                    logger.info(f"[ESSAY_SYNC] Found {len(essay_prompts)} prompts for {university_name}")
-                    
-                    # Add each essay prompt for this university
-                    for prompt in essay_prompts:
-                        if not isinstance(prompt, dict):
-                            continue
-                        
-                        prompt_text = prompt.get('prompt', '') or prompt.get('prompt_text', '')
-                        if not prompt_text:
-                            continue
-                        
-                        # Deduplicate by (university_id, prompt_text[:50])
-                        dedup_key = (university_id, prompt_text[:50].strip().lower())
-                        if dedup_key in seen_prompts:
-                            continue
-                        seen_prompts.add(dedup_key)
-                        
-                        prompt_copy = dict(prompt)
-                        prompt_copy['university_id'] = university_id
-                        prompt_copy['university_name'] = university_name
-                        prompt_copy['type'] = prompt.get('type', 'Supplement')
-                        all_essays.append(prompt_copy)
-                
-                # Sync to Firestore
-                if all_essays:
-                    db.sync_essay_tracker(user_email, all_essays)
-                
-                # Get updated tracker
-                essays = db.get_essay_tracker(user_email)
-                
-                logger.info(f"[ESSAY_SYNC] Synced {len(all_essays)} prompts, tracker has {len(essays)} essays for {user_email}")
-                
-                return add_cors_headers({
-                    'success': True,
-                    'essays_synced': len(all_essays),
-                    'total_essays': len(essays),
-                    'essays': essays
-                })
-                
+                result = essay_tracker_sync.sync_essay_tracker(user_email, full=bool(data.get('full')))
+                return add_cors_headers(result, 200 if result.get('success') else 500)
             except Exception as e:
                 logger.error(f"[ESSAY_SYNC ERROR] {str(e)}")
                 return add_cors_headers({'success': False, 'error': str(e)}, 500)
@@ -2052,7 +2050,11 @@ def profile_manager_v2_http_entry(request):
         
         # --- SYNC SCHOLARSHIP TRACKER ---
         elif resource_type == 'sync-scholarship-tracker' and request.method == 'POST':
-            """Sync scholarships from user's college list to their tracker."""
+            """Sync scholarships from user's college list to their tracker.
+
+            Incremental against the user's sync marker (see scholarship_engine);
+            `full: true` re-checks every school and re-evaluates every entry.
+            """
             data = request.get_json() or {}
             user_email = data.get('user_email')
             
@@ -2060,62 +2062,8 @@ def profile_manager_v2_http_entry(request):
                 return add_cors_headers({'error': 'user_email required'}, 400)
             
             try:
-                db = get_db()
-                
-                # Get user's college list and profile
-                college_list = db.get_college_list(user_email)
-                user_profile = db.get_profile(user_email)
-                
-                if not college_list:
-                    return add_cors_headers({
-                        'success': True,
-                        'message': 'No colleges in list',
-                        'scholarships_synced': 0
-                    })
-                
-                all_scholarships = []
-                
-                for college in college_list:
-                    university_id = college.get('university_id')
-                    university_name = college.get('university_name', university_id)
-                    
-                    # Use existing fetch_university_profile function (imported from essay_copilot)
-                    uni_data = fetch_university_profile(university_id)
-                    
-                    if not uni_data:
-                        logger.warning(f"[SCHOLARSHIP_SYNC] No data found for {university_id}")
-                        continue
-                    
-                    # Get scholarships from financials - check nested paths
-                    profile_data = uni_data.get('profile', uni_data)  # Handle nested profile
-                    scholarships = profile_data.get('financials', {}).get('scholarships', [])
-                    if not scholarships:
-                        scholarships = uni_data.get('financials', {}).get('scholarships', [])
-                    
-                    for scholarship in scholarships:
-                        if isinstance(scholarship, dict):
-                            # Make a copy to avoid modifying original
-                            scholarship_copy = dict(scholarship)
-                            scholarship_copy['university_id'] = university_id
-                            scholarship_copy['university_name'] = university_name
-                            all_scholarships.append(scholarship_copy)
-                
-                # Sync to Firestore with eligibility calculation
-                if all_scholarships:
-                    db.sync_scholarship_tracker(user_email, all_scholarships, user_profile)
-                
-                # Get updated tracker
-                scholarships = db.get_scholarship_tracker(user_email)
-                
-                logger.info(f"[SCHOLARSHIP_SYNC] Synced {len(all_scholarships)} scholarships for {user_email}")
-                
-                return add_cors_headers({
-                    'success': True,
-                    'scholarships_synced': len(all_scholarships),
-                    'total_scholarships': len(scholarships),
-                    'scholarships': scholarships
-                })
-                
+                result = scholarship_engine.sync_scholarship_tracker(user_email, full=bool(data.get('full')))
+                return add_cors_headers(result, 200 if result.get('success') else 500)
             except Exception as e:
                 logger.error(f"[SCHOLARSHIP_SYNC ERROR] {str(e)}")
                 return add_cors_headers({'success': False, 'error': str(e)}, 500)
@@ -2226,13 +2174,13 @@ def profile_manager_v2_http_entry(request):
         #      (comma-separated list; defaults to duser8531@gmail.com).
         #      Multiple accounts are supported so the autonomous QA loop
         #      account (stratiaadmissions@gmail.com) can also use this
-        #      endpoint. See issue #128.
+        #      endpoint. See issue #128. `local+qa<N>@domain` aliases of
+        #      a listed account are accepted too (QA synthetic users).
         #   2. The X-Admin-Token header must match QA_ADMIN_TOKEN secret.
         # If either gate fails the endpoint refuses without revealing
         # which check failed (avoid leaking which protection is in
         # place).
         elif resource_type == 'clear-test-data' and request.method == 'POST':
-            import os, secrets as _secrets
             data = request.get_json(silent=True) or {}
             user_email = data.get('user_email', '')
 
@@ -2241,13 +2189,16 @@ def profile_manager_v2_http_entry(request):
                 for e in os.getenv('QA_TEST_USER_EMAIL', 'duser8531@gmail.com').split(',')
                 if e.strip()
             ]
-            expected_token = os.getenv('QA_ADMIN_TOKEN', '')
-            provided_token = request.headers.get('X-Admin-Token', '')
-
-            email_ok = bool(user_email) and user_email in allowed_emails
-            token_ok = bool(expected_token) and _secrets.compare_digest(
-                provided_token, expected_token
+            # The QA agent runs each scenario as a plus-alias of a test
+            # account (local+qa<N>@domain, qa_agent/synthetic_users.py).
+            local, _, domain = user_email.partition('@')
+            base_local, plus, tag = local.partition('+')
+            is_qa_alias = (
+                bool(plus) and tag.startswith('qa') and tag[2:].isdigit()
+                and f"{base_local}@{domain}" in allowed_emails
             )
+            email_ok = bool(user_email) and (user_email in allowed_emails or is_qa_alias)
+            token_ok = _has_admin_token(request)
             if not (email_ok and token_ok):
                 logger.warning(
                     "[CLEAR_TEST_DATA] refused: email_ok=%s, token_ok=%s",
@@ -32,12 +32,11 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 import requests
-from google import genai
 
 from firestore_db import get_db
 from fit_computation import build_profile_content_from_fields
-from gemini_fallback import generate_content_with_fallback
 from generation_billing import run_billed_generation
+import llm_gateway
 from major_match import match_major
 
 logger = logging.getLogger(__name__)
@@ -65,8 +64,8 @@ RANKING_TIERS = ('strong', 'possible', 'reach', 'long_shot')
 
 # ---------------------------------------------------------------------------
 # KB fetch (sibling of essay_copilot.fetch_university_profile — but a single
-# attempt: callers here either degrade gracefully or fail unbilled, so the
-# 4-id × 3-retry ladder would only burn the caller's timeout)
+# attempt: callers here either degrade gracefully or fail unbilled, so
+# transport retries would only burn the caller's timeout)
 # ---------------------------------------------------------------------------
 
 def fetch_university_majors(university_id: str, query: Optional[str] = None,
@@ -258,10 +257,9 @@ def _llm_json(prompt: str) -> Optional[Dict]:
         logger.error("[MAJOR_LLM] No GEMINI_API_KEY configured")
         return None
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
         # Default chain's primary IS gemini-2.5-flash-lite (MODEL); overloads
         # walk to progressively different capacity pools.
-        response = generate_content_with_fallback(client, contents=prompt, config=None)
+        response = llm_gateway.generate(prompt, api_key=GEMINI_API_KEY)
         text = (response.text or '').strip()
         if text.startswith('```'):
             lines = text.split('\n')
@@ -344,8 +342,8 @@ def run_generate_major_map(data: Dict) -> Tuple[Dict, int]:
                 'missing': missing}, 422
 
     fingerprint = profile_fingerprint(profile)
+    existing = db.get_major_map(user_email)
     if not force:
-        existing = db.get_major_map(user_email)
         # Serve the cache only if the profile is unchanged AND the map is
         # already grounded — a pre-grounding map (#308) regenerates instead of
         # being served stale, even without force.
@@ -390,7 +388,12 @@ def run_generate_major_map(data: Dict) -> Tuple[Dict, int]:
                     'error': 'map generated but could not be saved — try again'}, 500
         return {'success': True, 'map': map_doc, 'from_cache': False}, 200
 
-    return run_billed_generation(user_email, 'major_map', _generate)
+    # The map is one per student: scope the client key to the map it
+    # replaces, so a key reused for a later regeneration is charged again.
+    replaced = (existing or {}).get('generated_at') or 'none'
+    return run_billed_generation(user_email, 'major_map', _generate,
+                                 idempotency_key=data.get('idempotency_key'),
+                                 artifact_id=f"replaces:{replaced}")
 
 
 def get_major_map_payload(user_email: str) -> Tuple[Dict, int]:
@@ -883,7 +886,9 @@ def run_generate_major_strategy(data: Dict) -> Tuple[Dict, int]:
                     'error': 'strategy generated but could not be saved — try again'}, 500
         return {'success': True, 'strategy': strategy_doc, 'gaps': gaps}, 200
 
-    return run_billed_generation(user_email, 'major_strategy', _generate)
+    return run_billed_generation(user_email, 'major_strategy', _generate,
+                                 idempotency_key=data.get('idempotency_key'),
+                                 artifact_id=university_id)
 
 
 def get_major_strategy_payload(user_email: str, university_id: str) -> Tuple[Dict, int]:
@@ -1248,7 +1253,9 @@ def run_rank_college_majors(data: Dict) -> Tuple[Dict, int]:
                     'error': 'ranking generated but could not be saved — try again'}, 500
         return {'success': True, 'ranking': ranking_doc, 'gaps': []}, 200
 
-    return run_billed_generation(user_email, 'major_chances', _generate)
+    return run_billed_generation(user_email, 'major_chances', _generate,
+                                 idempotency_key=data.get('idempotency_key'),
+                                 artifact_id=university_id)
 
 
 def get_college_major_chances_payload(user_email: str, university_id: str) -> Tuple[Dict, int]:
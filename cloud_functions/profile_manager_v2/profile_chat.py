@@ -7,9 +7,10 @@ Does NOT update profiles or answer university-related questions.
 import os
 import logging
 import json
-from google import genai
+import llm_gateway
 from google.genai import types
 from firestore_db import get_db  # Use Firestore instead of ES
+from profile_context import get_profile_context
 
 logger = logging.getLogger(__name__)
 
@@ -48,18 +49,13 @@ def profile_chat(user_id: str, question: str, conversation_history: list = None)
                 "error": "No profile found. Please upload your profile documents first."
             }
         
-        # Remove internal/metadata fields that aren't useful for the LLM
-        fields_to_exclude = ['indexed_at', 'updated_at', 'created_at', '_id', 'embedding', 'chunk_id', 'user_id']
-        profile_data = {k: v for k, v in user_profile.items() if k not in fields_to_exclude and v}
-        
-        # Build system prompt with profile context and restrictions
-        import json
-        profile_json = json.dumps(profile_data, indent=2)
+        # Bounded, deduplicated profile context (cached on the profile doc)
+        profile_context = get_profile_context(user_id, user_profile, surface='profile_chat')
         
         system_prompt = f"""You are Stratia, a warm and insightful college counseling advisor helping a student understand their unique story and strengths.
 
 STUDENT PROFILE DATA:
-{profile_json}
+{profile_context}
 
 YOUR ROLE:
 You are the student's personal guide for self-discovery and college preparation. You help them:
@@ -146,8 +142,7 @@ GOOD examples:
         ))
         
         # Call Gemini with JSON response format
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
             model='gemini-2.5-flash-lite',
             contents=contents,
             config=types.GenerateContentConfig(
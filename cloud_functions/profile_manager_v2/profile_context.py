@@ -0,0 +1,278 @@
+"""
+Profile context compiler: the one student-profile text every LLM prompt uses.
+
+Prompts used to embed json.dumps(profile, indent=2) plus `raw_content`, which
+index_student_profile appends to on every upload — so prompt size (and
+latency) grew with each document, re-uploads included. compile_profile_context
+builds a bounded canonical text instead:
+
+    1. structured fields, fixed order, one compact line per value/item,
+       list items deduplicated
+    2. DOCUMENT NOTES: raw_content with repeated uploads, repeated lines and
+       lines already stated by the structured section dropped, whitespace
+       collapsed, cut at the budget
+
+The compiled record is cached on the profile doc under `llm_context` with a
+fingerprint of its inputs; get_profile_context recompiles only when the
+fingerprint changes. Each use logs estimated input tokens against what the
+old full-dump prompt would have carried.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from firestore_db import get_db
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_FIELD = 'llm_context'
+CONTEXT_VERSION = 1
+
+# ~4 chars per token: 12k chars ≈ 3k input tokens for the profile block.
+CONTEXT_BUDGET_CHARS = int(os.getenv('PROFILE_CONTEXT_BUDGET_CHARS', '12000'))
+# Document notes always get at least this much, even for very full profiles.
+NOTES_MIN_CHARS = 1500
+MAX_LIST_ITEMS = 30
+CHARS_PER_TOKEN = 4
+
+DOCUMENT_SEPARATOR = '\n\n---\n\n'  # how index_student_profile appends uploads
+
+# Bookkeeping fields — never prompt material, never part of the fingerprint.
+_NON_PROFILE_FIELDS = {
+    CONTEXT_FIELD, 'indexed_at', 'updated_at', 'created_at', 'last_updated',
+    '_id', 'embedding', 'chunk_id', 'user_id', 'field_sources', 'gcs_url',
+    'original_filename', 'uploaded_files', 'upload_date', 'file_size',
+    'content_type', 'raw_content', 'content', 'content_markdown',
+}
+
+# What the pre-compiler prompts dropped before dumping the whole doc; used only
+# to report the "before" size.
+_LEGACY_EXCLUDED = {'indexed_at', 'updated_at', 'created_at', '_id', 'embedding',
+                    'chunk_id', 'user_id', CONTEXT_FIELD}
+
+# Render order. Covers both the upload-extraction and onboarding field names;
+# anything else non-empty follows in key order.
+_SCALAR_FIELDS = [
+    ('name', 'Name'), ('student_name', 'Name'), ('full_name', 'Name'),
+    ('school', 'High school'), ('high_school', 'High school'),
+    ('location', 'Location'), ('state', 'State'),
+    ('grade', 'Grade'), ('grade_level', 'Grade'), ('graduation_year', 'Graduation year'),
+    ('intended_major', 'Intended major'), ('intended_majors', 'Intended majors'),
+    ('gpa_weighted', 'Weighted GPA'), ('gpa_unweighted', 'Unweighted GPA'), ('gpa_uc', 'UC GPA'),
+    ('gpa', 'GPA'), ('class_rank', 'Class rank'),
+    ('sat_total', 'SAT'), ('sat_composite', 'SAT'), ('sat_score', 'SAT'),
+    ('sat_math', 'SAT math'), ('sat_reading', 'SAT reading'),
+    ('act_composite', 'ACT'), ('act_score', 'ACT'),
+    ('ap_courses_count', 'AP/IB courses'), ('top_activity', 'Top activity'),
+]
+_LIST_FIELDS = [
+    ('ap_exams', 'AP exams'), ('courses', 'Courses'),
+    ('extracurriculars', 'Activities'), ('activities', 'Activities'),
+    ('leadership_roles', 'Leadership'), ('awards', 'Awards'), ('honors_awards', 'Awards'),
+    ('special_programs', 'Special programs'), ('work_experience', 'Work experience'),
+    ('academic_interests', 'Academic interests'), ('interests', 'Interests'),
+    ('personal_qualities', 'Personal qualities'), ('career_goals', 'Career goals'),
+]
+_ITEM_TITLE_KEYS = ('name', 'subject', 'title', 'activity', 'employer', 'role')
+
+
+def _norm(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+
+def _fmt_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, list):
+        return '; '.join(_fmt_value(v) for v in value if v not in (None, '', [], {}))
+    if isinstance(value, dict):
+        return _fmt_item(value)
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+
+def _fmt_item(item) -> str:
+    """One list item on one line: its title first, then the other fields."""
+    if not isinstance(item, dict):
+        return _fmt_value(item)
+    title_key = next((k for k in _ITEM_TITLE_KEYS if item.get(k)), None)
+    parts = [_fmt_value(item[title_key])] if title_key else []
+    for key, value in item.items():
+        if key == title_key or value in (None, '', [], {}):
+            continue
+        parts.append(f"{key.replace('_', ' ')}: {_fmt_value(value)}")
+    return ' | '.join(parts)
+
+
+def _profile_inputs(profile: Dict) -> Dict:
+    """The fields that feed the compiled context."""
+    inputs = {k: v for k, v in profile.items()
+              if k not in _NON_PROFILE_FIELDS and v not in (None, '', [], {})}
+    raw = profile.get('raw_content') or profile.get('content') or ''
+    if raw:
+        inputs['raw_content'] = raw
+    return inputs
+
+
+def profile_fingerprint(profile: Dict, budget_chars: int = None) -> str:
+    """Hash of everything compile_profile_context reads (plus its version and
+    budget) — unchanged fingerprint ⇒ cached context is still exact."""
+    payload = json.dumps(_profile_inputs(profile), sort_keys=True, default=str)
+    key = f"v{CONTEXT_VERSION}:{budget_chars or CONTEXT_BUDGET_CHARS}:{payload}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _structured_lines(inputs: Dict) -> list:
+    lines, seen_labels = [], set()
+    for field, label in _SCALAR_FIELDS:
+        value = inputs.get(field)
+        if value in (None, '', [], {}) or label in seen_labels:
+            continue
+        seen_labels.add(label)
+        lines.append(f"{label}: {_fmt_value(value)}")
+
+    handled = {f for f, _ in _SCALAR_FIELDS} | {f for f, _ in _LIST_FIELDS} | {'raw_content'}
+    list_fields = list(_LIST_FIELDS) + [
+        (k, k.replace('_', ' ').capitalize()) for k in sorted(inputs) if k not in handled
+    ]
+    emitted = {}
+    for field, label in list_fields:
+        value = inputs.get(field)
+        if value in (None, '', [], {}):
+            continue
+        if not isinstance(value, list):
+            lines.append(f"{label}: {_fmt_value(value)}")
+            continue
+        items = emitted.setdefault(label, {})
+        for item in value:
+            text = _fmt_item(item)
+            if text and _norm(text) not in items and len(items) < MAX_LIST_ITEMS:
+                items[_norm(text)] = text
+    for label, items in emitted.items():
+        if items:
+            lines.append(f"{label}:")
+            lines.extend(f"- {text}" for text in items.values())
+    return lines
+
+
+def _note_lines(raw_content: str, already_stated: str) -> list:
+    """raw_content → unique, compact lines. Identical re-uploads, repeated
+    lines and short lines already in the structured section are dropped."""
+    seen, lines = set(), []
+    seen_docs = set()
+    for document in raw_content.split(DOCUMENT_SEPARATOR):
+        doc_key = _norm(document)
+        if not doc_key or doc_key in seen_docs:
+            continue
+        seen_docs.add(doc_key)
+        for line in document.splitlines():
+            text = re.sub(r'\s+', ' ', line.strip().lstrip('#').strip())
+            text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+            key = _norm(text)
+            if len(key) < 3 or key in seen:
+                continue
+            seen.add(key)
+            if len(key) <= 80 and f' {key} ' in already_stated:
+                continue
+            lines.append(text)
+    return lines
+
+
+def compile_profile_context(profile: Dict, budget_chars: int = None) -> str:
+    """Bounded canonical profile text: structured fields, then document notes."""
+    budget = budget_chars or CONTEXT_BUDGET_CHARS
+    inputs = _profile_inputs(profile or {})
+
+    structured = '\n'.join(_structured_lines(inputs))
+    if len(structured) > budget - NOTES_MIN_CHARS:
+        structured = structured[:max(budget - NOTES_MIN_CHARS, 0)].rsplit('\n', 1)[0]
+
+    sections = [structured] if structured else []
+    raw = inputs.get('raw_content', '')
+    if raw:
+        remaining = budget - len(structured) - len('\n\nDOCUMENT NOTES:\n')
+        notes, used = [], 0
+        note_lines = _note_lines(raw, f" {_norm(structured)} ")
+        for i, line in enumerate(note_lines):
+            if used + len(line) + 1 > remaining:
+                notes.append(f"[... {len(note_lines) - i} more lines omitted]")
+                break
+            notes.append(line)
+            used += len(line) + 1
+        if notes:
+            sections.append('DOCUMENT NOTES:\n' + '\n'.join(notes))
+    return '\n\n'.join(sections)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def legacy_prompt_tokens(profile: Dict) -> int:
+    """Estimated tokens of the old `json.dumps(profile, indent=2)` block."""
+    legacy = {k: v for k, v in (profile or {}).items() if k not in _LEGACY_EXCLUDED and v}
+    return estimate_tokens(json.dumps(legacy, indent=2, default=str))
+
+
+def build_context_record(profile: Dict, fingerprint: str = None) -> Dict:
+    text = compile_profile_context(profile)
+    return {
+        'text': text,
+        'fingerprint': fingerprint or profile_fingerprint(profile),
+        'version': CONTEXT_VERSION,
+        'chars': len(text),
+        'est_tokens': estimate_tokens(text),
+        'legacy_est_tokens': legacy_prompt_tokens(profile),
+        'compiled_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def client_profile(profile: Optional[Dict]) -> Optional[Dict]:
+    """
+    The profile as it may leave the service: a copy without the cached
+    compiled context, which is server-side prompt material only. Every route
+    that returns a profile doc goes through this.
+    """
+    if not profile:
+        return profile
+    return {k: v for k, v in profile.items() if k != CONTEXT_FIELD}
+
+
+def get_profile_context(user_id: str, profile: Optional[Dict] = None, surface: str = '') -> str:
+    """
+    The compiled profile context for a user's prompts.
+
+    Served from the profile doc's cached record when its fingerprint still
+    matches; otherwise recompiled and written back.
+
+    Args:
+        user_id: User's email
+        profile: The profile doc if the caller already loaded it
+        surface: Prompt name for the token-metrics log line
+
+    Returns:
+        Context text ('' when the user has no profile)
+    """
+    db = get_db()
+    if profile is None:
+        profile = db.get_profile(user_id)
+    if not profile:
+        return ''
+
+    fingerprint = profile_fingerprint(profile)
+    record = profile.get(CONTEXT_FIELD) or {}
+    cached = record.get('fingerprint') == fingerprint and 'text' in record
+    if not cached:
+        record = build_context_record(profile, fingerprint)
+        if not db.save_profile(user_id, {CONTEXT_FIELD: record}, merge=True):
+            logger.warning(f"[PROFILE_CONTEXT] Could not cache compiled context for {user_id}")
+
+    before, after = record.get('legacy_est_tokens', 0), record.get('est_tokens', 0)
+    saved = f"{100 * (before - after) / before:.0f}%" if before else 'n/a'
+    logger.info(f"[PROFILE_CONTEXT] {surface or 'prompt'}: ~{after} profile input tokens "
+                f"(full dump ~{before}, saved {saved}; {'cached' if cached else 'compiled'})")
+    return record['text']
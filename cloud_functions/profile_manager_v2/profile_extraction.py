@@ -6,7 +6,8 @@ Handles markdown conversion and structured data extraction.
 import os
 import json
 import logging
-from google import genai
+from concurrent.futures import ThreadPoolExecutor
+import llm_gateway
 from google.genai import types
 
 logger = logging.getLogger(__name__)
@@ -28,11 +29,13 @@ def extract_profile_content(raw_text, filename):
         Dict with markdown content and structured profile data
     """
     try:
-        # Convert to clean markdown
-        content_markdown = convert_to_markdown(raw_text, filename)
-        
-        # Extract structured profile data (MATCH ES EXACTLY)
-        structured_profile = extract_structured_profile_with_gemini(raw_text)
+        # Markdown conversion and structured extraction (MATCH ES EXACTLY)
+        # read the same text independently — run both Gemini calls at once.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            markdown = pool.submit(convert_to_markdown, raw_text, filename)
+            structured = pool.submit(extract_structured_profile_with_gemini, raw_text)
+            content_markdown = markdown.result()
+            structured_profile = structured.result()
         
         return {
             "raw_content": raw_text,
@@ -68,8 +71,6 @@ def convert_to_markdown(raw_text: str, filename: str) -> str:
             logger.error("[GEMINI] API key not configured")
             return f"# Student Profile\\n\\n{raw_text}"
         
-        client = genai.Client(api_key=api_key)
-        
         prompt = f"""You are a college admissions document formatter. Convert the following student profile content into a clean, well-formatted Markdown document.
 
 IMPORTANT RULES:
@@ -87,7 +88,8 @@ Content to format:
 
 Return ONLY the formatted Markdown, no explanation."""
 
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
+            api_key=api_key,
             model='gemini-2.5-flash-lite',
             contents=prompt,
             config=types.GenerateContentConfig(
@@ -119,8 +121,6 @@ def extract_structured_profile_with_gemini(raw_text: str) -> dict:
             logger.warning("[GEMINI] No API key, returning empty structured profile")
             return None
         
-        client = genai.Client(api_key=api_key)
-        
         prompt = f"""Extract ALL information from this student profile into structured JSON.
 Be thorough - extract EVERY piece of information present. Use null for missing fields.
 
@@ -204,7 +204,8 @@ TRANSCRIPT-SPECIFIC RULES (IMPORTANT):
 
 Return ONLY the JSON object."""
 
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
+            api_key=api_key,
             model='gemini-2.5-flash-lite',
             contents=prompt
         )
@@ -277,8 +278,6 @@ def evaluate_profile_changes(old_content: str, new_content: str) -> dict:
         if not api_key:
             return {"should_recompute": True, "reason": "Unable to evaluate changes"}
         
-        client = genai.Client(api_key=api_key)
-        
         prompt = f"""Compare these two student profile versions and determine if college fit analysis should be recomputed.
 
 Recompute if there are SIGNIFICANT changes to:
@@ -301,7 +300,8 @@ NEW PROFILE:
 
 Return JSON: {{"should_recompute": true/false, "reason": "brief explanation"}}"""
 
-        response = client.models.generate_content(
+        response = llm_gateway.generate(
+            api_key=api_key,
             model='gemini-2.5-flash-lite',
             contents=prompt,
             config=types.GenerateContentConfig(
@@ -46,7 +46,7 @@ def process_and_index_profile(user_id: str, filename: str, file_content: bytes,
         
         # Step 2: Extract text
         logger.info(f"[PROFILE] Extracting text from {filename}")
-        raw_text = extract_text_from_file_content(file_content, filename)
+        raw_text = extract_text_from_file_content(file_content, filename, user_id)
         
         if not raw_text:
             logger.warning(f"[PROFILE] No text extracted from {filename}")
@@ -311,8 +311,10 @@ def cleanup_profile_on_document_delete(user_id: str, filename: str) -> dict:
         # Save updated profile
         db.save_profile(user_id, profile, merge=True)
         
-        # Delete file metadata
+        # Delete file metadata (and its upload jobs, so a re-upload of the
+        # same bytes is processed again rather than deduped away)
         db.delete_file_metadata(user_id, filename)
+        db.delete_upload_jobs_for_file(user_id, filename)
         
         logger.info(f"[PROFILE] Cleaned up profile after deleting {filename}")
         
@@ -22,20 +22,46 @@ Rollout is governed by AUTH_MODE (env):
 - ``enforce``  — no valid credential → 401; a user token whose email doesn't
                  match the claimed identity → 403. The verified identity wins.
 
+Verified claims are cached per instance, keyed by a hash of the token (and
+the Firebase project it was checked against), until the token's own `exp`:
+a session's repeat calls skip signature verification and the cert fetch
+entirely. Policy checks (audience, trusted-caller allowlist, verified email)
+still run on every request against the cached claims, so a config change
+applies at once. Rejected tokens are cached for AUTH_NEGATIVE_TTL_SECONDS so
+a replayed bad token isn't re-verified; only definite rejections (ValueError
+from google-auth) are, never transport failures. The cache is a bounded LRU
+(AUTH_CACHE_SIZE); ``cache_metrics()`` reports hits, misses and evictions.
+
 Config (env): AUTH_MODE, FIREBASE_PROJECT_ID, TRUSTED_SERVICE_EMAILS (csv),
-SELF_AUDIENCES (csv of this service's accepted audience URLs).
+SELF_AUDIENCES (csv of this service's accepted audience URLs),
+AUTH_CACHE_SIZE, AUTH_NEGATIVE_TTL_SECONDS.
 
 Kept self-contained — these Cloud Functions deploy independently and share no
 common package, so an identical copy lives in each backend service
-(profile_manager_v2, counselor_agent, knowledge_base_manager_universities_v2).
+(profile_manager_v2, counselor_agent, knowledge_base_manager_universities_v2);
+tests/cicd/test_shared_module_copies.py fails if the copies drift.
 """
+import hashlib
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
 _CLOCK_SKEW_SECONDS = 10
 
+AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '4096'))
+AUTH_NEGATIVE_TTL_SECONDS = float(os.getenv('AUTH_NEGATIVE_TTL_SECONDS', '60'))
+
+# token key -> (expires_at epoch, issuer route, claims|None, error|None)
+_verified = OrderedDict()
+_cache_lock = threading.Lock()
+_METRIC_NAMES = ('hits', 'negative_hits', 'misses', 'verifications',
+                 'rejections_cached', 'evictions', 'expired')
+_metrics = dict.fromkeys(_METRIC_NAMES, 0)
+
 # google-auth is imported lazily: several test conftests stub the `google`
 # package, and this module must stay importable there (verification is
 # monkeypatched in unit tests; production always has the real package).
@@ -79,6 +105,105 @@ def _verify_google_oidc(token):
         clock_skew_in_seconds=_CLOCK_SKEW_SECONDS)
 
 
+# ---- Verified-claims cache ---------------------------------------------------
+
+
+def reset_cache():
+    """Drop cached verifications and zero the metrics (tests, key rotation)."""
+    with _cache_lock:
+        _verified.clear()
+        for name in _METRIC_NAMES:
+            _metrics[name] = 0
+
+
+def cache_metrics() -> dict:
+    """Cache counters since start, plus current size and hit rate."""
+    with _cache_lock:
+        out = dict(_metrics)
+        out['size'] = len(_verified)
+    lookups = out['hits'] + out['negative_hits'] + out['misses']
+    out['hit_rate'] = round((out['hits'] + out['negative_hits']) / lookups, 4) if lookups else 0.0
+    return out
+
+
+def _token_key(token, project):
+    return hashlib.sha256(f"{project or ''}\0{token}".encode('utf-8')).hexdigest()
+
+
+def _cache_get(key):
+    now = time.time()
+    with _cache_lock:
+        entry = _verified.get(key)
+        if entry is not None and entry[0] <= now:
+            del _verified[key]
+            _metrics['expired'] += 1
+            entry = None
+        if entry is None:
+            _metrics['misses'] += 1
+            return None
+        _verified.move_to_end(key)
+        _metrics['negative_hits' if entry[3] else 'hits'] += 1
+        return entry
+
+
+def _cache_put(key, expires_at, route, claims, error):
+    with _cache_lock:
+        _verified[key] = (expires_at, route, claims, error)
+        _verified.move_to_end(key)
+        if error:
+            _metrics['rejections_cached'] += 1
+        while len(_verified) > AUTH_CACHE_SIZE:
+            _verified.popitem(last=False)
+            _metrics['evictions'] += 1
+
+
+def _verified_claims(token):
+    """(route, claims, error) for a token: route is 'firebase' or 'google',
+    claims are signature-verified, error is set instead on rejection.
+    Served from the cache when this token was seen and hasn't expired."""
+    project = os.getenv('FIREBASE_PROJECT_ID') or os.getenv('GCP_PROJECT_ID')
+    key = _token_key(token, project)
+    hit = _cache_get(key)
+    if hit is not None:
+        _, route, claims, error = hit
+        return route, claims, error
+
+    # Route on the (unverified) issuer, then verify with the right verifier —
+    # routing is a hint only; nothing is trusted until verification passes.
+    try:
+        unverified = _decode_unverified(token)
+    except Exception as e:  # noqa: BLE001 — malformed token
+        error = f'malformed token: {e}'
+        _cache_put(key, time.time() + AUTH_NEGATIVE_TTL_SECONDS, None, None, error)
+        return None, None, error
+    issuer = unverified.get('iss') or ''
+    route = 'firebase' if 'securetoken.google.com' in issuer else 'google'
+
+    if route == 'firebase' and not project:
+        # Fail CLOSED: verifying with audience=None skips the project
+        # pin, so any Firebase project's token (shared securetoken
+        # keys) would verify — cross-project impersonation (#301 review).
+        return route, None, 'FIREBASE_PROJECT_ID unconfigured — cannot verify audience'
+
+    with _cache_lock:
+        _metrics['verifications'] += 1
+    try:
+        if route == 'firebase':
+            claims = _verify_firebase(token, project)
+        else:
+            claims = _verify_google_oidc(token)
+    except ValueError as e:  # bad signature, expired, wrong iss… — a definite no
+        _cache_put(key, time.time() + AUTH_NEGATIVE_TTL_SECONDS, route, None, str(e))
+        return route, None, str(e)
+    except Exception as e:  # noqa: BLE001 — cert fetch / transport: don't remember it
+        return route, None, str(e)
+
+    exp = claims.get('exp')
+    if isinstance(exp, (int, float)):
+        _cache_put(key, float(exp), route, claims, None)
+    return route, claims, None
+
+
 def _mode() -> str:
     mode = (os.getenv('AUTH_MODE') or 'log').strip().lower()
     return mode if mode in ('off', 'log', 'enforce') else 'log'
@@ -107,50 +232,34 @@ def authenticate(req) -> dict:
     Returns {'kind': 'user'|'service'|'anonymous'|'invalid',
              'email': str|None, 'error': str|None}.
     Never raises; verification failures come back as kind='invalid'.
+    Signature verification is skipped for a token already in the cache.
     """
     token = _bearer_token(req)
     if not token:
         return {'kind': 'anonymous', 'email': None, 'error': None}
 
-    # Route on the (unverified) issuer, then verify with the right verifier —
-    # routing is a hint only; nothing is trusted until verification passes.
-    try:
-        unverified = _decode_unverified(token)
-    except Exception as e:  # noqa: BLE001 — malformed token
-        return {'kind': 'invalid', 'email': None, 'error': f'malformed token: {e}'}
-    issuer = unverified.get('iss') or ''
+    route, claims, error = _verified_claims(token)
+    if error:
+        return {'kind': 'invalid', 'email': None, 'error': error}
 
-    try:
-        if 'securetoken.google.com' in issuer:
-            project = os.getenv('FIREBASE_PROJECT_ID') or os.getenv('GCP_PROJECT_ID')
-            if not project:
-                # Fail CLOSED: verifying with audience=None skips the project
-                # pin, so any Firebase project's token (shared securetoken
-                # keys) would verify — cross-project impersonation (#301 review).
-                return {'kind': 'invalid', 'email': None,
-                        'error': 'FIREBASE_PROJECT_ID unconfigured — cannot verify audience'}
-            claims = _verify_firebase(token, project)
-            email = (claims.get('email') or '').lower()
-            if not email or not claims.get('email_verified', False):
-                return {'kind': 'invalid', 'email': None,
-                        'error': 'firebase token lacks a verified email'}
-            return {'kind': 'user', 'email': email, 'error': None}
-
-        # Google OIDC (service-to-service): verify signature/expiry first,
-        # then bind to OUR audience and the trusted-caller allowlist.
-        claims = _verify_google_oidc(token)
-        aud = (claims.get('aud') or '').rstrip('/')
-        if aud not in _self_audiences():
-            return {'kind': 'invalid', 'email': None,
-                    'error': f'token audience {aud!r} is not this service'}
+    if route == 'firebase':
         email = (claims.get('email') or '').lower()
-        if email not in _trusted_service_emails() or not claims.get('email_verified', False):
+        if not email or not claims.get('email_verified', False):
             return {'kind': 'invalid', 'email': None,
-                    'error': f'caller {email!r} is not a trusted service'}
-        return {'kind': 'service', 'email': email, 'error': None}
-
-    except Exception as e:  # noqa: BLE001 — bad signature, expired, wrong iss…
-        return {'kind': 'invalid', 'email': None, 'error': str(e)}
+                    'error': 'firebase token lacks a verified email'}
+        return {'kind': 'user', 'email': email, 'error': None}
+
+    # Google OIDC (service-to-service): signature/expiry verified above; bind
+    # to OUR audience and the trusted-caller allowlist on every request.
+    aud = (claims.get('aud') or '').rstrip('/')
+    if aud not in _self_audiences():
+        return {'kind': 'invalid', 'email': None,
+                'error': f'token audience {aud!r} is not this service'}
+    email = (claims.get('email') or '').lower()
+    if email not in _trusted_service_emails() or not claims.get('email_verified', False):
+        return {'kind': 'invalid', 'email': None,
+                'error': f'caller {email!r} is not a trusted service'}
+    return {'kind': 'service', 'email': email, 'error': None}
 
 
 def _normalize_claims(claimed_emails) -> set:
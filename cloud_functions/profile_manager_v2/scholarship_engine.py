@@ -0,0 +1,401 @@
+"""
+Scholarship engine: compiled eligibility rules and incremental tracker sync.
+
+sync-scholarship-tracker used to fetch every listed school's full KB profile
+one GET at a time, stream the user's whole scholarship tracker to find what
+was already there, and re-derive each new entry's eligibility from the raw
+scholarship dict with string matching. Tracker ids also came from Python's
+hash(), which is salted per process, so a sync on a different instance
+re-created entries it had already made.
+
+Eligibility criteria are now compiled once per scholarship into a
+CompiledScholarship — its kind (need / merit / other) plus any explicit
+minimums (GPA, SAT, ACT) pulled from the criteria text — and cached per
+instance by (scholarship_id, data_year). The compiled form serializes to a
+small `rules` spec, so it can be rebuilt without the KB. evaluate_all()
+scores many scholarships against one profile, extracting the profile facts
+once.
+
+A marker doc, users/{uid}/scholarship_tracker_sync/state, records:
+
+    schools              {university_id: {data_year, content_hash, checked_at}}
+    entries              {scholarship_id: {university_id, name, data_year,
+                          rules, eligibility}} for every tracker entry
+    profile_fingerprint  hash of the profile facts the rules read
+
+A sync fetches only new schools and ones older than SYNC_RECHECK_SECONDS, in
+ONE KB batch call projected to `financials`. Only scholarships from schools
+whose KB data moved are recompiled. Everything is re-evaluated only when
+the profile fingerprint changes. New entries, changed indicators and the
+marker are committed in one batch. So sync cost follows what changed, not
+tracker size.
+
+The first sync for a user without a marker streams the tracker once to seed
+it. Existing entries are matched by (university_id, name) and keep their old
+hash()-based ids; new entries get md5 ids.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from firestore_db import get_db
+from fit_staleness import batch_fetch_universities
+
+logger = logging.getLogger(__name__)
+
+# KB profile sections the sync reads (scholarships live in financials).
+SCHOLARSHIP_SYNC_SECTIONS = ('financials',)
+
+# A synced school is re-checked against the KB after this long.
+SYNC_RECHECK_SECONDS = int(os.getenv("SCHOLARSHIP_SYNC_RECHECK_SECONDS", str(7 * 24 * 3600)))
+
+# Bump when the rules below change, so stored indicators get re-evaluated.
+RULES_VERSION = 1
+
+COMPILED_CACHE_SIZE = 4096
+
+# Text fields a scholarship's criteria can be stated in.
+_CRITERIA_FIELDS = ('name', 'eligibility', 'criteria', 'requirements', 'description', 'benefits')
+
+_MINIMUM_PATTERNS = {
+    'gpa': (re.compile(r'(\d\.\d{1,2})\s*\+?\s*(?:or (?:higher|above|better)\s+)?(?:unweighted\s+|weighted\s+)?gpa'),
+            re.compile(r'gpa\s*(?:of|:|>=|≥|above|at least|minimum(?: of)?)?\s*(\d\.\d{1,2})')),
+    'sat': (re.compile(r'\b(1[0-6]\d0)\s*\+?\s*(?:or (?:higher|above|better)\s+)?(?:on the\s+)?sat\b'),
+            re.compile(r'\bsat\b[^0-9]{0,15}(1[0-6]\d0)\b')),
+    'act': (re.compile(r'\b(3[0-6]|[12]\d)\s*\+?\s*(?:or (?:higher|above|better)\s+)?(?:on the\s+)?act\b'),
+            re.compile(r'\bact\b[^0-9]{0,15}(3[0-6]|[12]\d)\b')),
+}
+
+_compiled: 'OrderedDict[tuple, CompiledScholarship]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def reset() -> None:
+    with _lock:
+        _compiled.clear()
+
+
+def scholarship_id(university_id: str, name: str) -> str:
+    """Deterministic tracker doc id (hashlib: hash() changes between runs)."""
+    digest = hashlib.md5((name or '')[:100].encode()).hexdigest()[:8]
+    return f"{university_id or 'general'}_{digest}"
+
+
+# ---- Profile facts -----------------------------------------------------------
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, dict):
+        value = value.get('unweighted', value.get('total', value.get('composite')))
+    try:
+        return float(str(value).strip()) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def _first(profile: Dict, *keys) -> Optional[float]:
+    for key in keys:
+        value = _number(profile.get(key))
+        if value is not None:
+            return value
+    return None
+
+
+def profile_facts(profile: Optional[Dict]) -> Optional[Dict]:
+    """The profile fields eligibility rules read; None without a profile."""
+    if not profile:
+        return None
+    gpa = _first(profile, 'gpa_unweighted', 'gpa')
+    return {
+        'gpa': gpa if gpa is not None and gpa <= 4.0 else None,
+        'sat': _first(profile, 'sat_total', 'sat_composite', 'sat_score', 'sat'),
+        'act': _first(profile, 'act_composite', 'act_score', 'act'),
+    }
+
+
+def profile_fingerprint(profile: Optional[Dict]) -> str:
+    """Changes exactly when a re-evaluation could change an indicator."""
+    raw = json.dumps([RULES_VERSION, profile_facts(profile)], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+# ---- Compiled rules ----------------------------------------------------------
+
+
+class _Minimum:
+    """One explicit threshold, e.g. "3.5 GPA" → _Minimum('gpa', 3.5)."""
+
+    __slots__ = ('field', 'minimum')
+
+    def __init__(self, field: str, minimum: float):
+        self.field, self.minimum = field, minimum
+
+    def check(self, facts: Dict) -> Optional[bool]:
+        value = facts.get(self.field)
+        return None if value is None else value >= self.minimum
+
+
+class CompiledScholarship:
+    __slots__ = ('scholarship_id', 'data_year', 'kind', 'minimums', 'spec')
+
+    def __init__(self, scholarship_id: str, data_year, spec: Dict):
+        self.scholarship_id = scholarship_id
+        self.data_year = data_year
+        self.spec = spec
+        self.kind = spec.get('kind', 'other')
+        self.minimums = tuple(_Minimum(f, float(v)) for f, v in sorted((spec.get('min') or {}).items()))
+
+    def evaluate(self, facts: Optional[Dict]) -> str:
+        """likely_eligible | may_qualify | unknown for one profile's facts."""
+        if facts is None:
+            return 'unknown'
+        met = [m.check(facts) for m in self.minimums]
+        if False in met:
+            return 'unknown'
+        if self.minimums and all(met):
+            return 'likely_eligible'
+        if self.kind == 'merit':
+            gpa = facts.get('gpa') or 0
+            if gpa >= 3.8:
+                return 'likely_eligible'
+            if gpa >= 3.5:
+                return 'may_qualify'
+            return 'unknown'
+        # Need-based and everything else: conservatively assume most students may qualify.
+        return 'may_qualify'
+
+
+def rules_spec(scholarship: Dict) -> Dict:
+    """Parse a scholarship's type and criteria text into a serializable spec."""
+    scholarship_type = str(scholarship.get('type') or '').lower()
+    if 'need' in scholarship_type:
+        kind = 'need'
+    elif 'merit' in scholarship_type:
+        kind = 'merit'
+    else:
+        kind = 'other'
+    text = ' '.join(str(scholarship.get(f) or '') for f in _CRITERIA_FIELDS).lower()
+    minimums = {}
+    for field, patterns in _MINIMUM_PATTERNS.items():
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                minimums[field] = float(match.group(1))
+                break
+    spec = {'kind': kind}
+    if minimums:
+        spec['min'] = minimums
+    return spec
+
+
+def _cache(key: tuple, compiled: CompiledScholarship) -> CompiledScholarship:
+    with _lock:
+        _compiled[key] = compiled
+        _compiled.move_to_end(key)
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def compile_scholarship(sid: str, data_year, scholarship: Dict) -> CompiledScholarship:
+    """Compile fresh KB data, replacing any cached rules for (sid, data_year)."""
+    return _cache((sid, data_year), CompiledScholarship(sid, data_year, rules_spec(scholarship)))
+
+
+def compiled_for(sid: str, data_year, spec: Dict) -> CompiledScholarship:
+    """Cached rules for (sid, data_year), rebuilt from a stored spec on a miss."""
+    with _lock:
+        hit = _compiled.get((sid, data_year))
+        if hit is not None and hit.spec == spec:
+            _compiled.move_to_end((sid, data_year))
+            return hit
+    return _cache((sid, data_year), CompiledScholarship(sid, data_year, spec))
+
+
+def evaluate_all(compiled: Iterable[CompiledScholarship], profile: Optional[Dict]) -> Dict[str, str]:
+    """{scholarship_id: eligibility_indicator}, profile facts extracted once."""
+    facts = profile_facts(profile)
+    return {c.scholarship_id: c.evaluate(facts) for c in compiled}
+
+
+# ---- Incremental sync --------------------------------------------------------
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _is_fresh(entry: Optional[Dict], now: datetime) -> bool:
+    try:
+        checked = datetime.fromisoformat(entry['checked_at'])
+    except (TypeError, KeyError, ValueError):
+        return False
+    if checked.tzinfo is None:
+        checked = checked.replace(tzinfo=timezone.utc)
+    return (now - checked).total_seconds() < SYNC_RECHECK_SECONDS
+
+
+def _school_scholarships(uni_data: Dict) -> List[Dict]:
+    """Scholarships from a KB doc - check nested paths."""
+    profile_data = uni_data.get('profile') or uni_data
+    scholarships = (profile_data.get('financials') or {}).get('scholarships') or []
+    if not scholarships:
+        scholarships = (uni_data.get('financials') or {}).get('scholarships') or []
+    return [s for s in scholarships if isinstance(s, dict)]
+
+
+def _seed_entries(db, user_id: str) -> Dict[str, Dict]:
+    """Marker entries for a tracker that predates the marker (one stream)."""
+    entries = {}
+    for doc in db.get_scholarship_tracker(user_id):
+        name = doc.get('scholarship_name') or ''
+        entries[doc['scholarship_id']] = {
+            'university_id': doc.get('university_id'),
+            'name': name,
+            'data_year': None,
+            'rules': rules_spec({'type': doc.get('type'), 'name': name, 'benefits': doc.get('benefits')}),
+            'eligibility': doc.get('eligibility_indicator'),
+        }
+    return entries
+
+
+def _tracker_doc(scholarship: Dict, university_id: str, university_name: str, now: str) -> Dict:
+    application_method = str(scholarship.get('application_method') or '')
+    return {
+        'university_id': university_id,
+        'university_name': university_name,
+        'scholarship_name': scholarship.get('name'),
+        'type': scholarship.get('type', 'Need'),  # Need, Merit, Specific
+        'amount': scholarship.get('amount'),
+        'deadline': scholarship.get('deadline'),
+        'benefits': scholarship.get('benefits'),
+        'application_method': scholarship.get('application_method'),
+        'application_required': 'automatic' not in application_method.lower(),
+        'status': 'not_applied',  # not_applied, applied, received, not_eligible
+        'notes': '',
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def sync_scholarship_tracker(user_id: str, full: bool = False,
+                             fetch_batch: Callable = batch_fetch_universities) -> Dict:
+    """
+    Bring the user's scholarship tracker up to date with their college list
+    and profile.
+
+    Args:
+        user_id: User's email
+        full: Ignore the marker's school checks and re-evaluate everything
+        fetch_batch: KB batch fetcher (injectable for tests)
+
+    Returns:
+        Dict with success, scholarships_synced (scholarships read from the KB
+        this run), eligibility_updated, schools_fetched, total_scholarships
+        and the tracker's scholarships
+    """
+    db = get_db()
+    college_list = db.get_college_list(user_id)
+    if not college_list:
+        return {'success': True, 'message': 'No colleges in list', 'scholarships_synced': 0}
+
+    profile = db.get_profile(user_id)
+    fingerprint = profile_fingerprint(profile)
+    state = db.get_scholarship_tracker_sync_state(user_id)
+    if state is None:
+        state = {'entries': _seed_entries(db, user_id)}
+    prev_schools = {} if full else (state.get('schools') or {})
+    entries = {sid: dict(e) for sid, e in (state.get('entries') or {}).items()}
+    now = _now()
+    now_iso = now.isoformat()
+
+    listed = {}
+    for college in college_list:
+        university_id = college.get('university_id')
+        if university_id:
+            listed[university_id] = college.get('university_name', university_id)
+
+    schools = {uid: prev_schools[uid] for uid in listed if uid in prev_schools}
+    to_fetch = [uid for uid in listed if not _is_fresh(schools.get(uid), now)]
+
+    fetched = {}
+    if to_fetch:
+        for doc in fetch_batch(to_fetch, sections=list(SCHOLARSHIP_SYNC_SECTIONS)).values():
+            asked = doc.get('resolved_from') or doc.get('university_id')
+            if asked in listed:
+                fetched[asked] = doc
+
+    by_name = {(e.get('university_id'), e.get('name')): sid for sid, e in entries.items()}
+    creates = {}
+    to_evaluate = set()
+    considered = 0
+    for university_id in to_fetch:
+        uni_data = fetched.get(university_id)
+        if not uni_data:
+            logger.warning(f"[SCHOLARSHIP_SYNC] No data found for {university_id}")
+            schools.pop(university_id, None)
+            continue
+        check = {'data_year': uni_data.get('data_year'),
+                 'content_hash': uni_data.get('content_hash'),
+                 'checked_at': now_iso}
+        prior = schools.get(university_id)
+        schools[university_id] = check
+        if (prior and prior.get('content_hash') and
+                (prior.get('data_year'), prior.get('content_hash')) ==
+                (check['data_year'], check['content_hash'])):
+            continue  # KB unchanged — its compiled rules still hold
+
+        for scholarship in _school_scholarships(uni_data):
+            considered += 1
+            name = scholarship.get('name') or ''
+            sid = by_name.get((university_id, name)) or scholarship_id(university_id, name)
+            compiled = compile_scholarship(sid, check['data_year'], scholarship)
+            entry = entries.get(sid)
+            if entry is None:
+                creates[sid] = _tracker_doc(scholarship, university_id, listed[university_id], now_iso)
+                entry = entries[sid] = {'university_id': university_id, 'name': name, 'eligibility': None}
+                by_name[(university_id, name)] = sid
+            entry.update(data_year=check['data_year'], rules=compiled.spec)
+            to_evaluate.add(sid)
+
+    if full or fingerprint != state.get('profile_fingerprint'):
+        to_evaluate |= {sid for sid, e in entries.items() if e.get('university_id') in listed}
+
+    indicators = evaluate_all(
+        (compiled_for(sid, entries[sid].get('data_year'), entries[sid].get('rules') or {})
+         for sid in sorted(to_evaluate)),
+        profile,
+    )
+    updates = {}
+    for sid, indicator in indicators.items():
+        if sid in creates:
+            creates[sid]['eligibility_indicator'] = indicator
+        elif entries[sid].get('eligibility') != indicator:
+            updates[sid] = indicator
+        entries[sid]['eligibility'] = indicator
+
+    new_state = {'schools': schools, 'entries': entries, 'profile_fingerprint': fingerprint}
+    old_state = {k: state.get(k) for k in new_state}
+    if creates or updates or new_state != old_state:
+        new_state['synced_at'] = now_iso
+        if not db.sync_scholarship_tracker(user_id, creates, updates, sync_state=new_state):
+            return {'success': False, 'error': 'Failed to write scholarship tracker'}
+
+    scholarships = db.get_scholarship_tracker(user_id)
+    logger.info(f"[SCHOLARSHIP_SYNC] {len(to_fetch)} KB lookups, {len(creates)} new, "
+                f"{len(updates)} re-evaluated for {user_id}")
+    return {
+        'success': True,
+        'scholarships_synced': considered,
+        'eligibility_updated': len(updates),
+        'schools_fetched': len(to_fetch),
+        'total_scholarships': len(scholarships),
+        'scholarships': scholarships,
+    }
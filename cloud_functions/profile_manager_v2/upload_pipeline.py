@@ -0,0 +1,296 @@
+"""
+Asynchronous profile-upload pipeline.
+
+POST /upload-profile used to run the whole ingest on the request thread
+(GCS upload → text extraction → two sequential Gemini calls → merge), 15-30s
+per file. Now the request only hashes the file, stores it in GCS and records
+a job, then returns its `job_id`; the stages run off the request path:
+
+    extract    text from the PDF/DOCX bytes
+    markdown   ┐ the two Gemini passes over that text, run concurrently
+    structure  ┘
+    index      merge into the profile (index_student_profile)
+
+Per-stage progress lives on users/{email}/upload_jobs/{job_id} and is served
+by GET /get-upload-status. The job id IS the file's content hash: uploading
+bytes that are already queued, running or indexed returns the existing job
+(`duplicate: true`) and does no work.
+
+Dispatch: with UPLOAD_TASKS_QUEUE set, each job becomes a Cloud Tasks HTTP
+task that calls back POST /process-upload-job (its own request, full CPU,
+retried by Tasks). Otherwise LocalQueue runs jobs on an in-process worker
+pool — local dev and tests only. A deployed instance (K_SERVICE set) without
+the queue configured refuses uploads instead: after the 202 its CPU is
+throttled, so a background job would stall or be lost while dedup blocked the
+re-upload for JOB_STALE_S.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from firestore_db import get_db
+from file_processing import extract_text_from_file_content
+from profile_extraction import convert_to_markdown, extract_structured_profile_with_gemini
+from profile_operations import index_student_profile
+from gcs_storage import upload_file_to_gcs, download_file_from_gcs
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('extract', 'markdown', 'structure', 'index')
+
+# A queued/running job not touched for this long is presumed dead (instance
+# recycled mid-run); re-uploading the same file then reprocesses it.
+JOB_STALE_S = 15 * 60
+
+NO_TEXT_PLACEHOLDER = "Could not extract text from document."
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def content_hash(file_content: bytes) -> str:
+    """sha256 of the raw bytes — the dedup key and job id."""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def _is_live(job: Dict) -> bool:
+    """Done, or queued/running and recently touched."""
+    status = job.get('status')
+    if status == 'done':
+        return True
+    if status not in ('queued', 'running'):
+        return False
+    try:
+        touched = datetime.fromisoformat(job.get('updated_at') or '')
+    except ValueError:
+        return False
+    return (datetime.now(timezone.utc) - touched).total_seconds() < JOB_STALE_S
+
+
+def job_progress(job: Dict) -> float:
+    """Fraction of stages finished (done or failed), 0.0-1.0."""
+    stages = job.get('stages') or {}
+    finished = sum(1 for s in STAGES if (stages.get(s) or {}).get('status') in ('done', 'failed'))
+    return round(finished / len(STAGES), 2)
+
+
+# --- Queues -----------------------------------------------------------------
+
+class LocalQueue:
+    """In-process stand-in for the task queue: a small worker pool on this
+    instance. `drain()` waits for everything submitted so far (tests)."""
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-job')
+        self._futures = []
+
+    def submit(self, user_id: str, job_id: str, file_content: Optional[bytes] = None):
+        future = self._pool.submit(run_upload_job, user_id, job_id, file_content)
+        self._futures.append(future)
+        return future
+
+    def drain(self, timeout: Optional[float] = None) -> list:
+        futures, self._futures = self._futures, []
+        return [f.result(timeout=timeout) for f in futures]
+
+
+class CloudTasksQueue:
+    """One Cloud Tasks HTTP task per job → POST {worker_url}/process-upload-job,
+    OIDC-signed as `service_account` (a TRUSTED_SERVICE_EMAILS entry) with
+    this service's URL as audience. The worker re-reads the file from GCS."""
+
+    def __init__(self, queue_path: str, worker_url: str, service_account: str):
+        self.queue_path = queue_path
+        self.worker_url = worker_url.rstrip('/')
+        self.service_account = service_account
+        self._client = None
+
+    def submit(self, user_id: str, job_id: str, file_content: Optional[bytes] = None):
+        from google.cloud import tasks_v2  # deploy-only dependency
+        if self._client is None:
+            self._client = tasks_v2.CloudTasksClient()
+        task = {
+            'http_request': {
+                'http_method': tasks_v2.HttpMethod.POST,
+                'url': f"{self.worker_url}/process-upload-job",
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'user_email': user_id, 'job_id': job_id}).encode(),
+                'oidc_token': {'service_account_email': self.service_account,
+                               'audience': self.worker_url},
+            }
+        }
+        return self._client.create_task(parent=self.queue_path, task=task)
+
+
+_queue = None
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        queue_path = os.getenv('UPLOAD_TASKS_QUEUE')
+        worker_url = os.getenv('UPLOAD_WORKER_URL') or (os.getenv('SELF_AUDIENCES') or '').split(',')[0]
+        if queue_path and worker_url:
+            _queue = CloudTasksQueue(queue_path, worker_url, os.getenv('UPLOAD_TASKS_SERVICE_ACCOUNT', ''))
+        elif os.getenv('K_SERVICE'):
+            raise RuntimeError("UPLOAD_TASKS_QUEUE / UPLOAD_WORKER_URL are not configured on this "
+                               "deployment; refusing to run upload jobs on a background thread")
+        else:
+            _queue = LocalQueue()
+    return _queue
+
+
+def set_queue(queue):
+    """Swap the dispatcher (tests; None → re-read env on next use)."""
+    global _queue
+    _queue = queue
+
+
+# --- Accept -----------------------------------------------------------------
+
+def submit_upload(user_id: str, filename: str, file_content: bytes, content_type: str = None) -> dict:
+    """Accept an upload: dedup by content hash, store the file, record and
+    enqueue the job. Returns immediately with the job id."""
+    db = get_db()
+    digest = content_hash(file_content)
+    job_id = digest[:32]
+
+    existing = db.get_upload_job(user_id, job_id)
+    if existing and _is_live(existing):
+        logger.info(f"[UPLOAD] Duplicate of job {job_id} ({existing.get('filename')}) for {user_id} — skipped")
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": existing.get('status'),
+            "duplicate": True,
+            "filename": existing.get('filename'),
+            "progress": job_progress(existing),
+        }
+
+    gcs_result = upload_file_to_gcs(user_id, filename, file_content, content_type)
+    if not gcs_result.get('success'):
+        return gcs_result
+
+    now = _now()
+    job = {
+        'job_id': job_id,
+        'user_id': user_id,
+        'filename': filename,
+        'content_type': content_type,
+        'content_hash': digest,
+        'file_size': len(file_content),
+        'gcs_url': gcs_result['gcs_url'],
+        'status': 'queued',
+        'stages': {s: {'status': 'pending'} for s in STAGES},
+        'created_at': now,
+        'updated_at': now,
+    }
+    if not db.save_upload_job(user_id, job_id, job):
+        return {"success": False, "error": "Could not record upload job"}
+
+    try:
+        get_queue().submit(user_id, job_id, file_content)
+    except Exception as e:
+        logger.error(f"[UPLOAD] Enqueue failed for {job_id}: {e}")
+        db.update_upload_job(user_id, job_id, {'status': 'failed', 'error': f"enqueue failed: {e}",
+                                               'updated_at': _now()})
+        return {"success": False, "job_id": job_id, "error": f"Could not queue upload: {e}"}
+
+    logger.info(f"[UPLOAD] Queued job {job_id} ({filename}) for {user_id}")
+    return {"success": True, "job_id": job_id, "status": "queued", "duplicate": False,
+            "filename": filename, "progress": 0.0}
+
+
+def get_upload_status(user_id: str, job_id: str) -> dict:
+    job = get_db().get_upload_job(user_id, job_id)
+    if not job:
+        return {"success": False, "error": f"Upload job {job_id} not found"}
+    return {"success": True, "job": {**job, "progress": job_progress(job)}}
+
+
+# --- Work -------------------------------------------------------------------
+
+class _StageTracker:
+    """Times each stage and mirrors its status onto the job doc."""
+
+    def __init__(self, db, user_id: str, job_id: str):
+        self.db = db
+        self.user_id = user_id
+        self.job_id = job_id
+
+    def _set(self, stage: str, record: Dict):
+        self.db.update_upload_job(self.user_id, self.job_id,
+                                  {f'stages.{stage}': record, 'updated_at': _now()})
+
+    def run(self, stage: str, fn, *args):
+        self._set(stage, {'status': 'running', 'started_at': _now()})
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._set(stage, {'status': 'failed', 'error': str(e),
+                              'ms': round((time.perf_counter() - started) * 1000, 1)})
+            raise
+        self._set(stage, {'status': 'done', 'ms': round((time.perf_counter() - started) * 1000, 1)})
+        return result
+
+
+def run_upload_job(user_id: str, job_id: str, file_content: Optional[bytes] = None) -> dict:
+    """Run one job's stages. Safe to call twice (Tasks redelivery): a job
+    that is already done returns its stored result."""
+    db = get_db()
+    job = db.get_upload_job(user_id, job_id)
+    if not job:
+        return {"success": False, "error": f"Upload job {job_id} not found"}
+    if job.get('status') == 'done':
+        return job.get('result') or {"success": True}
+
+    filename = job['filename']
+    tracker = _StageTracker(db, user_id, job_id)
+    db.update_upload_job(user_id, job_id, {'status': 'running', 'updated_at': _now()})
+    try:
+        if file_content is None:
+            download = download_file_from_gcs(user_id, filename)
+            if not download.get('success'):
+                raise RuntimeError(f"stored upload unavailable: {download.get('error')}")
+            file_content = download['file_content']
+
+        raw_text = tracker.run('extract', extract_text_from_file_content, file_content, filename, user_id)
+        if not raw_text:
+            logger.warning(f"[UPLOAD] No text extracted from {filename}")
+            raw_text = NO_TEXT_PLACEHOLDER
+
+        # Both Gemini passes read the same text and don't depend on each
+        # other — run them side by side instead of back to back.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            markdown = pool.submit(tracker.run, 'markdown', convert_to_markdown, raw_text, filename)
+            structure = pool.submit(tracker.run, 'structure', extract_structured_profile_with_gemini, raw_text)
+            content_markdown = markdown.result()
+            structured_profile = structure.result()
+
+        result = tracker.run('index', index_student_profile, user_id, filename, content_markdown, {
+            'gcs_url': job.get('gcs_url'),
+            'upload_date': job.get('created_at'),
+            'file_size': job.get('file_size'),
+            'content_type': job.get('content_type'),
+        }, structured_profile)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'index failed')
+
+        summary = {k: result[k] for k in ('success', 'message', 'uploaded_files') if k in result}
+        db.update_upload_job(user_id, job_id, {'status': 'done', 'result': summary,
+                                               'updated_at': _now(), 'completed_at': _now()})
+        logger.info(f"[UPLOAD] Job {job_id} done ({filename})")
+        return summary
+
+    except Exception as e:
+        logger.error(f"[UPLOAD] Job {job_id} failed: {e}", exc_info=True)
+        db.update_upload_job(user_id, job_id, {'status': 'failed', 'error': str(e), 'updated_at': _now()})
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,263 @@
+"""
+Popular Workflows aggregation: queued runs, sharded counters, cached top-N.
+
+save-research used to increment the cross-user workflow_stats/{signature} doc
+inside the user's request, and get-popular-workflows ran an ordered query on
+every call. A popular signature is one document, so concurrent agent sessions
+saving the same workflow contended on it and every save paid for the write.
+
+Now:
+
+    record()      save-research hands the run (signature, this week's count,
+                  tools, kind) to the queue and returns; it never touches
+                  the shared counters.
+    queue         with WORKFLOW_STATS_TASKS_QUEUE set, each run becomes a
+                  Cloud Tasks HTTP task that calls back POST
+                  /process-workflow-stats — its own request with full CPU,
+                  OIDC-signed and retried by Tasks, the same pipeline as
+                  upload jobs. Tasks holds the runs, so nothing waits in an
+                  instance's memory for a flush that a throttled or recycled
+                  instance might never run. Locally (K_SERVICE unset)
+                  LocalQueue applies runs on an in-process worker thread; a
+                  deployment without the queue drops runs with an error log
+                  rather than writing them on the request.
+    apply_runs()  the task handler writes the runs as Increments to one random
+                  counter shard per signature (FirestoreDB.add_workflow_stat_runs).
+    popular()     get-popular-workflows serves a top-SNAPSHOT_SIZE snapshot doc,
+                  cached per instance for SNAPSHOT_CACHE_SECONDS. A snapshot older
+                  than SNAPSHOT_REFRESH_SECONDS is still served while a
+                  background thread folds the shards into the root docs and
+                  rewrites it; only the very first read (no snapshot yet) builds
+                  it inline.
+
+The counts are a popularity signal: a run whose task can't be created, or
+whose task is redelivered after its write landed, is lost or counted twice,
+an accepted trade for taking the write off every save.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from firestore_db import get_db, iso_week_key
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SIZE = 50  # the route's max limit
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv('WORKFLOW_STATS_SNAPSHOT_REFRESH_SECONDS', '300'))
+SNAPSHOT_CACHE_SECONDS = int(os.getenv('WORKFLOW_STATS_SNAPSHOT_CACHE_SECONDS', '60'))
+
+_now = time.monotonic
+
+_lock = threading.Lock()
+_queue = None
+_snapshot = None  # (workflows, generated_at iso, loaded_at monotonic)
+_refreshing = False
+_stats = {'recorded': 0, 'dropped': 0, 'applied': 0, 'apply_failures': 0, 'snapshot_refreshes': 0}
+
+
+def reset() -> None:
+    """Drop the cached snapshot and the queue, zero the counters."""
+    global _queue, _snapshot, _refreshing
+    with _lock:
+        _queue = _snapshot = None
+        _refreshing = False
+        for k in _stats:
+            _stats[k] = 0
+
+
+def stats() -> Dict:
+    with _lock:
+        return dict(_stats)
+
+
+def _spawn(target: Callable) -> None:
+    threading.Thread(target=target, daemon=True, name=f"workflow-stats-{target.__name__}").start()
+
+
+def _bump(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+
+# ---- Queues -----------------------------------------------------------------
+
+
+class LocalQueue:
+    """In-process stand-in for the task queue: one worker thread on this
+    instance. `drain()` waits for everything submitted so far (tests)."""
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='workflow-stats')
+        self._futures = []
+
+    def submit(self, runs: Dict[str, Dict]):
+        future = self._pool.submit(apply_runs, runs)
+        self._futures.append(future)
+        return future
+
+    def drain(self, timeout: Optional[float] = None) -> list:
+        futures, self._futures = self._futures, []
+        return [f.result(timeout=timeout) for f in futures]
+
+
+class CloudTasksQueue:
+    """One Cloud Tasks HTTP task per run → POST {worker_url}/process-workflow-stats,
+    OIDC-signed as `service_account` (a TRUSTED_SERVICE_EMAILS entry) with
+    this service's URL as audience."""
+
+    def __init__(self, queue_path: str, worker_url: str, service_account: str):
+        self.queue_path = queue_path
+        self.worker_url = worker_url.rstrip('/')
+        self.service_account = service_account
+        self._client = None
+
+    def submit(self, runs: Dict[str, Dict]):
+        from google.cloud import tasks_v2  # deploy-only dependency
+        if self._client is None:
+            self._client = tasks_v2.CloudTasksClient()
+        task = {
+            'http_request': {
+                'http_method': tasks_v2.HttpMethod.POST,
+                'url': f"{self.worker_url}/process-workflow-stats",
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'runs': runs}).encode(),
+                'oidc_token': {'service_account_email': self.service_account,
+                               'audience': self.worker_url},
+            }
+        }
+        return self._client.create_task(parent=self.queue_path, task=task)
+
+
+def get_queue():
+    """The run dispatcher, or None on a deployment without the queue."""
+    global _queue
+    if _queue is None:
+        queue_path = os.getenv('WORKFLOW_STATS_TASKS_QUEUE')
+        worker_url = (os.getenv('WORKFLOW_STATS_WORKER_URL')
+                      or (os.getenv('SELF_AUDIENCES') or '').split(',')[0])
+        if queue_path and worker_url:
+            _queue = CloudTasksQueue(queue_path, worker_url,
+                                     os.getenv('WORKFLOW_STATS_TASKS_SERVICE_ACCOUNT', ''))
+        elif not os.getenv('K_SERVICE'):
+            _queue = LocalQueue()
+    return _queue
+
+
+def set_queue(queue) -> None:
+    """Swap the dispatcher (tests; None → re-read env on next use)."""
+    global _queue
+    _queue = queue
+
+
+# ---- Write side -------------------------------------------------------------
+
+
+def record(signature: str, tools: List[str], kind: str = None) -> bool:
+    """Queue one run of `signature`. Never touches Firestore and never raises:
+    a run that can't be queued is dropped with an error log. Returns whether
+    it was queued."""
+    now = datetime.utcnow()
+    run = {'tools': list(tools or []), 'kind': kind or 'note', 'count': 1,
+           'weeks': {iso_week_key(now): 1}, 'updated_at': now.isoformat()}
+    queue = get_queue()
+    if queue is None:
+        logger.error("[WORKFLOW_STATS] WORKFLOW_STATS_TASKS_QUEUE / WORKFLOW_STATS_WORKER_URL "
+                     "are not configured on this deployment; dropping the run")
+        _bump('dropped')
+        return False
+    try:
+        queue.submit({signature: run})
+    except Exception as e:  # noqa: BLE001 — a stats hiccup must never fail the save
+        logger.error(f"[WORKFLOW_STATS] Could not queue a run of {signature}: {e}")
+        _bump('dropped')
+        return False
+    _bump('recorded')
+    return True
+
+
+def _valid_run(signature, run) -> bool:
+    return (isinstance(signature, str) and signature and '/' not in signature
+            and isinstance(run, dict)
+            and isinstance(run.get('count'), int) and run['count'] > 0
+            and isinstance(run.get('weeks'), dict)
+            and all(isinstance(w, str) and isinstance(n, int) for w, n in run['weeks'].items())
+            and isinstance(run.get('tools'), list))
+
+
+def apply_runs(runs: Dict[str, Dict]) -> bool:
+    """Task handler: write queued runs to the counter shards. Malformed
+    entries are dropped (a retry can't fix them). False on a write failure,
+    so the task is retried."""
+    valid = {sig: run for sig, run in (runs or {}).items() if _valid_run(sig, run)}
+    if len(valid) < len(runs or {}):
+        logger.warning(f"[WORKFLOW_STATS] Dropped {len(runs) - len(valid)} malformed runs")
+    if not valid:
+        return True
+    if get_db().add_workflow_stat_runs(valid):
+        _bump('applied')
+        return True
+    _bump('apply_failures')
+    return False
+
+
+# ---- Read side --------------------------------------------------------------
+
+
+def refresh_snapshot() -> List[Dict]:
+    """Fold the counter shards into the root docs, query a fresh
+    top-SNAPSHOT_SIZE snapshot, store it and cache it on this instance."""
+    global _snapshot
+    db = get_db()
+    workflows = db.get_popular_workflows(limit=SNAPSHOT_SIZE)
+    db.save_workflow_stats_snapshot(workflows)
+    with _lock:
+        _snapshot = (workflows, datetime.utcnow().isoformat(), _now())
+        _stats['snapshot_refreshes'] += 1
+    return workflows
+
+
+def _background_refresh() -> None:
+    global _refreshing
+    try:
+        refresh_snapshot()
+    except Exception as e:  # noqa: BLE001 — the stale snapshot keeps being served
+        logger.error(f"[WORKFLOW_STATS] Snapshot refresh failed: {e}")
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def _age_seconds(generated_at: str) -> float:
+    try:
+        return (datetime.utcnow() - datetime.fromisoformat(generated_at)).total_seconds()
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+def popular(limit: int = 20) -> List[Dict]:
+    """Top `limit` workflows from the snapshot. Blocks on Firestore only for
+    the instance's snapshot read (once per SNAPSHOT_CACHE_SECONDS) or when
+    no snapshot exists yet."""
+    global _snapshot, _refreshing
+    with _lock:
+        cached = _snapshot
+    if cached is None or _now() - cached[2] >= SNAPSHOT_CACHE_SECONDS:
+        doc = get_db().get_workflow_stats_snapshot()
+        if not doc:
+            return refresh_snapshot()[:limit]
+        cached = (doc.get('workflows') or [], doc.get('generated_at'), _now())
+        with _lock:
+            _snapshot = cached
+    with _lock:
+        stale = not _refreshing and _age_seconds(cached[1]) >= SNAPSHOT_REFRESH_SECONDS
+        if stale:
+            _refreshing = True
+    if stale:
+        _spawn(_background_refresh)
+    return cached[0][:limit]
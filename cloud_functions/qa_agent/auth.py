@@ -9,6 +9,11 @@ Flow:
      REST endpoint (signInWithCustomToken).
   3. Cache the ID token for its lifetime (1 hour); refresh when expired.
 
+Each scenario in a run signs in as its own synthetic user (see
+synthetic_users.py), so the cache is keyed by uid and `ensure_user`
+creates the backing Firebase account — with a verified email, which the
+production auth gates require — the first time a uid is seen.
+
 The production cloud functions verify ID tokens with their own Firebase
 auth gate. This module gives us the same kind of token a real signed-in
 browser would carry.
@@ -18,9 +23,10 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional
 
 import requests
 
@@ -34,10 +40,12 @@ class IdTokenBundle:
     expires_at: float  # unix timestamp
 
 
-# Module-level cache. Cloud Functions may reuse the same instance across
-# invocations; reusing the token saves the custom-token mint + REST round
-# trip on warm starts.
-_cached: Optional[IdTokenBundle] = None
+# Module-level cache, uid -> bundle. Cloud Functions may reuse the same
+# instance across invocations; reusing the token saves the custom-token
+# mint + REST round trip on warm starts. Scenario workers mint in
+# parallel, hence the lock.
+_cache: Dict[str, IdTokenBundle] = {}
+_lock = threading.Lock()
 
 
 def _now() -> float:
@@ -70,6 +78,20 @@ def mint_custom_token(uid: str) -> str:
     return token_bytes.decode("utf-8")
 
 
+def ensure_user(uid: str, email: str) -> None:
+    """Create the Firebase account for a synthetic QA user if it doesn't
+    exist yet. The email is marked verified — profile_manager_v2 and
+    counselor_agent reject ID tokens without a verified email claim."""
+    auth = _firebase_admin()
+    try:
+        auth.get_user(uid)
+        return
+    except auth.UserNotFoundError:
+        pass
+    auth.create_user(uid=uid, email=email, email_verified=True)
+    logger.info("qa_agent: created synthetic user uid=%s email=%s", uid, email)
+
+
 def exchange_for_id_token(custom_token: str, api_key: str) -> IdTokenBundle:
     """Exchange a custom token for an ID token via the Firebase Auth REST
     API. Returns the ID token + refresh token + expiry."""
@@ -93,25 +115,30 @@ def exchange_for_id_token(custom_token: str, api_key: str) -> IdTokenBundle:
     )
 
 
-def get_id_token(uid: str, api_key: Optional[str] = None) -> str:
+def get_id_token(uid: str, api_key: Optional[str] = None,
+                 email: Optional[str] = None) -> str:
     """Public entry: return a fresh ID token for `uid`, cached if valid.
 
     `api_key` defaults to env var FIREBASE_WEB_API_KEY. Required because
     the custom-token-exchange REST API is identified by the project's
-    web API key (not the service account's credentials)."""
-    global _cached
+    web API key (not the service account's credentials). Pass `email`
+    for a synthetic user whose Firebase account may not exist yet."""
     api_key = api_key or os.getenv("FIREBASE_WEB_API_KEY")
     if not api_key:
         raise RuntimeError(
             "FIREBASE_WEB_API_KEY env var is required for QA agent auth"
         )
 
-    if _cached and _cached.expires_at > _now():
-        return _cached.id_token
+    cached = _cache.get(uid)
+    if cached and cached.expires_at > _now():
+        return cached.id_token
 
+    if email:
+        ensure_user(uid, email)
     custom = mint_custom_token(uid)
     bundle = exchange_for_id_token(custom, api_key)
-    _cached = bundle
+    with _lock:
+        _cache[uid] = bundle
     logger.info("qa_agent: minted fresh ID token for uid=%s, ttl=%ds",
                 uid, int(bundle.expires_at - _now()))
     return bundle.id_token
@@ -120,5 +147,5 @@ def get_id_token(uid: str, api_key: Optional[str] = None) -> str:
 def reset_cache() -> None:
     """Test helper. Clears the module cache so a fresh token is requested
     on the next call."""
-    global _cached
-    _cached = None
+    with _lock:
+        _cache.clear()
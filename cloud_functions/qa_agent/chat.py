@@ -23,6 +23,8 @@ from __future__ import annotations
 import logging
 from typing import List, Tuple
 
+import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
@@ -299,11 +301,12 @@ def _format_feedback_item(it: dict, *, status_label: str) -> str:
 
 
 def _load_recent_run_summaries(limit: int = 30) -> List[dict]:
-    """Pull the most recent N qa_runs docs. Already-existing helper in
-    firestore_store; this thin wrapper just keeps chat.py self-contained
-    for tests that monkeypatch it."""
+    """Digests of the most recent N finished runs — one rollup doc read
+    instead of N full qa_runs reports (firestore_store.list_run_digests).
+    This thin wrapper keeps chat.py self-contained for tests that
+    monkeypatch it."""
     import firestore_store  # noqa: WPS433 — lazy import for test stubs
-    return firestore_store.list_recent_runs(limit=limit)
+    return firestore_store.list_run_digests(limit=limit)
 
 
 # ---- Gemini call -----------------------------------------------------------
@@ -311,16 +314,13 @@ def _load_recent_run_summaries(limit: int = 30) -> List[dict]:
 
 def _call_gemini(system: str, prompt: str, api_key: str) -> str:
     """Single-shot Gemini Flash call. Matches the pattern used by
-    narratives.py + synthesizer.py so we share auth + library setup."""
+    narratives.py + synthesizer.py; the gateway shares auth + library setup."""
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY is not configured")
-    import google.generativeai as genai  # noqa: WPS433
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(
-        "gemini-2.5-flash",
+    resp = llm_gateway.generate_legacy(
+        prompt, model="gemini-2.5-flash", api_key=api_key,
         system_instruction=system,
     )
-    resp = model.generate_content(prompt)
     text = (getattr(resp, "text", None) or "").strip()
     if not text:
         raise RuntimeError("model returned empty response")
@@ -29,6 +29,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 # Archetype JSON files live alongside this module so they ship with the
@@ -173,14 +175,11 @@ def generate_variation(
         return fallback
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        gen_model = genai.GenerativeModel(model)
         prompt = _VARIATION_PROMPT.format(
             description=archetype.get("description", ""),
             profile_template=json.dumps(archetype.get("profile_template", {})),
         )
-        resp = gen_model.generate_content(prompt)
+        resp = llm_gateway.generate_legacy(prompt, model=model, api_key=api_key)
         raw = (resp.text or "").strip()
         # Strip optional code fences the model sometimes ignores instructions about.
         if raw.startswith("```"):
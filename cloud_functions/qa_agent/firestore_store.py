@@ -1,9 +1,11 @@
 """
 Firestore I/O for the QA agent.
 
-Two collections:
+Three collections:
   qa_scenarios/{archetype_id}  — per-archetype history
   qa_runs/{run_id}             — per-run reports
+  qa_rollups/recent_runs       — compact digests of the last ROLLUP_RUNS
+                                 finished runs, for the dashboard + chat
 
 The store is tiny and intentionally untyped (we read/write plain dicts)
 so changes to the report shape don't require a migration.
@@ -67,8 +69,16 @@ def update_history(archetype_id: str, *, last_result: str, db=None) -> None:
 
 
 def write_report(run_id: str, report: dict, db=None) -> None:
+    """Write a run report. A finished report (status=complete) is also
+    folded into the rollup; a rollup failure is logged, not raised —
+    the report is the source of truth and list_run_digests rebuilds."""
     db = db or _client()
     db.collection("qa_runs").document(run_id).set(report)
+    if report.get("status") == "complete":
+        try:
+            _add_to_rollup(digest_run(report), db)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("qa_agent: rollup update for %s failed (%s)", run_id, exc)
 
 
 def read_report(run_id: str, db=None) -> Optional[dict]:
@@ -87,3 +97,89 @@ def list_recent_runs(limit: int = 30, db=None) -> List[dict]:
         .limit(limit)
     )
     return [doc.to_dict() for doc in q.stream()]
+
+
+# ---- Rollups ----------------------------------------------------------------
+# The dashboard (/summary) and chat used to pull the last 30-60 full
+# qa_runs docs — every step, assertion and redacted request — on every
+# load. They only read a few fields per scenario, so write_report keeps a
+# single rollup doc of run digests instead: one small read serves both.
+# Time windows (7d/30d) and the user's recent-N pick still apply at read
+# time, over digests rather than reports.
+
+ROLLUP_RUNS = 60
+_ROLLUP_DOC = ("qa_rollups", "recent_runs")
+_DIGEST_MESSAGE_CHARS = 300
+
+
+def digest_run(report: dict) -> dict:
+    """The slice of a run report that narratives.build_summary,
+    coverage.build_coverage, resolved_issues and chat read. Steps are
+    reduced to the failing ones, each with its first failing assertion,
+    so the digest has the same shape those builders already walk."""
+    scenarios = []
+    for scen in report.get("scenarios") or []:
+        failing = []
+        for step in scen.get("steps") or []:
+            if _is_passed(step):
+                continue
+            first = next((a for a in step.get("assertions") or [] if not _is_passed(a)), None)
+            failing.append({
+                "name": step.get("name") or "<step>",
+                "passed": False,
+                "assertions": [{
+                    "passed": False,
+                    "message": ((first or {}).get("message") or "")[:_DIGEST_MESSAGE_CHARS],
+                }] if first else [],
+            })
+        scenarios.append({
+            "scenario_id": scen.get("scenario_id"),
+            "passed": scen.get("passed"),
+            "surfaces_covered": list(scen.get("surfaces_covered") or []),
+            "tests": list(scen.get("tests") or []),
+            "colleges_template": list(scen.get("colleges_template") or []),
+            "steps": failing,
+        })
+    digest = {key: report[key] for key in (
+        "run_id", "type", "status", "started_at", "ended_at", "trigger",
+        "actor", "summary", "latency", "error",
+    ) if key in report}
+    digest["scenarios"] = scenarios
+    return digest
+
+
+def _add_to_rollup(digest: dict, db) -> None:
+    # Plain read-modify-write, like update_history: finished runs are
+    # serialized by the /run mutex, so two writers never race here.
+    ref = db.collection(_ROLLUP_DOC[0]).document(_ROLLUP_DOC[1])
+    snap = ref.get()
+    digests = (snap.to_dict() or {}).get("runs", []) if snap.exists else []
+    digests = [d for d in digests if d.get("run_id") != digest.get("run_id")]
+    digests.append(digest)
+    digests.sort(key=lambda d: d.get("started_at") or "", reverse=True)
+    ref.set({
+        "runs": digests[:ROLLUP_RUNS],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+
+def list_run_digests(limit: int = ROLLUP_RUNS, db=None) -> List[dict]:
+    """Most-recent finished runs first, as digests (see digest_run).
+    The first call after deploy builds the rollup from full reports."""
+    db = db or _client()
+    ref = db.collection(_ROLLUP_DOC[0]).document(_ROLLUP_DOC[1])
+    snap = ref.get()
+    if snap.exists:
+        return list((snap.to_dict() or {}).get("runs", []))[:limit]
+    digests = [
+        digest_run(r) for r in list_recent_runs(limit=ROLLUP_RUNS, db=db)
+        if r.get("status") == "complete"
+    ]
+    ref.set({"runs": digests, "updated_at": datetime.now(timezone.utc).isoformat()})
+    return digests[:limit]
+
+
+def _is_passed(d: dict) -> bool:
+    """Tolerate Firestore round-trips that turn booleans into strings."""
+    v = d.get("passed")
+    return v is True or (isinstance(v, str) and v.lower() == "true")
@@ -10,18 +10,53 @@ A KB miss for a given college returns an empty record (NOT raises).
 That way one missing university doesn't blow up the whole scenario;
 assertions that depend on the missing record will mark themselves
 SKIP rather than fail.
+
+Records come from the KB's batch endpoint (POST {"university_ids": [...]})
+in one round trip, not one GET per college. The same handful of colleges
+recurs in every scenario of every run, so normalized records are cached
+at module level and shared by concurrent scenarios and by later runs on a
+warm instance. An entry is served as-is for TRUTH_TTL_S; after that it is
+revalidated in the next batch, and replaced only if the KB record's
+version — its (data_year, last_updated) pair — moved. Misses are never
+cached, so a college ingested mid-session is picked up on the next run.
 """
 
 from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 
 logger = logging.getLogger(__name__)
 
+# How long a cached record is trusted without asking the KB again.
+TRUTH_TTL_S = int(os.getenv("QA_GROUND_TRUTH_TTL_S", "900"))
+
+BatchClient = Callable[[List[str]], Dict[str, dict]]
+
+
+@dataclass
+class _Entry:
+    version: Tuple[Any, Any]
+    record: dict
+    checked_at: float
+
+
+_cache: Dict[str, _Entry] = {}
+# Held across the batch call so concurrent scenarios asking for the same
+# colleges wait for one fetch instead of each issuing their own.
+_fetch_lock = threading.Lock()
+
+
+def reset_cache() -> None:
+    with _fetch_lock:
+        _cache.clear()
+
 
 # ---- Public entry ----------------------------------------------------------
 
@@ -30,24 +65,46 @@ def fetch_ground_truth(
     college_ids: List[str],
     *,
     kb_client: Optional[Callable[[str], Optional[dict]]] = None,
+    kb_batch_client: Optional[BatchClient] = None,
     kb_url: Optional[str] = None,
     timeout: int = 10,
+    now: Callable[[], float] = time.time,
 ) -> Dict[str, dict]:
     """Returns {college_id: record}. Records are normalized so downstream
     assertions don't have to walk variant KB shapes.
 
     `kb_client` (testable): a function that takes a college_id and
-    returns the raw KB record (or None for a miss). When omitted, an
-    HTTP-based default is built from `kb_url`.
+    returns the raw KB record (or None for a miss). It is called once
+    per college and bypasses the cache.
+
+    `kb_batch_client` (testable): a function that takes a list of
+    college_ids and returns {college_id: raw record}, omitting misses.
+    When neither client is given, an HTTP batch client is built from
+    `kb_url`. Batch fetches go through the module cache.
     """
-    if kb_client is None:
+    if kb_client is not None:
+        return _fetch_each(college_ids, kb_client)
+
+    if kb_batch_client is None:
         kb_url = kb_url or os.getenv("KNOWLEDGE_BASE_UNIVERSITIES_URL", "")
         if not kb_url:
             logger.warning("ground_truth: no kb_url; truth bag will be empty")
-            kb_client = lambda _id: None  # noqa: E731
-        else:
-            kb_client = _http_kb_client(kb_url, timeout=timeout)
-
+            return {cid: {} for cid in college_ids}
+        kb_batch_client = _http_kb_batch_client(kb_url, timeout=timeout)
+
+    bag = _cached(college_ids, now())
+    if len(bag) < len(set(college_ids)):
+        with _fetch_lock:
+            # Another scenario may have filled these while we waited.
+            bag = _cached(college_ids, now())
+            wanted = [cid for cid in dict.fromkeys(college_ids) if cid not in bag]
+            if wanted:
+                bag.update(_refresh(wanted, kb_batch_client, now()))
+    return {cid: bag.get(cid, {}) for cid in college_ids}
+
+
+def _fetch_each(college_ids: List[str],
+                kb_client: Callable[[str], Optional[dict]]) -> Dict[str, dict]:
     bag: Dict[str, dict] = {}
     for cid in college_ids:
         try:
@@ -59,6 +116,47 @@ def fetch_ground_truth(
     return bag
 
 
+def _cached(college_ids: List[str], at: float) -> Dict[str, dict]:
+    """Cached records still inside their TTL."""
+    return {
+        cid: entry.record
+        for cid in college_ids
+        if (entry := _cache.get(cid)) is not None and at - entry.checked_at < TRUTH_TTL_S
+    }
+
+
+def _refresh(college_ids: List[str], batch_client: BatchClient,
+             at: float) -> Dict[str, dict]:
+    """One batch call for every uncached or expired college. Callers hold
+    _fetch_lock."""
+    try:
+        raws = batch_client(college_ids) or {}
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("ground_truth: kb batch client raised for %s: %s",
+                       college_ids, exc)
+        raws = {}
+
+    bag: Dict[str, dict] = {}
+    for cid in college_ids:
+        raw = raws.get(cid)
+        if not raw:
+            _cache.pop(cid, None)
+            continue
+        version = _version(raw)
+        entry = _cache.get(cid)
+        if entry is None or entry.version != version:
+            entry = _Entry(version=version, record=_normalize(raw), checked_at=at)
+            _cache[cid] = entry
+        else:
+            entry.checked_at = at
+        bag[cid] = entry.record
+    return bag
+
+
+def _version(raw: dict) -> Tuple[Any, Any]:
+    return raw.get("data_year"), raw.get("last_updated")
+
+
 # ---- HTTP default ---------------------------------------------------------
 
 
@@ -84,6 +182,39 @@ def _http_kb_client(kb_url: str, *, timeout: int):
     return _fetch
 
 
+def _http_kb_batch_client(kb_url: str, *, timeout: int) -> BatchClient:
+    """Build a batch client over the KB's POST {"university_ids": [...]}
+    endpoint. Stale ids the KB resolved through its alias index come back
+    with `resolved_from`, so they are keyed by the id that was asked for."""
+
+    def _fetch(college_ids: List[str]) -> Dict[str, dict]:
+        resp = requests.post(kb_url, json={"university_ids": college_ids},
+                             timeout=timeout)
+        if resp.status_code != 200:
+            logger.warning("ground_truth: kb batch returned %s", resp.status_code)
+            return {}
+        body = resp.json()
+        out: Dict[str, dict] = {}
+        for rec in (body.get("universities") or []) if isinstance(body, dict) else []:
+            if not isinstance(rec, dict):
+                continue
+            cid = rec.get("resolved_from") or rec.get("university_id")
+            if cid:
+                out[cid] = _flatten(rec)
+        return out
+
+    return _fetch
+
+
+def _flatten(rec: dict) -> dict:
+    """Batch records keep most fields under `profile`; lift them to the top
+    level so _normalize sees the same shape as a single-record GET.
+    Top-level fields (id, name, version) win over profile copies."""
+    flat = dict(rec.get("profile") or {})
+    flat.update({k: v for k, v in rec.items() if k != "profile" and v is not None})
+    return flat
+
+
 # ---- Normalization --------------------------------------------------------
 
 
@@ -96,7 +227,7 @@ def _normalize(raw: dict) -> dict:
     """
     out = {
         "id": raw.get("id") or raw.get("university_id"),
-        "name": raw.get("name") or raw.get("university_name"),
+        "name": raw.get("name") or raw.get("university_name") or raw.get("official_name"),
     }
     if "application_deadline" in raw:
         out["application_deadline"] = raw["application_deadline"]
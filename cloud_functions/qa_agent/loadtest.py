@@ -0,0 +1,311 @@
+"""
+Latency load-test mode (/run with {"type": "loadtest"}).
+
+A correctness run measures each endpoint exactly once, so the report's
+`latency_under` assertions say nothing about the tail. A load-test run
+replays the read-heavy steps of the scenario corpus at a fixed request
+rate and concurrency and records every response time into a per-endpoint
+HDR histogram:
+
+  get-college-list    POST profile_manager_v2/get-college-list
+  compute-single-fit  POST profile_manager_v2/compute-single-fit
+  search              GET  knowledge_base?search=<college>
+  work-feed           GET  counselor_agent/work-feed
+
+Flow:
+  1. Seed one synthetic user per scenario (same slots as /run): clear,
+     profile fields, college list, and enough credits for the fit calls
+     this run will make.
+  2. Open-loop replay: requests are scheduled at `rps` for `duration_s`
+     regardless of how fast responses come back, and executed on a pool
+     of `concurrency` workers. Latency is measured from the *scheduled*
+     send time, so a backed-up pool shows up as latency rather than
+     silently lowering the offered load (coordinated omission).
+  3. Teardown: clear every seeded user.
+
+The report carries per-endpoint percentiles under `latency`; an endpoint
+passes when its p95 is inside P95_BUDGET_MS and its error rate is under
+MAX_ERROR_RATE. narratives.build_summary compares the newest load test
+against earlier ones to flag regressions.
+
+Scenarios are replayed as written (no LLM variation) and picked in a
+stable order, so successive load tests are comparable.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import runner
+
+logger = logging.getLogger(__name__)
+
+
+# p95 budgets. work-feed and compute-single-fit mirror the per-step
+# latency_under() thresholds in runner.run_scenario; the two plain reads
+# get a tighter budget since they never call an LLM.
+P95_BUDGET_MS = {
+    "get-college-list": 3000,
+    "compute-single-fit": 60000,
+    "search": 3000,
+    "work-feed": 8000,
+}
+ENDPOINTS = tuple(P95_BUDGET_MS)
+MAX_ERROR_RATE = 0.01
+
+DEFAULTS = {"rps": 2.0, "concurrency": 8, "duration_s": 60, "scenarios": 4}
+# Guard rails: a load test against prod shouldn't be able to DoS it, and
+# seeding + replay + teardown must fit the function's 540s timeout.
+MAX_RPS = 50.0
+MAX_CONCURRENCY = 64
+MAX_DURATION_S = 420
+
+
+# ---- HDR histogram ---------------------------------------------------------
+
+
+class LatencyHistogram:
+    """HDR-style latency histogram (integer milliseconds).
+
+    Values are bucketed log-linearly: each power-of-two range is split
+    into 2**sub_bucket_bits linear sub-buckets, so every recorded value is
+    kept to `significant_figures` of precision at constant memory no
+    matter how wide the range. Percentiles report the highest value
+    equivalent to the bucket they land in, as HdrHistogram does."""
+
+    def __init__(self, significant_figures: int = 2):
+        self._sub_bucket_bits = (2 * 10 ** significant_figures - 1).bit_length()
+        self._counts: Dict[tuple, int] = {}
+        self.count = 0
+        self.total_ms = 0
+        self.min_ms: Optional[int] = None
+        self.max_ms: Optional[int] = None
+
+    def _bucket(self, value: int) -> tuple:
+        shift = max(0, value.bit_length() - self._sub_bucket_bits)
+        return shift, value >> shift
+
+    @staticmethod
+    def _highest_equivalent(shift: int, sub: int) -> int:
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_ms: float) -> None:
+        value = max(0, int(round(value_ms)))
+        key = self._bucket(value)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.count += 1
+        self.total_ms += value
+        self.min_ms = value if self.min_ms is None else min(self.min_ms, value)
+        self.max_ms = value if self.max_ms is None else max(self.max_ms, value)
+
+    def percentile(self, pct: float) -> Optional[int]:
+        if not self.count:
+            return None
+        target = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        # (shift, sub) order is value order: higher shifts only hold
+        # sub-buckets in the upper half, above every lower-shift value.
+        for key in sorted(self._counts):
+            seen += self._counts[key]
+            if seen >= target:
+                return min(self._highest_equivalent(*key), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "min_ms": self.min_ms,
+            "mean_ms": round(self.total_ms / self.count) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+# ---- Request plan ----------------------------------------------------------
+
+
+def _fit_targets(scenario: dict) -> List[str]:
+    targets = scenario.get("fit_target_colleges") or scenario.get("fit_target_college") or []
+    return [targets] if isinstance(targets, str) else list(targets)
+
+
+def build_requests(scenario: dict, cfg: runner.RunConfig,
+                   endpoints=ENDPOINTS) -> List[dict]:
+    """The replayable steps of one scenario, as request specs for
+    runner._post. Steps whose inputs the scenario doesn't have (no
+    colleges, no fit target, no KB url) are left out."""
+    pm, ca, kb = cfg.profile_manager_url, cfg.counselor_agent_url, cfg.knowledge_base_url
+    email = cfg.test_user_email
+    colleges = list(scenario.get("colleges_template") or [])
+    specs: List[dict] = []
+    if "get-college-list" in endpoints and colleges:
+        specs.append({"endpoint": "get-college-list", "url": f"{pm}/get-college-list",
+                      "body": {"user_email": email}, "id_token": cfg.id_token})
+    if "compute-single-fit" in endpoints:
+        for target in _fit_targets(scenario):
+            specs.append({"endpoint": "compute-single-fit",
+                          "url": f"{pm}/compute-single-fit",
+                          "body": {"user_email": email, "university_id": target},
+                          "admin_token": cfg.admin_token, "timeout": 90})
+    if "search" in endpoints and kb:
+        for college_id in colleges:
+            specs.append({"endpoint": "search", "url": kb, "method": "GET",
+                          "params": {"search": college_id.replace("_", " "), "limit": 10}})
+    if "work-feed" in endpoints:
+        specs.append({"endpoint": "work-feed", "url": f"{ca}/work-feed", "method": "GET",
+                      "params": {"user_email": email, "limit": 8}, "id_token": cfg.id_token})
+    return specs
+
+
+def _send(spec: dict, poster: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+    kwargs = {k: spec[k] for k in ("method", "params", "id_token", "admin_token", "timeout")
+              if k in spec}
+    return poster(spec["url"], spec.get("body"), **kwargs)
+
+
+# ---- Seeding ---------------------------------------------------------------
+
+
+def seed_user(scenario: dict, cfg: runner.RunConfig, *, fit_calls: int,
+              poster: Callable[..., Dict[str, Any]] = runner._post) -> bool:
+    """Give a synthetic user the state the replayed reads need. Returns
+    False if any write failed (the load test is then meaningless)."""
+    pm, email = cfg.profile_manager_url, cfg.test_user_email
+    ctxs = [poster(f"{pm}/clear-test-data", {"user_email": email},
+                   admin_token=cfg.admin_token)]
+    for field_path, value in (scenario.get("profile_template") or {}).items():
+        ctxs.append(poster(f"{pm}/update-structured-field",
+                           {"user_email": email, "field_path": field_path,
+                            "value": value, "operation": "set"},
+                           id_token=cfg.id_token))
+    for college_id in scenario.get("colleges_template") or []:
+        ctxs.append(poster(f"{pm}/add-to-list",
+                           {"user_email": email, "university_id": college_id,
+                            "university_name": college_id.replace("_", " ").title()},
+                           id_token=cfg.id_token))
+    if fit_calls:
+        # Every replayed compute bills a credit (#285); top up exactly
+        # what this run can spend so the replay never reads a 402.
+        ctxs.append(poster(f"{pm}/add-credits",
+                           {"user_email": email, "credits": fit_calls,
+                            "source": "qa_agent_loadtest_provisioning"},
+                           admin_token=cfg.admin_token))
+    return all(200 <= c.get("status_code", 0) < 300 for c in ctxs)
+
+
+# ---- Replay ----------------------------------------------------------------
+
+
+def clamp_settings(body: dict) -> dict:
+    """rps / concurrency / duration_s from the request body, defaulted
+    and clamped to the guard rails."""
+    def _num(key, cast, lo, hi):
+        try:
+            value = cast(body.get(key) or DEFAULTS[key])
+        except (TypeError, ValueError):
+            value = DEFAULTS[key]
+        return max(lo, min(hi, value))
+
+    return {
+        "rps": _num("rps", float, 0.1, MAX_RPS),
+        "concurrency": _num("concurrency", int, 1, MAX_CONCURRENCY),
+        "duration_s": _num("duration_s", float, 1, MAX_DURATION_S),
+    }
+
+
+def replay(specs: List[dict], *, rps: float, concurrency: int, duration_s: float,
+           poster: Callable[..., Dict[str, Any]] = runner._post,
+           clock: Callable[[], float] = time.monotonic,
+           sleep: Callable[[float], None] = time.sleep) -> Dict[str, dict]:
+    """Issue `specs` round-robin at `rps` for `duration_s` on
+    `concurrency` workers. Returns {endpoint: {"histogram", "errors"}}."""
+    results: Dict[str, dict] = {}
+    lock = threading.Lock()
+    total = int(rps * duration_s)
+    interval = 1.0 / rps
+
+    def _one(spec, scheduled):
+        ctx = _send(spec, poster)
+        latency_ms = (clock() - scheduled) * 1000
+        ok = 200 <= ctx.get("status_code", 0) < 300
+        with lock:
+            slot = results.setdefault(spec["endpoint"],
+                                      {"histogram": LatencyHistogram(), "errors": 0})
+            slot["histogram"].record(latency_ms)
+            slot["errors"] += 0 if ok else 1
+
+    if not specs or total <= 0:
+        return results
+    start = clock()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, spec in zip(range(total), itertools.cycle(specs)):
+            scheduled = start + i * interval
+            delay = scheduled - clock()
+            if delay > 0:
+                sleep(delay)
+            pool.submit(_one, spec, scheduled)
+    return results
+
+
+def summarize(results: Dict[str, dict]) -> Dict[str, dict]:
+    """Per-endpoint percentiles + pass/fail against the budgets."""
+    out = {}
+    for endpoint, slot in results.items():
+        stats = slot["histogram"].to_dict()
+        budget = P95_BUDGET_MS.get(endpoint)
+        error_rate = slot["errors"] / stats["count"] if stats["count"] else 0.0
+        stats.update({
+            "errors": slot["errors"],
+            "error_rate": round(error_rate, 4),
+            "p95_budget_ms": budget,
+            "passed": (error_rate <= MAX_ERROR_RATE
+                       and (budget is None or (stats["p95_ms"] or 0) <= budget)),
+        })
+        out[endpoint] = stats
+    return out
+
+
+def run_loadtest(scenarios: List[dict], cfgs: List[runner.RunConfig], *,
+                 rps: float, concurrency: int, duration_s: float,
+                 endpoints=ENDPOINTS,
+                 poster: Callable[..., Dict[str, Any]] = runner._post,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> dict:
+    """Seed, replay, tear down. `cfgs[i]` is the (synthetic) user that
+    scenario i is replayed as. Never raises on HTTP failures — they are
+    counted as endpoint errors."""
+    per_scenario = [build_requests(s, c, endpoints) for s, c in zip(scenarios, cfgs)]
+    # Interleave scenarios so every user sees load from the first second.
+    specs = [spec for group in itertools.zip_longest(*per_scenario)
+             for spec in group if spec is not None]
+    planned = int(rps * duration_s)
+
+    seeded = []
+    for scenario, cfg, own in zip(scenarios, cfgs, per_scenario):
+        own_fits = sum(1 for s in own if s["endpoint"] == "compute-single-fit")
+        fit_calls = math.ceil(planned * own_fits / len(specs)) if own_fits else 0
+        seeded.append(seed_user(scenario, cfg, fit_calls=fit_calls, poster=poster))
+
+    try:
+        results = replay(specs, rps=rps, concurrency=concurrency,
+                         duration_s=duration_s, poster=poster,
+                         clock=clock, sleep=sleep) if all(seeded) else {}
+    finally:
+        for cfg in cfgs:
+            poster(f"{cfg.profile_manager_url}/clear-test-data",
+                   {"user_email": cfg.test_user_email}, admin_token=cfg.admin_token)
+
+    return {
+        "seeded": all(seeded),
+        "requests_planned": planned,
+        "latency": summarize(results),
+    }
@@ -17,6 +17,7 @@ Endpoints:
   GET  /scenarios             → list of registered archetypes (id + description)
   POST /run                   → run a fresh batch
   POST /run?scenario=<id>     → run one specific archetype
+  POST /run {"type": "loadtest"} → latency load test (loadtest.py)
   POST /suggest-cause         → LLM analysis of a failing scenario
   POST /github-issue          → build a pre-filled GitHub issue URL
 
@@ -44,6 +45,7 @@ import os
 import secrets
 import urllib.parse
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import functions_framework
@@ -52,9 +54,11 @@ from flask import jsonify
 import auth
 import corpus
 import firestore_store
+import llm_gateway
 import narratives
 import runner
 import schedule
+import synthetic_users
 import synthesizer
 
 logging.basicConfig(level=logging.INFO)
@@ -89,6 +93,9 @@ def _config():
         # How many of the per-run scenarios should be LLM-synthesized.
         # Default 0 — flip to 2 once the prompt is stable in prod.
         "SYNTHESIS_COUNT": int(os.getenv("QA_SYNTHESIS_COUNT", "0")),
+        # Scenarios run concurrently, each as its own synthetic user
+        # (synthetic_users.py). 1 restores strictly serial execution.
+        "SCENARIO_WORKERS": int(os.getenv("QA_SCENARIO_WORKERS", "4")),
         "GITHUB_REPO": os.getenv("QA_GITHUB_REPO", "cvsubs74/college-expert"),
     }
 
@@ -562,6 +569,40 @@ def _check_run_in_progress() -> "Optional[dict]":
     return None
 
 
+def _scenario_workers(body: dict, cfg: dict, n_scenarios: int) -> int:
+    """Worker-pool size for a run: body `workers` overrides
+    QA_SCENARIO_WORKERS; clamped to [1, number of scenarios]."""
+    try:
+        workers = int(body.get("workers") or cfg["SCENARIO_WORKERS"])
+    except (TypeError, ValueError):
+        workers = cfg["SCENARIO_WORKERS"]
+    return max(1, min(workers, n_scenarios or 1))
+
+
+def _provision_run_configs(cfg: dict, n: int, workers: int) -> list:
+    """One RunConfig per scenario slot 1..n, each signed in as that
+    slot's synthetic user. Tokens are minted in parallel; raises if any
+    mint fails."""
+    users = [
+        synthetic_users.for_slot(cfg["TEST_USER_UID"], cfg["TEST_USER_EMAIL"], slot)
+        for slot in range(1, n + 1)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        id_tokens = list(pool.map(
+            lambda u: synthetic_users.provision(u, cfg["FIREBASE_API_KEY"]),
+            users,
+        ))
+    base_cfg = runner.RunConfig(
+        profile_manager_url=cfg["PROFILE_MANAGER_URL"],
+        counselor_agent_url=cfg["COUNSELOR_AGENT_URL"],
+        admin_token=cfg["ADMIN_TOKEN"],
+        id_token="",
+        test_user_email=cfg["TEST_USER_EMAIL"],
+        knowledge_base_url=cfg["KNOWLEDGE_BASE_URL"],
+    )
+    return [base_cfg.for_user(u.email, t) for u, t in zip(users, id_tokens)]
+
+
 def _handle_run(body: dict, cfg: dict):
     """Execute a QA run. Returns either a dict (HTTP 200 implicit) or
     a (dict, status_code) tuple when an explicit status is needed
@@ -589,6 +630,8 @@ def _handle_run(body: dict, cfg: dict):
     # Mutex: refuse to start a run if another is already in flight on
     # the same test user. Two runs racing on the shared user produce
     # indeterminate state (verify_college_list_symmetry fails, etc.).
+    # Scenarios within a run are isolated, but synthetic users are per
+    # slot and reused run to run, so two runs would still collide.
     busy = _check_run_in_progress()
     if busy:
         logger.info(
@@ -628,6 +671,9 @@ def _handle_run(body: dict, cfg: dict):
         "test_plan": None,
     })
 
+    if body.get("type") == "loadtest":
+        return _handle_loadtest(body, cfg, run_id, started, trigger, actor)
+
     pick = _pick_scenarios(cfg, n, scenario_id_filter)
     if not pick["ok"]:
         # Release the lock — flip the stub to "complete" so the next
@@ -640,27 +686,19 @@ def _handle_run(body: dict, cfg: dict):
     chosen = pick["chosen"]
     active_feedback = pick["active_feedback"]
 
-    # Authenticate as the test user before running scenarios. If the
-    # token mint fails, every scenario will fail predictably; we surface
-    # that as a top-level error rather than running the rest in a doomed
-    # state.
+    # Provision one synthetic user per scenario (in parallel) and sign
+    # each in before running anything. If a token mint fails, every
+    # scenario would fail predictably; we surface that as a top-level
+    # error rather than running the rest in a doomed state.
+    workers = _scenario_workers(body, cfg, len(chosen))
     try:
-        id_token = auth.get_id_token(cfg["TEST_USER_UID"], cfg["FIREBASE_API_KEY"])
+        run_cfgs = _provision_run_configs(cfg, len(chosen), workers)
     except Exception as exc:  # noqa: BLE001
-        logger.exception("qa_agent: failed to mint test-user ID token")
+        logger.exception("qa_agent: failed to mint synthetic-user ID tokens")
         err = f"auth: {type(exc).__name__}: {exc}"
         _release_run_lock(run_id, started, trigger, actor, error=err)
         return {"success": False, "error": err}
 
-    run_cfg = runner.RunConfig(
-        profile_manager_url=cfg["PROFILE_MANAGER_URL"],
-        counselor_agent_url=cfg["COUNSELOR_AGENT_URL"],
-        admin_token=cfg["ADMIN_TOKEN"],
-        id_token=id_token,
-        test_user_email=cfg["TEST_USER_EMAIL"],
-        knowledge_base_url=cfg["KNOWLEDGE_BASE_URL"],
-    )
-
     # Pre-run: ask the planner for a test_plan narrative + structured
     # rationale + coverage. Cheap (one Gemini Flash call), gives the
     # dashboard the "what is this run testing and why" context.
@@ -682,17 +720,22 @@ def _handle_run(body: dict, cfg: dict):
         "test_plan": test_plan,
     })
 
-    scenarios_results = []
-    for archetype in chosen:
+    def _execute(archetype, run_cfg):
         variation = corpus.generate_variation(archetype, api_key=cfg["GEMINI_API_KEY"])
         materialized = corpus.apply_variation(archetype, variation)
         result = runner.run_scenario(materialized, run_cfg)
         _propagate_archetype_metadata(result, archetype)
-        scenarios_results.append(result)
         firestore_store.update_history(
             archetype["id"],
             last_result="pass" if result["passed"] else "fail",
         )
+        return result
+
+    # Scenarios are isolated by user, so they run side by side; the run
+    # takes about as long as its slowest scenario. pool.map keeps the
+    # report in pick order.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scenarios_results = list(pool.map(_execute, chosen, run_cfgs))
 
     ended = datetime.now(timezone.utc)
     summary = {
@@ -738,6 +781,75 @@ def _handle_run(body: dict, cfg: dict):
     return {"success": True, "run_id": run_id, "summary": summary}
 
 
+# ---- /run {"type": "loadtest"} ---------------------------------------------
+
+
+def _handle_loadtest(body: dict, cfg: dict, run_id: str, started,
+                     trigger: str, actor: str) -> dict:
+    """Latency load test under an already-claimed run lock. Replays
+    scenario steps at body `rps` / `concurrency` / `duration_s` and
+    writes per-endpoint percentiles into the qa_runs report. Scenarios
+    come from body `scenarios` (ids) or the first few archetypes by id;
+    rotation history is left alone. See loadtest.py."""
+    import loadtest  # noqa: WPS433 — lazy so correctness runs skip the import
+
+    settings = loadtest.clamp_settings(body)
+    archetypes = sorted(corpus.load_archetypes(), key=lambda a: a.get("id") or "")
+    wanted = body.get("scenarios") or []
+    chosen = ([a for a in archetypes if a.get("id") in wanted] if wanted
+              else archetypes[:loadtest.DEFAULTS["scenarios"]])
+    endpoints = [e for e in (body.get("endpoints") or loadtest.ENDPOINTS)
+                 if e in loadtest.ENDPOINTS]
+    if not chosen or not endpoints:
+        err = "loadtest: no matching scenarios or endpoints"
+        _release_run_lock(run_id, started, trigger, actor, error=err)
+        return {"success": False, "error": err}
+
+    try:
+        run_cfgs = _provision_run_configs(
+            cfg, len(chosen), _scenario_workers(body, cfg, len(chosen)))
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("qa_agent: failed to mint synthetic-user ID tokens")
+        err = f"auth: {type(exc).__name__}: {exc}"
+        _release_run_lock(run_id, started, trigger, actor, error=err)
+        return {"success": False, "error": err}
+
+    result = loadtest.run_loadtest(chosen, run_cfgs, endpoints=endpoints, **settings)
+    latency = result["latency"]
+    passes = sum(1 for stats in latency.values() if stats["passed"])
+    summary = {
+        "total": len(latency),
+        "pass": passes,
+        "fail": len(latency) - passes + (0 if result["seeded"] else 1),
+    }
+    ended = datetime.now(timezone.utc)
+    report = {
+        "run_id": run_id,
+        "type": "loadtest",
+        "status": "complete",
+        "started_at": started.isoformat(),
+        "ended_at": ended.isoformat(),
+        "duration_ms": int((ended - started).total_seconds() * 1000),
+        "trigger": trigger,
+        "actor": actor,
+        "summary": summary,
+        "scenarios": [],
+        "latency": latency,
+        "loadtest": {
+            **settings,
+            "endpoints": endpoints,
+            "scenario_ids": [a.get("id") for a in chosen],
+            "requests_planned": result["requests_planned"],
+        },
+    }
+    if not result["seeded"]:
+        report["error"] = "loadtest: seeding a synthetic user failed"
+    firestore_store.write_report(run_id, report)
+    logger.info("qa_agent: loadtest %s complete — %d/%d endpoints within budget",
+                run_id, passes, len(latency))
+    return {"success": True, "run_id": run_id, "summary": summary, "latency": latency}
+
+
 # ---- /schedule -------------------------------------------------------------
 
 
@@ -817,7 +929,8 @@ def _handle_summary(cfg: dict, request=None) -> dict:
             except (TypeError, ValueError):
                 pass
 
-        runs = firestore_store.list_recent_runs(limit=60)
+        # Digests from the rollup doc, not full reports — one small read.
+        runs = firestore_store.list_run_digests(limit=60)
         # Pass the colleges allowlist into coverage so it can compute
         # universities_untested (allowlist - tested). Allowlist is
         # cheap to load (a small JSON), no need to cache.
@@ -980,11 +1093,8 @@ def _gemini_suggest(scenario: dict, api_key: str | None) -> str:
         return _heuristic_suggest(failing_steps)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.5-flash")
         prompt = _build_suggest_prompt(scenario, failing_steps)
-        resp = model.generate_content(prompt)
+        resp = llm_gateway.generate_legacy(prompt, model="gemini-2.5-flash", api_key=api_key)
         text = (resp.text or "").strip()
         return text or _heuristic_suggest(failing_steps)
     except Exception as exc:  # noqa: BLE001
@@ -26,9 +26,12 @@ from __future__ import annotations
 import json
 import logging
 import os
+import statistics
 from datetime import datetime, timedelta, timezone
 from typing import Iterable, Optional
 
+import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
@@ -97,11 +100,8 @@ def _plan_narrative(archetypes, history, rationale, coverage,
         return _plan_narrative_fallback(archetypes, history, rationale)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel("gemini-2.5-flash")
         prompt = _plan_prompt(archetypes, history, rationale, coverage)
-        resp = model.generate_content(prompt)
+        resp = llm_gateway.generate_legacy(prompt, model="gemini-2.5-flash", api_key=gemini_key)
         text = (resp.text or "").strip()
         return text or _plan_narrative_fallback(archetypes, history, rationale)
     except Exception as exc:  # noqa: BLE001
@@ -223,11 +223,8 @@ def _outcome_narrative(report, verdict, first_look, *,
         return _outcome_narrative_fallback(report, verdict, first_look)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel("gemini-2.5-flash")
         prompt = _outcome_prompt(report, verdict, first_look)
-        resp = model.generate_content(prompt)
+        resp = llm_gateway.generate_legacy(prompt, model="gemini-2.5-flash", api_key=gemini_key)
         text = (resp.text or "").strip()
         return text or _outcome_narrative_fallback(report, verdict, first_look)
     except Exception as exc:  # noqa: BLE001
@@ -311,13 +308,20 @@ def build_summary(runs: Iterable[dict],
       - `pass_rate_7d` / `pass_rate_30d`: time-windowed rates kept as
         secondary context.
       - per-surface health.
+      - `latency`: the newest load-test run (loadtest.py) against the
+        median of the ones before it, flagging p95 regressions.
       - LLM narrative on top.
 
+    Load-test runs carry no scenarios and a latency verdict rather than
+    a correctness one, so they're left out of the pass-rate windows.
+
     `recent_n` is clamped to [5, 100] — out-of-range values get pulled
     to the nearest bound rather than silently using the default, so the
     UI selector can't accidentally show a mismatched number.
     """
     runs = list(runs or [])
+    latency = _latency_trend(runs)
+    runs = [r for r in runs if r.get("type") != "loadtest"]
     now = datetime.now(timezone.utc)
 
     # Clamp recent_n to a sane range.
@@ -336,7 +340,7 @@ def build_summary(runs: Iterable[dict],
     narrative = _summary_narrative(
         runs, pass_rate_recent, recent_n_clamped,
         pass_rate_7d, pass_rate_30d, trend, surfaces,
-        gemini_key=gemini_key,
+        latency=latency, gemini_key=gemini_key,
     )
     return {
         "narrative": narrative,
@@ -346,9 +350,74 @@ def build_summary(runs: Iterable[dict],
         "pass_rate_30d": pass_rate_30d,
         "trend": trend,
         "surfaces": surfaces,
+        "latency": latency,
+    }
+
+
+# A load test regresses an endpoint when its p95 is both 25% and 50ms
+# above the median p95 of up to LATENCY_BASELINE_RUNS earlier load tests.
+# The absolute floor keeps millisecond-scale jitter on fast reads quiet.
+LATENCY_REGRESSION_RATIO = 1.25
+LATENCY_REGRESSION_MIN_MS = 50
+LATENCY_BASELINE_RUNS = 5
+
+
+def _latency_trend(runs):
+    """Per-endpoint percentiles of the newest load test, each with its
+    baseline p95 and a `regressed` flag. {} when no load test has run."""
+    loadtests = sorted(
+        (r for r in runs
+         if r.get("type") == "loadtest" and r.get("latency") and r.get("started_at")),
+        key=lambda r: r["started_at"],
+        reverse=True,
+    )
+    if not loadtests:
+        return {}
+    latest, earlier = loadtests[0], loadtests[1:1 + LATENCY_BASELINE_RUNS]
+    endpoints = {}
+    for endpoint, stats in latest["latency"].items():
+        p95 = stats.get("p95_ms")
+        history = [
+            r["latency"][endpoint]["p95_ms"] for r in earlier
+            if (r["latency"].get(endpoint) or {}).get("p95_ms") is not None
+        ]
+        baseline = statistics.median(history) if history else None
+        endpoints[endpoint] = {
+            "p50_ms": stats.get("p50_ms"),
+            "p95_ms": p95,
+            "p99_ms": stats.get("p99_ms"),
+            "baseline_p95_ms": baseline,
+            "within_budget": bool(stats.get("passed")),
+            "regressed": (
+                p95 is not None and baseline is not None
+                and p95 > baseline * LATENCY_REGRESSION_RATIO
+                and p95 - baseline >= LATENCY_REGRESSION_MIN_MS
+            ),
+        }
+    return {
+        "run_id": latest.get("run_id"),
+        "started_at": latest.get("started_at"),
+        "endpoints": endpoints,
+        "regressions": sorted(e for e, v in endpoints.items() if v["regressed"]),
+        "over_budget": sorted(e for e, v in endpoints.items() if not v["within_budget"]),
     }
 
 
+def _latency_lines(latency) -> list:
+    """One line per regressed / over-budget endpoint, for the narratives."""
+    lines = []
+    for name in sorted(set(latency.get("regressions", []))
+                       | set(latency.get("over_budget", []))):
+        slot = latency["endpoints"][name]
+        line = f"{name} p95 {slot['p95_ms']}ms"
+        if slot["regressed"]:
+            line += f" (baseline {round(slot['baseline_p95_ms'])}ms)"
+        if not slot["within_budget"]:
+            line += " over budget"
+        lines.append(line)
+    return lines
+
+
 def _pass_rate_recent(runs, n):
     """Pass rate over the N most-recent runs (by started_at). Assumes
     the input is already sorted most-recent-first (firestore_store
@@ -463,32 +532,33 @@ def _aggregate_surface_health(runs):
 
 def _summary_narrative(runs, rate_recent, recent_n,
                        rate_7d, rate_30d, trend, surfaces,
-                       *, gemini_key: Optional[str] = None) -> str:
+                       *, latency=None, gemini_key: Optional[str] = None) -> str:
     if not runs:
         return "No QA runs yet. Click Run now to kick off the first batch."
 
     if not gemini_key:
         return _summary_narrative_fallback(
-            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces)
+            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces,
+            latency=latency)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel("gemini-2.5-flash")
         prompt = _summary_prompt(
-            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces)
-        resp = model.generate_content(prompt)
+            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces,
+            latency=latency)
+        resp = llm_gateway.generate_legacy(prompt, model="gemini-2.5-flash", api_key=gemini_key)
         text = (resp.text or "").strip()
         return text or _summary_narrative_fallback(
-            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces)
+            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces,
+            latency=latency)
     except Exception as exc:  # noqa: BLE001
         logger.warning("qa_agent.planner: build_summary LLM failed (%s)", exc)
         return _summary_narrative_fallback(
-            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces)
+            runs, rate_recent, recent_n, rate_7d, rate_30d, trend, surfaces,
+            latency=latency)
 
 
 def _summary_prompt(runs, rate_recent, recent_n, rate_7d, rate_30d,
-                    trend, surfaces) -> str:
+                    trend, surfaces, *, latency=None) -> str:
     """Build the LLM prompt. Leads with the recent-N rate (the dashboard's
     primary pill) so the generated narrative tracks the same window the
     user sees up top, then mentions 7d/30d as historical context."""
@@ -496,6 +566,9 @@ def _summary_prompt(runs, rate_recent, recent_n, rate_7d, rate_30d,
         f"  - {name}: {slot['fails']}/{slot['total']} fails ({slot['status']})"
         for name, slot in surfaces.items()
     ) or "  (no surfaces tracked)"
+    latency_lines = "\n".join(
+        f"  - {line}" for line in _latency_lines(latency or {})
+    ) or "  (no latency regressions in the latest load test)"
     return f"""You are a senior QA engineer writing a 2-3 sentence executive summary
 of a synthetic-monitoring system's health.
 
@@ -510,6 +583,9 @@ Historical context (mention only if it differs notably from the primary):
 Surface health (last 14 days):
 {surf_lines}
 
+Latency (latest load test vs earlier ones):
+{latency_lines}
+
 In 2-3 sentences:
 1. Lead with a one-line health verdict using the PRIMARY signal — name
    the window (e.g., "Last {recent_n} runs are 100% pass") rather than
@@ -519,12 +595,13 @@ In 2-3 sentences:
    green").
 3. Call out any surface that's red or yellow, with a hint at where to
    look. If everything is green, say so simply.
+4. If the latency section lists an endpoint, name it and its p95.
 
 Be direct. No preamble. No disclaimers."""
 
 
 def _summary_narrative_fallback(runs, rate_recent, recent_n,
-                                rate_7d, rate_30d, trend, surfaces):
+                                rate_7d, rate_30d, trend, surfaces, *, latency=None):
     """Deterministic narrative when the LLM is unavailable. Leads with
     the recent-N pass rate so the narrative tracks the dashboard's
     primary pill."""
@@ -542,5 +619,10 @@ def _summary_narrative_fallback(runs, rate_recent, recent_n,
     flagged = [name for name, slot in surfaces.items()
                if slot.get("status") in ("yellow", "red")]
     if flagged:
-        return f"{headline.capitalize()}. Watch surfaces: {', '.join(flagged)}."
-    return f"{headline.capitalize()}. All tracked surfaces are green."
+        text = f"{headline.capitalize()}. Watch surfaces: {', '.join(flagged)}."
+    else:
+        text = f"{headline.capitalize()}. All tracked surfaces are green."
+    slow = _latency_lines(latency or {})
+    if slow:
+        text += f" Latency: {'; '.join(slow)}."
+    return text
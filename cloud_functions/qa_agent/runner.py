@@ -269,6 +269,17 @@ class RunConfig:
         # gathering and cross-reference assertions mark themselves SKIP.
         self.knowledge_base_url = knowledge_base_url.rstrip("/") if knowledge_base_url else ""
 
+    def for_user(self, test_user_email: str, id_token: str) -> "RunConfig":
+        """Same endpoints, signed in as another (synthetic) test user."""
+        return RunConfig(
+            profile_manager_url=self.profile_manager_url,
+            counselor_agent_url=self.counselor_agent_url,
+            admin_token=self.admin_token,
+            id_token=id_token,
+            test_user_email=test_user_email,
+            knowledge_base_url=self.knowledge_base_url,
+        )
+
 
 # ---- Scenario execution ----------------------------------------------------
 
@@ -26,6 +26,8 @@ import os
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
@@ -320,14 +322,11 @@ def synthesize_scenarios(
     history_summary = summarize_history(history)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=gemini_key)
-        gen_model = genai.GenerativeModel(model)
         prompt = _build_prompt(
             n, system_knowledge, history_summary, colleges_allowlist,
             feedback_items=feedback_items,
         )
-        resp = gen_model.generate_content(prompt)
+        resp = llm_gateway.generate_legacy(prompt, model=model, api_key=gemini_key)
         raw = (resp.text or "").strip()
     except Exception as exc:  # noqa: BLE001
         logger.warning("synthesizer: LLM call failed: %s", exc)
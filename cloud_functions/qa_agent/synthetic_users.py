@@ -0,0 +1,52 @@
+"""
+Synthetic QA users: one isolated account per scenario slot.
+
+Scenarios used to share the single QA test user, so they had to run one
+after another — two scenarios on the same account wipe each other's state
+in setup_teardown and interleave their college-list writes. Giving every
+scenario in a run its own account lets them run concurrently.
+
+Slot N of a run signs in as:
+
+    uid    {QA_TEST_USER_UID}-qa{N}
+    email  local+qa{N}@domain   (plus-alias of QA_TEST_USER_EMAIL)
+
+Slots are reused run to run, so the set of accounts stays bounded and
+profile_manager_v2's /clear-test-data allow-list accepts them as aliases
+of the base test account. Each scenario clears its account at setup and
+again at teardown (runner.run_scenario), so a slot never leaks state into
+the next run that uses it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import auth
+
+
+@dataclass(frozen=True)
+class SyntheticUser:
+    uid: str
+    email: str
+
+
+def alias_email(base_email: str, slot: int) -> str:
+    """`local+qa{slot}@domain` for the base test account."""
+    local, _, domain = base_email.partition("@")
+    local = local.split("+", 1)[0]
+    return f"{local}+qa{slot}@{domain}"
+
+
+def for_slot(base_uid: str, base_email: str, slot: int) -> SyntheticUser:
+    """The synthetic user that runs scenario `slot` (1-based) of a run."""
+    if not base_uid:
+        raise RuntimeError("QA_TEST_USER_UID is required for synthetic users")
+    return SyntheticUser(uid=f"{base_uid}-qa{slot}",
+                         email=alias_email(base_email, slot))
+
+
+def provision(user: SyntheticUser, api_key: Optional[str] = None) -> str:
+    """Ensure the account exists and return an ID token for it."""
+    return auth.get_id_token(user.uid, api_key, email=user.email)
@@ -828,6 +828,9 @@ async def health(_request: Request):
 # ASGI app for uvicorn (Procfile: `web: uvicorn server:app ...`).
 app = mcp.streamable_http_app()
 
+# Mint backend service tokens before the first tool call needs them.
+sc.warm_up_service_tokens()
+
 # Kill switch: when CONNECTOR_ENABLED is false, 404 everything except /health
 # (and forward lifespan/websocket scopes so the session manager still starts).
 # Lets the connector be disabled via env without a redeploy. See settings.py.
@@ -0,0 +1,176 @@
+"""
+Outbound service-identity tokens, minted ahead of need (#223).
+
+Callers attach a Google-signed OIDC ID token (audience = the backend's base
+URL) to service-to-service calls. Tokens used to be fetched lazily with a
+55-minute TTL, so the first call after expiry sat on a metadata-server round
+trip inside a user's request, and every request that arrived at that moment
+fetched its own token.
+
+This module keeps one token per audience and manages its lifetime:
+
+    refresh-ahead  a token is served for TOKEN_TTL_SECONDS; once it is within
+                   REFRESH_AHEAD_SECONDS of that, the request that notices
+                   still gets the current token and a background thread mints
+                   the next one (on a busy instance the swap is invisible)
+    single-flight  one fetch per audience at a time — concurrent callers with
+                   no usable token wait for that fetch instead of issuing
+                   their own, and a background refresh is skipped while one
+                   is already running
+    warm_up()      called at cold start on Cloud Run / Cloud Functions
+                   (K_SERVICE is set) to mint tokens in the background before
+                   the first request needs them
+
+Fails open by design, as before: with no metadata server (local dev, unit
+tests) get_token returns None and callers omit the header; the backend's
+AUTH_MODE decides what that means. A failed fetch is not retried for
+FAILURE_BACKOFF_SECONDS so a missing metadata server isn't re-probed on
+every call.
+
+The services deploy independently and share no package, so this file is an
+identical copy in counselor_agent and stratia_connector
+(tests/cicd/test_shared_module_copies.py keeps them in step).
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Google ID tokens live 1h; serve one for 55 minutes (5 minutes of slack).
+TOKEN_TTL_SECONDS = int(os.getenv('SERVICE_TOKEN_TTL_SECONDS', str(55 * 60)))
+# Start minting the replacement this long before the served token goes stale.
+REFRESH_AHEAD_SECONDS = int(os.getenv('SERVICE_TOKEN_REFRESH_AHEAD_SECONDS', str(10 * 60)))
+# After a failed fetch, callers get None without a retry for this long.
+FAILURE_BACKOFF_SECONDS = int(os.getenv('SERVICE_TOKEN_FAILURE_BACKOFF_SECONDS', '30'))
+
+_now = time.monotonic
+
+_lock = threading.Lock()  # guards the dicts below
+_tokens: Dict[str, tuple] = {}  # audience -> (token, fetched_at)
+_failed_at: Dict[str, float] = {}  # audience -> last failed fetch
+_flights: Dict[str, threading.Lock] = {}  # audience -> single-flight lock
+_refreshing: set = set()  # audiences with a background refresh scheduled
+_metrics = {'hits': 0, 'misses': 0, 'fetches': 0, 'failures': 0, 'refreshes_ahead': 0}
+
+
+def reset_cache() -> None:
+    """Drop every cached token and zero the counters (tests, key rotation)."""
+    with _lock:
+        _tokens.clear()
+        _failed_at.clear()
+        _refreshing.clear()
+        for key in _metrics:
+            _metrics[key] = 0
+
+
+def cache_metrics() -> Dict:
+    """Counters since the last reset: hits (served from cache), misses (the
+    caller had to wait for a fetch), fetches, failures and refreshes_ahead."""
+    with _lock:
+        return {**_metrics, 'audiences': len(_tokens)}
+
+
+def _fetch(audience: str) -> str:
+    # Lazy import: test conftests stub the `google` package.
+    from google.auth.transport import requests as google_requests  # noqa: WPS433
+    from google.oauth2 import id_token as google_id_token  # noqa: WPS433
+    return google_id_token.fetch_id_token(google_requests.Request(), audience)
+
+
+def _flight(audience: str) -> threading.Lock:
+    with _lock:
+        return _flights.setdefault(audience, threading.Lock())
+
+
+def _spawn(target: Callable, *args) -> None:
+    threading.Thread(target=target, args=args, daemon=True,
+                     name=f"service-token-{args[0] if args else ''}").start()
+
+
+def _refresh(audience: str, wait: bool = True) -> Optional[str]:
+    """Mint a token for `audience` unless another caller just did. With
+    wait=False, returns None at once when a fetch is already in flight."""
+    flight = _flight(audience)
+    if not flight.acquire(blocking=wait):
+        return None
+    try:
+        now = _now()
+        with _lock:
+            cached = _tokens.get(audience)
+            failed = _failed_at.get(audience)
+        if cached and now - cached[1] < TOKEN_TTL_SECONDS - REFRESH_AHEAD_SECONDS:
+            return cached[0]  # refreshed while we waited for the flight
+        if failed is not None and now - failed < FAILURE_BACKOFF_SECONDS:
+            return cached[0] if cached and now - cached[1] < TOKEN_TTL_SECONDS else None
+        try:
+            token = _fetch(audience)
+        except Exception as e:  # noqa: BLE001 — local dev / tests have no metadata server
+            with _lock:
+                _failed_at[audience] = _now()
+                _metrics['failures'] += 1
+            logger.info(f"[SVC_TOKENS] no service identity token available for {audience}: {e}")
+            return cached[0] if cached and _now() - cached[1] < TOKEN_TTL_SECONDS else None
+        with _lock:
+            _tokens[audience] = (token, _now())
+            _failed_at.pop(audience, None)
+            _metrics['fetches'] += 1
+        return token
+    finally:
+        flight.release()
+
+
+def _background_refresh(audience: str) -> None:
+    try:
+        _refresh(audience, wait=False)
+    finally:
+        with _lock:
+            _refreshing.discard(audience)
+
+
+def get_token(audience: str) -> Optional[str]:
+    """The ID token for `audience`, or None when none can be minted. Never
+    raises. Only blocks when no usable token is cached (cold instance, or an
+    instance idle for longer than the TTL)."""
+    if not audience:
+        return None
+    now = _now()
+    token, refresh = None, False
+    with _lock:
+        cached = _tokens.get(audience)
+        if cached and now - cached[1] < TOKEN_TTL_SECONDS:
+            token = cached[0]
+            _metrics['hits'] += 1
+            if (now - cached[1] >= TOKEN_TTL_SECONDS - REFRESH_AHEAD_SECONDS
+                    and audience not in _refreshing):
+                refresh = True
+                _refreshing.add(audience)
+                _metrics['refreshes_ahead'] += 1
+        else:
+            _metrics['misses'] += 1
+    if token is None:
+        return _refresh(audience)
+    if refresh:
+        _spawn(_background_refresh, audience)
+    return token
+
+
+def warm_up(audiences: Iterable[str]) -> List[str]:
+    """Mint tokens for `audiences` in the background. Call at cold start; a
+    request that arrives before a fetch lands joins it rather than starting
+    another. A no-op off Cloud Run / Cloud Functions (K_SERVICE unset), so
+    local runs and tests never reach for a metadata server. Returns the
+    audiences being warmed."""
+    if not os.getenv('K_SERVICE'):
+        return []
+    warming = []
+    for audience in audiences:
+        audience = (audience or '').rstrip('/')
+        if audience and audience not in warming:
+            warming.append(audience)
+            _spawn(_refresh, audience)
+    if warming:
+        logger.info(f"[SVC_TOKENS] warming service tokens for {warming}")
+    return warming
@@ -12,10 +12,10 @@ final `_cap_size` guard so results stay under Claude's ~150k-char tool limit.
 import datetime as _dt
 import json
 import logging
-import time
 
 import requests
 
+import service_tokens
 from settings import settings
 
 logger = logging.getLogger("stratia_connector.client")
@@ -83,18 +83,18 @@ def _cap_size(d, droppable=(), limit=_RESULT_CAP):
 # the backend it is calling. The backends recognize the runtime SA
 # (TRUSTED_SERVICE_EMAILS) and then honor the X-User-Email this connector
 # forwards — the human was already verified here via Google OAuth.
-_SVC_TOKEN_TTL_SECONDS = 55 * 60  # tokens live 1h; refresh with slack
-_svc_token_cache = {}  # audience -> (token, fetched_at_monotonic)
+# Token lifetime (refresh-ahead, single-flight, cold-start warm-up) is
+# managed by service_tokens so minting stays off user requests.
+_SVC_AUDIENCES = ("PROFILE_MANAGER_V2_URL", "COUNSELOR_AGENT_URL",
+                  "KNOWLEDGE_BASE_UNIVERSITIES_URL")
 
 
 def _audience_for(url):
     """The configured base URL of the service this url belongs to — the
     audience the backend expects (never a bare host: Cloud Functions URLs
     include the function path)."""
-    for base in (settings.PROFILE_MANAGER_V2_URL,
-                 settings.COUNSELOR_AGENT_URL,
-                 settings.KNOWLEDGE_BASE_UNIVERSITIES_URL):
-        base = (base or '').rstrip('/')
+    for name in _SVC_AUDIENCES:
+        base = (getattr(settings, name) or '').rstrip('/')
         if base and url.startswith(base):
             return base
     return None
@@ -104,23 +104,13 @@ def _svc_auth_headers(url):
     """{'Authorization': 'Bearer <oidc>'} for backend calls, {} when no
     runtime credentials exist (local dev/tests). Never raises — the
     backend's AUTH_MODE decides what a missing credential means."""
-    audience = _audience_for(url)
-    if not audience:
-        return {}
-    cached = _svc_token_cache.get(audience)
-    now = time.monotonic()
-    if cached and now - cached[1] < _SVC_TOKEN_TTL_SECONDS:
-        return {"Authorization": f"Bearer {cached[0]}"}
-    try:
-        # Lazy import: full-suite test runs stub the `google` package.
-        from google.auth.transport import requests as google_requests
-        from google.oauth2 import id_token as google_id_token
-        token = google_id_token.fetch_id_token(google_requests.Request(), audience)
-        _svc_token_cache[audience] = (token, now)
-        return {"Authorization": f"Bearer {token}"}
-    except Exception as e:  # noqa: BLE001 — metadata server absent locally
-        logger.info(f"no service identity token available for {audience}: {e}")
-        return {}
+    token = service_tokens.get_token(_audience_for(url))
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def warm_up_service_tokens():
+    """Mint tokens for every backend in the background at cold start."""
+    return service_tokens.warm_up(getattr(settings, name) for name in _SVC_AUDIENCES)
 
 
 def _get(url, params=None, timeout=30):
@@ -43,6 +43,21 @@ AUTH_MODE="${AUTH_MODE:-log}"
 # compute SA; qa-agent has its own).
 TRUSTED_SERVICE_EMAILS="808989169388-compute@developer.gserviceaccount.com,qa-agent@college-counselling-478115.iam.gserviceaccount.com"
 
+# Profile uploads (upload_pipeline.py) run as Cloud Tasks HTTP tasks that call
+# back profile-manager-v2's /process-upload-job, OIDC-signed as this SA (a
+# TRUSTED_SERVICE_EMAILS entry; it needs iam.serviceAccountUser on itself).
+UPLOAD_TASKS_QUEUE_NAME="profile-upload-jobs"
+UPLOAD_TASKS_SERVICE_ACCOUNT="808989169388-compute@developer.gserviceaccount.com"
+
+# Popular Workflows runs (workflow_stats.py) are queued the same way and
+# written by /process-workflow-stats, signed as the same SA.
+WORKFLOW_STATS_QUEUE_NAME="workflow-stats-runs"
+
+# The KB's semantic search tier loads its vector index from here; the KB v2
+# deploy rebuilds and publishes it (scripts/build_search_index.py, only
+# changed schools are re-embedded). SKIP_KB_INDEX_BUILD=true skips the build.
+KB_VECTOR_INDEX_GCS=${KB_VECTOR_INDEX_GCS:-"gs://college-counselling-knowledge-base/search_index"}
+
 # Warm min-instances for latency-sensitive services (profile-manager-v2,
 # counselor-agent, hybrid agent). Default 0 = scale-to-zero, so idle/pre-launch
 # costs nothing; export WARM_MIN_INSTANCES=1 at launch for low first-request
@@ -542,6 +557,34 @@ deploy_profile_manager_v2() {
     
     echo -e "${YELLOW}Deploying Profile Manager V2 (Firestore)...${NC}"
     
+    # Upload jobs need their queue; without it the function refuses uploads
+    # rather than running them on a CPU-throttled background thread.
+    if ! gcloud tasks queues describe "$UPLOAD_TASKS_QUEUE_NAME" --location=$REGION >/dev/null 2>&1; then
+        echo -e "${YELLOW}Creating Cloud Tasks queue ${UPLOAD_TASKS_QUEUE_NAME}...${NC}"
+        gcloud tasks queues create "$UPLOAD_TASKS_QUEUE_NAME" \
+            --location=$REGION \
+            --max-attempts=5 \
+            --min-backoff=10s \
+            --max-concurrent-dispatches=10
+    fi
+    if ! gcloud tasks queues describe "$WORKFLOW_STATS_QUEUE_NAME" --location=$REGION >/dev/null 2>&1; then
+        echo -e "${YELLOW}Creating Cloud Tasks queue ${WORKFLOW_STATS_QUEUE_NAME}...${NC}"
+        gcloud tasks queues create "$WORKFLOW_STATS_QUEUE_NAME" \
+            --location=$REGION \
+            --max-attempts=5 \
+            --min-backoff=5s \
+            --max-dispatches-per-second=20 \
+            --max-concurrent-dispatches=10
+    fi
+    
+    # The Popular Workflows rollup queries counter shards with count > 0
+    # across all signatures, which needs a collection-group index on count.
+    gcloud firestore indexes fields update count \
+        --collection-group=workflow_stat_shards \
+        --index=order=ascending,query-scope=collection-group \
+        --async --quiet >/dev/null 2>&1 || \
+        echo -e "${YELLOW}Could not enable the workflow_stat_shards count index; check it in the console${NC}"
+    
     cd cloud_functions/profile_manager_v2
     
     # Create deploy-time env.yaml with substituted values
@@ -558,6 +601,12 @@ AUTH_MODE: "${AUTH_MODE}"
 FIREBASE_PROJECT_ID: "${PROJECT_ID}"
 TRUSTED_SERVICE_EMAILS: "${TRUSTED_SERVICE_EMAILS}"
 SELF_AUDIENCES: "https://profile-manager-v2-pfnwjfp26a-ue.a.run.app,https://${REGION}-${PROJECT_ID}.cloudfunctions.net/profile-manager-v2"
+UPLOAD_TASKS_QUEUE: "projects/${PROJECT_ID}/locations/${REGION}/queues/${UPLOAD_TASKS_QUEUE_NAME}"
+UPLOAD_WORKER_URL: "https://profile-manager-v2-pfnwjfp26a-ue.a.run.app"
+UPLOAD_TASKS_SERVICE_ACCOUNT: "${UPLOAD_TASKS_SERVICE_ACCOUNT}"
+WORKFLOW_STATS_TASKS_QUEUE: "projects/${PROJECT_ID}/locations/${REGION}/queues/${WORKFLOW_STATS_QUEUE_NAME}"
+WORKFLOW_STATS_WORKER_URL: "https://profile-manager-v2-pfnwjfp26a-ue.a.run.app"
+WORKFLOW_STATS_TASKS_SERVICE_ACCOUNT: "${UPLOAD_TASKS_SERVICE_ACCOUNT}"
 EOF
     
     # QA_ADMIN_TOKEN is the second gate on /clear-test-data; same secret
@@ -707,12 +756,31 @@ deploy_knowledge_base_manager_universities() {
     cd ../..
 }
 
+publish_kb_vector_index() {
+    # Without an index at KB_VECTOR_INDEX_GCS every semantic/hybrid search
+    # silently runs as keyword, so a failed build is loud.
+    if [ "${SKIP_KB_INDEX_BUILD}" != "true" ]; then
+        echo -e "${YELLOW}Building KB vector index → ${KB_VECTOR_INDEX_GCS}...${NC}"
+        if GEMINI_API_KEY="${GEMINI_API_KEY}" python3 scripts/build_search_index.py \
+                --out /tmp/kb_vector_index_build --upload "${KB_VECTOR_INDEX_GCS}"; then
+            return 0
+        fi
+        echo -e "${RED}KB vector index build failed${NC}"
+    fi
+    if ! gcloud storage ls "${KB_VECTOR_INDEX_GCS%/}/index.json" >/dev/null 2>&1; then
+        echo -e "${RED}WARNING: no vector index at ${KB_VECTOR_INDEX_GCS}; semantic/hybrid search will fall back to keyword${NC}"
+        echo -e "${YELLOW}Publish one with: python3 scripts/build_search_index.py --out /tmp/kb_index --upload ${KB_VECTOR_INDEX_GCS}${NC}"
+    fi
+}
+
 deploy_knowledge_base_manager_universities_v2() {
     echo -e "${BLUE}═══════════════════════════════════════════════════════════${NC}"
     echo -e "${BLUE}  Deploying Knowledge Base Manager Universities V2 (Firestore)${NC}"
     echo -e "${BLUE}═══════════════════════════════════════════════════════════${NC}"
     echo ""
     
+    publish_kb_vector_index
+    
     cd cloud_functions/knowledge_base_manager_universities_v2
     
     # Create env.deploy.yaml with secrets
@@ -723,6 +791,7 @@ AUTH_MODE: "${AUTH_MODE}"
 FIREBASE_PROJECT_ID: "${PROJECT_ID}"
 TRUSTED_SERVICE_EMAILS: "${TRUSTED_SERVICE_EMAILS}"
 SELF_AUDIENCES: "https://knowledge-base-manager-universities-v2-pfnwjfp26a-ue.a.run.app,https://${REGION}-${PROJECT_ID}.cloudfunctions.net/knowledge-base-manager-universities-v2"
+KB_VECTOR_INDEX_GCS: "${KB_VECTOR_INDEX_GCS}"
 EOF
     
     gcloud functions deploy knowledge-base-manager-universities-v2 \
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import AgentChatHandoff from '../components/AgentChatHandoff';
@@ -18,6 +18,9 @@ import {
 
 const KB_URL = import.meta.env.VITE_KNOWLEDGE_BASE_UNIVERSITIES_URL || 'https://knowledge-base-manager-universities-pfnwjfp26a-ue.a.run.app';
 const PROFILE_V2_URL = import.meta.env.VITE_PROFILE_MANAGER_V2_URL || 'https://profile-manager-v2-pfnwjfp26a-ue.a.run.app';
+// Copilot asks in a burst collapse to the last one: each ask waits this long
+// and replaces (aborts) the one before it for the same prompt.
+const COPILOT_DEBOUNCE_MS = 350;
 
 // Fallback brainstorming questions if none are persisted
 const getDefaultBrainstormingQuestions = (promptText) => {
@@ -99,7 +102,10 @@ export default function EssayHelpPage() {
     const [starters, setStarters] = useState({});
     const [loadingStarters, setLoadingStarters] = useState({});
     const [copilotSuggestion, setCopilotSuggestion] = useState({}); // Now stores array of suggestions
+    const [copilotCursor, setCopilotCursor] = useState({}); // Caret position per prompt; copilot coaches the text before it
     const [loadingCopilot, setLoadingCopilot] = useState({});
+    const copilotTimers = useRef({}); // promptIndex -> pending debounce timer
+    const copilotRequests = useRef({}); // promptIndex -> AbortController of the newest ask
     const [feedback, setFeedback] = useState({});
     const [loadingFeedback, setLoadingFeedback] = useState({});
     const [writingMode, setWritingMode] = useState({});
@@ -114,7 +120,7 @@ export default function EssayHelpPage() {
     const [chatResponse, setChatResponse] = useState({});
     const [loadingChat, setLoadingChat] = useState({});
     // Version state - stores all versions per prompt
-    const [draftVersions, setDraftVersions] = useState({}); // { promptIndex: [{ version: 0, version_name: "Main", draft_text: "..." }, ...] }
+    const [draftVersions, setDraftVersions] = useState({}); // { promptIndex: [{ version: 0, version_name: "Main", notes, updated_at }, ...] }
     const [currentVersion, setCurrentVersion] = useState({}); // { promptIndex: 0 } - currently selected version
     // Outline state
     const [outline, setOutline] = useState({});
@@ -265,17 +271,33 @@ export default function EssayHelpPage() {
     };
 
 
-    // Get copilot suggestions (now returns array for 'suggest' action)
-    const handleGetSuggestion = async (promptIndex, promptText, action = 'suggest') => {
+    // Get copilot suggestions (now returns array for 'suggest' action).
+    // Debounced per prompt: a newer ask cancels the pending timer and aborts
+    // the request in flight, so only the last ask in a burst reaches Gemini.
+    const handleGetSuggestion = (promptIndex, promptText, action = 'suggest') => {
+        clearTimeout(copilotTimers.current[promptIndex]);
+        copilotRequests.current[promptIndex]?.abort();
+        const controller = new AbortController();
+        copilotRequests.current[promptIndex] = controller;
         setLoadingCopilot(prev => ({ ...prev, [promptIndex]: true }));
+        copilotTimers.current[promptIndex] = setTimeout(
+            () => fetchSuggestion(promptIndex, promptText, action, controller),
+            COPILOT_DEBOUNCE_MS
+        );
+    };
+
+    const fetchSuggestion = async (promptIndex, promptText, action, controller) => {
         try {
             const currentText = essayDrafts[promptIndex] || '';
             const response = await fetch(`${PROFILE_V2_URL}/essay-copilot`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
+                signal: controller.signal,
                 body: JSON.stringify({
+                    user_email: currentUser?.email,
                     prompt_text: promptText,
                     current_text: currentText,
+                    cursor: copilotCursor[promptIndex],
                     action: action
                 })
             });
@@ -284,9 +306,11 @@ export default function EssayHelpPage() {
                 setCopilotSuggestion(prev => ({ ...prev, [promptIndex]: data.suggestions }));
             }
         } catch (err) {
-            console.error('Failed to get suggestion:', err);
+            if (err.name !== 'AbortError') console.error('Failed to get suggestion:', err);
         } finally {
-            setLoadingCopilot(prev => ({ ...prev, [promptIndex]: false }));
+            if (copilotRequests.current[promptIndex] === controller) {
+                setLoadingCopilot(prev => ({ ...prev, [promptIndex]: false }));
+            }
         }
     };
 
@@ -402,6 +426,27 @@ export default function EssayHelpPage() {
         }
     };
 
+    // Reconstructed text of one saved draft version (null if unavailable)
+    const fetchDraftText = useCallback(async (promptIndex, version) => {
+        try {
+            const response = await fetch(`${PROFILE_V2_URL}/get-essay-draft`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    user_email: currentUser?.email,
+                    university_id: universityId,
+                    prompt_index: promptIndex,
+                    version: version
+                })
+            });
+            const data = await response.json();
+            return data.success && data.draft ? data.draft.draft_text : null;
+        } catch (err) {
+            console.error('Failed to load draft text:', err);
+            return null;
+        }
+    }, [currentUser?.email, universityId]);
+
     // Load saved drafts on mount - group by prompt and track versions
     const loadDrafts = useCallback(async () => {
         if (!currentUser?.email) return;
@@ -416,11 +461,12 @@ export default function EssayHelpPage() {
             });
             const data = await response.json();
             if (data.success && data.drafts) {
-                const draftsMap = {};
                 const notesMap = {};
                 const versionsMap = {};
+                const displayed = [];
 
-                // Group drafts by prompt_index
+                // Group drafts by prompt_index. The list is metadata only;
+                // text is fetched for the version on screen.
                 data.drafts.forEach(draft => {
                     const idx = draft.prompt_index;
                     const version = draft.version || 0;
@@ -430,14 +476,13 @@ export default function EssayHelpPage() {
                     versionsMap[idx].push({
                         version: version,
                         version_name: draft.version_name || `Version ${version + 1}`,
-                        draft_text: draft.draft_text,
                         notes: draft.notes,
                         updated_at: draft.updated_at
                     });
 
                     // Set main draft (version 0) as default display
                     if (version === (currentVersion[idx] || 0)) {
-                        draftsMap[idx] = draft.draft_text;
+                        displayed.push({ idx, version });
                         if (draft.notes?.length > 0) {
                             notesMap[idx] = draft.notes;
                         }
@@ -449,6 +494,14 @@ export default function EssayHelpPage() {
                     versionsMap[idx].sort((a, b) => a.version - b.version);
                 });
 
+                const texts = await Promise.all(
+                    displayed.map(({ idx, version }) => fetchDraftText(idx, version))
+                );
+                const draftsMap = {};
+                displayed.forEach(({ idx }, i) => {
+                    if (texts[i] !== null) draftsMap[idx] = texts[i];
+                });
+
                 setDraftVersions(versionsMap);
                 setEssayDrafts(draftsMap);
                 setSavedNotes(prev => ({ ...prev, ...notesMap }));
@@ -456,7 +509,7 @@ export default function EssayHelpPage() {
         } catch (err) {
             console.error('Failed to load drafts:', err);
         }
-    }, [currentUser?.email, universityId, currentVersion]);
+    }, [currentUser?.email, universityId, currentVersion, fetchDraftText]);
 
     useEffect(() => {
         loadDrafts();
@@ -868,16 +921,19 @@ export default function EssayHelpPage() {
                                                     {draftVersions[index]?.length > 0 && (
                                                         <select
                                                             value={currentVersion[index] || 0}
-                                                            onChange={(e) => {
+                                                            onChange={async (e) => {
                                                                 const newVersion = parseInt(e.target.value);
                                                                 setCurrentVersion(prev => ({ ...prev, [index]: newVersion }));
                                                                 // Load the selected version's content
                                                                 const versionData = draftVersions[index].find(v => v.version === newVersion);
                                                                 if (versionData) {
-                                                                    setEssayDrafts(prev => ({ ...prev, [index]: versionData.draft_text }));
                                                                     if (versionData.notes?.length > 0) {
                                                                         setSavedNotes(prev => ({ ...prev, [index]: versionData.notes }));
                                                                     }
+                                                                    const text = await fetchDraftText(index, newVersion);
+                                                                    if (text !== null) {
+                                                                        setEssayDrafts(prev => ({ ...prev, [index]: text }));
+                                                                    }
                                                                 }
                                                             }}
                                                             className="text-xs px-2 py-1 bg-[#F5F5F5] border border-[#E0DED8] rounded-lg focus:outline-none focus:ring-1 focus:ring-[#1A4D2E]"
@@ -900,6 +956,7 @@ export default function EssayHelpPage() {
                                             <textarea
                                                 value={essayDrafts[index] || ''}
                                                 onChange={(e) => setEssayDrafts(prev => ({ ...prev, [index]: e.target.value }))}
+                                                onSelect={(e) => setCopilotCursor(prev => ({ ...prev, [index]: e.target.selectionStart }))}
                                                 placeholder="Start writing your essay here... Use the starters above or begin fresh."
                                                 rows={10}
                                                 className="w-full px-4 py-4 bg-[#FAFAF8] border border-[#E0DED8] rounded-xl focus:outline-none focus:ring-2 focus:ring-[#1A4D2E]/20 focus:border-[#1A4D2E] resize-none text-sm leading-relaxed"
@@ -269,6 +269,9 @@ export const getSession = async (sessionId) => {
   }
 };
 
+const UPLOAD_POLL_INTERVAL_MS = 1500;
+const UPLOAD_POLL_TIMEOUT_MS = 180000;
+
 /**
  * Upload student profile document to the user-specific student_profile store
  * Uses the profile manager cloud function
@@ -292,13 +295,51 @@ export const uploadStudentProfile = async (file, userEmail) => {
         'X-User-Email': userEmail
       },
     });
-    return response.data;
+
+    // The backend accepts the file and returns a job id (202); extraction
+    // and indexing run asynchronously. Poll until the job settles so callers
+    // still resolve once the profile is indexed.
+    const accepted = response.data;
+    if (!accepted?.success || !accepted.job_id) {
+      return accepted;
+    }
+    const deadline = Date.now() + UPLOAD_POLL_TIMEOUT_MS;
+    let job = { status: accepted.status };
+    while (job.status !== 'done' && job.status !== 'failed') {
+      if (Date.now() > deadline) {
+        throw new Error('Timed out waiting for profile processing');
+      }
+      await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS));
+      const status = await getUploadStatus(accepted.job_id, userEmail);
+      if (!status.success) {
+        throw new Error(status.error || 'Upload job not found');
+      }
+      job = status.job;
+    }
+    if (job.status === 'failed') {
+      return { success: false, job_id: accepted.job_id, error: job.error || 'Profile processing failed' };
+    }
+    return { ...(job.result || { success: true }), job_id: accepted.job_id, duplicate: accepted.duplicate };
   } catch (error) {
     console.error('Error uploading profile:', error);
     throw error;
   }
 };
 
+/**
+ * Get per-stage progress for an asynchronous profile upload job
+ */
+export const getUploadStatus = async (jobId, userEmail) => {
+  const baseUrl = getProfileManagerUrl();
+  const response = await axios.get(`${baseUrl}/get-upload-status`, {
+    timeout: 30000,
+    params: { user_email: userEmail, job_id: jobId },
+    headers: { 'X-User-Email': userEmail },
+    validateStatus: (status) => status < 500,
+  });
+  return response.data;
+};
+
 /**
  * List documents in user-specific student_profile store
  * Uses the profile manager cloud function
@@ -2742,13 +2783,16 @@ export const getAidPackages = async (userEmail) => {
 
 /**
  * Sync essay prompts from user's college list to their essay tracker
- * This pulls essay prompts from all universities in the user's college list
+ * This pulls essay prompts from all universities in the user's college list.
+ * Incremental by default (only new or aged schools are looked up); pass
+ * full=true to re-check every school.
  */
-export const syncEssayTracker = async (userEmail) => {
+export const syncEssayTracker = async (userEmail, full = false) => {
   try {
     const url = getProfileManagerUrl();
     const response = await axios.post(`${url}/sync-essay-tracker`, {
-      user_email: userEmail
+      user_email: userEmail,
+      full
     }, {
       timeout: 30000,
       headers: {
@@ -2809,13 +2853,17 @@ export const updateEssayProgress = async (userEmail, essayId, updates) => {
 
 /**
  * Sync scholarships from user's college list to their scholarship tracker
- * This pulls available scholarships from all universities in the user's college list
+ * This pulls available scholarships from all universities in the user's college list.
+ * Incremental by default (only new or aged schools are looked up, and
+ * eligibility is re-evaluated when the profile changes); pass full=true to
+ * re-check everything.
  */
-export const syncScholarshipTracker = async (userEmail) => {
+export const syncScholarshipTracker = async (userEmail, full = false) => {
   try {
     const url = getProfileManagerUrl();
     const response = await axios.post(`${url}/sync-scholarship-tracker`, {
-      user_email: userEmail
+      user_email: userEmail,
+      full
     }, {
       timeout: 30000,
       headers: {
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Build the KB's local vector index (semantic search tier).
+
+Embeds every university profile (vector_index.embedding_text) and writes the
+index artifact the KB function loads once per instance:
+
+    <out>/vectors.npy   float16, L2-normalized, one row per school
+    <out>/index.json    ids, per-school content_hash, embedder model
+
+Rebuilds are incremental: when <out> already holds an index built with the
+same embedder (or, with --upload and an empty <out>, the index already
+published there), schools whose content_hash is unchanged keep their vector
+and are not re-embedded — after a KB refresh only the changed schools cost an
+embedding call. deploy.sh runs it this way on every KB v2 deploy.
+
+Modes:
+  # From live Firestore (needs ADC + GEMINI_API_KEY), then publish to GCS
+  python3 scripts/build_search_index.py --out /tmp/kb_index \\
+      --upload gs://college-counselling-knowledge-base/search_index
+
+  # Offline from the local collector corpus with the deterministic hashing
+  # embedder (no network) — handy for local runs of the function
+  python3 scripts/build_search_index.py --from-corpus --embedder hashing --out /tmp/kb_index
+
+Point the function at the result with KB_VECTOR_INDEX_GCS=gs://… (deployed)
+or KB_VECTOR_INDEX_DIR=/tmp/kb_index (local).
+"""
+import argparse
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+KB_DIR = ROOT / 'cloud_functions' / 'knowledge_base_manager_universities_v2'
+sys.path.insert(0, str(KB_DIR))
+
+import vector_index  # noqa: E402  (from KB_DIR)
+from profile_diff import content_hash  # noqa: E402
+
+
+def _corpus_items():
+    base = ROOT / 'agents' / 'university_profile_collector'
+    seen = set()
+    for d in ('research', 'research_2026', 'verified_samples'):
+        for f in sorted(glob.glob(str(base / d / '*.json'))):
+            try:
+                profile = json.load(open(f))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(profile.get('university_profile'), dict):
+                profile = profile['university_profile']
+            uid = profile.get('_id') or Path(f).stem
+            if uid in seen:
+                continue
+            seen.add(uid)
+            yield uid, vector_index.embedding_text(profile), content_hash(profile)
+
+
+def _firestore_items():
+    from firestore_db import get_db
+    db = get_db()
+    for doc in db.collection.stream():
+        data = doc.to_dict() or {}
+        profile = data.get('profile') or {}
+        yield (doc.id, vector_index.embedding_text(profile),
+               data.get('content_hash') or content_hash(profile))
+
+
+def _fetch_published(uri: str, out: Path) -> bool:
+    """Download the index published at `uri` into `out` to reuse its vectors.
+    False when nothing is published there yet."""
+    from google.cloud import storage
+    bucket_name, _, prefix = uri[len('gs://'):].partition('/')
+    bucket = storage.Client().bucket(bucket_name)
+    blobs = {}
+    for name in (vector_index.META_FILE, vector_index.VECTORS_FILE):
+        blob = bucket.get_blob(f"{prefix.rstrip('/')}/{name}" if prefix else name)
+        if blob is None:
+            return False
+        blobs[name] = blob
+    out.mkdir(parents=True, exist_ok=True)
+    for name, blob in blobs.items():
+        blob.download_to_filename(str(out / name))
+    print(f"reusing published index from {uri}")
+    return True
+
+
+def _upload(out: Path, uri: str):
+    from google.cloud import storage
+    bucket_name, _, prefix = uri[len('gs://'):].partition('/')
+    bucket = storage.Client().bucket(bucket_name)
+    # Vectors first, metadata last: a reader that sees the new index.json
+    # also gets matching vectors.
+    for name in (vector_index.VECTORS_FILE, vector_index.META_FILE):
+        blob_name = f"{prefix.rstrip('/')}/{name}" if prefix else name
+        bucket.blob(blob_name).upload_from_filename(str(out / name))
+    print(f"uploaded → {uri}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--out', required=True, help='index directory (read for reuse, then written)')
+    ap.add_argument('--from-corpus', action='store_true',
+                    help='build from the local collector corpus (no Firestore)')
+    ap.add_argument('--embedder', choices=('gemini', 'hashing'), default='gemini')
+    ap.add_argument('--full', action='store_true', help='re-embed everything (ignore the previous index)')
+    ap.add_argument('--upload', help='gs://bucket/prefix to publish the index to')
+    args = ap.parse_args()
+
+    if vector_index.np is None:
+        print('numpy is required (pip install numpy)', file=sys.stderr)
+        return 2
+
+    embedder = (vector_index.HashingEmbedder() if args.embedder == 'hashing'
+                else vector_index.GeminiEmbedder())
+    out = Path(args.out)
+    previous = None
+    if not args.full and not (out / vector_index.META_FILE).exists() and args.upload:
+        _fetch_published(args.upload, out)
+    if not args.full and (out / vector_index.META_FILE).exists():
+        previous = vector_index.VectorIndex.load(out, mmap=False)
+
+    items = list(_corpus_items() if args.from_corpus else _firestore_items())
+    started = time.monotonic()
+    index, embedded = vector_index.VectorIndex.build(items, embedder, previous=previous)
+    index.save(out)
+
+    size_kb = (out / vector_index.VECTORS_FILE).stat().st_size / 1024
+    print(f"indexed {len(index)} universities with {index.model} (dim {index.dim}): "
+          f"{embedded} embedded, {len(index) - embedded} reused "
+          f"in {time.monotonic() - started:.1f}s → {out} ({size_kb:.0f} KB vectors)")
+    if args.upload:
+        _upload(out, args.upload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
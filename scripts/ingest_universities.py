@@ -7,7 +7,9 @@ and POSTs them to knowledge_base_manager_universities_v2, filing each under
 an admission cycle year (ADR 0002 — harness/decisions/0002-*.md). The KB
 keeps one snapshot per year; re-running for the same year refreshes that
 year only, and ingesting a newer year becomes the serving "current" data
-without destroying prior years.
+without destroying prior years. Profiles identical to the stored snapshot
+(same content hash) are skipped server-side and reported as "same"; pass
+--force to rewrite them anyway.
 
 Usage:
     # Refresh the whole KB for the current cycle
@@ -21,10 +23,19 @@ Usage:
 
     # Subset by university id
     python scripts/ingest_universities.py --dir research/ --only mit,stanford_university
+
+    # Full-cycle refresh: 20 profiles per bulk-ingest request, 4 in flight,
+    # at most 2 requests/s, per-school timings written to a report
+    python scripts/ingest_universities.py --dir research/ --bulk-size 20 \
+        --workers 4 --rps 2 --timing-report ingest_timing.json
 """
 import argparse
 import json
+import random
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import os
@@ -39,6 +50,8 @@ from versioning import (  # noqa: E402
 )
 
 DEFAULT_URL = "https://knowledge-base-manager-universities-v2-pfnwjfp26a-ue.a.run.app"
+# Statuses worth retrying: throttling and transient server/platform errors.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 
 
 def iter_profiles(args):
@@ -58,6 +71,222 @@ def iter_profiles(args):
         yield path, profile, None
 
 
+class RateLimiter:
+    """Shared request pacing for the worker pool (backpressure).
+
+    acquire() spaces requests at most `rps` per second across all threads;
+    pause() lets any worker that sees a 429/503 hold EVERY worker back for
+    the server's Retry-After, instead of each one hammering on its own.
+    """
+
+    def __init__(self, rps: float = 0):
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+def _retry_after(resp, attempt: int) -> float:
+    header = resp.headers.get('Retry-After') if resp is not None else None
+    try:
+        return float(header)
+    except (TypeError, ValueError):
+        # Exponential backoff with jitter: ~1s, 2s, 4s, ...
+        return min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+def post_with_retries(url, payload, headers, limiter, retries, timeout=120):
+    """POST with pacing + retries. Returns (resp|None, body|None, error|None, attempts)."""
+    attempt = 0
+    while True:
+        attempt += 1
+        limiter.acquire()
+        resp = None
+        try:
+            resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
+            if resp.status_code not in RETRYABLE_STATUSES or attempt > retries:
+                return resp, resp.json(), None, attempt
+            error = f"HTTP {resp.status_code}"
+        except (requests.RequestException, ValueError) as e:
+            if attempt > retries:
+                return resp, None, f"request failed: {e}", attempt
+            error = str(e)
+        delay = _retry_after(resp, attempt)
+        if resp is not None and resp.status_code in (429, 503):
+            limiter.pause(delay)
+        print(f"  retry {error} — attempt {attempt + 1}/{retries + 1} in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def prepare_profile(path, profile, year, args, limiter):
+    """Normalize, validate (fresh, then merged) and optionally merge one
+    profile. Returns (profile|None, log_lines, error|None)."""
+    lines = []
+    fixed = normalize_percentages(profile)
+    if fixed:
+        lines.append(f"  norm  {path.name}: {fixed} fraction-style percent fields → percents")
+
+    # Validate the FRESH collection before any merge: a fragment file
+    # (broken extraction) merged onto the rich base looks like a
+    # successful ingest but silently delivers no refresh at all.
+    fresh_errors, _ = validate_profile(profile, year)
+    if fresh_errors:
+        return None, lines, (f"fresh collection invalid (re-collect): "
+                             f"{'; '.join(fresh_errors)}")
+
+    if args.merge_with_current:
+        try:
+            limiter.acquire()
+            resp = requests.get(args.url, params={"id": profile.get('_id')}, timeout=60)
+            current = (resp.json().get('university') or {}).get('profile') if resp.ok else None
+        except (requests.RequestException, ValueError):
+            current = None
+        if current:
+            profile = merge_cycle_refresh(current, profile)
+            # The base may carry fraction-style fields from a prior bad
+            # ingest — normalize the merged result too.
+            normalize_percentages(profile)
+            lines.append(f"  merge {path.name}: cycle-sensitive sections refreshed onto current profile")
+        else:
+            lines.append(f"  merge {path.name}: no current profile in KB — ingesting fresh as-is")
+
+    errors, warnings = validate_profile(profile, year)
+    if errors:
+        return None, lines, '; '.join(errors)
+    for w in warnings:
+        lines.append(f"  warn  {path.name}: {w}")
+    return profile, lines, None
+
+
+def write_timing_report(report_path, year, timings, wall_s):
+    ordered = sorted(timings, key=lambda t: t.get('client_ms') or 0, reverse=True)
+    with open(report_path, 'w') as f:
+        json.dump({"year": year, "wall_s": round(wall_s, 2), "schools": ordered}, f, indent=2)
+    print(f"\nTiming report → {report_path}")
+    for t in ordered[:5]:
+        print(f"  slow  {t['university_id']}: {t['client_ms']:.0f} ms "
+              f"({t['attempts']} attempt(s), {t['status']})")
+
+
+def _report_single(path, resp, body, error, printer):
+    """Print one single-ingest outcome. Returns 'ok' | 'failed' | 'abort'."""
+    if error:
+        printer(f"  FAIL  {path.name}: {error}")
+        return 'failed'
+    if resp.status_code == 200 and body.get('success'):
+        if 'year' not in body:
+            # Old pre-versioning function deployed: it just overwrote the
+            # main doc with no snapshot. Stop before doing more damage.
+            printer(f"  FAIL  {path.name}: server doesn't support versioning yet "
+                    f"(deploy knowledge-universities-v2 first) — aborting")
+            return 'abort'
+        promo = "current" if body.get('promoted_to_current') else "archived"
+        tag = "same " if body.get('unchanged') else "ok   "
+        printer(f"  {tag} {path.name} → year {body.get('year')} [{promo}] "
+                f"years={body.get('available_years')}")
+        return 'ok'
+    printer(f"  FAIL  {path.name}: HTTP {resp.status_code}: "
+            f"{body.get('error', resp.text[:200])}")
+    return 'failed'
+
+
+def run_single(ready, year, args, headers, limiter, printer):
+    """One POST per profile through the worker pool. Returns timing rows."""
+    abort = threading.Event()
+
+    def send(item):
+        if abort.is_set():
+            return item, None, None, "skipped after abort", 0, 0.0
+        t0 = time.monotonic()
+        resp, body, error, attempts = post_with_retries(
+            args.url, {"profile": item[1], "year": year, "force": args.force},
+            headers, limiter, args.retries)
+        if not error and resp.status_code == 200 and body.get('success') and 'year' not in body:
+            abort.set()  # pre-versioning server; flag before the next task starts
+        return item, resp, body, error, attempts, (time.monotonic() - t0) * 1000
+
+    timings = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for future in as_completed([pool.submit(send, item) for item in ready]):
+            (path, profile), resp, body, error, attempts, client_ms = future.result()
+            outcome = _report_single(path, resp, body, error, printer)
+            timings.append({
+                "university_id": profile.get('_id'),
+                "status": 'ok' if outcome == 'ok' else 'failed',
+                "unchanged": bool((body or {}).get('unchanged')),
+                "attempts": attempts, "client_ms": round(client_ms, 1),
+            })
+    return timings
+
+
+def _lacks_bulk_endpoint(resp, body) -> bool:
+    """An older deployed function answers bulk-ingest with its generic 400."""
+    return (resp is not None and resp.status_code == 400
+            and 'Invalid request' in str((body or {}).get('error')))
+
+
+def run_bulk(ready, year, args, headers, limiter, printer):
+    """Chunks of --bulk-size profiles per bulk-ingest request (server writes
+    each chunk with batched commits and one catalog pass). Returns timing rows."""
+    abort = threading.Event()
+    chunks = [ready[i:i + args.bulk_size] for i in range(0, len(ready), args.bulk_size)]
+
+    def send(chunk):
+        if abort.is_set():
+            return chunk, None, None, "skipped after abort", 0, 0.0
+        t0 = time.monotonic()
+        resp, body, error, attempts = post_with_retries(
+            args.url, {"action": "bulk-ingest", "year": year, "force": args.force,
+                       "profiles": [profile for _, profile in chunk]},
+            headers, limiter, args.retries, timeout=300)
+        if _lacks_bulk_endpoint(resp, body):
+            abort.set()  # every remaining chunk would fail the same way
+        return chunk, resp, body, error, attempts, (time.monotonic() - t0) * 1000
+
+    timings = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for future in as_completed([pool.submit(send, c) for c in chunks]):
+            chunk, resp, body, error, attempts, client_ms = future.result()
+            body = body or {}
+            if not error and (resp.status_code != 200 or 'results' not in body):
+                error = f"HTTP {resp.status_code}: {body.get('error', resp.text[:200])}"
+                if _lacks_bulk_endpoint(resp, body):
+                    error += " (deploy knowledge-universities-v2 with bulk-ingest first) — aborting"
+            results = [] if error else body['results']
+            for i, (path, profile) in enumerate(chunk):
+                entry = results[i] if i < len(results) else {}
+                if error:
+                    printer(f"  FAIL  {path.name}: {error}")
+                elif entry.get('success'):
+                    promo = "current" if entry.get('promoted_to_current') else "archived"
+                    tag = "same " if entry.get('unchanged') else "ok   "
+                    printer(f"  {tag} {path.name} → year {entry.get('year')} [{promo}] "
+                            f"years={entry.get('available_years')}")
+                else:
+                    printer(f"  FAIL  {path.name}: {entry.get('error', 'no result returned')}")
+                timings.append({
+                    "university_id": profile.get('_id'),
+                    "status": 'ok' if entry.get('success') else 'failed',
+                    "unchanged": bool(entry.get('unchanged')),
+                    "attempts": attempts, "client_ms": round(client_ms, 1),
+                    "batch_size": len(chunk),
+                    "server_prepare_ms": entry.get('prepare_ms'),
+                    "server_batch_timing": body.get('timing'),
+                })
+    return timings
+
+
 def main():
     parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
     source = parser.add_mutually_exclusive_group(required=True)
@@ -73,95 +302,79 @@ def main():
                              '(current admissions status, deadlines, rank, costs) from '
                              'the fresh JSON onto the KB\'s current rich profile, so a '
                              'thinner fresh collection never degrades durable data')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Concurrent requests in flight (default 1 = serial)')
+    parser.add_argument('--rps', type=float, default=0,
+                        help='Max requests/second across all workers (default: unlimited)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries per request on 429/5xx/network errors (default 3)')
+    parser.add_argument('--bulk-size', type=int, default=0,
+                        help='Profiles per bulk-ingest request (batched writes, one '
+                             'catalog pass per request); 0 = one POST per profile')
+    parser.add_argument('--timing-report', help='Write per-school timings (JSON) here')
+    parser.add_argument('--force', action='store_true',
+                        help='Rewrite profiles even when unchanged since the last ingest')
     args = parser.parse_args()
 
     year = coerce_year(args.year)
     print(f"Ingesting for admission cycle year {year} → {args.url}"
           + (" [DRY RUN]" if args.dry_run else ""))
 
-    ok, failed = 0, 0
-    for path, profile, read_error in iter_profiles(args):
-        if read_error:
-            print(f"  FAIL  {path.name}: {read_error}")
-            failed += 1
-            continue
-
-        fixed = normalize_percentages(profile)
-        if fixed:
-            print(f"  norm  {path.name}: {fixed} fraction-style percent fields → percents")
-
-        # Validate the FRESH collection before any merge: a fragment file
-        # (broken extraction) merged onto the rich base looks like a
-        # successful ingest but silently delivers no refresh at all.
-        fresh_errors, _ = validate_profile(profile, year)
-        if fresh_errors:
-            print(f"  FAIL  {path.name}: fresh collection invalid (re-collect): "
-                  f"{'; '.join(fresh_errors)}")
-            failed += 1
-            continue
+    started = time.monotonic()
+    limiter = RateLimiter(args.rps)
+    print_lock = threading.Lock()
 
-        if args.merge_with_current:
-            try:
-                resp = requests.get(args.url, params={"id": profile.get('_id')}, timeout=60)
-                current = (resp.json().get('university') or {}).get('profile') if resp.ok else None
-            except (requests.RequestException, ValueError):
-                current = None
-            if current:
-                profile = merge_cycle_refresh(current, profile)
-                # The base may carry fraction-style fields from a prior bad
-                # ingest — normalize the merged result too.
-                normalize_percentages(profile)
-                print(f"  merge {path.name}: cycle-sensitive sections refreshed onto current profile")
-            else:
-                print(f"  merge {path.name}: no current profile in KB — ingesting fresh as-is")
+    def printer(line):
+        with print_lock:
+            print(line)
 
-        errors, warnings = validate_profile(profile, year)
-        if errors:
-            print(f"  FAIL  {path.name}: {'; '.join(errors)}")
-            failed += 1
-            continue
-        for w in warnings:
-            print(f"  warn  {path.name}: {w}")
+    # #223: KB writes require a credential. The CLI uses the shared
+    # write token:  export KB_WRITE_TOKEN=$(gcloud secrets versions \
+    #   access latest --secret kb-write-token --project college-counselling-478115)
+    headers = {}
+    write_token = os.getenv('KB_WRITE_TOKEN')
+    if write_token:
+        headers['X-Admin-Token'] = write_token
 
-        if args.dry_run:
-            print(f"  ok    {path.name} (validated, not written)")
-            ok += 1
-            continue
+    ok, failed, unchanged = 0, 0, 0
+    ready = []  # (path, profile) that passed local validation, in input order
 
-        try:
-            # #223: KB writes require a credential. The CLI uses the shared
-            # write token:  export KB_WRITE_TOKEN=$(gcloud secrets versions \
-            #   access latest --secret kb-write-token --project college-counselling-478115)
-            headers = {}
-            write_token = os.getenv('KB_WRITE_TOKEN')
-            if write_token:
-                headers['X-Admin-Token'] = write_token
-            resp = requests.post(args.url, json={"profile": profile, "year": year},
-                                 headers=headers, timeout=120)
-            body = resp.json()
-        except (requests.RequestException, ValueError) as e:
-            print(f"  FAIL  {path.name}: request failed: {e}")
-            failed += 1
-            continue
+    def prepare(item):
+        path, profile, read_error = item
+        if read_error:
+            return path, None, [], read_error
+        return (path, *prepare_profile(path, profile, year, args, limiter))
 
-        if resp.status_code == 200 and body.get('success'):
-            if 'year' not in body:
-                # Old pre-versioning function deployed: it just overwrote the
-                # main doc with no snapshot. Stop before doing more damage.
-                print(f"  FAIL  {path.name}: server doesn't support versioning yet "
-                      f"(deploy knowledge-universities-v2 first) — aborting")
+    # Phase 1 — local normalize/validate (+ optional merge fetch), pooled
+    # because --merge-with-current does one GET per school.
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for path, profile, lines, error in pool.map(prepare, list(iter_profiles(args))):
+            for line in lines:
+                printer(line)
+            if error:
+                printer(f"  FAIL  {path.name}: {error}")
                 failed += 1
-                break
-            promo = "current" if body.get('promoted_to_current') else "archived"
-            print(f"  ok    {path.name} → year {body.get('year')} [{promo}] "
-                  f"years={body.get('available_years')}")
-            ok += 1
-        else:
-            print(f"  FAIL  {path.name}: HTTP {resp.status_code}: "
-                  f"{body.get('error', resp.text[:200])}")
-            failed += 1
+            elif args.dry_run:
+                printer(f"  ok    {path.name} (validated, not written)")
+                ok += 1
+            else:
+                ready.append((path, profile))
+
+    # Phase 2 — writes, paced by the shared limiter.
+    timings = []
+    if ready:
+        run = run_bulk if args.bulk_size > 0 else run_single
+        timings = run(ready, year, args, headers, limiter, printer)
+        sent_ok = sum(1 for t in timings if t['status'] == 'ok')
+        unchanged = sum(1 for t in timings if t.get('unchanged'))
+        ok += sent_ok
+        failed += len(timings) - sent_ok
+
+    if args.timing_report and timings:
+        write_timing_report(args.timing_report, year, timings, time.monotonic() - started)
 
-    print(f"\nDone: {ok} ok, {failed} failed (cycle year {year})")
+    print(f"\nDone: {ok} ok ({unchanged} unchanged), {failed} failed (cycle year {year}) "
+          f"in {time.monotonic() - started:.1f}s")
     sys.exit(1 if failed else 0)
 
 
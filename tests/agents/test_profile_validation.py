@@ -0,0 +1,90 @@
+"""profile_validation: compiled fast-path validator + content-hash memo."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Needs pydantic (collector model); skipped in the lightweight CI image.
+pytest.importorskip("pydantic")
+
+REPO = Path(__file__).resolve().parents[2]
+COLLECTOR = REPO / "agents" / "university_profile_collector"
+sys.path.insert(0, str(COLLECTOR))
+
+import profile_validation as pv  # noqa: E402
+
+SAMPLE = COLLECTOR / "research" / "adelphi_university.json"
+
+
+@pytest.fixture
+def cache():
+    return pv.ValidationCache()
+
+
+def test_valid_profile_passes_and_second_call_is_memoized(cache):
+    raw = SAMPLE.read_bytes()
+    first = pv.validate_bytes(raw, cache=cache)
+    assert first.valid and not first.cached
+    second = pv.validate_bytes(raw, cache=cache)
+    assert second.valid and second.cached
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_matches_legacy_model_validate_verdict(cache):
+    from model import UniversityProfile
+    data = json.loads(SAMPLE.read_text())
+    data["student_insights"]["red_flags"] = "not a list"
+    with pytest.raises(Exception):
+        UniversityProfile.model_validate(data)
+
+    result = pv.validate_bytes(json.dumps(data).encode(), cache=cache)
+    assert result.valid is False
+    assert result.error_count == 1
+    assert result.message().startswith("student_insights.red_flags:")
+
+
+def test_invalid_json_is_reported_as_such(cache):
+    result = pv.validate_bytes(b'{"_id": "x",', cache=cache)
+    assert result.valid is False
+    assert result.message().startswith("Invalid JSON")
+
+
+def test_wrapped_profile_is_unwrapped(cache):
+    wrapped = {"university_profile": json.loads(SAMPLE.read_text())}
+    assert pv.validate_bytes(json.dumps(wrapped).encode(), cache=cache).valid
+
+
+def test_validate_data_hash_ignores_key_order(cache):
+    data = json.loads(SAMPLE.read_text())
+    reordered = dict(reversed(list(data.items())))
+    assert pv.validate_data(data, cache=cache).cached is False
+    assert pv.validate_data(reordered, cache=cache).cached is True
+
+
+def test_validate_file_drop_in_signature(cache, tmp_path):
+    assert pv.validate_file(SAMPLE, cache=cache) == (True, "")
+    ok, msg = pv.validate_file(tmp_path / "missing.json", cache=cache)
+    assert ok is False and "Unreadable" in msg
+
+
+def test_persistent_cache_round_trip(tmp_path):
+    path = tmp_path / "cache.json"
+    raw = SAMPLE.read_bytes()
+    writer = pv.ValidationCache(path)
+    pv.validate_bytes(raw, cache=writer)
+    writer.save()
+
+    reader = pv.ValidationCache(path)
+    assert pv.validate_bytes(raw, cache=reader).cached is True
+
+
+def test_schema_change_discards_persisted_verdicts(tmp_path):
+    path = tmp_path / "cache.json"
+    raw = SAMPLE.read_bytes()
+    path.write_text(json.dumps({
+        "schema": "stale-fingerprint",
+        "results": {pv.content_hash(raw): {"valid": False, "errors": ["x"], "error_count": 1}},
+    }))
+    result = pv.validate_bytes(raw, cache=pv.ValidationCache(path))
+    assert result.cached is False and result.valid is True
@@ -0,0 +1,35 @@
+"""
+Shared modules stay identical across services.
+
+The Cloud Functions deploy independently from their own directories and share
+no common package, so a module several services need lives as an identical
+copy in each. Fixing one copy and forgetting the others is the failure mode;
+this test is the guard.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+_FUNCTIONS = Path(__file__).resolve().parents[2] / "cloud_functions"
+
+SHARED_MODULES = {
+    "request_auth.py": ("profile_manager_v2", "counselor_agent",
+                        "knowledge_base_manager_universities_v2"),
+    "gemini_fallback.py": ("profile_manager_v2", "counselor_agent",
+                           "knowledge_base_manager_universities_v2"),
+    "llm_gateway.py": ("profile_manager_v2", "qa_agent"),
+    "service_tokens.py": ("counselor_agent", "stratia_connector"),
+}
+
+
+@pytest.mark.parametrize("module", sorted(SHARED_MODULES))
+def test_copies_are_identical(module):
+    services = SHARED_MODULES[module]
+    reference = (_FUNCTIONS / services[0] / module).read_bytes()
+    drifted = [s for s in services[1:] if (_FUNCTIONS / s / module).read_bytes() != reference]
+    assert not drifted, (
+        f"{module} differs from cloud_functions/{services[0]}/{module} in: {drifted} — "
+        f"copy the updated file to every service listed in SHARED_MODULES")
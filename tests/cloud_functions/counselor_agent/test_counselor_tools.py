@@ -226,3 +226,26 @@ class TestHttpHelpers:
             text = 'not found'
         with patch.object(ct.requests, 'get', return_value=_R()):
             assert ct.get_university_data('mit') is None
+
+    def test_profile_context_prefers_the_compiled_text(self):
+        class _R:
+            status_code = 200
+            def json(self):
+                return {'profile': {'gpa': 3.9, 'llm_context': {'text': 'x'}},
+                        'profile_context': 'GPA: 3.9'}
+        with patch.object(ct.requests, 'get', return_value=_R()) as get:
+            assert ct.get_student_profile_context('u@x.com') == 'GPA: 3.9'
+        assert get.call_args.kwargs['params']['include_context'] == 'true'
+
+    def test_profile_context_fallback_never_dumps_llm_context(self):
+        class _R:
+            status_code = 200
+            def json(self):
+                return {'profile': {'gpa': 3.9, 'llm_context': {'text': 'GPA: 3.9'}}}
+        with patch.object(ct.requests, 'get', return_value=_R()):
+            out = ct.get_student_profile_context('u@x.com')
+        assert '3.9' in out and 'llm_context' not in out
+
+    def test_profile_context_empty_on_exception(self):
+        with patch.object(ct.requests, 'get', side_effect=ConnectionError('down')):
+            assert ct.get_student_profile_context('u@x.com') == ''
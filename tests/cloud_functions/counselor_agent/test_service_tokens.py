@@ -0,0 +1,161 @@
+"""Service token manager (service_tokens.py): refresh-ahead, single-flight,
+per-audience caching and the cold-start warm-up hook.
+
+The fetch is monkeypatched (no metadata server) and the clock is driven by
+hand; background work is captured instead of run on a thread unless a test
+needs real concurrency.
+"""
+
+import threading
+import time
+
+import pytest
+
+import service_tokens as st
+
+TTL = st.TOKEN_TTL_SECONDS
+AHEAD = st.REFRESH_AHEAD_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    st.reset_cache()
+    yield
+    st.reset_cache()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(st, '_now', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def fetch(audience):
+        calls.append(audience)
+        return f"tok-{audience[-2:]}-{len(calls)}"
+
+    monkeypatch.setattr(st, '_fetch', fetch)
+    return calls
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(st, '_spawn', lambda target, *args: jobs.append((target, args)))
+    return jobs
+
+
+def _run(jobs):
+    while jobs:
+        target, args = jobs.pop(0)
+        target(*args)
+
+
+def test_tokens_are_cached_per_audience(clock, fetches):
+    assert st.get_token('https://pm.a1') == 'tok-a1-1'
+    assert st.get_token('https://pm.a1') == 'tok-a1-1'
+    assert st.get_token('https://kb.b2') == 'tok-b2-2'
+    assert fetches == ['https://pm.a1', 'https://kb.b2']
+    assert st.cache_metrics()['audiences'] == 2
+
+
+def test_no_audience_is_none_without_a_fetch(fetches):
+    assert st.get_token('') is None and fetches == []
+
+
+def test_refresh_ahead_serves_current_token_and_refreshes_in_background(clock, fetches, spawned):
+    first = st.get_token('https://pm.a1')
+    clock[0] += TTL - AHEAD + 1
+
+    assert st.get_token('https://pm.a1') == first  # no wait on the request
+    assert st.get_token('https://pm.a1') == first
+    assert len(spawned) == 1  # one background refresh, however many requests
+    assert fetches == ['https://pm.a1']
+
+    _run(spawned)
+    assert fetches == ['https://pm.a1'] * 2
+    assert st.get_token('https://pm.a1') == 'tok-a1-2'
+    assert st.cache_metrics()['refreshes_ahead'] == 1
+
+
+def test_expired_token_is_fetched_inline(clock, fetches, spawned):
+    st.get_token('https://pm.a1')
+    clock[0] += TTL + 1
+    assert st.get_token('https://pm.a1') == 'tok-a1-2'
+    assert spawned == []
+    assert st.cache_metrics()['misses'] == 2
+
+
+def test_failed_background_refresh_keeps_serving_the_current_token(clock, fetches, spawned, monkeypatch):
+    first = st.get_token('https://pm.a1')
+    clock[0] += TTL - AHEAD + 1
+    monkeypatch.setattr(st, '_fetch', lambda audience: (_ for _ in ()).throw(RuntimeError('503')))
+
+    st.get_token('https://pm.a1')
+    _run(spawned)
+
+    assert st.get_token('https://pm.a1') == first
+    assert st.cache_metrics()['failures'] == 1
+
+
+def test_failure_backs_off_before_retrying(clock, monkeypatch):
+    calls = []
+
+    def boom(audience):
+        calls.append(audience)
+        raise RuntimeError('no metadata server')
+
+    monkeypatch.setattr(st, '_fetch', boom)
+    assert st.get_token('https://pm.a1') is None
+    assert st.get_token('https://pm.a1') is None
+    assert len(calls) == 1
+    clock[0] += st.FAILURE_BACKOFF_SECONDS + 1
+    assert st.get_token('https://pm.a1') is None
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_fetch(monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow_fetch(audience):
+        calls.append(audience)
+        started.set()
+        release.wait(5)
+        return 'tok'
+
+    monkeypatch.setattr(st, '_fetch', slow_fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(st.get_token('https://pm.a1')))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    started.wait(5)
+    time.sleep(0.05)  # let the other callers queue behind the flight
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == ['https://pm.a1']
+    assert results == ['tok'] * 8
+
+
+def test_warm_up_mints_in_the_background_on_cloud_run(monkeypatch, fetches, spawned):
+    monkeypatch.setenv('K_SERVICE', 'counselor-agent')
+    assert st.warm_up(['https://pm.a1/', '', 'https://pm.a1', 'https://kb.b2']) == [
+        'https://pm.a1', 'https://kb.b2']
+    assert fetches == []  # nothing on the caller's thread
+    _run(spawned)
+    assert fetches == ['https://pm.a1', 'https://kb.b2']
+    assert st.get_token('https://pm.a1') == 'tok-a1-1'
+    assert st.cache_metrics()['hits'] == 1
+
+
+def test_warm_up_is_a_no_op_locally(monkeypatch, fetches, spawned):
+    monkeypatch.delenv('K_SERVICE', raising=False)
+    assert st.warm_up(['https://pm.a1']) == []
+    assert spawned == []
@@ -4,6 +4,7 @@ import sys
 import types
 from unittest.mock import patch
 
+import service_tokens
 import svc_auth
 
 
@@ -17,7 +18,7 @@ def _stub_google(monkeypatch, fetch):
 
 
 def test_headers_carry_token_and_cache_per_audience(monkeypatch):
-    svc_auth._cache.clear()
+    service_tokens.reset_cache()
     calls = []
     _stub_google(monkeypatch, lambda request, audience: calls.append(audience) or 'oidc-token')
     with patch.dict('os.environ', {'PROFILE_MANAGER_URL': 'https://pm.example/'}, clear=False):
@@ -25,11 +26,11 @@ def test_headers_carry_token_and_cache_per_audience(monkeypatch):
         h2 = svc_auth.pm_auth_headers()
     assert h1 == {'Authorization': 'Bearer oidc-token'} and h2 == h1
     assert calls == ['https://pm.example']   # trailing slash normalized; one fetch
-    svc_auth._cache.clear()
+    service_tokens.reset_cache()
 
 
 def test_no_metadata_server_degrades_to_empty(monkeypatch):
-    svc_auth._cache.clear()
+    service_tokens.reset_cache()
     def boom(request, audience):
         raise RuntimeError('no metadata server')
     _stub_google(monkeypatch, boom)
@@ -40,3 +41,10 @@ def test_no_metadata_server_degrades_to_empty(monkeypatch):
 def test_unconfigured_pm_url_is_empty(monkeypatch):
     with patch.dict('os.environ', {'PROFILE_MANAGER_URL': ''}, clear=False):
         assert svc_auth.pm_auth_headers() == {}
+        assert svc_auth.warm_up() == []
+
+
+def test_warm_up_is_a_no_op_off_cloud_run(monkeypatch):
+    monkeypatch.delenv('K_SERVICE', raising=False)
+    with patch.dict('os.environ', {'PROFILE_MANAGER_URL': 'https://pm.example'}, clear=False):
+        assert svc_auth.warm_up() == []
@@ -81,6 +81,9 @@ sys.modules['major_catalog'] = kb_major_catalog
 kb_firestore_db = _load('firestore_db.py', 'kbv2_firestore_db')
 kb_year_history = _load('year_history.py', 'kbv2_year_history')
 kb_major_facts = _load('major_facts.py', 'kbv2_major_facts')
+kb_profile_diff = _load('profile_diff.py', 'kbv2_profile_diff')
+kb_vector_index = _load('vector_index.py', 'kbv2_vector_index')
+kb_alias_index = _load('alias_index.py', 'kbv2_alias_index')
 kb_request_auth = _load('request_auth.py', 'kbv2_request_auth')
 kb_gemini_fallback = _load('gemini_fallback.py', 'kbv2_gemini_fallback')
 
@@ -90,12 +93,17 @@ kb_gemini_fallback = _load('gemini_fallback.py', 'kbv2_gemini_fallback')
 # aliased too so this suite runs in isolation (previously it only resolved
 # because counselor_agent's conftest happened to put ITS copy on sys.path).
 _saved = {n: sys.modules.get(n)
-          for n in ('firestore_db', 'versioning', 'year_history', 'major_facts', 'major_catalog', 'request_auth', 'gemini_fallback')}
+          for n in ('firestore_db', 'versioning', 'year_history', 'major_facts', 'major_catalog',
+                    'profile_diff', 'vector_index', 'alias_index', 'request_auth',
+                    'gemini_fallback')}
 sys.modules['firestore_db'] = kb_firestore_db
 sys.modules['versioning'] = kb_versioning
 sys.modules['year_history'] = kb_year_history
 sys.modules['major_facts'] = kb_major_facts
 sys.modules['major_catalog'] = kb_major_catalog
+sys.modules['profile_diff'] = kb_profile_diff
+sys.modules['vector_index'] = kb_vector_index
+sys.modules['alias_index'] = kb_alias_index
 sys.modules['request_auth'] = kb_request_auth
 sys.modules['gemini_fallback'] = kb_gemini_fallback
 try:
@@ -134,6 +142,10 @@ class FakeDocRef:
         self._store = store
         self._path = path
 
+    @property
+    def path(self):
+        return '/'.join(self._path)
+
     def get(self, field_paths=None):
         data = self._store.get(self._path)
         if data is not None and field_paths:
@@ -176,14 +188,47 @@ class FakeCollectionRef:
     def where(self, *a, **k):
         return self
 
+    def select(self, field_paths):
+        return self
+
+
+class FakeWriteBatch:
+    """Buffers set/update ops; applies them only on commit()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data):
+        self._ops.append(('set', ref, data))
+
+    def update(self, ref, fields):
+        self._ops.append(('update', ref, fields))
+
+    def commit(self):
+        if self._client.fail_commits:
+            raise RuntimeError("commit failed (injected)")
+        self._client.commits += 1
+        for op, ref, payload in self._ops:
+            getattr(ref, op)(payload)
+
 
 class FakeFirestoreClient:
     def __init__(self):
         self.store = {}
+        self.commits = 0
+        self.fail_commits = False
 
     def collection(self, name):
         return FakeCollectionRef(self.store, (name,))
 
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, refs, field_paths=None):
+        for ref in refs:
+            yield ref.get(field_paths)
+
 
 @pytest.fixture
 def db(monkeypatch):
@@ -197,8 +242,10 @@ def db(monkeypatch):
         types.SimpleNamespace(Client=FakeFirestoreClient),
     )
     kb_firestore_db._db_instance = None
+    kb_alias_index.invalidate()
     yield kb_firestore_db.get_db()
     kb_firestore_db._db_instance = None
+    kb_alias_index.invalidate()
 
 
 @pytest.fixture
@@ -211,6 +258,9 @@ def kb(db):
         year_history=kb_year_history,
         major_facts=kb_major_facts,
         major_catalog=kb_major_catalog,
+        profile_diff=kb_profile_diff,
+        vector_index=kb_vector_index,
+        alias_index=kb_alias_index,
         request_auth=kb_request_auth,
         db=db,
     )
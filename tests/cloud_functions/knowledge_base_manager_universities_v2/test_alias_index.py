@@ -0,0 +1,150 @@
+"""
+Alias index: acronyms, slugs, `_slug` ids and official names → canonical
+university_id in one in-memory lookup, used by get_university's miss path,
+search pinning and the resolve action.
+"""
+import pytest
+
+
+@pytest.fixture
+def schools(kb, make_profile):
+    for uid, name in (('university_of_southern_california', 'University of Southern California'),
+                      ('georgia_institute_of_technology', 'Georgia Institute of Technology'),
+                      ('university_of_texas_at_austin', 'The University of Texas at Austin'),
+                      ('stanford_university', 'Stanford University')):
+        kb.main.ingest_university(make_profile(uid=uid, name=name), year=2026)
+
+
+class TestNormalize:
+    def test_ids_names_and_slugs_share_one_key(self, kb):
+        norm = kb.alias_index.normalize_alias
+        assert norm('university_of_texas_at_austin') == 'university texas austin'
+        assert norm('The University of Texas at Austin') == 'university texas austin'
+        assert norm('university-of-texas-austin_slug') == 'university texas austin'
+        assert norm('Texas A&M') == 'texas a and m'
+
+    def test_find_alias_prefers_the_longest_phrase(self, kb):
+        find = kb.alias_index.find_alias
+        assert find('nyu stern finance') == 'nyu stern'
+        assert find('computer science at USC') == 'usc'
+        assert find('liberal arts colleges') is None
+
+    def test_generic_aliases_only_match_a_whole_query(self, kb):
+        find = kb.alias_index.find_alias
+        assert find('Cal') == 'cal'
+        assert find('cal poly') is None
+        assert find('UT Dallas') is None
+
+    def test_curated_aliases_for_name(self, kb):
+        aliases = kb.main.get_acronyms_for_university('Georgia Institute of Technology')
+        assert {'gt', 'gatech', 'georgia tech'} <= set(aliases)
+
+
+class TestAliasIndex:
+    def _index(self, kb, *universities):
+        return kb.alias_index.AliasIndex.build(
+            [{'university_id': u, 'official_name': n} for u, n in universities])
+
+    def test_resolves_each_kind(self, kb):
+        index = self._index(kb, ('university_of_southern_california', 'University of Southern California'))
+        for text, matched_by in (('university_of_southern_california', 'id'),
+                                 ('university_of_southern_california_slug', 'id'),
+                                 ('USC', 'alias'),
+                                 ('university of southern california', 'id')):
+            hit = index.resolve(text)
+            assert hit['university_id'] == 'university_of_southern_california'
+            assert hit['matched_by'] == matched_by
+
+    def test_official_name_resolves_when_the_id_differs(self, kb):
+        index = self._index(kb, ('mit_slug', 'Massachusetts Institute of Technology'))
+        assert index.resolve('Massachusetts Institute of Technology')['matched_by'] == 'name'
+        assert index.resolve('mit')['university_id'] == 'mit_slug'
+
+    def test_alias_for_a_school_not_in_the_kb_does_not_resolve(self, kb):
+        index = self._index(kb, ('stanford_university', 'Stanford University'))
+        assert index.resolve('ucla') is None
+
+    def test_slug_duplicates_serve_the_plain_id(self, kb):
+        index = self._index(kb, ('harvard_university_slug', 'Harvard University'),
+                            ('harvard_university', 'Harvard University'))
+        assert index.resolve('harvard')['university_id'] == 'harvard_university'
+        assert index.resolve('harvard_university_slug')['university_id'] == 'harvard_university_slug'
+
+    def test_one_name_for_two_schools_is_ambiguous(self, kb):
+        index = self._index(kb, ('miami_university', 'Miami University'),
+                            ('miami_university_ohio', 'Miami University'))
+        hit = index.resolve('Miami University')
+        assert hit['university_id'] == 'miami_university'  # the id key wins
+        index = self._index(kb, ('miami_fl', 'Miami University'),
+                            ('miami_oh', 'Miami University'))
+        hit = index.resolve('Miami University')
+        assert hit['ambiguous'] is True
+        assert {c['university_id'] for c in hit['candidates']} == {'miami_fl', 'miami_oh'}
+
+
+class TestServing:
+    def test_get_university_resolves_an_alias_miss(self, kb, schools):
+        result = kb.main.get_university('usc')
+        assert result['success'] is True
+        assert result['university']['university_id'] == 'university_of_southern_california'
+        assert result['university']['resolved_from'] == 'usc'
+
+    def test_get_university_resolves_slug_ids(self, kb, schools):
+        result = kb.main.get_university('stanford_university_slug')
+        assert result['university']['university_id'] == 'stanford_university'
+
+    def test_exact_hit_carries_no_resolved_from(self, kb, schools):
+        result = kb.main.get_university('stanford_university')
+        assert 'resolved_from' not in result['university']
+
+    def test_unknown_name_is_still_not_found(self, kb, schools):
+        result = kb.main.get_university('hogwarts')
+        assert result == {"success": False, "error": "University hogwarts not found"}
+
+    def test_resolve_batch(self, kb, schools):
+        result = kb.main.resolve_universities(['GT', 'UT', 'The University of Texas at Austin', 'nope'])
+        resolved = result['resolved']
+        assert resolved['GT']['university_id'] == 'georgia_institute_of_technology'
+        assert resolved['UT']['university_id'] == 'university_of_texas_at_austin'
+        assert resolved['The University of Texas at Austin']['matched_by'] == 'id'
+        assert resolved['nope'] is None
+        assert result['indexed_universities'] == 4
+
+    def test_index_is_built_once_and_reused(self, kb, schools, monkeypatch):
+        kb.main.resolve_universities(['usc'])
+        calls = []
+        original = kb.db.list_alias_sources
+        monkeypatch.setattr(kb.db, 'list_alias_sources', lambda: calls.append(1) or original())
+        for _ in range(3):
+            kb.main.resolve_universities(['usc'])
+        assert calls == []
+
+    def test_ingest_makes_a_new_school_resolvable(self, kb, schools, make_profile):
+        assert kb.main.resolve_universities(['cmu'])['resolved']['cmu'] is None
+        kb.main.ingest_university(make_profile(uid='carnegie_mellon_university',
+                                               name='Carnegie Mellon University'), year=2026)
+        hit = kb.main.resolve_universities(['cmu'])['resolved']['cmu']
+        assert hit['university_id'] == 'carnegie_mellon_university'
+
+    def test_delete_drops_the_school(self, kb, schools):
+        kb.main.resolve_universities(['usc'])
+        kb.main.delete_university('university_of_southern_california')
+        assert kb.main.resolve_universities(['usc'])['resolved']['usc'] is None
+
+
+class TestSearchPinning:
+    def test_acronym_query_pins_the_school(self, kb, schools):
+        result = kb.main.search_universities('gatech', search_type='keyword')
+        top = result['results'][0]
+        assert top['university_id'] == 'georgia_institute_of_technology'
+        assert top['alias_match'] is True
+
+    def test_excluded_school_is_not_pinned(self, kb, schools):
+        result = kb.main.search_universities(
+            'USC', search_type='keyword', exclude_ids=['university_of_southern_california'])
+        assert 'university_of_southern_california' not in [
+            r['university_id'] for r in result['results']]
+
+    def test_topic_queries_are_not_pinned(self, kb, schools):
+        result = kb.main.search_universities('Testville', search_type='keyword')
+        assert not any(r.get('alias_match') for r in result['results'])
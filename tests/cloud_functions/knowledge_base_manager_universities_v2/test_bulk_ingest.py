@@ -0,0 +1,97 @@
+"""
+Bulk ingest (bulk_ingest_universities + FirestoreDB.save_universities_bulk):
+same ADR 0002 storage results as N single ingests, but batched commits and
+one major-catalog pass for the whole request.
+"""
+
+
+def _majors(*names):
+    return {'colleges': [{'name': 'E', 'majors': [{'name': n} for n in names]}]}
+
+
+class TestBulkIngest:
+    def test_matches_single_ingest_storage(self, kb, make_profile):
+        result = kb.main.bulk_ingest_universities(
+            [make_profile(uid='a', name='A University'),
+             make_profile(uid='b', name='B University')], year=2026)
+        assert result['success'] is True
+        assert result['summary'] == {'total': 2, 'ok': 2, 'failed': 0, 'unchanged': 0}
+        assert [r['university_id'] for r in result['results']] == ['a', 'b']
+        for r in result['results']:
+            assert r['promoted_to_current'] is True
+            assert r['available_years'] == [2026]
+            assert r['prepare_ms'] >= 0
+
+        main = kb.main.get_university('a')['university']
+        assert main['data_year'] == 2026 and main['available_years'] == [2026]
+        assert kb.db.get_university('b', year=2026)['official_name'] == 'B University'
+
+    def test_writes_go_out_in_one_commit(self, kb, make_profile):
+        kb.main.bulk_ingest_universities(
+            [make_profile(uid=f'u{i}') for i in range(5)], year=2026)
+        assert kb.db.db.commits == 1
+
+    def test_commits_are_chunked_under_the_batch_cap(self, kb, make_profile, monkeypatch):
+        monkeypatch.setattr(kb.firestore_db, 'BATCH_MAX_OPS', 4)  # 2 schools × 2 ops
+        result = kb.main.bulk_ingest_universities(
+            [make_profile(uid=f'u{i}') for i in range(5)], year=2026)
+        assert result['summary']['ok'] == 5
+        assert kb.db.db.commits == 3
+
+    def test_older_year_is_archived_not_promoted(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2026)
+        result = kb.main.bulk_ingest_universities([make_profile()], year=2025)
+        entry = result['results'][0]
+        assert entry['success'] is True
+        assert entry['promoted_to_current'] is False
+        assert entry['available_years'] == [2025, 2026]
+        assert kb.main.get_university('testu')['university']['data_year'] == 2026
+
+    def test_legacy_main_doc_is_archived_first(self, kb, make_profile):
+        kb.db.collection.document('testu').set({'official_name': 'Legacy', 'profile': {}})
+        result = kb.main.bulk_ingest_universities([make_profile()], year=2026)
+        assert result['results'][0]['available_years'] == [2025, 2026]
+        legacy = kb.db.get_university('testu', year=2025)
+        assert legacy['official_name'] == 'Legacy'
+        assert legacy['vintage_estimated'] is True
+
+    def test_invalid_and_duplicate_profiles_fail_individually(self, kb, make_profile):
+        result = kb.main.bulk_ingest_universities(
+            [make_profile(uid='a'), {'metadata': {}}, make_profile(uid='a'), 'junk'], year=2026)
+        assert [r['success'] for r in result['results']] == [True, False, False, False]
+        assert result['results'][1]['validation_errors']
+        assert 'duplicate' in result['results'][2]['error']
+        assert result['summary'] == {'total': 4, 'ok': 1, 'failed': 3, 'unchanged': 0}
+        assert result['success'] is False
+
+    def test_failed_commit_reports_schools_unsaved(self, kb, make_profile):
+        kb.db.db.fail_commits = True
+        result = kb.main.bulk_ingest_universities([make_profile()], year=2026)
+        assert result['results'][0]['success'] is False
+        assert kb.db.get_university('testu') is None
+
+
+class TestBulkCatalogPass:
+    def test_catalog_updated_once_for_the_batch(self, kb, make_profile, monkeypatch):
+        calls = []
+        original = kb.db.update_major_catalog_for_schools
+        monkeypatch.setattr(kb.db, 'update_major_catalog_for_schools',
+                            lambda profiles: calls.append(sorted(profiles)) or original(profiles))
+        monkeypatch.setattr(kb.db, 'update_major_catalog_for_school',
+                            lambda *a, **k: (_ for _ in ()).throw(AssertionError('per-school hook used')))
+        kb.main.bulk_ingest_universities(
+            [make_profile(uid='u1', academic_structure=_majors('Computer Science')),
+             make_profile(uid='u2', academic_structure=_majors('Computer Science', 'Art History'))],
+            year=2026)
+        assert calls == [['u1', 'u2']]
+        view = kb.main.get_majors_catalog()
+        assert view['university_count'] == 2
+        assert {r['normalized']: r['offered_count'] for r in view['majors']} == {
+            'computer science': 2, 'art history': 1}
+
+    def test_archived_year_does_not_touch_catalog(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(academic_structure=_majors('Physics')), year=2026)
+        kb.main.bulk_ingest_universities(
+            [make_profile(academic_structure=_majors('Chemistry'))], year=2025)
+        names = {r['normalized'] for r in kb.main.get_majors_catalog()['majors']}
+        assert names == {'physics'}
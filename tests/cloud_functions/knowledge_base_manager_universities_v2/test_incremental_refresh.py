@@ -0,0 +1,167 @@
+"""
+Incremental KB refresh: content_hash on every snapshot, unchanged profiles
+are a no-op, changed ones carry a change_summary (profile_diff.deep_diff) and
+only touch the major catalog when their majors moved.
+"""
+import pytest
+
+
+def _majors(*names):
+    return {'colleges': [{'name': 'E', 'majors': [{'name': n} for n in names]}]}
+
+
+@pytest.fixture
+def writes(kb, monkeypatch):
+    """Every document write (set/update/delete), batched or not."""
+    log = []
+    ref_type = type(kb.db.collection.document('x'))
+    for op in ('set', 'update', 'delete'):
+        original = getattr(ref_type, op)
+
+        def spy(self, *args, _op=op, _original=original):
+            log.append((_op, self.path))
+            return _original(self, *args)
+        monkeypatch.setattr(ref_type, op, spy)
+    return log
+
+
+class TestProfileDiff:
+    def test_hash_ignores_key_order(self, kb):
+        pd = kb.profile_diff
+        assert pd.content_hash({'a': 1, 'b': {'c': 2, 'd': 3}}) == \
+            pd.content_hash({'b': {'d': 3, 'c': 2}, 'a': 1})
+        assert pd.content_hash({'a': 1}) != pd.content_hash({'a': 2})
+
+    def test_summary_lists_sections_and_fields(self, kb):
+        old = {'admissions_data': {'rate': 10, 'gone': 1}, 'outcomes': {'x': 1}}
+        new = {'admissions_data': {'rate': 12, 'new': 2}, 'outcomes': {'x': 1}}
+        summary = kb.profile_diff.summarize_diff(old, new, base_year=2025)
+        assert summary['base_year'] == 2025
+        assert summary['changed_sections'] == ['admissions_data']
+        assert summary['changed_fields'] == [
+            'admissions_data.gone', 'admissions_data.new', 'admissions_data.rate']
+        assert summary['counts'] == {'changed': 1, 'added': 1, 'removed': 1}
+
+    def test_no_base_means_everything_changed(self, kb):
+        pd = kb.profile_diff
+        assert pd.summarize_diff(None, {'a': 1}) is None
+        assert pd.section_changed(None, 'academic_structure') is True
+
+
+class TestSingleIngest:
+    def test_snapshot_and_main_doc_carry_the_hash(self, kb, make_profile):
+        result = kb.main.ingest_university(make_profile(), year=2026)
+        expected = kb.profile_diff.content_hash(make_profile())
+        assert result['content_hash'] == expected
+        assert result['change_summary'] is None  # first ingest
+        assert kb.db.get_university('testu', year=2026)['content_hash'] == expected
+        assert kb.db.get_university('testu')['content_hash'] == expected
+
+    def test_unchanged_reingest_writes_nothing(self, kb, make_profile, writes):
+        kb.main.ingest_university(make_profile(), year=2026)
+        before = kb.db.get_university('testu')['last_updated']
+        writes.clear()
+
+        result = kb.main.ingest_university(make_profile(), year=2026)
+        assert result['success'] is True and result['unchanged'] is True
+        assert result['promoted_to_current'] is True
+        assert result['available_years'] == [2026]
+        assert writes == []
+        assert kb.db.get_university('testu')['last_updated'] == before
+
+    def test_force_rewrites_an_unchanged_profile(self, kb, make_profile, writes):
+        kb.main.ingest_university(make_profile(), year=2026)
+        writes.clear()
+        result = kb.main.ingest_university(make_profile(), year=2026, force=True)
+        assert result['unchanged'] is False
+        assert writes
+
+    def test_changed_profile_records_a_diff(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(acceptance_rate=25.0), year=2026)
+        result = kb.main.ingest_university(make_profile(acceptance_rate=12.0), year=2026)
+        summary = result['change_summary']
+        assert result['unchanged'] is False
+        assert summary['base_year'] == 2026
+        assert summary['changed_sections'] == ['admissions_data']
+        assert summary['changed_fields'] == ['admissions_data.current_status.overall_acceptance_rate']
+        stored = kb.db.get_university('testu', year=2026)
+        assert stored['change_summary'] == summary
+        assert stored['acceptance_rate'] == 12.0
+
+    def test_new_cycle_is_diffed_against_the_serving_doc(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2025)
+        result = kb.main.ingest_university(make_profile(acceptance_rate=20.0), year=2026)
+        assert result['change_summary']['base_year'] == 2025
+        assert result['promoted_to_current'] is True
+
+    def test_same_profile_for_a_new_year_is_not_skipped(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2025)
+        result = kb.main.ingest_university(make_profile(), year=2026)
+        assert result['unchanged'] is False
+        assert result['available_years'] == [2025, 2026]
+
+    def test_older_unchanged_year_reports_not_promoted(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2025)
+        kb.main.ingest_university(make_profile(), year=2026)
+        result = kb.main.ingest_university(make_profile(), year=2025)
+        assert result['unchanged'] is True
+        assert result['promoted_to_current'] is False
+
+    def test_invalid_profile_still_fails_validation(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2026)
+        result = kb.main.ingest_university({'metadata': {}}, year=2026)
+        assert result['success'] is False and result['validation_errors']
+
+
+class TestCatalogInvalidation:
+    def test_catalog_skipped_when_majors_untouched(self, kb, make_profile, monkeypatch):
+        kb.main.ingest_university(
+            make_profile(academic_structure=_majors('Physics')), year=2026)
+        calls = []
+        monkeypatch.setattr(kb.db, 'update_major_catalog_for_school',
+                            lambda uid, profile: calls.append(uid))
+        kb.main.ingest_university(
+            make_profile(acceptance_rate=10.0, academic_structure=_majors('Physics')), year=2026)
+        assert calls == []
+
+    def test_catalog_updated_when_majors_change(self, kb, make_profile):
+        kb.main.ingest_university(
+            make_profile(academic_structure=_majors('Physics')), year=2026)
+        kb.main.ingest_university(
+            make_profile(academic_structure=_majors('Physics', 'Chemistry')), year=2026)
+        names = {r['normalized'] for r in kb.main.get_majors_catalog()['majors']}
+        assert names == {'physics', 'chemistry'}
+
+
+class TestBulkRefresh:
+    def test_rerun_with_no_changes_does_no_writes(self, kb, make_profile, writes):
+        profiles = [make_profile(uid=f'u{i}', academic_structure=_majors('Art'))
+                    for i in range(4)]
+        kb.main.bulk_ingest_universities(profiles, year=2026)
+        commits = kb.db.db.commits
+        writes.clear()
+
+        result = kb.main.bulk_ingest_universities(
+            [make_profile(uid=f'u{i}', academic_structure=_majors('Art')) for i in range(4)],
+            year=2026)
+        assert result['summary'] == {'total': 4, 'ok': 4, 'failed': 0, 'unchanged': 4}
+        assert all(r['unchanged'] and r['promoted_to_current'] for r in result['results'])
+        assert writes == []
+        assert kb.db.db.commits == commits
+
+    def test_only_changed_schools_are_written(self, kb, make_profile, writes):
+        kb.main.bulk_ingest_universities(
+            [make_profile(uid='a'), make_profile(uid='b')], year=2026)
+        writes.clear()
+        result = kb.main.bulk_ingest_universities(
+            [make_profile(uid='a'), make_profile(uid='b', acceptance_rate=9.0)], year=2026)
+        by_id = {r['university_id']: r for r in result['results']}
+        assert by_id['a']['unchanged'] is True
+        assert by_id['b']['unchanged'] is False
+        assert by_id['b']['change_summary']['changed_sections'] == ['admissions_data']
+        assert {path.split('/')[1] for _, path in writes} == {'b'}
+
+    def test_force_bypasses_the_hash_check(self, kb, make_profile):
+        kb.main.bulk_ingest_universities([make_profile()], year=2026)
+        result = kb.main.bulk_ingest_universities([make_profile()], year=2026, force=True)
+        assert result['summary']['unchanged'] == 0
@@ -0,0 +1,146 @@
+"""
+Semantic search tier: local float16 vector index (vector_index) + hybrid
+reciprocal-rank fusion in search_universities. Uses the deterministic
+HashingEmbedder — no network.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _school(make_profile, uid, name, summary, majors, city='Testville', state='CA'):
+    profile = make_profile(uid=uid, name=name, academic_structure={
+        'colleges': [{'name': 'College of Arts and Sciences',
+                      'majors': [{'name': m} for m in majors]}]})
+    profile['metadata']['location'] = {'city': city, 'state': state, 'type': 'Private'}
+    profile['strategic_profile']['executive_summary'] = summary
+    return profile
+
+
+@pytest.fixture
+def schools(kb, make_profile):
+    profiles = [
+        _school(make_profile, 'seaside', 'Seaside College',
+                'A small liberal arts college on the coast, known for marine biology, '
+                'ocean science and field stations on the shore.',
+                ['Marine Biology', 'Environmental Science', 'English'], city='Port Town', state='ME'),
+        _school(make_profile, 'techu', 'Metro Tech Institute',
+                'A large urban research institute focused on engineering, computer '
+                'science and entrepreneurship.',
+                ['Computer Science', 'Electrical Engineering', 'Mechanical Engineering']),
+        _school(make_profile, 'prairie', 'Prairie State University',
+                'A public flagship with agriculture, business and a big football program.',
+                ['Agronomy', 'Business Administration', 'Animal Science'], state='KS'),
+    ]
+    for p in profiles:
+        kb.main.ingest_university(p, year=2026)
+    return profiles
+
+
+@pytest.fixture
+def index(kb, schools):
+    vi = kb.vector_index
+    items = [(p['_id'], vi.embedding_text(p), kb.profile_diff.content_hash(p)) for p in schools]
+    built, _ = vi.VectorIndex.build(items, vi.HashingEmbedder(128))
+    vi.set_index(built)
+    yield built
+    vi.set_embedder(None)
+    vi.set_index(None)
+
+
+class TestVectorIndex:
+    def test_rrf_rewards_agreement(self, kb):
+        fused = kb.vector_index.rrf([['a', 'b', 'c'], ['b', 'a']], k=60)
+        assert fused['a'] == pytest.approx(1 / 61 + 1 / 62)
+        assert fused['b'] == fused['a']
+        assert fused['c'] == pytest.approx(1 / 63)
+
+    def test_vectors_are_unit_float16(self, index):
+        assert index.vectors.dtype == np.float16
+        norms = np.linalg.norm(np.asarray(index.vectors, dtype=np.float32), axis=1)
+        assert np.allclose(norms, 1.0, atol=1e-2)
+
+    def test_save_load_round_trip_is_memory_mapped(self, kb, index, tmp_path):
+        index.save(tmp_path)
+        loaded = kb.vector_index.VectorIndex.load(tmp_path)
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.ids == index.ids and loaded.model == 'hashing-128'
+        q = kb.vector_index.HashingEmbedder(128).embed(['marine biology'])[0]
+        assert loaded.search(q, 1) == index.search(q, 1)
+
+    def test_rebuild_reuses_unchanged_vectors(self, kb, schools, index):
+        vi = kb.vector_index
+        calls = []
+
+        class Counting(vi.HashingEmbedder):
+            def embed(self, texts, task='RETRIEVAL_DOCUMENT'):
+                calls.append(len(texts))
+                return super().embed(texts, task)
+
+        items = [(p['_id'], vi.embedding_text(p), kb.profile_diff.content_hash(p)) for p in schools]
+        items[0] = (items[0][0], items[0][1] + ' Sailing team.', 'new-hash')
+        rebuilt, embedded = vi.VectorIndex.build(items, Counting(128), previous=index)
+        assert embedded == 1 and calls == [1]
+        assert np.array_equal(rebuilt.vector('techu'), index.vector('techu'))
+
+    def test_no_index_means_no_semantic_scores(self, kb, monkeypatch):
+        monkeypatch.delenv('KB_VECTOR_INDEX_DIR', raising=False)
+        monkeypatch.delenv('KB_VECTOR_INDEX_GCS', raising=False)
+        kb.vector_index.set_index(None)
+        assert kb.vector_index.query_scores('anything') is None
+
+    def test_index_loads_once_from_configured_dir(self, kb, index, tmp_path, monkeypatch):
+        index.save(tmp_path)
+        kb.vector_index.set_index(None)
+        monkeypatch.setenv('KB_VECTOR_INDEX_DIR', str(tmp_path))
+        first = kb.vector_index.get_index()
+        assert first is not None and len(first) == 3
+        assert kb.vector_index.get_index() is first
+
+
+class TestSearchTiers:
+    QUERY = 'small liberal arts college strong in marine biology near the coast'
+
+    def test_semantic_finds_the_coastal_college(self, kb, index):
+        result = kb.main.search_universities(self.QUERY, search_type='semantic')
+        assert result['search_type_used'] == 'semantic'
+        assert result['results'][0]['university_id'] == 'seaside'
+        assert result['results'][0]['semantic_score'] > result['results'][1]['semantic_score']
+
+    def test_hybrid_fuses_keyword_and_semantic_ranks(self, kb, index):
+        result = kb.main.search_universities('Metro Tech', search_type='hybrid')
+        top = result['results'][0]
+        assert result['search_type_used'] == 'hybrid'
+        assert top['university_id'] == 'techu'
+        assert top['keyword_score'] > 0 and top['semantic_score'] is not None
+
+    def test_hybrid_keeps_meaning_matches_without_keyword_hits(self, kb, index):
+        result = kb.main.search_universities('ocean science shore', search_type='hybrid')
+        assert result['results'][0]['university_id'] == 'seaside'
+
+    def test_filters_and_exclusions_still_apply(self, kb, index):
+        result = kb.main.search_universities(self.QUERY, search_type='semantic',
+                                             exclude_ids=['seaside'])
+        assert 'seaside' not in [r['university_id'] for r in result['results']]
+
+    def test_keyword_mode_ignores_the_index(self, kb, index):
+        result = kb.main.search_universities('Prairie', search_type='keyword')
+        assert result['search_type_used'] == 'keyword'
+        assert [r['university_id'] for r in result['results']] == ['prairie']
+        assert 'semantic_score' not in result['results'][0]
+
+    def test_without_index_hybrid_degrades_to_keyword(self, kb, schools):
+        kb.vector_index.set_index(None)
+        result = kb.main.search_universities('Prairie', search_type='hybrid')
+        assert result['search_type_used'] == 'keyword'
+        assert [r['university_id'] for r in result['results']] == ['prairie']
+
+    def test_embedder_failure_degrades_to_keyword(self, kb, index):
+        class Broken:
+            model = 'hashing-128'
+
+            def embed(self, texts, task=None):
+                raise RuntimeError('quota')
+        kb.vector_index.set_embedder(Broken())
+        result = kb.main.search_universities('Prairie', search_type='semantic')
+        assert result['success'] is True and result['search_type_used'] == 'keyword'
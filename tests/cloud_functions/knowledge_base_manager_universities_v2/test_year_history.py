@@ -72,6 +72,30 @@ class TestGetUniversitySections:
         assert uni['soft_fit_category'] == 'TARGET'
 
 
+class TestBatchSections:
+    def test_batch_projects_every_profile(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2026)
+        kb.main.ingest_university(make_profile(uid='otheru', name='Other University'), year=2026)
+        result = kb.main.get_universities_batch(['otheru', 'testu'], sections=['admissions_data'])
+        assert result['success'] is True
+        assert [u['university_id'] for u in result['universities']] == ['otheru', 'testu']
+        for uni in result['universities']:
+            assert list(uni['profile'].keys()) == ['admissions_data']
+            assert uni['data_year'] == 2026
+
+    def test_batch_all_unknown_sections_is_an_error(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2026)
+        result = kb.main.get_universities_batch(['testu'], sections=['financial'])
+        assert result['success'] is False
+        assert result['invalid_sections'] is True
+
+    def test_batch_without_sections_returns_full_profiles(self, kb, make_profile):
+        kb.main.ingest_university(make_profile(), year=2026)
+        uni = kb.main.get_universities_batch(['testu', 'missing'])['universities']
+        assert len(uni) == 1
+        assert uni[0]['profile']['_id'] == 'testu'
+
+
 class TestYearReadSelfDescribes:
     def test_year_snapshot_read_backfills_available_years(self, kb, make_profile):
         kb.main.ingest_university(make_profile(), year=2025)
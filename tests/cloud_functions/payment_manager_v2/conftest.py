@@ -63,6 +63,17 @@ if not hasattr(_fs, "Client"):
     _fs.Client = lambda *a, **k: types.SimpleNamespace()
 if not hasattr(_fs, "Query"):
     _fs.Query = type("Query", (), {"DESCENDING": "DESCENDING", "ASCENDING": "ASCENDING"})
+if not hasattr(_fs, "Increment"):
+    _fs.Increment = type("Increment", (), {"__init__": lambda self, value: setattr(self, "value", value)})
+if not hasattr(_fs, "transactional"):
+    def _transactional(fn):
+        # run fn(transaction, ...) then commit its buffered writes (no retries)
+        def run(transaction, *a, **k):
+            result = fn(transaction, *a, **k)
+            transaction.commit()
+            return result
+        return run
+    _fs.transactional = _transactional
 _sm = _ensure("google.cloud.secretmanager")
 if not hasattr(_sm, "SecretManagerServiceClient"):
     _sm.SecretManagerServiceClient = lambda *a, **k: types.SimpleNamespace()
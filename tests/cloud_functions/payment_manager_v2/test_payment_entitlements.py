@@ -0,0 +1,246 @@
+"""Entitlement cache + merged projection for payment_manager_v2.
+
+Free reads (check-access, purchases) go through a per-instance cache of
+users/{uid}/entitlements/data, which save_purchases/save_credits mirror into;
+webhooks and mutations drop the entry after writing; use-credit is one
+transaction. Runs the real PaymentFirestoreDB against an in-memory Firestore."""
+import importlib.util
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+import stripe  # stubbed by conftest
+from google.cloud import firestore
+
+SRC = Path(__file__).resolve().parents[3] / "cloud_functions" / "payment_manager_v2"
+
+
+def _load(unique_name, filename):
+    # Same isolation as test_subscription_provisioning: load by path under a
+    # unique name with a temporary bare alias for sibling imports.
+    saved_path = list(sys.path)
+    sys.path.insert(0, str(SRC))
+    spec = importlib.util.spec_from_file_location(unique_name, SRC / filename)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[unique_name] = mod
+    sys.modules[filename[:-3]] = mod
+    try:
+        spec.loader.exec_module(mod)
+    finally:
+        sys.path[:] = saved_path
+    return mod
+
+
+firestore_db = _load("pay_ent_firestore_db", "firestore_db.py")
+entitlements = _load("pay_ent_entitlements", "entitlements.py")
+main = _load("pay_ent_main", "main.py")
+for _bare in ("main", "firestore_db", "email_service", "entitlements"):
+    sys.modules.pop(_bare, None)
+
+U = "stu@example.com"
+PURCHASES = f"users/{U}/purchases/data"
+PROJECTION = f"users/{U}/entitlements/data"
+
+
+class _Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Snap:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+def _merge(current, data):
+    out = dict(current)
+    for k, v in data.items():
+        if isinstance(v, _Increment):
+            v = (out.get(k) or 0) + v.value
+        elif isinstance(v, dict) and isinstance(out.get(k), dict):
+            v = _merge(out[k], v)
+        out[k] = v
+    return out
+
+
+class _Store:
+    def __init__(self):
+        self.docs, self.reads = {}, []
+        self.lock = threading.Lock()
+
+    def read(self, path):
+        self.reads.append(path)
+        return _Snap(self.docs.get(path))
+
+    def write(self, path, data, merge):
+        self.docs[path] = _merge(self.docs.get(path, {}) if merge else {}, data)
+
+
+class _Ref:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Ref(self.store, f"{self.path}/{name}")
+
+    def document(self, doc_id):
+        return _Ref(self.store, f"{self.path}/{doc_id}")
+
+    def get(self, transaction=None):
+        return self.store.read(self.path)
+
+    def set(self, data, merge=False):
+        self.store.write(self.path, data, merge)
+
+    def add(self, data):
+        self.store.write(f"{self.path}/{len(self.store.docs)}", data, False)
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store, self.writes = store, []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref.path, data, merge))
+
+    def commit(self):
+        for path, data, merge in self.writes:
+            self.store.write(path, data, merge)
+
+
+class _Transaction(_Batch):
+    def __init__(self, store):
+        super().__init__(store)
+        store.lock.acquire()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self.store.lock.release()
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Ref(self.store, name)
+
+    def batch(self):
+        return _Batch(self.store)
+
+    def transaction(self):
+        return _Transaction(self.store)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # Other test modules rebind Increment on the shared firestore stub.
+    monkeypatch.setattr(firestore, "Increment", _Increment)
+    pdb = firestore_db.PaymentFirestoreDB.__new__(firestore_db.PaymentFirestoreDB)
+    pdb.db = _Client()
+    monkeypatch.setattr(main, "get_payment_db", lambda: pdb)
+    monkeypatch.setattr(main, "send_credits_low_email", lambda *a, **k: True)
+    monkeypatch.setattr(main, "send_subscription_ended_email", lambda *a, **k: True)
+    entitlements.invalidate_cache()
+    yield pdb
+    entitlements.invalidate_cache()
+
+
+def _request(payload=None, method="POST"):
+    return types.SimpleNamespace(method=method, args={}, get_json=lambda *a, **k: payload or {})
+
+
+def _check(feature="fit_analysis"):
+    body, status, _ = main.handle_check_access(_request({"feature": feature}), U)
+    return body
+
+
+def _seed(db, **fields):
+    db.save_purchases(U, {**main.get_default_purchases(), **fields})
+    db.db.store.reads.clear()
+
+
+class TestReads:
+    def test_save_purchases_mirrors_into_the_projection(self, db):
+        _seed(db, fit_analysis_credits=20, subscription_active=True)
+        assert db.db.store.docs[PROJECTION]["purchases"]["fit_analysis_credits"] == 20
+
+    def test_check_access_is_one_read_then_served_from_cache(self, db):
+        _seed(db, fit_analysis_credits=20)
+        for _ in range(3):
+            assert _check()["has_access"] is True
+        assert db.db.store.reads == [PROJECTION]
+
+    def test_pre_projection_user_is_backfilled(self, db):
+        db.db.store.docs[PURCHASES] = {"fit_analysis_credits": 7, "fit_analysis_used": 0}
+        assert _check()["reason"] == "7 analyses available"
+        assert db.db.store.docs[PROJECTION]["purchases"]["fit_analysis_credits"] == 7
+
+    def test_denial_rereads_before_refusing(self, db):
+        _seed(db, fit_analysis_credits=3, fit_analysis_used=3)
+        assert _check()["has_access"] is False
+        # credit pack landed via another instance: projection updated, cache not
+        db.db.store.docs[PROJECTION]["purchases"]["fit_analysis_credits"] = 13
+        assert _check()["has_access"] is True
+
+
+class TestInvalidation:
+    def test_subscription_deleted_webhook_drops_the_cached_entry(self, db):
+        stripe.Customer._store["cus_ent"] = {"email": U}
+        _seed(db, subscription_active=True, stripe_subscription_id="sub_ent",
+              ai_unlimited=True, subscription_plan="monthly")
+        assert main.get_user_purchases(U)["subscription_active"] is True
+        main.handle_subscription_lifecycle_webhooks({
+            "type": "customer.subscription.deleted",
+            "data": {"object": {"id": "sub_ent", "customer": "cus_ent"}}})
+        assert main.get_user_purchases(U)["subscription_active"] is False
+        assert db.db.store.docs[PROJECTION]["credits"]["tier"] == "free"
+
+    def test_successful_payment_is_visible_immediately(self, db):
+        _seed(db)
+        assert main.get_user_purchases(U)["fit_analysis_credits"] == 3
+        main.handle_successful_payment({
+            "id": "cs_1", "client_reference_id": U, "amount_total": 900,
+            "metadata": {"product_id": "credit_pack_10", "quantity": "1"}})
+        assert main.get_user_purchases(U)["fit_analysis_credits"] == 13
+
+
+class TestUseCredit:
+    def test_use_is_one_transaction_and_updates_the_cache(self, db):
+        _seed(db, fit_analysis_credits=3)
+        main.get_user_purchases(U)                       # warm
+        db.db.store.reads.clear()
+        body, status, _ = main.handle_use_credit(
+            _request({"credit_type": "fit_analysis", "college_id": "duke"}), U)
+        assert status == 200 and body["remaining"] == 2
+        assert db.db.store.reads == [PURCHASES]          # the transactional read only
+        stored = db.db.store.docs[PURCHASES]
+        assert stored["fit_analysis_used"] == 1
+        assert stored["college_usage"] == {"duke": {"fit_analysis": True}}
+        assert main.get_user_purchases(U)["fit_analysis_used"] == 1
+        assert db.db.store.reads == [PURCHASES]
+
+    def test_concurrent_uses_never_overspend(self, db):
+        _seed(db, fit_analysis_credits=3)
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(main.handle_use_credit(
+            _request({"credit_type": "fit_analysis"}), U)[1])) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(statuses) == [200] * 3 + [403] * 5
+        assert db.db.store.docs[PURCHASES]["fit_analysis_used"] == 3
+
+    def test_user_without_a_record_gets_defaults_created(self, db):
+        body, status, _ = main.handle_use_credit(_request({"credit_type": "fit_analysis"}), U)
+        assert status == 200 and body["remaining"] == 2
+        assert db.db.store.docs[PURCHASES]["ai_messages_limit"] == 30
@@ -30,9 +30,10 @@ def _load(unique_name, filename):
 
 
 firestore_db = _load("pay_firestore_db", "firestore_db.py")
+entitlements = _load("pay_entitlements", "entitlements.py")
 main = _load("pay_main", "main.py")
 # Strip the bare aliases so profile_manager_v2 imports its OWN main/firestore_db.
-for _bare in ("main", "firestore_db", "email_service"):
+for _bare in ("main", "firestore_db", "email_service", "entitlements"):
     sys.modules.pop(_bare, None)
 
 
@@ -14,6 +14,8 @@ import sys
 import types
 from pathlib import Path
 
+import pytest
+
 # Source dir → sys.path. ROOT/cloud_functions/profile_manager_v2/
 SOURCE_DIR = Path(__file__).resolve().parents[3] / 'cloud_functions' / 'profile_manager_v2'
 if str(SOURCE_DIR) not in sys.path:
@@ -57,7 +59,7 @@ _firestore.Query = _StubQuery
 
 
 class _StubIncrement:
-    """Sentinel mirror of firestore.Increment — used by upsert_workflow_stat
+    """Sentinel mirror of firestore.Increment — used by add_workflow_stat_runs
     and increment_kb_gap; tests assert on .value."""
     def __init__(self, value):
         self.value = value
@@ -65,6 +67,23 @@ class _StubIncrement:
 
 _firestore.Increment = _StubIncrement
 
+# Sentinel mirror of firestore.DELETE_FIELD — the college_list_view mirrors
+# drop rows with it.
+_firestore.DELETE_FIELD = object()
+
+
+def _stub_transactional(fn):
+    """Mirror of firestore.transactional: run fn(transaction, ...) and then
+    commit the transaction's buffered writes (no contention retries)."""
+    def run(transaction, *args, **kwargs):
+        result = fn(transaction, *args, **kwargs)
+        transaction.commit()
+        return result
+    return run
+
+
+_firestore.transactional = _stub_transactional
+
 
 # google.cloud.firestore_v1.base_query.FieldFilter — used in queries.
 _firestore_v1 = _ensure_module('google.cloud.firestore_v1')
@@ -110,3 +129,13 @@ class _StubGenAIModel:
 
 _generativeai.GenerativeModel = _StubGenAIModel
 _generativeai.configure = lambda *args, **kwargs: None
+
+
+@pytest.fixture(autouse=True)
+def _fresh_entitlement_cache():
+    """The entitlement cache is per-process; tests reuse the same emails
+    against different fake DBs, so each test starts cold."""
+    import entitlements
+    entitlements.invalidate_cache()
+    yield
+    entitlements.invalidate_cache()
@@ -0,0 +1,213 @@
+"""Chat store: fit/profile/university/counselor conversations are a header
+doc plus a messages subcollection. A save reads only the header's
+message_count (field mask) and writes just the new messages; listing selects
+header fields only; legacy JSON-blob headers still load and migrate on their
+next save.
+
+Runs the real FirestoreDB chat methods against a small in-memory Firestore
+that records reads, field masks and writes."""
+
+import json
+
+import pytest
+
+from firestore_db import CHAT_LIST_FIELDS, FirestoreDB
+from google.cloud import firestore
+
+U = 'stu@example.com'
+FIT = f'users/{U}/fit_chat_conversations'
+
+
+class _Snap:
+    def __init__(self, doc_id, data):
+        self.id, self._data = doc_id, data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Store:
+    def __init__(self):
+        self.docs, self.gets, self.writes = {}, [], []
+
+    def children(self, path):
+        prefix = path + '/'
+        return sorted((p, d) for p, d in self.docs.items()
+                      if p.startswith(prefix) and '/' not in p[len(prefix):])
+
+
+class _Doc:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Query(self.store, f"{self.path}/{name}")
+
+    def get(self, field_paths=None):
+        self.store.gets.append((self.path, field_paths))
+        data = self.store.docs.get(self.path)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return _Snap(self.path.rsplit('/', 1)[1], data)
+
+
+class _Query:
+    def __init__(self, store, path, mask=None, order=None, where=None, limit=None):
+        self.store, self.path = store, path
+        self.mask, self.order, self.where_, self.limit_ = mask, order, where, limit
+
+    def _copy(self, **kw):
+        base = dict(mask=self.mask, order=self.order, where=self.where_, limit=self.limit_)
+        base.update(kw)
+        return _Query(self.store, self.path, **base)
+
+    def document(self, doc_id):
+        return _Doc(self.store, f"{self.path}/{doc_id}")
+
+    def list_documents(self):
+        return [_Doc(self.store, p) for p, _ in self.store.children(self.path)]
+
+    def select(self, fields):
+        return self._copy(mask=list(fields))
+
+    def where(self, filter=None):
+        return self._copy(where=filter)
+
+    def order_by(self, field, direction=None):
+        return self._copy(order=(field, direction == 'DESCENDING'))
+
+    def limit(self, n):
+        return self._copy(limit=n)
+
+    def stream(self):
+        self.store.gets.append((self.path, self.mask))
+        rows = [(p.rsplit('/', 1)[1], dict(d)) for p, d in self.store.children(self.path)]
+        if self.order:
+            field, desc = self.order
+            rows.sort(key=lambda r: r[1].get(field), reverse=desc)
+        if self.mask is not None:
+            rows = [(i, {k: v for k, v in d.items() if k in self.mask}) for i, d in rows]
+        return [_Snap(i, d) for i, d in rows[:self.limit_]]
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store, self.ops = store, []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref.path, data))
+
+    def delete(self, ref):
+        self.ops.append((ref.path, None))
+
+    def commit(self):
+        for path, data in self.ops:
+            self.store.writes.append(path)
+            if data is None:
+                self.store.docs.pop(path, None)
+                continue
+            doc = self.store.docs.setdefault(path, {})
+            for k, v in data.items():
+                if v is firestore.DELETE_FIELD:
+                    doc.pop(k, None)
+                else:
+                    doc[k] = v
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Query(self.store, name)
+
+    def batch(self):
+        return _Batch(self.store)
+
+
+@pytest.fixture
+def db():
+    fdb = FirestoreDB.__new__(FirestoreDB)
+    fdb.db = _Client()
+    return fdb
+
+
+def _msgs(n):
+    return [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'm{i}'} for i in range(n)]
+
+
+def _drain(db):
+    store = db.db.store
+    gets, writes = list(store.gets), list(store.writes)
+    store.gets.clear()
+    store.writes.clear()
+    return gets, writes
+
+
+class TestSave:
+    def test_new_turn_writes_only_new_messages_after_a_masked_header_read(self, db):
+        db.save_fit_conversation(U, 'c1', {'title': 'Why MIT?', 'messages': _msgs(4)})
+        _drain(db)
+        assert db.save_fit_conversation(U, 'c1', {'title': 'Why MIT?', 'messages': _msgs(6)})
+        gets, writes = _drain(db)
+        assert gets == [(f'{FIT}/c1', ['message_count', 'created_at', 'messages_store'])]
+        # The last stored message is rewritten (regenerated replies), then the new ones.
+        assert writes == [f'{FIT}/c1/messages/00000{i}' for i in (3, 4, 5)] + [f'{FIT}/c1']
+        assert db.db.store.docs[f'{FIT}/c1']['message_count'] == 6
+        assert 'messages' not in db.db.store.docs[f'{FIT}/c1']
+
+    def test_created_at_survives_updates(self, db):
+        db.save_fit_conversation(U, 'c1', {'messages': _msgs(2)})
+        created = db.db.store.docs[f'{FIT}/c1']['created_at']
+        db.db.store.docs[f'{FIT}/c1']['created_at'] = '2026-01-01T00:00:00'
+        db.save_fit_conversation(U, 'c1', {'messages': _msgs(3), 'created_at': created})
+        assert db.db.store.docs[f'{FIT}/c1']['created_at'] == '2026-01-01T00:00:00'
+
+    def test_shorter_transcript_rewrites_and_drops_the_tail(self, db):
+        db.save_fit_conversation(U, 'c1', {'messages': _msgs(5)})
+        db.save_fit_conversation(U, 'c1', {'messages': [{'role': 'user', 'content': 'fresh'}]})
+        conv = db.get_fit_conversation(U, 'c1')
+        assert conv['messages'] == [{'role': 'user', 'content': 'fresh'}]
+        assert conv['message_count'] == 1
+
+    def test_legacy_blob_loads_then_migrates_on_next_save(self, db):
+        db.db.store.docs[f'{FIT}/old'] = {
+            'title': 'Legacy', 'messages': json.dumps(_msgs(2)), 'message_count': 2,
+            'created_at': '2025-09-01T00:00:00', 'updated_at': '2025-09-01T00:00:00'}
+        assert db.get_fit_conversation(U, 'old')['messages'] == _msgs(2)
+
+        db.save_fit_conversation(U, 'old', {'title': 'Legacy', 'messages': _msgs(3)})
+        header = db.db.store.docs[f'{FIT}/old']
+        assert 'messages' not in header and header['created_at'] == '2025-09-01T00:00:00'
+        assert db.get_fit_conversation(U, 'old')['messages'] == _msgs(3)
+
+
+class TestReadAndList:
+    def test_load_returns_messages_in_order_without_seq(self, db):
+        db.save_counselor_conversation(U, 'k1', {'title': 'Plan', 'messages': _msgs(12)})
+        conv = db.get_counselor_conversation(U, 'k1')
+        assert conv['messages'] == _msgs(12) and conv['title'] == 'Plan'
+
+    def test_listing_reads_header_fields_only(self, db):
+        db.save_profile_conversation(U, 'p1', {'title': 'One', 'messages': _msgs(2)})
+        db.save_profile_conversation(U, 'p2', {'title': 'Two', 'messages': _msgs(3)})
+        _drain(db)
+        out = db.list_profile_conversations(U)
+        gets, _ = _drain(db)
+        assert gets == [(f'users/{U}/profile_chat_conversations', list(CHAT_LIST_FIELDS))]
+        assert {c['conversation_id']: c['message_count'] for c in out} == {'p1': 2, 'p2': 3}
+        assert all('messages' not in c for c in out)
+
+    def test_university_chats_are_keyed_by_university(self, db):
+        db.save_university_conversation(U, 'mit', {'university_name': 'MIT', 'messages': _msgs(1)})
+        assert db.list_university_conversations(U)[0]['university_id'] == 'mit'
+        assert db.get_university_conversation(U, 'mit')['messages'] == _msgs(1)
+
+
+class TestDelete:
+    def test_delete_removes_header_and_messages(self, db):
+        db.save_fit_conversation(U, 'c1', {'messages': _msgs(3)})
+        assert db.delete_fit_conversation(U, 'c1') is True
+        assert not [p for p in db.db.store.docs if p.startswith(f'{FIT}/c1')]
+        assert db.get_fit_conversation(U, 'c1') is None
@@ -104,8 +104,10 @@ class TestClearTestData:
         # The expected enumeration set; if a new collection is added to
         # the helper, update this test consciously.
         expected = {
-            'profile', 'roadmap_tasks', 'essay_tracker',
-            'scholarship_tracker', 'college_list', 'aid_packages', 'tasks',
+            'profile', 'roadmap_tasks', 'essay_tracker', 'essay_tracker_sync',
+            'scholarship_tracker', 'scholarship_tracker_sync',
+            'college_list', 'college_list_view',
+            'aid_packages', 'tasks',
         }
         assert set(user_doc.calls) == expected
 
@@ -29,7 +29,13 @@ import pytest
 def _email_ok(user_email: str, qa_test_user_email_env: str) -> bool:
     """Mirror of the allow-list check in main.py clear-test-data handler."""
     allowed = [e.strip() for e in qa_test_user_email_env.split(",") if e.strip()]
-    return bool(user_email) and user_email in allowed
+    local, _, domain = user_email.partition("@")
+    base_local, plus, tag = local.partition("+")
+    is_qa_alias = (
+        bool(plus) and tag.startswith("qa") and tag[2:].isdigit()
+        and f"{base_local}@{domain}" in allowed
+    )
+    return bool(user_email) and (user_email in allowed or is_qa_alias)
 
 
 # ---------------------------------------------------------------------------
@@ -61,8 +67,22 @@ class TestClearTestDataAllowList:
         env = "duser8531@gmail.com , stratiaadmissions@gmail.com"
         assert _email_ok("stratiaadmissions@gmail.com", env) is True
 
+    def test_qa_synthetic_user_alias_is_permitted(self):
+        """Each QA scenario runs as local+qa<N>@domain of a test account."""
+        env = "duser8531@gmail.com,stratiaadmissions@gmail.com"
+        assert _email_ok("duser8531+qa3@gmail.com", env) is True
+
     # --- negative cases ---
 
+    def test_alias_of_unlisted_account_is_rejected(self):
+        env = "duser8531@gmail.com"
+        assert _email_ok("attacker+qa1@evil.com", env) is False
+
+    def test_non_qa_alias_is_rejected(self):
+        env = "duser8531@gmail.com"
+        assert _email_ok("duser8531+other@gmail.com", env) is False
+        assert _email_ok("duser8531+qa@gmail.com", env) is False
+
     def test_random_email_is_rejected(self):
         env = "duser8531@gmail.com,stratiaadmissions@gmail.com"
         assert _email_ok("attacker@evil.com", env) is False
@@ -0,0 +1,243 @@
+"""Materialized college list view: list and fit writes mirror lean rows into
+users/{uid}/college_list_view/data in the same batch, so get_college_list is
+one document read (plus a KB call only for newly added or expired rows). A
+missing/partial view is rebuilt from the source collections, and
+check_college_list_view diffs the two.
+
+Runs the real FirestoreDB methods against a small in-memory Firestore with
+deep-merge set() and DELETE_FIELD."""
+
+from unittest.mock import patch
+
+import pytest
+
+import college_list
+from firestore_db import FirestoreDB
+from google.cloud import firestore
+
+U = 'stu@example.com'
+VIEW = f'users/{U}/college_list_view/data'
+
+
+def _merge(current, data):
+    for key, value in data.items():
+        if value is firestore.DELETE_FIELD:
+            current.pop(key, None)
+        elif isinstance(value, dict) and isinstance(current.get(key), dict):
+            _merge(current[key], value)
+        elif isinstance(value, dict):
+            current[key] = _merge({}, value)
+        else:
+            current[key] = value
+    return current
+
+
+class _Snap:
+    def __init__(self, doc_id, data, reference=None):
+        self.id, self._data, self.reference = doc_id, data, reference
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Doc:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Collection(self.store, f"{self.path}/{name}")
+
+    def get(self):
+        self.store.reads.append(self.path)
+        return _Snap(self.path.rsplit('/', 1)[1], self.store.docs.get(self.path), self)
+
+    def set(self, data, merge=False):
+        self.store.apply(self.path, data, merge)
+
+    def update(self, data):
+        self.store.apply(self.path, data, True)
+
+    def delete(self):
+        self.store.docs.pop(self.path, None)
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def document(self, doc_id):
+        return _Doc(self.store, f"{self.path}/{doc_id}")
+
+    def stream(self):
+        self.store.reads.append(self.path)
+        prefix = self.path + '/'
+        return [_Snap(p[len(prefix):], d, _Doc(self.store, p)) for p, d in sorted(self.store.docs.items())
+                if p.startswith(prefix) and '/' not in p[len(prefix):]]
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store, self.ops = store, []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self.ops.append(lambda: ref.update(data))
+
+    def delete(self, ref):
+        self.ops.append(ref.delete)
+
+    def commit(self):
+        for op in self.ops:
+            op()
+
+
+class _Store:
+    def __init__(self):
+        self.docs, self.reads = {}, []
+
+    def apply(self, path, data, merge):
+        base = dict(self.docs.get(path) or {}) if merge else {}
+        self.docs[path] = _merge(base, dict(data))
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Collection(self.store, name)
+
+    def batch(self):
+        return _Batch(self.store)
+
+
+class _KB:
+    """Stand-in for the KB batch POST; records which ids were asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, json, timeout):
+        self.calls.append(list(json['university_ids']))
+
+        class _Resp:
+            status_code = 200
+
+            def json(_self):
+                return {'success': True, 'universities': [
+                    {'university_id': uid, 'location': {'city': 'X', 'state': 'CA'},
+                     'acceptance_rate': 10, 'content_hash': 'h1'}
+                    for uid in json['university_ids'] if uid != 'unknown']}
+        return _Resp()
+
+
+@pytest.fixture
+def env():
+    fdb = FirestoreDB.__new__(FirestoreDB)
+    fdb.db = _Client()
+    kb = _KB()
+    with patch.object(college_list, 'get_db', return_value=fdb), \
+         patch.object(college_list.requests, 'post', kb):
+        yield fdb, kb
+
+
+def _reads(fdb):
+    reads = list(fdb.db.store.reads)
+    fdb.db.store.reads.clear()
+    return reads
+
+
+class TestViewReads:
+    def test_missing_view_is_rebuilt_then_reads_are_one_doc(self, env):
+        fdb, kb = env
+        fdb.db.store.docs[f'users/{U}/college_list/mit'] = {'university_name': 'MIT', 'status': 'planning'}
+        fdb.db.store.docs[f'users/{U}/college_fits/mit'] = {'fit_category': 'REACH', 'match_percentage': 40,
+                                                           'factors': ['long', 'text']}
+        first = college_list.get_college_list(U)
+        assert first[0]['fit_category'] == 'REACH' and first[0]['location'] == 'X, CA'
+        assert fdb.db.store.docs[VIEW]['complete'] is True
+        assert 'factors' not in fdb.db.store.docs[VIEW]['fits']['mit']
+
+        _reads(fdb)
+        assert college_list.get_college_list(U) == first
+        assert _reads(fdb) == [VIEW] and kb.calls == [['mit']]
+
+    def test_add_fetches_kb_for_the_new_row_only(self, env):
+        fdb, kb = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        out = college_list.add_university_to_list(U, 'duke', {'university_name': 'Duke'})
+        assert [c['university_id'] for c in out['college_list']] == ['duke', 'mit']
+        assert kb.calls == [['mit'], ['duke']]
+
+    def test_kb_misses_are_not_refetched_every_read(self, env):
+        fdb, kb = env
+        college_list.add_university_to_list(U, 'unknown', {'university_name': 'Nowhere'})
+        college_list.get_college_list(U)
+        assert kb.calls == [['unknown']]
+
+    def test_fit_save_and_delete_update_the_view(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        fdb.save_college_fit(U, 'mit', {'fit_category': 'TARGET', 'match_percentage': 70})
+        assert college_list.get_college_list(U)[0]['fit_category'] == 'TARGET'
+        fdb.delete_college_fit(U, 'mit')
+        assert college_list.get_college_list(U)[0]['fit_category'] is None
+
+    def test_item_updates_and_removal_update_the_view(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        college_list.add_university_to_list(U, 'duke', {'university_name': 'Duke'})
+        fdb.update_application_status(U, 'mit', {'status': 'applied', 'decision': None})
+        fdb.update_notes(U, 'college_list', 'mit', 'visit in May')
+        out = college_list.remove_university_from_list(U, 'duke')['college_list']
+        assert [(c['university_id'], c['status'], c['notes']) for c in out] == \
+            [('mit', 'applied', 'visit in May')]
+        assert 'duke' not in fdb.db.store.docs[VIEW]['kb']
+
+    def test_expired_kb_rows_are_refetched(self, env, monkeypatch):
+        fdb, kb = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        monkeypatch.setattr(college_list, 'VIEW_KB_TTL_SECONDS', 0)
+        college_list.get_college_list(U)
+        assert kb.calls == [['mit'], ['mit']]
+
+
+class TestKbRefresh:
+    def test_moved_content_hash_rewrites_enrichment(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        changed = college_list.apply_kb_refresh(U, {
+            'mit': {'university_id': 'mit', 'acceptance_rate': 4, 'content_hash': 'h2'},
+            'duke': {'university_id': 'duke', 'content_hash': 'h9'},  # not on the list
+        })
+        assert changed == 1
+        assert college_list.get_college_list(U)[0]['acceptance_rate'] == 4
+        assert 'duke' not in fdb.db.store.docs[VIEW]['kb']
+
+    def test_unchanged_hash_writes_nothing(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        assert college_list.apply_kb_refresh(U, {'mit': {'content_hash': 'h1'}}) == 0
+
+
+class TestConsistencyCheck:
+    def test_consistent_after_mirrored_writes(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        fdb.save_college_fit(U, 'mit', {'fit_category': 'SAFETY', 'match_percentage': 90})
+        assert college_list.check_college_list_view(U) == \
+            {'missing': [], 'extra': [], 'mismatched': [], 'consistent': True}
+
+    def test_drift_is_reported_and_repaired(self, env):
+        fdb, _ = env
+        college_list.add_university_to_list(U, 'mit', {'university_name': 'MIT'})
+        # A write that bypassed FirestoreDB (e.g. a console edit).
+        fdb.db.store.docs[f'users/{U}/college_list/duke'] = {'university_name': 'Duke'}
+        fdb.db.store.docs[f'users/{U}/college_list/mit']['status'] = 'applied'
+        report = college_list.check_college_list_view(U, repair=True)
+        assert report['missing'] == ['items/duke'] and report['mismatched'] == ['items/mit']
+        assert report['consistent'] is False and report['repaired'] is True
+        assert college_list.check_college_list_view(U)['consistent'] is True
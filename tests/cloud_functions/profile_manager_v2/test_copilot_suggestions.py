@@ -0,0 +1,105 @@
+"""Tests for the cached essay copilot (copilot_suggestions.py).
+
+The model seam is `_generate` — patched to count calls and echo its input, so
+these cover windowing, the LRU and the stats without any LLM.
+"""
+import pytest
+
+import copilot_suggestions as cs
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    cs.reset()
+    yield
+    cs.reset()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    calls = []
+
+    def fake(prompt_text, window, action):
+        calls.append((prompt_text, window, action))
+        return [f"{action}:{window[-10:]}"]
+
+    monkeypatch.setattr(cs, '_generate', fake)
+    return calls
+
+
+class TestNormalizeWindow:
+    def test_whitespace_collapsed(self):
+        assert cs.normalize_window("  I  ran\n\nfast.  ") == "I ran fast."
+
+    def test_cut_at_cursor(self):
+        assert cs.normalize_window("first part|second part", cursor=10) == "first part"
+
+    def test_trailing_window_starts_on_a_word(self, monkeypatch):
+        monkeypatch.setattr(cs, 'WINDOW_CHARS', 12)
+        assert cs.normalize_window("alpha bravo charlie delta") == "delta"
+        assert cs.normalize_window("alpha bravo charlie deltas") == "deltas"
+
+    def test_empty(self):
+        assert cs.normalize_window(None) == ""
+
+
+class TestCache:
+    def test_repeat_and_trivially_different_text_hit_the_cache(self, model):
+        first = cs.suggest("Why us?", "I built a robot.", "suggest")
+        again = cs.suggest("Why us?", "I built a robot.", "suggest")
+        spaced = cs.suggest("Why us?", "I  built a robot.\n", "suggest")
+
+        assert len(model) == 1
+        assert first['cached'] is False
+        assert again['cached'] is True and spaced['cached'] is True
+        assert again['suggestions'] == first['suggestions']
+
+    def test_action_and_prompt_are_part_of_the_key(self, model):
+        cs.suggest("Why us?", "text", "suggest")
+        cs.suggest("Why us?", "text", "expand")
+        cs.suggest("Challenge?", "text", "suggest")
+        assert len(model) == 3
+
+    def test_unknown_action_treated_as_expand(self, model):
+        result = cs.suggest("p", "text", "rewrite")
+        assert result['type'] == 'expand'
+        assert cs.suggest("p", "text", "expand")['cached'] is True
+
+    def test_only_the_window_is_sent(self, model, monkeypatch):
+        monkeypatch.setattr(cs, 'WINDOW_CHARS', 20)
+        long_text = "opening paragraph " * 20 + "the newest sentence"
+        cs.suggest("p", long_text, "suggest")
+        assert model[0][1] == "the newest sentence"
+        # Edits far behind the window don't miss.
+        assert cs.suggest("p", "EDITED " + long_text, "suggest")['cached'] is True
+
+    def test_failures_are_not_cached(self, monkeypatch):
+        def boom(*_a):
+            raise RuntimeError("503 UNAVAILABLE")
+
+        monkeypatch.setattr(cs, '_generate', boom)
+        result = cs.suggest("p", "text", "suggest")
+        assert result['success'] is False
+        assert result['suggestions'] == []
+        assert cs.stats()['cache_entries'] == 0
+
+    def test_lru_evicts_least_recently_used(self, model, monkeypatch):
+        monkeypatch.setattr(cs, 'CACHE_SIZE', 2)
+        cs.suggest("p", "a", "suggest")
+        cs.suggest("p", "b", "suggest")
+        cs.suggest("p", "a", "suggest")        # touch a
+        cs.suggest("p", "c", "suggest")        # evicts b
+        assert cs.suggest("p", "a", "suggest")['cached'] is True
+        assert cs.suggest("p", "b", "suggest")['cached'] is False
+
+
+class TestStats:
+    def test_hit_rate_and_calls_saved(self, model):
+        cs.suggest("p", "a", "suggest")
+        cs.suggest("p", "a", "suggest")
+        cs.suggest("p", "a", "suggest")
+        cs.suggest("p", "b", "suggest")
+        s = cs.stats()
+        assert (s['requests'], s['hits'], s['gemini_calls']) == (4, 2, 2)
+        assert s['hit_rate'] == 0.5
+        assert s['gemini_calls_saved'] == 2
@@ -0,0 +1,323 @@
+"""Credit ledger: every balance change is one transaction — Increment on
+credits/data plus a credit_ledger/{idempotency_key} entry — so concurrent
+charges can't lose updates, retries can't double-charge, and the credits doc
+no longer grows with account age.
+
+Runs the real FirestoreDB.apply_credit_entry against a small in-memory
+Firestore whose transactions serialize on one lock and commit buffered
+writes (conftest stubs firestore.transactional to call fn then commit)."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+import credits as credits_mod
+import fit_billing
+import generation_billing
+from firestore_db import CREDIT_PROJECTION_FIELDS, FirestoreDB
+from google.cloud import firestore
+
+U = 'stu@example.com'
+
+
+class _Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Snap:
+    def __init__(self, data, reference=None):
+        self._data = data
+        self.exists = data is not None
+        self.reference = reference
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Store:
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+        self.transactions = []
+
+    def apply(self, path, data, merge=False):
+        current = dict(self.docs.get(path) or {}) if merge else {}
+        for key, value in data.items():
+            if isinstance(value, _Increment):
+                value = (current.get(key) or 0) + value.value
+            current[key] = value
+        self.docs[path] = current
+
+
+class _Doc:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Collection(self.store, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        return _Snap(self.store.docs.get(self.path), self)
+
+    def set(self, data, merge=False):
+        self.store.apply(self.path, data, merge=merge)
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+        self._order, self._limit = None, None
+
+    def document(self, doc_id):
+        return _Doc(self.store, f"{self.path}/{doc_id}")
+
+    def order_by(self, field, direction=None):
+        self._order = (field, direction == 'DESCENDING')
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def stream(self):
+        prefix = self.path + '/'
+        rows = [_Snap(d) for p, d in self.store.docs.items()
+                if p.startswith(prefix) and '/' not in p[len(prefix):]]
+        if self._order:
+            field, desc = self._order
+            rows.sort(key=lambda s: s.to_dict().get(field), reverse=desc)
+        return rows[:self._limit]
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref.path, data, merge))
+
+    def commit(self):
+        for path, data, merge in self.writes:
+            self.store.apply(path, data, merge=merge)
+
+
+class _Transaction(_Batch):
+    def __init__(self, store):
+        super().__init__(store)
+        self.reads = 0
+        store.lock.acquire()
+        store.transactions.append(self)
+
+    def get_all(self, refs):
+        self.reads += 1
+        return [_Snap(self.store.docs.get(ref.path), ref) for ref in refs]
+
+    def update(self, ref, data):
+        self.writes.append((ref.path, data, True))
+
+    def create(self, ref, data):
+        assert ref.path not in self.store.docs, 'create() on an existing ledger entry'
+        self.writes.append((ref.path, data, False))
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self.store.lock.release()
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Collection(self.store, name)
+
+    def transaction(self):
+        return _Transaction(self.store)
+
+    def batch(self):
+        return _Batch(self.store)
+
+
+CREDITS_PATH = f'users/{U}/credits/data'
+ENTITLEMENTS_PATH = f'users/{U}/entitlements/data'
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # Other modules in this directory rebind Increment at import time.
+    monkeypatch.setattr(firestore, 'Increment', _Increment)
+    fdb = FirestoreDB.__new__(FirestoreDB)
+    fdb.db = _Client()
+    fdb.db.store.docs[CREDITS_PATH] = {
+        'user_id': U, 'tier': 'free', 'credits_total': 5, 'credits_used': 0, 'credits_remaining': 5,
+    }
+    with patch.object(credits_mod, 'get_db', return_value=fdb):
+        yield fdb
+
+
+def _doc(db):
+    return db.db.store.docs[CREDITS_PATH]
+
+
+def _ledger(db):
+    prefix = CREDITS_PATH + '/credit_ledger/'
+    return {p[len(prefix):]: d for p, d in db.db.store.docs.items() if p.startswith(prefix)}
+
+
+class TestDeduct:
+    def test_deduction_updates_counters_and_writes_one_ledger_entry(self, db):
+        out = credits_mod.deduct_credit(U, 2, 'fit_analysis', idempotency_key='fit:duke:1')
+        assert out == {'success': True, 'credits_remaining': 3, 'credits_deducted': 2,
+                       'reason': 'fit_analysis', 'duplicate': False}
+        assert _doc(db)['credits_remaining'] == 3 and _doc(db)['credits_used'] == 2
+        assert 'credit_history' not in _doc(db)
+        entry, = _ledger(db).values()
+        assert entry['amount'] == -2 and entry['balance_after'] == 3
+        assert entry['reason'] == 'fit_analysis' and entry['idempotency_key'] == 'fit:duke:1'
+
+    def test_replayed_key_never_charges_twice(self, db):
+        credits_mod.deduct_credit(U, 1, 'fit_analysis', idempotency_key='fit:duke:1')
+        again = credits_mod.deduct_credit(U, 1, 'fit_analysis', idempotency_key='fit:duke:1')
+        assert again['success'] is True and again['duplicate'] is True
+        assert again['credits_deducted'] == 0 and again['credits_remaining'] == 4
+        assert _doc(db)['credits_remaining'] == 4 and len(_ledger(db)) == 1
+
+    def test_calls_without_a_key_are_distinct_charges(self, db):
+        credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        assert _doc(db)['credits_remaining'] == 3 and len(_ledger(db)) == 2
+
+    def test_insufficient_balance_writes_nothing(self, db):
+        out = credits_mod.deduct_credit(U, 6, 'fit_analysis')
+        assert out['success'] is False and out['error'] == 'Insufficient credits'
+        assert out['credits_remaining'] == 5
+        assert _doc(db)['credits_remaining'] == 5 and _ledger(db) == {}
+
+    def test_concurrent_charges_never_lose_updates(self, db):
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+            credits_mod.deduct_credit(U, 1, 'fit_analysis', idempotency_key=f'fit:{i}')))
+            for i in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sum(r['success'] for r in results) == 5
+        assert _doc(db)['credits_remaining'] == 0 and _doc(db)['credits_used'] == 5
+        assert len(_ledger(db)) == 5
+
+    def test_missing_credits_doc_is_initialized_then_charged(self, db):
+        del db.db.store.docs[CREDITS_PATH]
+        out = credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        assert out['success'] is True and out['credits_remaining'] == credits_mod.FREE_TIER_CREDITS - 1
+        assert db.db.store.docs[ENTITLEMENTS_PATH]['credits']['credits_remaining'] == out['credits_remaining']
+
+    def test_legacy_string_counters_are_rewritten_as_ints(self, db):
+        _doc(db).update({'credits_remaining': '5', 'credits_used': '0'})
+        out = credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        assert out['credits_remaining'] == 4
+        assert _doc(db)['credits_remaining'] == 4 and _doc(db)['credits_used'] == 1
+
+    def test_transaction_failure_is_retryable_and_writes_nothing(self, db):
+        with patch.object(db, 'apply_credit_entry', side_effect=RuntimeError('aborted')):
+            out = credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        assert out == {'success': False, 'error': 'credits_read_failed', 'retryable': True}
+        assert _doc(db)['credits_remaining'] == 5
+
+
+class TestProjection:
+    def test_charge_is_one_batched_read_and_mirrors_the_projection(self, db):
+        credits_mod.deduct_credit(U, 2, 'fit_analysis', idempotency_key='fit:duke:1')
+        txn, = db.db.store.transactions
+        assert txn.reads == 1
+        projected = db.db.store.docs[ENTITLEMENTS_PATH]['credits']
+        assert projected['credits_remaining'] == 3 and projected['credits_used'] == 2
+        assert projected['tier'] == 'free'
+
+    def test_projection_carries_only_balance_and_plan_fields(self, db):
+        _doc(db)['credit_history'] = [{'date': '2025-01-01', 'amount': -1, 'reason': 'old'}]
+        _doc(db)['created_at'] = '2025-01-01T00:00:00'
+        credits_mod.upgrade_subscription(U, plan_type='monthly', idempotency_key='sub_1')
+        projected = db.db.store.docs[ENTITLEMENTS_PATH]['credits']
+        assert set(projected) <= set(CREDIT_PROJECTION_FIELDS)
+        assert projected['tier'] == 'monthly' and projected['subscription_active'] is True
+        assert projected['credits_remaining'] == _doc(db)['credits_remaining']
+        assert 'credit_history' in _doc(db)  # the legacy array stays on credits/data
+
+    def test_projection_doc_id_is_the_normalized_email(self, db):
+        db.save_credits(' Stu@Example.com ', {'tier': 'free', 'credits_remaining': 5})
+        assert ENTITLEMENTS_PATH in db.db.store.docs
+
+    def test_free_reads_after_a_charge_cost_no_round_trip(self, db):
+        credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        with patch.object(db, 'get_entitlements', side_effect=AssertionError('read on a warm cache')):
+            assert credits_mod.get_user_credits(U)['credits_remaining'] == 4
+            assert credits_mod.check_credits_available(U, 1)['has_credits'] is True
+
+
+class TestGrants:
+    def test_add_credits_is_idempotent_per_payment(self, db):
+        first = credits_mod.add_credits(U, 10, 'credit_pack', idempotency_key='pi_123')
+        again = credits_mod.add_credits(U, 10, 'credit_pack', idempotency_key='pi_123')
+        assert first['credits_added'] == 10 and again['credits_added'] == 0
+        assert _doc(db)['credits_total'] == 15 and _doc(db)['credits_remaining'] == 15
+
+    def test_upgrade_sets_tier_and_grants_in_the_same_write(self, db):
+        out = credits_mod.upgrade_subscription(U, plan_type='season_pass', idempotency_key='sub_1')
+        assert out['success'] is True and out['credits_added'] == credits_mod.SEASON_PASS_CREDITS
+        doc = _doc(db)
+        assert doc['tier'] == 'season_pass' and doc['subscription_active'] is True
+        assert doc['credits_remaining'] == 5 + credits_mod.SEASON_PASS_CREDITS
+
+    def test_history_lists_ledger_then_legacy_entries(self, db):
+        _doc(db)['credit_history'] = [{'date': '2025-01-01', 'amount': -1, 'reason': 'old'}]
+        credits_mod.deduct_credit(U, 1, 'fit_analysis')
+        credits_mod.add_credits(U, 3, 'bonus')
+        history = credits_mod.get_credit_history(U)['history']
+        assert sorted(h['amount'] for h in history[:2]) == [-1, 3]
+        assert history[-1] == {'date': '2025-01-01', 'amount': -1, 'reason': 'old'}
+
+
+class TestBillingKeys:
+    def test_fit_charge_is_keyed_by_the_computed_fit(self):
+        payload = {'fit_analysis': {'calculated_at': '2026-10-18T10:00:00'}}
+        assert fit_billing.fit_charge_key({'university_id': 'duke'}, payload) == \
+            'fit_analysis:duke:2026-10-18T10:00:00'
+        assert fit_billing.fit_charge_key({'university_id': 'duke', 'idempotency_key': 'req-1'},
+                                          payload) == 'fit_analysis:duke:req-1'
+        assert fit_billing.fit_charge_key({'university_id': 'duke'}, {'fit_analysis': {}}) is None
+
+    def test_generation_charge_is_keyed_by_the_artifact(self):
+        payload = {'success': True, 'strategy': {'university_id': 'mit', 'generated_at': 't1'}}
+        assert generation_billing.generation_charge_key('major_strategy', payload) == 'major_strategy:mit:t1'
+        assert generation_billing.generation_charge_key('major_strategy', payload, 'req-9') == \
+            'major_strategy:mit:req-9'
+        assert generation_billing.generation_charge_key('major_map', {'success': True}, 'req-9',
+                                                        artifact_id='replaces:t0') == 'major_map:replaces:t0:req-9'
+        assert generation_billing.generation_charge_key('major_map', {'success': True}) is None
+
+    def test_one_client_key_reused_across_universities_charges_each(self, db):
+        def generate(university_id):
+            return lambda: ({'success': True, 'strategy': {'university_id': university_id,
+                                                           'generated_at': 't'}}, 200)
+
+        for university_id in ('duke', 'mit'):
+            payload, status = generation_billing.run_billed_generation(
+                U, 'major_strategy', generate(university_id),
+                idempotency_key='same-key', artifact_id=university_id)
+            assert status == 200
+
+        assert _doc(db)['credits_remaining'] == 3 and len(_ledger(db)) == 2
+
+    def test_one_client_key_reused_across_fits_charges_each(self, db):
+        payload = {'fit_analysis': {'calculated_at': 't'}}
+        for university_id in ('duke', 'mit'):
+            key = fit_billing.fit_charge_key({'university_id': university_id,
+                                              'idempotency_key': 'same-key'}, payload)
+            assert credits_mod.deduct_credit(U, 1, 'fit_analysis', idempotency_key=key)['duplicate'] is False
+        assert _doc(db)['credits_remaining'] == 3
@@ -12,6 +12,9 @@ class _RaisingDB:
     def __init__(self):
         self.saves = []
 
+    def get_entitlements(self, user_id):
+        raise RuntimeError('firestore read blip')
+
     def get_credits(self, user_id):
         raise RuntimeError('firestore read blip')
 
@@ -21,6 +24,9 @@ class _RaisingDB:
 
 
 class _EmptyDB(_RaisingDB):
+    def get_entitlements(self, user_id):
+        return None   # projection not built yet
+
     def get_credits(self, user_id):
         return None   # confirmed-missing document
 
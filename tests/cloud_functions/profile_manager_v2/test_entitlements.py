@@ -0,0 +1,111 @@
+"""Entitlement cache (entitlements.py): free credit reads go through a
+short-TTL per-instance cache of the users/{uid}/entitlements/data
+projection; misses and would-be denials always re-read."""
+
+from unittest.mock import patch
+
+import pytest
+
+import credits as credits_mod
+import entitlements
+
+U = 'stu@example.com'
+
+
+class _FakeDB:
+    def __init__(self, projection=None, credits=None):
+        self.projection = projection
+        self.credits = credits
+        self.reads = []
+        self.backfills = []
+
+    def get_entitlements(self, user_id):
+        self.reads.append('entitlements')
+        return dict(self.projection) if self.projection else None
+
+    def get_credits(self, user_id):
+        self.reads.append('credits')
+        return dict(self.credits) if self.credits else None
+
+    def save_entitlements(self, user_id, data):
+        self.backfills.append(data)
+        return True
+
+    def save_credits(self, user_id, data):
+        self.credits = dict(data)
+        return True
+
+
+def _balance(remaining, **extra):
+    return {'tier': 'free', 'credits_total': 3, 'credits_used': 3 - remaining,
+            'credits_remaining': remaining, **extra}
+
+
+@pytest.fixture
+def use_db(monkeypatch):
+    def _use(db):
+        monkeypatch.setattr(credits_mod, 'get_db', lambda: db)
+        return db
+    return _use
+
+
+def test_warm_reads_cost_no_round_trip(use_db):
+    db = use_db(_FakeDB(projection={'credits': _balance(2), 'purchases': {'subscription_active': False}}))
+    for _ in range(3):
+        assert credits_mod.get_user_credits(U)['credits_remaining'] == 2
+    assert db.reads == ['entitlements']
+    view = entitlements.get_entitlements(U)
+    assert view['purchases'] == {'subscription_active': False}
+
+
+def test_entries_expire_after_the_ttl(use_db, monkeypatch):
+    db = use_db(_FakeDB(projection={'credits': _balance(2)}))
+    credits_mod.get_user_credits(U)
+    monkeypatch.setattr(entitlements, 'ENTITLEMENT_CACHE_TTL_S', 0)
+    credits_mod.get_user_credits(U)
+    assert db.reads == ['entitlements', 'entitlements']
+
+
+def test_pre_projection_user_is_read_once_and_backfilled(use_db):
+    db = use_db(_FakeDB(projection={'credits': {'tier': 'free'}}, credits=_balance(1)))
+    assert credits_mod.get_user_credits(U)['credits_remaining'] == 1
+    assert db.reads == ['entitlements', 'credits']
+    assert db.backfills == [{'credits': _balance(1)}]
+
+
+def test_backfill_leaves_the_legacy_history_behind(use_db):
+    legacy = _balance(1, credit_history=[{'amount': -1}], created_at='2025-01-01')
+    db = use_db(_FakeDB(credits=legacy))
+    assert 'credit_history' not in credits_mod.get_user_credits(U)
+    assert db.backfills == [{'credits': _balance(1)}]
+
+
+def test_new_user_miss_is_never_cached(use_db):
+    db = use_db(_FakeDB())
+    assert credits_mod.get_user_credits(U)['credits_remaining'] == credits_mod.FREE_TIER_CREDITS
+    db.credits = {'tier': 'monthly', 'credits_total': 20, 'credits_used': 0,
+                  'credits_remaining': 20}                   # paid on another instance
+    assert credits_mod.get_user_credits(U)['credits_remaining'] == 20
+
+
+def test_denial_rereads_before_refusing(use_db):
+    db = use_db(_FakeDB(projection={'credits': _balance(0)}))
+    assert credits_mod.check_credits_available(U, 1)['has_credits'] is False
+    db.projection = {'credits': _balance(10)}                # credit pack bought via payments
+    out = credits_mod.check_credits_available(U, 1)
+    assert out['has_credits'] is True and out['credits_remaining'] == 10
+
+
+def test_read_failure_stays_retryable_and_uncached(use_db):
+    db = use_db(_FakeDB(projection={'credits': _balance(2)}))
+    with patch.object(db, 'get_entitlements', side_effect=RuntimeError('blip')):
+        assert credits_mod.get_user_credits(U)['error'] == 'credits_read_failed'
+    assert credits_mod.get_user_credits(U)['credits_remaining'] == 2
+
+
+def test_partial_note_drops_the_entry(use_db):
+    db = use_db(_FakeDB(projection={'credits': _balance(2)}))
+    credits_mod.get_user_credits(U)
+    entitlements.note_credits(U, {'tier': 'free'})
+    credits_mod.get_user_credits(U)
+    assert db.reads == ['entitlements', 'entitlements']
@@ -0,0 +1,132 @@
+"""Tests for essay_copilot.load_essay_context — the concurrent context wave
+behind the starter / hook-context / outline / chat endpoints, with the KB
+profile memoized per university and the student's docs always read fresh.
+
+The three fetchers are patched at their module seams; the KB fetcher records
+the sections it was asked for.
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import essay_copilot
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    essay_copilot.reset_essay_kb_cache()
+    yield
+    essay_copilot.reset_essay_kb_cache()
+
+
+class _Seams:
+    """Fake profile / fit / KB reads. Each blocks until `parties` reads have
+    started, so a sequential loader would deadlock (and time out). Pass
+    parties=2 when the KB profile is already memoized."""
+
+    def __init__(self, fits=None, kb_found=True, profile=None, parties=3):
+        self.fits = fits if fits is not None else {}
+        self.university = None if not kb_found else {
+            'university_id': 'university_of_michigan', 'resolved_from': 'umich',
+            'profile': {'metadata': {'official_name': 'University of Michigan'}}}
+        self.profile = profile if profile is not None else {'gpa': 3.9}
+        self.calls = []
+        self.kb_sections = []
+        self._barrier = threading.Barrier(parties, timeout=2)
+
+    def student(self, email):
+        self.calls.append(('profile', email))
+        self._barrier.wait()
+        return self.profile
+
+    def fit(self, email, university_id):
+        self.calls.append(('fit', university_id))
+        if len([c for c in self.calls if c[0] == 'fit']) == 1:
+            self._barrier.wait()
+        return self.fits.get(university_id)
+
+    def kb(self, university_id, max_retries=3, sections=None):
+        self.calls.append(('kb', university_id))
+        self.kb_sections.append(sections)
+        self._barrier.wait()
+        return self.university
+
+    def patch(self):
+        return (patch.object(essay_copilot, 'get_student_profile', side_effect=self.student),
+                patch.object(essay_copilot, 'get_fit_analysis', side_effect=self.fit),
+                patch.object(essay_copilot, 'fetch_university_profile', side_effect=self.kb))
+
+
+def _load(seams, user='s@x.com', uni='umich'):
+    p1, p2, p3 = seams.patch()
+    with p1, p2, p3:
+        return essay_copilot.load_essay_context(user, uni)
+
+
+def test_reads_run_concurrently_and_kb_is_projected():
+    seams = _Seams(fits={'umich': {'fit_category': 'TARGET'}})
+    ctx = _load(seams)
+    assert ctx['fit_analysis'] == {'fit_category': 'TARGET'}
+    assert ctx['student_profile'] == {'gpa': 3.9}
+    assert seams.kb_sections == [essay_copilot.ESSAY_KB_SECTIONS]
+    assert 'application_process' in essay_copilot.ESSAY_KB_SECTIONS
+    assert 'strategic_profile' in essay_copilot.ESSAY_KB_SECTIONS
+
+
+def test_fit_retried_under_the_canonical_id_the_kb_resolved():
+    seams = _Seams(fits={'university_of_michigan': {'fit_category': 'REACH'}})
+    ctx = _load(seams)
+    assert ctx['university_id'] == 'university_of_michigan'
+    assert ctx['fit_analysis'] == {'fit_category': 'REACH'}
+    assert [c for c in seams.calls if c[0] == 'fit'] == [('fit', 'umich'), ('fit', 'university_of_michigan')]
+
+
+def test_kb_profile_is_memoized_per_university_but_student_docs_are_not():
+    first = _load(_Seams())
+    seams = _Seams(parties=2, profile={'gpa': 4.0}, fits={'umich': {'fit_category': 'SAFETY'}})
+    ctx = _load(seams, user='t@x.com')
+
+    assert not [c for c in seams.calls if c[0] == 'kb']
+    assert ctx['university_profile'] is first['university_profile']
+    assert ctx['student_profile'] == {'gpa': 4.0}
+    assert ctx['fit_analysis'] == {'fit_category': 'SAFETY'}
+
+
+def test_a_fit_computed_after_the_first_load_is_seen_at_once():
+    assert _load(_Seams())['fit_analysis'] is None
+    later = _Seams(parties=2, fits={'university_of_michigan': {'fit_category': 'REACH'}})
+    assert _load(later)['fit_analysis'] == {'fit_category': 'REACH'}
+
+
+def test_kb_memo_expires(monkeypatch):
+    _load(_Seams())
+    monkeypatch.setattr(essay_copilot, 'ESSAY_KB_TTL_SECONDS', 0)
+    time.sleep(0.001)
+    seams = _Seams()
+    _load(seams)
+    assert [c for c in seams.calls if c[0] == 'kb'] == [('kb', 'umich')]
+
+
+def test_kb_miss_is_not_memoized():
+    ctx = _load(_Seams(kb_found=False))
+    assert ctx['university_profile'] is None
+    assert ctx['university_id'] == 'umich'
+    assert essay_copilot._kb_profiles == {}
+
+
+def test_sections_are_sent_to_the_kb():
+    captured = {}
+
+    class _Resp:
+        def json(self):
+            return {'success': True, 'university': {'university_id': 'mit'}}
+
+    def fake_get(url, params=None, timeout=None):
+        captured.update(params)
+        return _Resp()
+
+    with patch.object(essay_copilot.requests, 'get', side_effect=fake_get):
+        essay_copilot.fetch_university_profile('mit', sections=('metadata', 'strategic_profile'))
+    assert captured == {'university_id': 'mit', 'sections': 'metadata,strategic_profile'}
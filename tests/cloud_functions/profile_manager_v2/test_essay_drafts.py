@@ -0,0 +1,238 @@
+"""Essay drafts: each save stores a splice delta against the head (a fresh
+snapshot every SNAPSHOT_EVERY deltas or when an edit rewrites most of the
+essay), listing is metadata only, and any version's text is rebuilt from its
+latest snapshot + deltas."""
+
+from unittest.mock import patch
+
+import pytest
+
+import essay_copilot
+import essay_drafts
+
+U = 'stu@example.com'
+ESSAY = ("I grew up in a small town where the library closed at five. " * 20).strip()
+
+
+class _FakeDB:
+    """The four FirestoreDB essay-draft methods over plain dicts."""
+
+    def __init__(self):
+        self.headers, self.revisions, self.writes = {}, {}, []
+        self.before_write, self.conflicts = None, 0
+
+    def get_essay_draft_header(self, user_id, draft_id):
+        h = self.headers.get(draft_id)
+        return dict(h) if h else None
+
+    def list_essay_draft_headers(self, user_id, university_id=None):
+        return [{'draft_id': k, 'university_id': h['university_id'], 'version': h['version'],
+                 'updated_at': h['updated_at'], 'word_count': h['word_count']}
+                for k, h in self.headers.items()
+                if not university_id or h['university_id'] == university_id]
+
+    def get_essay_draft_revisions(self, user_id, draft_id, from_seq):
+        revs = self.revisions.get(draft_id, {})
+        return [revs[s] for s in sorted(revs) if s >= from_seq]
+
+    def write_essay_draft(self, user_id, draft_id, header, revision=None, prune_seqs=(),
+                          expected_head=None):
+        if self.before_write:
+            hook, self.before_write = self.before_write, None
+            hook()
+        current = self.headers.get(draft_id)
+        if (current['head'] if current else None) != expected_head:
+            self.conflicts += 1
+            return 'conflict'
+        self.writes.append((header, revision, list(prune_seqs)))
+        revs = self.revisions.setdefault(draft_id, {})
+        if revision is not None:
+            assert revision['seq'] not in revs, 'revision overwritten'
+            revs[revision['seq']] = dict(revision)
+        for seq in prune_seqs:
+            revs.pop(seq, None)
+        self.headers.setdefault(draft_id, {}).update(header)
+        return 'written'
+
+
+@pytest.fixture
+def db():
+    fake = _FakeDB()
+    essay_drafts.reset_cache()
+    with patch.object(essay_drafts, 'get_db', return_value=fake):
+        yield fake
+    essay_drafts.reset_cache()
+
+
+def _save(text, version=0, **kw):
+    return essay_copilot.save_essay_draft(U, 'mit', 0, 'Why MIT?', text, version=version, **kw)
+
+
+class TestDeltas:
+    @pytest.mark.parametrize('old,new', [
+        ('', 'hello'), ('hello', ''), ('abc', 'abXc'), ('aaaa', 'aa'), ('same', 'same'),
+        ('the cat sat', 'the dog sat'), ('xyz', 'xyzxyz'),
+    ])
+    def test_round_trip(self, old, new):
+        delta = essay_drafts.make_delta(old, new)
+        assert (delta is None) == (old == new)
+        if delta is not None:
+            assert essay_drafts.apply_delta(old, delta) == new
+
+    def test_delta_is_the_size_of_the_edit(self):
+        delta = essay_drafts.make_delta(ESSAY, ESSAY.replace('small', 'tiny', 1))
+        assert delta['ins'] == 'tiny' and delta['del'] == len('small')
+
+
+class TestSave:
+    def test_first_save_is_a_snapshot_then_autosaves_are_deltas(self, db):
+        assert _save(ESSAY)['revision'] == 'snapshot'
+        out = _save(ESSAY + ' Then it moved.')
+        assert out['success'] is True and out['revision'] == 'delta'
+        header, revision, _ = db.writes[-1]
+        assert revision['ins'] == ' Then it moved.' and 'snapshot' not in revision
+        # Unchanged metadata isn't rewritten.
+        assert 'prompt_text' not in header and 'notes' not in header
+
+    def test_metadata_only_save_writes_no_revision(self, db):
+        _save(ESSAY)
+        assert _save(ESSAY, notes=['idea'])['revision'] is None
+        header, revision, _ = db.writes[-1]
+        assert revision is None and header['notes'] == ['idea']
+
+    def test_resnapshots_and_prunes_the_old_chain(self, db, monkeypatch):
+        monkeypatch.setattr(essay_drafts, 'SNAPSHOT_EVERY', 3)
+        text = ESSAY
+        for i in range(5):  # snapshot, 3 deltas, then a re-snapshot
+            text += f' {i}'
+            _save(text)
+        _, revision, pruned = db.writes[-1]
+        assert 'snapshot' in revision and pruned == [0, 1, 2, 3]
+        assert sorted(db.revisions['mit__prompt_0_v0']) == [4]
+
+    def test_rewrite_of_most_of_the_essay_is_a_snapshot(self, db):
+        _save(ESSAY)
+        assert _save('Completely new essay.')['revision'] == 'snapshot'
+
+    def test_header_read_failure_fails_the_save_without_writing(self, db):
+        with patch.object(db, 'get_essay_draft_header', side_effect=RuntimeError('blip')):
+            out = _save(ESSAY)
+        assert out['success'] is False and db.writes == []
+
+
+    def test_interleaved_saves_never_share_a_seq(self, db):
+        _save(ESSAY)
+        # Tab B saves between tab A's header read and A's write.
+        db.before_write = lambda: _save(ESSAY + ' From tab B.')
+        out = _save(ESSAY + ' From tab A.')
+
+        assert out['success'] is True and db.conflicts == 1
+        assert sorted(db.revisions['mit__prompt_0_v0']) == [0, 1, 2]
+        essay_drafts.reset_cache()
+        assert essay_copilot.get_essay_draft(U, 'mit', 0, 0)['draft']['draft_text'] == \
+            ESSAY + ' From tab A.'
+
+    def test_persistent_contention_fails_the_save(self, db, monkeypatch):
+        _save(ESSAY)
+        monkeypatch.setattr(db, 'write_essay_draft', lambda *a, **k: 'conflict')
+        assert _save(ESSAY + ' More.')['success'] is False
+
+
+class TestRead:
+    def test_any_version_is_rebuilt_on_a_cold_instance(self, db):
+        _save(ESSAY)
+        _save(ESSAY + ' A.')
+        _save('Second version.', version=1, version_name='Version 2')
+        _save(ESSAY + ' A. B.')
+        essay_drafts.reset_cache()
+        main = essay_copilot.get_essay_draft(U, 'mit', 0, 0)['draft']
+        assert main['draft_text'] == ESSAY + ' A. B.' and main['version_name'] == 'Main Draft'
+        assert 'head' not in main
+        assert essay_copilot.get_essay_draft(U, 'mit', 0, 1)['draft']['draft_text'] == 'Second version.'
+
+    def test_missing_version_is_none(self, db):
+        assert essay_copilot.get_essay_draft(U, 'mit', 0, 7) == {'success': True, 'draft': None}
+
+    def test_listing_is_metadata_only_and_scoped(self, db):
+        _save(ESSAY)
+        essay_copilot.save_essay_draft(U, 'duke', 0, 'Why Duke?', 'Blue devils.')
+        out = essay_copilot.get_essay_drafts(U, 'mit')
+        assert [d['draft_id'] for d in out['drafts']] == ['mit__prompt_0_v0']
+        assert all('draft_text' not in d for d in out['drafts'])
+
+
+class _Snap:
+    def __init__(self, data):
+        self._data, self.exists = data, data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Ref:
+    def __init__(self, docs, path):
+        self.docs, self.path = docs, path
+
+    def collection(self, name):
+        return _Ref(self.docs, f"{self.path}/{name}")
+
+    def document(self, doc_id):
+        return _Ref(self.docs, f"{self.path}/{doc_id}")
+
+    def get(self, transaction=None):
+        return _Snap(self.docs.get(self.path))
+
+
+class _Txn:
+    def __init__(self, docs):
+        self.docs, self.ops = docs, []
+
+    def create(self, ref, data):
+        self.ops.append(('create', ref.path, data))
+
+    def delete(self, ref):
+        self.ops.append(('delete', ref.path, None))
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(('set', ref.path, data))
+
+    def commit(self):
+        for op, path, data in self.ops:
+            if op == 'create':
+                assert path not in self.docs, 'create() on an existing revision'
+                self.docs[path] = dict(data)
+            elif op == 'delete':
+                self.docs.pop(path, None)
+            else:
+                self.docs[path] = {**self.docs.get(path, {}), **data}
+
+
+class _Client:
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return _Ref(self.docs, name)
+
+    def transaction(self):
+        return _Txn(self.docs)
+
+
+class TestFirestoreWrite:
+    @pytest.fixture
+    def fdb(self):
+        from firestore_db import FirestoreDB
+        fdb = FirestoreDB.__new__(FirestoreDB)
+        fdb.db = _Client()
+        return fdb
+
+    def test_write_is_a_compare_and_set_on_the_head(self, fdb):
+        assert fdb.write_essay_draft(U, 'd', {'head': 0}, {'seq': 0, 'snapshot': 'a'}) == 'written'
+        # A second "first save" and a stale head both lose instead of overwriting.
+        assert fdb.write_essay_draft(U, 'd', {'head': 0}, {'seq': 0, 'snapshot': 'b'}) == 'conflict'
+        assert fdb.write_essay_draft(U, 'd', {'head': 1}, {'seq': 1, 'at': 1, 'del': 0, 'ins': 'x'},
+                                     expected_head=0) == 'written'
+        assert fdb.write_essay_draft(U, 'd', {'head': 1}, {'seq': 1, 'at': 1, 'del': 0, 'ins': 'y'},
+                                     expected_head=0) == 'conflict'
+        revs = {p.rsplit('/', 1)[1]: d for p, d in fdb.db.docs.items() if '/revisions/' in p}
+        assert revs['000000']['snapshot'] == 'a' and revs['000001']['ins'] == 'x'
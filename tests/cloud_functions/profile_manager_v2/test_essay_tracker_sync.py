@@ -0,0 +1,243 @@
+"""Incremental essay tracker sync (essay_tracker_sync.py).
+
+A sync diffs the college list against users/{uid}/essay_tracker_sync/state,
+fetches only new / aged schools in one section-projected KB batch call, and
+commits new tracker entries plus the marker in one batch. Runs the real
+FirestoreDB methods against a small in-memory Firestore that counts reads,
+get_all calls and batch commits.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+import essay_tracker_sync as sync
+from firestore_db import FirestoreDB
+
+U = 'stu@example.com'
+STATE = f'users/{U}/essay_tracker_sync/state'
+TRACKER = f'users/{U}/essay_tracker/'
+
+
+class _Snap:
+    def __init__(self, doc_id, data):
+        self.id, self._data = doc_id, data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Doc:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Collection(self.store, f"{self.path}/{name}")
+
+    def get(self):
+        self.store.reads.append(self.path)
+        return _Snap(self.path.rsplit('/', 1)[1], self.store.docs.get(self.path))
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def document(self, doc_id):
+        return _Doc(self.store, f"{self.path}/{doc_id}")
+
+    def stream(self):
+        self.store.reads.append(self.path)
+        prefix = self.path + '/'
+        return [_Snap(p[len(prefix):], d) for p, d in sorted(self.store.docs.items())
+                if p.startswith(prefix) and '/' not in p[len(prefix):]]
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store, self.ops = store, []
+
+    def set(self, ref, data):
+        self.ops.append((ref.path, dict(data)))
+
+    def commit(self):
+        self.store.commits += 1
+        self.store.docs.update(self.ops)
+
+
+class _Store:
+    def __init__(self):
+        self.docs, self.reads, self.get_all_calls, self.commits = {}, [], [], 0
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Collection(self.store, name)
+
+    def batch(self):
+        return _Batch(self.store)
+
+    def get_all(self, refs, field_paths=None):
+        self.store.get_all_calls.append([r.path for r in refs])
+        return [_Snap(r.path.rsplit('/', 1)[1], self.store.docs.get(r.path)) for r in refs]
+
+
+class _KB:
+    """Stand-in for fit_staleness.batch_fetch_universities."""
+
+    def __init__(self, prompts=None):
+        self.prompts = prompts or {}
+        self.hashes = {}
+        self.calls = []
+
+    def __call__(self, university_ids, sections=None):
+        self.calls.append((list(university_ids), sections))
+        return {uid: {'university_id': uid, 'data_year': 2026,
+                      'content_hash': self.hashes.get(uid, 'h1'),
+                      'profile': {'application_process': {'essay_prompts': [
+                          {'prompt': p, 'word_limit': 250} for p in self.prompts.get(uid, [])]}}}
+                for uid in university_ids if uid in self.prompts}
+
+
+@pytest.fixture
+def env():
+    fdb = FirestoreDB.__new__(FirestoreDB)
+    fdb.db = _Client()
+    with patch.object(sync, 'get_db', return_value=fdb):
+        yield fdb
+
+
+def _add(fdb, *schools):
+    for uid, name in schools:
+        fdb.db.store.docs[f'users/{U}/college_list/{uid}'] = {'university_name': name}
+
+
+def _tracker(fdb):
+    return {p[len(TRACKER):]: d for p, d in fdb.db.store.docs.items() if p.startswith(TRACKER)}
+
+
+def test_full_sync_is_one_kb_call_and_one_batch(env):
+    schools = [(f'school_{i}', f'School {i}') for i in range(15)]
+    _add(env, *schools)
+    kb = _KB({uid: [f'Why {uid}?', f'Tell us about {uid}.'] for uid, _ in schools})
+
+    result = sync.sync_essay_tracker(U, full=True, fetch_batch=kb)
+
+    assert result['success'] is True
+    assert len(kb.calls) == 1
+    assert sorted(kb.calls[0][0]) == sorted(uid for uid, _ in schools)
+    assert kb.calls[0][1] == ['application_process']
+    assert env.db.store.commits == 1
+    assert len(env.db.store.get_all_calls) == 1
+    assert len(_tracker(env)) == 30 and result['total_essays'] == 30
+    assert set(env.db.store.docs[STATE]['schools']) == {uid for uid, _ in schools}
+
+
+def test_resync_with_unchanged_list_touches_nothing(env):
+    _add(env, ('mit', 'MIT'))
+    kb = _KB({'mit': ['Why MIT?']})
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    commits = env.db.store.commits
+
+    result = sync.sync_essay_tracker(U, fetch_batch=kb)
+
+    assert len(kb.calls) == 1
+    assert env.db.store.commits == commits
+    assert result['schools_fetched'] == 0 and result['total_essays'] == 1
+
+
+def test_only_new_schools_are_fetched(env):
+    _add(env, ('mit', 'MIT'))
+    kb = _KB({'mit': ['Why MIT?'], 'duke': ['Why Duke?']})
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    _add(env, ('duke', 'Duke'))
+
+    result = sync.sync_essay_tracker(U, fetch_batch=kb)
+
+    assert kb.calls[1][0] == ['duke']
+    assert env.db.store.get_all_calls[-1] == [TRACKER + FirestoreDB.essay_tracker_id(
+        {'university_id': 'duke', 'prompt': 'Why Duke?'})]
+    assert result['total_essays'] == 2
+
+
+def test_existing_entries_are_not_overwritten(env):
+    _add(env, ('mit', 'MIT'))
+    essay_id = FirestoreDB.essay_tracker_id({'university_id': 'mit', 'prompt': 'Why MIT?'})
+    env.db.store.docs[TRACKER + essay_id] = {'status': 'drafting', 'content': 'my draft'}
+
+    sync.sync_essay_tracker(U, fetch_batch=_KB({'mit': ['Why MIT?', 'Community?']}))
+
+    tracker = _tracker(env)
+    assert tracker[essay_id]['content'] == 'my draft'
+    assert len(tracker) == 2
+    # Streamed once, for the response — not to diff.
+    assert env.db.store.reads.count(TRACKER.rstrip('/')) == 1
+
+
+def test_aged_school_with_unchanged_kb_is_restamped_only(env):
+    _add(env, ('mit', 'MIT'))
+    kb = _KB({'mit': ['Why MIT?']})
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    old = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    env.db.store.docs[STATE]['schools']['mit']['checked_at'] = old
+    get_alls = len(env.db.store.get_all_calls)
+
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    assert len(kb.calls) == 2
+    assert len(env.db.store.get_all_calls) == get_alls  # no prompts re-read
+    assert env.db.store.docs[STATE]['schools']['mit']['checked_at'] != old
+
+    # A KB edit on the next re-check does pick up new prompts.
+    kb.prompts['mit'].append('A new prompt')
+    kb.hashes['mit'] = 'h2'
+    result = sync.sync_essay_tracker(U, full=True, fetch_batch=kb)
+    assert result['total_essays'] == 2
+
+
+def test_kb_miss_is_retried_next_sync(env):
+    _add(env, ('mit', 'MIT'), ('ghost', 'Ghost U'))
+    kb = _KB({'mit': ['Why MIT?']})
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    assert 'ghost' not in env.db.store.docs[STATE]['schools']
+
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    assert kb.calls[1][0] == ['ghost']
+
+
+def test_resolved_slug_maps_back_to_the_listed_id(env):
+    _add(env, ('umich', 'University of Michigan'))
+
+    def kb(ids, sections=None):
+        return {'university_of_michigan': {
+            'university_id': 'university_of_michigan', 'resolved_from': 'umich',
+            'data_year': 2026, 'content_hash': 'h',
+            'profile': {'application_process': {'essay_prompts': [{'prompt': 'Why Michigan?'}]}}}}
+
+    sync.sync_essay_tracker(U, fetch_batch=kb)
+    assert [d['university_id'] for d in _tracker(env).values()] == ['umich']
+    assert 'umich' in env.db.store.docs[STATE]['schools']
+
+
+def test_uc_schools_share_the_piqs_without_a_kb_call(env):
+    _add(env, ('university_of_california_los_angeles', 'University of California, Los Angeles'),
+         ('university_of_california_berkeley', 'University of California, Berkeley'))
+    kb = _KB()
+
+    result = sync.sync_essay_tracker(U, fetch_batch=kb)
+
+    assert kb.calls == []
+    assert result['total_essays'] == 8
+    names = {d['university_name'] for d in _tracker(env).values()}
+    assert names == {'UC Application (UC Berkeley, UCLA)'}
+    assert env.db.store.docs[STATE]['uc_schools'] == ['UC Berkeley', 'UCLA']
+
+
+def test_empty_list(env):
+    result = sync.sync_essay_tracker(U, fetch_batch=_KB())
+    assert result == {'success': True, 'message': 'No colleges in list',
+                      'essays_synced': 0, 'schools_fetched': 0, 'essays': []}
@@ -26,9 +26,10 @@ def _run(body, *, cached=None, has_credits=True, remaining=5,
         return {'has_credits': has_credits, 'credits_remaining': remaining,
                 'credits_needed': needed}
 
-    def fake_deduct(user_email, count, reason):
+    def fake_deduct(user_email, count, reason, idempotency_key=None):
         calls['deduct'] += 1
         calls['deduct_args'] = (user_email, count, reason)
+        calls['deduct_key'] = idempotency_key
         return {'success': True, 'credits_remaining': remaining - count,
                 'credits_deducted': count, 'reason': reason}
 
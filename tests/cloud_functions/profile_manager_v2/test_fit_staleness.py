@@ -153,6 +153,41 @@ class TestClassifyKbChanges:
         assert entry['changes'][0]['severity'] == 'minor'
 
 
+class TestSameCycleRefresh:
+    """KB content_hash (incremental refresh) within one data_year."""
+
+    def _fit_at(self, content_hash, **kw):
+        source = _uni(**kw)
+        source['content_hash'] = content_hash
+        fit = {'university_id': 'northeastern', 'fit_category': 'TARGET'}
+        fit.update(fs.build_kb_provenance(source))
+        return fit
+
+    def _current(self, content_hash, **kw):
+        uni = _uni(**kw)
+        uni['content_hash'] = content_hash
+        return uni
+
+    def test_provenance_stamps_content_hash(self):
+        assert self._fit_at('h1')['kb_content_hash'] == 'h1'
+
+    def test_matching_hash_is_current(self):
+        assert fs.classify_kb_changes(self._fit_at('h1'), self._current('h1')) is None
+
+    def test_refresh_that_moves_an_input_is_reported(self):
+        entry = fs.classify_kb_changes(self._fit_at('h1', rate=35.2),
+                                       self._current('h2', rate=20.0))
+        assert [c['field'] for c in entry['changes']] == ['acceptance_rate']
+        assert entry['fit_kb_year'] == entry['current_kb_year'] == 2026
+
+    def test_refresh_of_unrelated_sections_is_silent(self):
+        assert fs.classify_kb_changes(self._fit_at('h1'), self._current('h2')) is None
+
+    def test_fit_without_hash_keeps_year_only_rule(self):
+        fit = _fit(kb_year=2026, rate=10.0)
+        assert fs.classify_kb_changes(fit, self._current('h2', rate=35.2)) is None
+
+
 class TestGetKbUpdates:
     def test_batches_and_classifies(self):
         fits = [_fit(rate=44.0), {'university_id': 'ghost_university'}]
@@ -0,0 +1,108 @@
+"""Extracted-text cache in gcs_storage: stored under the owner's prefix, tied
+to the bytes it came from, removed with the document and by the profile
+reset, and never listed as one of the user's files.
+
+google.cloud.storage isn't installed here; the bucket is an in-memory fake
+and the module is loaded from source under a private name so the stubs other
+tests register for `gcs_storage` don't interfere.
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+SOURCE = Path(__file__).resolve().parents[3] / "cloud_functions" / "profile_manager_v2" / "gcs_storage.py"
+
+_cloud = sys.modules["google.cloud"]  # stubbed by conftest
+if not hasattr(_cloud, "storage"):
+    _cloud.storage = types.SimpleNamespace(Client=object)
+
+_spec = importlib.util.spec_from_file_location("gcs_storage_under_test", SOURCE)
+gcs = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gcs)
+
+U = "stu@example.com"
+
+
+class _Blob:
+    def __init__(self, bucket, name):
+        self.bucket, self.name = bucket, name
+        self.metadata = None
+        self.size, self.content_type, self.updated = 0, None, None
+
+    def exists(self):
+        return self.name in self.bucket.blobs
+
+    def delete(self):
+        del self.bucket.blobs[self.name]
+
+    def upload_from_string(self, data, content_type=None):
+        self.size, self.content_type = len(data), content_type
+        self.bucket.blobs[self.name] = (data, self.metadata)
+
+    def download_as_bytes(self):
+        return self.bucket.blobs[self.name][0]
+
+
+class _Bucket:
+    def __init__(self):
+        self.blobs = {}  # name -> (bytes, metadata)
+
+    def blob(self, name):
+        return _Blob(self, name)
+
+    def get_blob(self, name):
+        if name not in self.blobs:
+            return None
+        blob = _Blob(self, name)
+        blob.metadata = self.blobs[name][1]
+        return blob
+
+    def list_blobs(self, prefix=""):
+        return [self.get_blob(n) for n in sorted(self.blobs) if n.startswith(prefix)]
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    b = _Bucket()
+    monkeypatch.setattr(gcs, "get_storage_bucket", lambda: b)
+    return b
+
+
+def _upload(bucket, user_id, filename, data=b"%PDF"):
+    bucket.blob(gcs.get_storage_path(user_id, filename)).upload_from_string(data)
+
+
+def test_cache_lives_under_the_users_prefix(bucket):
+    assert gcs.save_cached_extracted_text(U, "t.pdf", "h1", "GPA 4.0")
+    assert list(bucket.blobs) == [f"{U}/_extracted_text/v1/t.pdf.txt"]
+    assert gcs.get_cached_extracted_text(U, "t.pdf", "h1") == "GPA 4.0"
+
+
+def test_cache_for_other_bytes_is_a_miss(bucket):
+    gcs.save_cached_extracted_text(U, "t.pdf", "h1", "old text")
+    assert gcs.get_cached_extracted_text(U, "t.pdf", "h2") is None
+    assert gcs.get_cached_extracted_text("other@example.com", "t.pdf", "h1") is None
+
+
+def test_document_delete_removes_its_cached_text(bucket):
+    _upload(bucket, U, "t.pdf")
+    gcs.save_cached_extracted_text(U, "t.pdf", "h1", "GPA 4.0")
+    gcs.save_cached_extracted_text(U, "essay.pdf", "h2", "kept")
+
+    assert gcs.delete_file_from_gcs(U, "t.pdf")["success"]
+    assert list(bucket.blobs) == [f"{U}/_extracted_text/v1/essay.pdf.txt"]
+
+
+def test_cache_is_not_listed_and_reset_clears_orphans(bucket):
+    _upload(bucket, U, "t.pdf")
+    gcs.save_cached_extracted_text(U, "t.pdf", "h1", "GPA 4.0")
+    gcs.save_cached_extracted_text(U, "gone.pdf", "h2", "orphan")
+    gcs.save_cached_extracted_text("other@example.com", "t.pdf", "h3", "not mine")
+
+    assert [f["filename"] for f in gcs.list_user_files(U)] == ["t.pdf"]
+    assert gcs.delete_cached_extracted_text(U) == 2
+    assert sorted(bucket.blobs) == ["other@example.com/_extracted_text/v1/t.pdf.txt", f"{U}/t.pdf"]
@@ -19,9 +19,10 @@ def _run(*, has_credits=True, remaining=5, gen_payload=None, gen_status=200,
         return {'has_credits': has_credits, 'credits_remaining': remaining,
                 'credits_needed': needed}
 
-    def fake_deduct(user_email, count, why):
+    def fake_deduct(user_email, count, why, idempotency_key=None):
         calls['deduct'] += 1
         calls['deduct_args'] = (user_email, count, why)
+        calls['deduct_key'] = idempotency_key
         return ({'success': True, 'credits_remaining': remaining - count}
                 if deduct_success else {'success': False, 'error': 'firestore down'})
 
@@ -77,11 +77,11 @@ class TestGradeNormalizationAtExtraction:
     """After extraction, profile['grade'] must always be str or None."""
 
     def _run_extraction(self, gemini_payload: dict) -> dict:
-        """Patch Gemini client to return gemini_payload, run extraction."""
+        """Patch the gateway's pooled client to return gemini_payload, run extraction."""
         mock_client = MagicMock()
         mock_client.models.generate_content.return_value = _fake_gemini_response(gemini_payload)
 
-        with patch.object(profile_extraction.genai, 'Client', return_value=mock_client), \
+        with patch.object(profile_extraction.llm_gateway, 'client', return_value=mock_client), \
              patch.dict('os.environ', {'GEMINI_API_KEY': 'test-key'}):
             result = profile_extraction.extract_structured_profile_with_gemini("dummy text")
         return result
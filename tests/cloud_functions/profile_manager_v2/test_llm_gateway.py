@@ -0,0 +1,213 @@
+"""Unit tests for the process-wide Gemini gateway.
+
+Covers client pooling per key, single-flight coalescing of identical in-flight
+requests, the per-model concurrency gate (a saturated model falls through to
+the next one in the chain), per-model metrics, and single-model calls keeping
+their key on the client rather than in the legacy SDK's global configure. The same file is copied into qa_agent, so testing
+the profile_manager_v2 copy covers both.
+"""
+import sys
+import threading
+import types
+
+import pytest
+
+import llm_gateway
+from gemini_fallback import DEFAULT_MODEL_CHAIN
+
+
+@pytest.fixture(autouse=True)
+def _fresh_gateway():
+    llm_gateway.reset()
+    yield
+    llm_gateway.reset()
+
+
+class _FakeModels:
+    """Counts calls; optionally blocks on `gate` until the test releases it."""
+
+    def __init__(self, response=None, error=None, gate=None):
+        self.response = response if response is not None else types.SimpleNamespace(text='ok')
+        self.error = error
+        self.gate = gate
+        self.started = threading.Event()
+        self.calls = []
+
+    def generate_content(self, *, model, contents, config):
+        self.calls.append(model)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    def install(**kwargs):
+        fake = types.SimpleNamespace(models=_FakeModels(**kwargs))
+        monkeypatch.setattr(llm_gateway, 'client', lambda api_key=None: fake)
+        return fake.models
+    return install
+
+
+def _in_thread(fn):
+    out = {}
+
+    def run():
+        try:
+            out['result'] = fn()
+        except Exception as e:  # noqa: BLE001
+            out['error'] = e
+
+    t = threading.Thread(target=run)
+    t.start()
+    return t, out
+
+
+class TestClientPool:
+    def test_one_client_per_key(self):
+        a = llm_gateway.client('key-a')
+        assert llm_gateway.client('key-a') is a
+        assert llm_gateway.client('key-b') is not a
+
+    def test_defaults_to_env_key(self, monkeypatch):
+        monkeypatch.setenv('GEMINI_API_KEY', 'env-key')
+        assert llm_gateway.client() is llm_gateway.client('env-key')
+
+
+class TestSingleFlight:
+    def test_identical_in_flight_requests_share_one_call(self, fake_client):
+        release = threading.Event()
+        models = fake_client(gate=release)
+        t1, out1 = _in_thread(lambda: llm_gateway.generate('same prompt', api_key='k'))
+        assert models.started.wait(2)
+        t2, out2 = _in_thread(lambda: llm_gateway.generate('same prompt', api_key='k'))
+        threading.Event().wait(0.05)  # let the follower park on the flight
+        release.set()
+        t1.join(2)
+        t2.join(2)
+
+        assert models.calls == [DEFAULT_MODEL_CHAIN[0]]
+        assert out1['result'] is out2['result']
+        assert llm_gateway.metrics()[DEFAULT_MODEL_CHAIN[0]]['coalesced'] == 1
+
+    def test_error_reaches_followers(self, fake_client):
+        release = threading.Event()
+        models = fake_client(gate=release, error=ValueError('400 INVALID_ARGUMENT'))
+        t1, out1 = _in_thread(lambda: llm_gateway.generate('p', api_key='k'))
+        assert models.started.wait(2)
+        t2, out2 = _in_thread(lambda: llm_gateway.generate('p', api_key='k'))
+        threading.Event().wait(0.05)
+        release.set()
+        t1.join(2)
+        t2.join(2)
+
+        assert len(models.calls) == 1
+        assert isinstance(out1['error'], ValueError)
+        assert out2['error'] is out1['error']
+
+    def test_sequential_and_distinct_requests_are_not_coalesced(self, fake_client):
+        models = fake_client()
+        llm_gateway.generate('a', api_key='k')
+        llm_gateway.generate('a', api_key='k')
+        llm_gateway.generate('b', api_key='k')
+        llm_gateway.generate('a', api_key='other')
+        assert len(models.calls) == 4
+
+
+class TestModelSelection:
+    def test_pinned_model_has_no_fallback(self, fake_client):
+        models = fake_client(error=RuntimeError('503 UNAVAILABLE'))
+        with pytest.raises(RuntimeError, match='503'):
+            llm_gateway.generate('p', model='only-model', api_key='k')
+        assert models.calls == ['only-model']
+
+    def test_default_chain_walks_on_overload(self, fake_client):
+        models = fake_client(error=RuntimeError('503 UNAVAILABLE'))
+        with pytest.raises(RuntimeError):
+            llm_gateway.generate('p', api_key='k')
+        assert models.calls == list(DEFAULT_MODEL_CHAIN)
+
+
+class TestConcurrencyGate:
+    def test_saturated_model_falls_through_to_next(self, fake_client, monkeypatch):
+        monkeypatch.setattr(llm_gateway, 'MAX_CONCURRENT_PER_MODEL', 1)
+        monkeypatch.setattr(llm_gateway, 'GATE_TIMEOUT_S', 0.05)
+        release = threading.Event()
+        models = fake_client(gate=release)
+        t1, _ = _in_thread(lambda: llm_gateway.generate('first', models=['m1', 'm2'], api_key='k'))
+        assert models.started.wait(2)
+
+        # Different prompt, so no coalescing — it must queue for m1's only slot.
+        t2, out2 = _in_thread(lambda: llm_gateway.generate('second', models=['m1', 'm2'], api_key='k'))
+        for _ in range(500):
+            if 'm2' in models.calls:
+                break
+            threading.Event().wait(0.002)
+        release.set()
+        t1.join(2)
+        t2.join(2)
+
+        assert models.calls == ['m1', 'm2']
+        assert out2['result'].text == 'ok'
+        assert llm_gateway.metrics()['m1']['errors'] == 1
+
+
+class TestMetrics:
+    def test_latency_and_tokens_recorded_per_model(self, fake_client):
+        usage = types.SimpleNamespace(prompt_token_count=12, candidates_token_count=30)
+        fake_client(response=types.SimpleNamespace(text='ok', usage_metadata=usage))
+        llm_gateway.generate('p', model='m', api_key='k')
+        llm_gateway.generate('q', model='m', api_key='k')
+
+        m = llm_gateway.metrics()['m']
+        assert m['calls'] == 2
+        assert m['errors'] == 0
+        assert (m['prompt_tokens'], m['output_tokens']) == (24, 60)
+        assert m['latency_ms_max'] <= m['latency_ms_total']
+
+    def test_failures_counted(self, fake_client):
+        fake_client(error=ValueError('bad'))
+        with pytest.raises(ValueError):
+            llm_gateway.generate('p', model='m', api_key='k')
+        assert llm_gateway.metrics()['m']['errors'] == 1
+
+
+class TestLegacy:
+    def test_key_travels_with_the_pooled_client(self, monkeypatch):
+        legacy = sys.modules['google.generativeai']
+        monkeypatch.setattr(legacy, 'configure', lambda **_k: pytest.fail('global configure'),
+                            raising=False)
+        clients, calls = [], []
+
+        class _Models:
+            def __init__(self, key):
+                self.key = key
+
+            def generate_content(self, *, model, contents, config):
+                calls.append((self.key, model, config))
+                return types.SimpleNamespace(text=f'echo {contents}')
+
+        def client(api_key=None):
+            clients.append(api_key)
+            return types.SimpleNamespace(models=_Models(api_key))
+
+        monkeypatch.setattr(llm_gateway, 'client', client)
+
+        assert llm_gateway.generate_legacy('a', model='m', api_key='k1').text == 'echo a'
+        llm_gateway.generate_legacy('b', model='m', api_key='k1', system_instruction='sys')
+        llm_gateway.generate_legacy('c', model='m', api_key='k2')
+
+        assert clients == ['k1', 'k1', 'k2']
+        assert calls == [('k1', 'm', None), ('k1', 'm', {'system_instruction': 'sys'}),
+                         ('k2', 'm', None)]
+        assert llm_gateway.metrics()['m']['calls'] == 3
+
+
+def test_generate_without_gemini_fallback_says_so(monkeypatch, fake_client):
+    fake_client()
+    monkeypatch.setitem(sys.modules, 'gemini_fallback', None)
+    with pytest.raises(RuntimeError, match='gemini_fallback.py'):
+        llm_gateway.generate('p', api_key='k')
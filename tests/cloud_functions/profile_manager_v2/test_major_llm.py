@@ -223,9 +223,10 @@ def _billing_seams(has_credits=True, remaining=5):
         calls['check'] += 1
         return {'has_credits': has_credits, 'credits_remaining': remaining}
 
-    def fake_deduct(user_email, count, reason):
+    def fake_deduct(user_email, count, reason, idempotency_key=None):
         calls['deduct'] += 1
         calls['deduct_args'] = (user_email, count, reason)
+        calls['deduct_key'] = idempotency_key
         return {'success': True, 'credits_remaining': remaining - count}
 
     return calls, patch.object(generation_billing, 'check_credits_available',
@@ -0,0 +1,142 @@
+"""
+Streaming PDF extraction (file_processing.iter_pdf_pages): cleaned pages in
+order, pypdf fallback per page rather than per document, and the per-user
+extracted-text cache.
+
+fitz is replaced with a fake whose documents are described by the test; the
+per-page fallback reads the real two-page fixture through real pypdf.
+"""
+
+import hashlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+FIXTURE = ROOT / "tests" / "fixtures" / "profile-samples" / "sample-junior-comprehensive.pdf"
+
+# file_processing imports fitz/docx at module top; neither is installed here.
+for _name, _attr in (("fitz", "open"), ("docx", "Document")):
+    _mod = sys.modules.get(_name) or types.ModuleType(_name)
+    if not hasattr(_mod, _attr):
+        setattr(_mod, _attr, object)
+    sys.modules[_name] = _mod
+
+import file_processing as fp  # noqa: E402
+
+
+class _Page:
+    def __init__(self, text):
+        self._text = text
+
+    def get_text(self, mode):
+        if isinstance(self._text, Exception):
+            raise self._text
+        return self._text
+
+
+class _Doc:
+    def __init__(self, pages):
+        self._pages = [_Page(t) for t in pages]
+        self.page_count = len(self._pages)
+        self.closed = False
+
+    def __getitem__(self, i):
+        return self._pages[i]
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_fitz(pages_for, opened=None):
+    """fitz stand-in: `pages_for(bytes)` gives the page texts of a document."""
+    def open_(stream=None, filetype=None):
+        if opened is not None:
+            opened.append(1)
+        return _Doc(pages_for(stream))
+    return types.SimpleNamespace(open=open_)
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(fp, '_read_text_cache', lambda user_id, filename, digest: None)
+    monkeypatch.setattr(fp, '_write_text_cache', lambda user_id, filename, digest, text: None)
+
+
+def _dict_cache(monkeypatch, store):
+    monkeypatch.setattr(fp, '_read_text_cache', lambda *key: store.get(key))
+    monkeypatch.setattr(fp, '_write_text_cache', lambda *args: store.__setitem__(args[:3], args[3]))
+
+
+def test_pages_are_cleaned_and_yielded_in_order(monkeypatch):
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: ["GPA:\n4.0\n", "   ", "Awards\nState\nchampion\n"]))
+    pages = fp.iter_pdf_pages(b"pdf", "t.pdf")
+    assert not isinstance(pages, list)
+    assert list(pages) == ["GPA:\n4.0", "Awards\nState champion"]
+
+
+def test_one_bad_page_falls_back_to_pypdf_for_that_page_only(monkeypatch):
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(
+        lambda b: [RuntimeError("code=7: cycle in resources"), "Second page from PyMuPDF"]))
+    pages = list(fp.iter_pdf_pages(FIXTURE.read_bytes(), "sample.pdf"))
+    assert len(pages) == 2
+    assert "ALEX RIVERA" in pages[0]  # page 1 read by pypdf
+    assert pages[1] == "Second page from PyMuPDF"
+
+
+def test_empty_fitz_page_is_retried_with_pypdf(monkeypatch):
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: ["First page", ""]))
+    pages = list(fp.iter_pdf_pages(FIXTURE.read_bytes(), "sample.pdf"))
+    assert pages[0] == "First page"
+    assert len(pages) == 2 and len(pages[1]) > 100
+
+
+def test_long_documents_are_read_in_one_pass(monkeypatch):
+    opened = []
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: [f"Page {i}" for i in range(60)], opened))
+    assert list(fp.iter_pdf_pages(b"report", "long.pdf")) == [f"Page {i}" for i in range(60)]
+    assert len(opened) == 1
+
+
+def test_extract_text_is_cached_per_user_document(monkeypatch):
+    store, opened = {}, []
+    _dict_cache(monkeypatch, store)
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: ["One", "Two"], opened))
+
+    first = fp.extract_text_from_file_content(b"same bytes", "a.pdf", "u@x.com")
+    again = fp.extract_text_from_file_content(b"same bytes", "a.pdf", "u@x.com")
+    assert first == again == "One\n\nTwo"
+    assert len(opened) == 1
+    assert list(store) == [("u@x.com", "a.pdf", hashlib.sha256(b"same bytes").hexdigest())]
+
+    fp.extract_text_from_file_content(b"same bytes", "a.pdf", "other@x.com")
+    assert len(opened) == 2  # another user's upload never reads this user's cache
+
+
+def test_replaced_file_misses_the_cache(monkeypatch):
+    store, opened = {}, []
+    _dict_cache(monkeypatch, store)
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: [b.decode()], opened))
+
+    assert fp.extract_text_from_file_content(b"v1", "t.pdf", "u@x.com") == "v1"
+    assert fp.extract_text_from_file_content(b"v2", "t.pdf", "u@x.com") == "v2"
+    assert len(opened) == 2
+
+
+def test_no_user_means_no_cache(monkeypatch):
+    store = {}
+    _dict_cache(monkeypatch, store)
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: ["One"]))
+    assert fp.extract_text_from_file_content(b"bytes", "a.pdf") == "One"
+    assert store == {}
+
+
+def test_no_text_is_not_cached(monkeypatch):
+    store = {}
+    _dict_cache(monkeypatch, store)
+    monkeypatch.setattr(fp, 'fitz', _fake_fitz(lambda b: [""]))
+    monkeypatch.setattr(fp._PypdfPages, 'text', lambda self, n: "")
+    assert fp.extract_text_from_file_content(b"blank", "scan.pdf", "u@x.com") is None
+    assert store == {}
@@ -0,0 +1,156 @@
+"""Profile context compiler (profile_context): bounded, deduplicated prompt
+context — structured fields first, then compacted document notes — cached on
+the profile doc and recompiled only when its fingerprint changes."""
+
+import copy
+
+import pytest
+
+import profile_context as pc
+
+U = "stu@example.com"
+
+TRANSCRIPT = """# Student Profile
+
+**Name:** Maya Chen
+GPA: 4.21 weighted
+
+## Activities
+Robotics Club captain, led team to state finals
+Volunteer tutor at the public library
+"""
+
+
+def _profile(**overrides):
+    profile = {
+        'user_id': U,
+        'indexed_at': '2026-01-01T00:00:00',
+        'uploaded_files': ['transcript.pdf', 'transcript (1).pdf'],
+        'field_sources': {'name': ['transcript.pdf']},
+        'name': 'Maya Chen',
+        'grade': '11',
+        'intended_major': 'Computer Science',
+        'gpa_weighted': 4.21,
+        'sat_total': 1540.0,
+        'courses': [{'name': 'AP Calculus BC', 'type': 'AP', 'semester1_grade': 'A'},
+                    {'name': 'AP Calculus BC', 'type': 'AP', 'semester1_grade': 'A'}],
+        'extracurriculars': [{'name': 'Robotics Club', 'role': 'Captain', 'hours_per_week': 10}],
+        'activities': ['Robotics Club | role: Captain | hours per week: 10', 'Debate'],
+        'awards': [{'name': 'USACO Gold', 'grade': 10}],
+        # The same file uploaded twice, as index_student_profile stores it.
+        'raw_content': TRANSCRIPT + pc.DOCUMENT_SEPARATOR + TRANSCRIPT,
+    }
+    profile.update(overrides)
+    return profile
+
+
+class _FakeDB:
+    def __init__(self, profile):
+        self.profile = profile
+        self.saves = []
+
+    def get_profile(self, user_id):
+        return copy.deepcopy(self.profile)
+
+    def save_profile(self, user_id, data, merge=True):
+        self.saves.append(data)
+        self.profile.update(copy.deepcopy(data))
+        return True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = _FakeDB(_profile())
+    monkeypatch.setattr(pc, 'get_db', lambda: fake)
+    return fake
+
+
+class TestCompile:
+    def test_structured_fields_come_first_then_notes(self):
+        text = pc.compile_profile_context(_profile())
+        structured, notes = text.split('DOCUMENT NOTES:')
+        assert structured.startswith('Name: Maya Chen\nGrade: 11\nIntended major: Computer Science')
+        assert 'Weighted GPA: 4.21' in structured and 'SAT: 1540\n' in structured
+        assert 'Robotics Club captain, led team to state finals' in notes
+
+    def test_bookkeeping_fields_are_left_out(self):
+        text = pc.compile_profile_context(_profile())
+        for noise in ('indexed_at', 'transcript (1).pdf', 'field_sources', 'user_id', U):
+            assert noise not in text
+
+    def test_list_items_are_deduplicated_across_fields(self):
+        text = pc.compile_profile_context(_profile())
+        assert text.count('AP Calculus BC') == 1
+        assert text.count('- Robotics Club | role: Captain') == 1
+        assert '- Debate' in text
+
+    def test_reuploaded_document_appears_once(self):
+        text = pc.compile_profile_context(_profile())
+        assert text.count('Volunteer tutor at the public library') == 1
+
+    def test_note_lines_already_in_structured_fields_are_dropped(self):
+        notes = pc.compile_profile_context(_profile()).split('DOCUMENT NOTES:')[1]
+        assert 'Maya Chen' not in notes
+
+    def test_output_is_bounded(self):
+        many_docs = pc.DOCUMENT_SEPARATOR.join(
+            f"Upload {i}: paragraph about a different summer program number {i} " * 3 for i in range(500))
+        text = pc.compile_profile_context(_profile(raw_content=many_docs), budget_chars=4000)
+        assert len(text) <= 4000
+        assert text.rstrip().endswith('more lines omitted]')
+        assert text.startswith('Name: Maya Chen')
+
+    def test_profile_without_documents(self):
+        text = pc.compile_profile_context(_profile(raw_content=''))
+        assert 'DOCUMENT NOTES' not in text and 'Name: Maya Chen' in text
+
+    def test_smaller_than_the_old_full_dump(self):
+        profile = _profile()
+        assert pc.estimate_tokens(pc.compile_profile_context(profile)) < pc.legacy_prompt_tokens(profile)
+
+
+class TestFingerprint:
+    def test_ignores_bookkeeping_and_the_cached_record(self):
+        base = pc.profile_fingerprint(_profile())
+        assert pc.profile_fingerprint(_profile(indexed_at='2027-01-01', uploaded_files=[],
+                                               llm_context={'text': 'x'})) == base
+
+    def test_changes_with_profile_content(self):
+        base = pc.profile_fingerprint(_profile())
+        assert pc.profile_fingerprint(_profile(gpa_weighted=4.3)) != base
+        assert pc.profile_fingerprint(_profile(raw_content=TRANSCRIPT + 'New award')) != base
+
+
+class TestCache:
+    def test_compiles_once_then_serves_the_cached_record(self, db, monkeypatch):
+        first = pc.get_profile_context(U, surface='test')
+        assert len(db.saves) == 1
+        record = db.profile[pc.CONTEXT_FIELD]
+        assert record['text'] == first and record['est_tokens'] < record['legacy_est_tokens']
+
+        monkeypatch.setattr(pc, 'compile_profile_context',
+                            lambda *a, **k: pytest.fail('recompiled an unchanged profile'))
+        assert pc.get_profile_context(U, db.get_profile(U)) == first
+        assert len(db.saves) == 1
+
+    def test_profile_change_recompiles(self, db):
+        pc.get_profile_context(U)
+        db.profile['awards'] = [{'name': 'USACO Platinum'}]
+        assert 'USACO Platinum' in pc.get_profile_context(U)
+        assert len(db.saves) == 2
+
+    def test_no_profile(self, db):
+        db.profile = {}
+        assert pc.get_profile_context(U) == ''
+
+
+class TestClientProfile:
+    def test_strips_the_compiled_context_without_touching_the_doc(self, db):
+        pc.get_profile_context(U)
+        profile = db.get_profile(U)
+        out = pc.client_profile(profile)
+        assert pc.CONTEXT_FIELD not in out and out['gpa_weighted'] == profile['gpa_weighted']
+        assert pc.CONTEXT_FIELD in profile  # server paths keep the cached record
+
+    def test_no_profile_passes_through(self):
+        assert pc.client_profile(None) is None and pc.client_profile({}) == {}
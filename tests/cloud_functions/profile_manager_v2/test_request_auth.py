@@ -1,12 +1,22 @@
 """Caller-identity verification (#223): the verified credential — never the
 raw X-User-Email — is what scopes data access, across all three AUTH_MODEs."""
 
+import time
 import types
 from unittest.mock import patch
 
+import pytest
+
 import request_auth
 
 
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    request_auth.reset_cache()
+    yield
+    request_auth.reset_cache()
+
+
 def _req(headers=None, path='/get-profile'):
     return types.SimpleNamespace(headers=headers or {}, path=path)
 
@@ -178,3 +188,82 @@ class TestFirebaseProjectFailClosed:
             _bearer(), 'student@x.com',
             env={'FIREBASE_PROJECT_ID': '', 'GCP_PROJECT_ID': ''})
         assert allow is False and rejection[1] == 401
+
+
+class TestVerifiedClaimsCache:
+    """Repeat calls with the same token skip signature verification; the
+    policy checks still run on the cached claims every time."""
+
+    def _counting(self, claims):
+        calls = []
+
+        def verify(token, audience):
+            calls.append(token)
+            if isinstance(claims, Exception):
+                raise claims
+            return claims
+        return verify, calls
+
+    def test_repeat_calls_verify_once(self):
+        verify, calls = self._counting({**_fb_claims(), 'exp': time.time() + 3600})
+        for _ in range(3):
+            allow, identity, _ = _run_gate(_bearer(), 'student@x.com', firebase=verify)
+            assert allow is True and identity['email'] == 'student@x.com'
+        assert len(calls) == 1
+        m = request_auth.cache_metrics()
+        assert (m['hits'], m['misses'], m['verifications'], m['size']) == (2, 1, 1, 1)
+
+    def test_cached_claims_still_face_the_identity_check(self):
+        verify, _ = self._counting({**_fb_claims('attacker@x.com'), 'exp': time.time() + 3600})
+        assert _run_gate(_bearer(), 'attacker@x.com', firebase=verify)[0] is True
+        allow, _, rejection = _run_gate(_bearer(), 'victim@x.com', firebase=verify)
+        assert allow is False and rejection[1] == 403
+
+    def test_entry_expires_with_the_token(self):
+        verify, calls = self._counting({**_fb_claims(), 'exp': time.time() - 1})
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        assert len(calls) == 2
+
+    def test_claims_without_exp_are_not_cached(self):
+        verify, calls = self._counting(_fb_claims())
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        assert len(calls) == 2
+
+    def test_rejections_are_negatively_cached(self):
+        verify, calls = self._counting(ValueError('Token expired'))
+        for _ in range(2):
+            allow, identity, _ = _run_gate(_bearer(), 'student@x.com', firebase=verify)
+            assert allow is False and identity['error'] == 'Token expired'
+        assert len(calls) == 1
+        assert request_auth.cache_metrics()['negative_hits'] == 1
+
+    def test_negative_entries_expire(self, monkeypatch):
+        monkeypatch.setattr(request_auth, 'AUTH_NEGATIVE_TTL_SECONDS', 0)
+        verify, calls = self._counting(ValueError('bad signature'))
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        assert len(calls) == 2
+
+    def test_transport_failures_are_not_cached(self):
+        verify, calls = self._counting(RuntimeError('cert fetch timed out'))
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        assert len(calls) == 2
+
+    def test_project_is_part_of_the_key(self):
+        verify, calls = self._counting({**_fb_claims(), 'exp': time.time() + 3600})
+        _run_gate(_bearer(), 'student@x.com', firebase=verify)
+        _run_gate(_bearer(), 'student@x.com', firebase=verify,
+                  env={'FIREBASE_PROJECT_ID': 'another-project'})
+        assert len(calls) == 2
+
+    def test_lru_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(request_auth, 'AUTH_CACHE_SIZE', 2)
+        verify, calls = self._counting({**_fb_claims(), 'exp': time.time() + 3600})
+        for tok in ('a', 'b', 'c', 'a'):
+            _run_gate(_bearer({'Authorization': f'Bearer {tok}'}), 'student@x.com', firebase=verify)
+        assert calls == ['a', 'b', 'c', 'a']
+        m = request_auth.cache_metrics()
+        assert m['size'] == 2 and m['evictions'] == 2
@@ -0,0 +1,281 @@
+"""Scholarship engine (scholarship_engine.py): compiled eligibility rules and
+the incremental scholarship tracker sync.
+
+Rule compilation / evaluation is pure. The sync runs the real FirestoreDB
+methods against a small in-memory Firestore that counts reads and batch
+commits; the KB batch fetcher is injected.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+import scholarship_engine as se
+from firestore_db import FirestoreDB
+
+U = 'stu@example.com'
+STATE = f'users/{U}/scholarship_tracker_sync/state'
+TRACKER = f'users/{U}/scholarship_tracker/'
+PROFILE = f'users/{U}/profile/data'
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    se.reset()
+    yield
+    se.reset()
+
+
+class TestRules:
+    def test_type_sets_the_kind(self):
+        assert se.rules_spec({'type': 'Need'}) == {'kind': 'need'}
+        assert se.rules_spec({'type': 'Merit'}) == {'kind': 'merit'}
+        assert se.rules_spec({'type': 'Athletic'}) == {'kind': 'other'}
+        assert se.rules_spec({}) == {'kind': 'other'}
+
+    def test_minimums_parsed_from_criteria_text(self):
+        spec = se.rules_spec({'type': 'Merit', 'name': 'Presidential',
+                              'eligibility': 'Minimum 3.7 GPA and SAT of 1450 or ACT 33+'})
+        assert spec['min'] == {'gpa': 3.7, 'sat': 1450.0, 'act': 33.0}
+
+    def test_merit_tiers_by_gpa(self):
+        merit = se.CompiledScholarship('s', 2026, {'kind': 'merit'})
+        assert merit.evaluate({'gpa': 3.9}) == 'likely_eligible'
+        assert merit.evaluate({'gpa': 3.6}) == 'may_qualify'
+        assert merit.evaluate({'gpa': 3.0}) == 'unknown'
+        assert merit.evaluate(None) == 'unknown'
+
+    def test_explicit_minimums_decide(self):
+        rules = se.CompiledScholarship('s', 2026, {'kind': 'other', 'min': {'sat': 1400}})
+        assert rules.evaluate({'sat': 1500}) == 'likely_eligible'
+        assert rules.evaluate({'sat': 1300}) == 'unknown'
+        assert rules.evaluate({'sat': None}) == 'may_qualify'  # can't tell
+
+    def test_profile_facts_read_every_gpa_shape(self):
+        assert se.profile_facts({'gpa_unweighted': '3.85'})['gpa'] == 3.85
+        assert se.profile_facts({'gpa': {'unweighted': 3.6}})['gpa'] == 3.6
+        assert se.profile_facts({'gpa': 4.4})['gpa'] is None  # weighted scale, not comparable
+        assert se.profile_facts(None) is None
+
+    def test_fingerprint_ignores_fields_rules_dont_read(self):
+        base = {'gpa_unweighted': 3.9, 'sat_total': 1500}
+        assert se.profile_fingerprint(base) == se.profile_fingerprint({**base, 'hobbies': ['chess']})
+        assert se.profile_fingerprint(base) != se.profile_fingerprint({**base, 'gpa_unweighted': 3.5})
+
+    def test_compiled_rules_are_cached_by_id_and_year(self):
+        first = se.compile_scholarship('mit_x', 2026, {'type': 'Merit'})
+        assert se.compiled_for('mit_x', 2026, first.spec) is first
+        assert se.compiled_for('mit_x', 2027, first.spec) is not first
+
+    def test_evaluate_all(self):
+        compiled = [se.compile_scholarship('a', 2026, {'type': 'Need'}),
+                    se.compile_scholarship('b', 2026, {'type': 'Merit'})]
+        assert se.evaluate_all(compiled, {'gpa_unweighted': 3.9}) == {
+            'a': 'may_qualify', 'b': 'likely_eligible'}
+
+    def test_ids_are_deterministic(self):
+        assert se.scholarship_id('mit', 'Regents') == se.scholarship_id('mit', 'Regents')
+        assert se.scholarship_id('mit', 'Regents') != se.scholarship_id('mit', 'Chancellor')
+
+
+# ---- Sync against an in-memory Firestore ------------------------------------
+
+
+class _Snap:
+    def __init__(self, doc_id, data):
+        self.id, self._data = doc_id, data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Doc:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def collection(self, name):
+        return _Collection(self.store, f"{self.path}/{name}")
+
+    def get(self):
+        self.store.reads.append(self.path)
+        return _Snap(self.path.rsplit('/', 1)[1], self.store.docs.get(self.path))
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def document(self, doc_id):
+        return _Doc(self.store, f"{self.path}/{doc_id}")
+
+    def stream(self):
+        self.store.reads.append(self.path)
+        prefix = self.path + '/'
+        return [_Snap(p[len(prefix):], d) for p, d in sorted(self.store.docs.items())
+                if p.startswith(prefix) and '/' not in p[len(prefix):]]
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store, self.ops = store, []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref.path, dict(data), merge))
+
+    def commit(self):
+        self.store.commits += 1
+        self.store.writes += len(self.ops)
+        for path, data, merge in self.ops:
+            self.store.docs[path] = {**self.store.docs.get(path, {}), **data} if merge else data
+
+
+class _Store:
+    def __init__(self):
+        self.docs, self.reads, self.commits, self.writes = {}, [], 0, 0
+
+
+class _Client:
+    def __init__(self):
+        self.store = _Store()
+
+    def collection(self, name):
+        return _Collection(self.store, name)
+
+    def batch(self):
+        return _Batch(self.store)
+
+
+class _KB:
+    def __init__(self, scholarships=None):
+        self.scholarships = scholarships or {}
+        self.hashes = {}
+        self.calls = []
+
+    def __call__(self, university_ids, sections=None):
+        self.calls.append((list(university_ids), sections))
+        return {uid: {'university_id': uid, 'data_year': 2026,
+                      'content_hash': self.hashes.get(uid, 'h1'),
+                      'profile': {'financials': {'scholarships': self.scholarships[uid]}}}
+                for uid in university_ids if uid in self.scholarships}
+
+
+@pytest.fixture
+def env():
+    fdb = FirestoreDB.__new__(FirestoreDB)
+    fdb.db = _Client()
+    with patch.object(se, 'get_db', return_value=fdb):
+        yield fdb
+
+
+def _add(fdb, *schools):
+    for uid in schools:
+        fdb.db.store.docs[f'users/{U}/college_list/{uid}'] = {'university_name': uid.upper()}
+
+
+def _tracker(fdb):
+    return {p[len(TRACKER):]: d for p, d in fdb.db.store.docs.items() if p.startswith(TRACKER)}
+
+
+def _merit(name):
+    return {'name': name, 'type': 'Merit', 'amount': '$10,000', 'application_method': 'Automatic'}
+
+
+class TestSync:
+    def test_first_sync_is_one_kb_call_and_one_batch(self, env):
+        _add(env, *[f's{i}' for i in range(15)])
+        env.db.store.docs[PROFILE] = {'gpa_unweighted': 3.9}
+        kb = _KB({f's{i}': [_merit('Deans'), {'name': 'Grant', 'type': 'Need'}] for i in range(15)})
+
+        result = se.sync_scholarship_tracker(U, fetch_batch=kb)
+
+        assert len(kb.calls) == 1 and kb.calls[0][1] == ['financials']
+        assert env.db.store.commits == 1
+        assert result['total_scholarships'] == 30
+        indicators = {d['scholarship_name']: d['eligibility_indicator'] for d in _tracker(env).values()}
+        assert indicators == {'Deans': 'likely_eligible', 'Grant': 'may_qualify'}
+        assert next(iter(_tracker(env).values()))['application_required'] is False
+
+    def test_unchanged_resync_writes_nothing(self, env):
+        _add(env, 'mit')
+        kb = _KB({'mit': [_merit('Deans')]})
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        commits = env.db.store.commits
+
+        result = se.sync_scholarship_tracker(U, fetch_batch=kb)
+
+        assert len(kb.calls) == 1
+        assert env.db.store.commits == commits
+        assert (result['schools_fetched'], result['eligibility_updated']) == (0, 0)
+
+    def test_profile_change_reevaluates_without_the_kb(self, env):
+        _add(env, 'mit')
+        env.db.store.docs[PROFILE] = {'gpa_unweighted': 3.0}
+        kb = _KB({'mit': [_merit('Deans'), {'name': 'Grant', 'type': 'Need'}]})
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        se.reset()  # a different instance: rules rebuilt from the marker
+        env.db.store.docs[PROFILE] = {'gpa_unweighted': 3.9}
+        writes = env.db.store.writes
+
+        result = se.sync_scholarship_tracker(U, fetch_batch=kb)
+
+        assert len(kb.calls) == 1
+        assert result['eligibility_updated'] == 1
+        assert env.db.store.writes - writes == 2  # the changed entry + marker
+        deans = [d for d in _tracker(env).values() if d['scholarship_name'] == 'Deans'][0]
+        assert deans['eligibility_indicator'] == 'likely_eligible'
+        assert deans['status'] == 'not_applied'
+
+    def test_new_school_only_is_fetched(self, env):
+        _add(env, 'mit')
+        kb = _KB({'mit': [_merit('Deans')], 'duke': [_merit('Robertson')]})
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        _add(env, 'duke')
+
+        result = se.sync_scholarship_tracker(U, fetch_batch=kb)
+
+        assert kb.calls[1][0] == ['duke']
+        assert result['total_scholarships'] == 2
+
+    def test_aged_school_with_same_kb_data_is_not_recompiled(self, env):
+        _add(env, 'mit')
+        kb = _KB({'mit': [_merit('Deans')]})
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        old = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        env.db.store.docs[STATE]['schools']['mit']['checked_at'] = old
+
+        result = se.sync_scholarship_tracker(U, fetch_batch=kb)
+        assert result['schools_fetched'] == 1 and result['scholarships_synced'] == 0
+
+        kb.scholarships['mit'].append(_merit('New Award'))
+        kb.hashes['mit'] = 'h2'
+        result = se.sync_scholarship_tracker(U, full=True, fetch_batch=kb)
+        assert result['total_scholarships'] == 2
+
+    def test_legacy_tracker_is_seeded_and_keeps_its_ids(self, env):
+        _add(env, 'mit')
+        env.db.store.docs[TRACKER + 'mit_12345'] = {
+            'university_id': 'mit', 'scholarship_name': 'Deans', 'type': 'Merit',
+            'status': 'applied', 'eligibility_indicator': 'unknown'}
+        env.db.store.docs[PROFILE] = {'gpa_unweighted': 3.9}
+
+        se.sync_scholarship_tracker(U, fetch_batch=_KB({'mit': [_merit('Deans')]}))
+
+        tracker = _tracker(env)
+        assert list(tracker) == ['mit_12345']
+        assert tracker['mit_12345']['status'] == 'applied'
+        assert tracker['mit_12345']['eligibility_indicator'] == 'likely_eligible'
+        assert 'mit_12345' in env.db.store.docs[STATE]['entries']
+
+    def test_marker_means_tracker_is_streamed_only_for_the_response(self, env):
+        _add(env, 'mit')
+        kb = _KB({'mit': [_merit('Deans')]})
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        env.db.store.reads.clear()
+        se.sync_scholarship_tracker(U, fetch_batch=kb)
+        assert env.db.store.reads.count(TRACKER.rstrip('/')) == 1
+
+    def test_empty_list(self, env):
+        assert se.sync_scholarship_tracker(U, fetch_batch=_KB()) == {
+            'success': True, 'message': 'No colleges in list', 'scholarships_synced': 0}
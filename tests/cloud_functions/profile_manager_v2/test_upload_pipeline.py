@@ -0,0 +1,183 @@
+"""Async profile-upload pipeline (upload_pipeline): upload-profile returns a
+job id at once, the stages run on the in-process LocalQueue with per-stage
+progress on the job doc, the two Gemini passes run concurrently, and
+identical bytes are deduped by content hash."""
+
+import sys
+import threading
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# upload_pipeline's siblings pull in fitz / google.cloud.storage / genai at
+# import time — stub whatever isn't already loaded (same pattern as
+# test_profile_upsert); the test patches the bound names anyway.
+for _name, _attrs in {
+    "file_processing": ["extract_text_from_file_content"],
+    "profile_extraction": ["extract_profile_content", "evaluate_profile_changes",
+                           "convert_to_markdown", "extract_structured_profile_with_gemini"],
+    "gcs_storage": ["upload_file_to_gcs", "delete_file_from_gcs", "download_file_from_gcs"],
+}.items():
+    _mod = sys.modules.get(_name) or types.ModuleType(_name)
+    for _a in _attrs:
+        if not hasattr(_mod, _a):
+            setattr(_mod, _a, lambda *a, **k: None)
+    sys.modules[_name] = _mod
+
+import upload_pipeline as up  # noqa: E402
+
+U = "stu@example.com"
+PDF = b"%PDF-1.4 transcript bytes"
+
+
+class _FakeDB:
+    def __init__(self):
+        self.jobs = {}
+
+    def get_upload_job(self, user_id, job_id):
+        job = self.jobs.get((user_id, job_id))
+        return {**job, 'stages': dict(job['stages'])} if job else None
+
+    def save_upload_job(self, user_id, job_id, job):
+        self.jobs[(user_id, job_id)] = {**job, 'stages': dict(job['stages'])}
+        return True
+
+    def update_upload_job(self, user_id, job_id, fields):
+        job = self.jobs[(user_id, job_id)]
+        for key, value in fields.items():
+            if key.startswith('stages.'):
+                job['stages'][key.split('.', 1)[1]] = value
+            else:
+                job[key] = value
+        return True
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    db = _FakeDB()
+    calls = types.SimpleNamespace(uploads=[], indexed=[], gemini_threads=set())
+    barrier = threading.Barrier(2, timeout=5)
+
+    def gemini(name, value):
+        def fn(*args):
+            # Both Gemini stages must be in flight at once to pass the barrier.
+            calls.gemini_threads.add(threading.current_thread().name)
+            barrier.wait()
+            return value
+        return fn
+
+    monkeypatch.setattr(up, 'get_db', lambda: db)
+    monkeypatch.setattr(up, 'upload_file_to_gcs', lambda u, f, c, t=None: calls.uploads.append(f) or
+                        {'success': True, 'gcs_url': f'gs://bucket/{u}/{f}'})
+    monkeypatch.setattr(up, 'extract_text_from_file_content', lambda c, f, u: 'GPA 4.0')
+    monkeypatch.setattr(up, 'convert_to_markdown', gemini('markdown', '# Profile'))
+    monkeypatch.setattr(up, 'extract_structured_profile_with_gemini', gemini('structure', {'gpa_weighted': 4.0}))
+    monkeypatch.setattr(up, 'index_student_profile', lambda *a: calls.indexed.append(a) or
+                        {'success': True, 'message': 'Profile indexed successfully'})
+    queue = up.LocalQueue()
+    up.set_queue(queue)
+    yield types.SimpleNamespace(db=db, calls=calls, queue=queue)
+    up.set_queue(None)
+
+
+def test_upload_returns_a_job_then_runs_every_stage(pipeline):
+    accepted = up.submit_upload(U, 'transcript.pdf', PDF, 'application/pdf')
+    assert accepted['success'] is True and accepted['status'] == 'queued'
+    assert accepted['duplicate'] is False
+
+    pipeline.queue.drain(timeout=10)
+    status = up.get_upload_status(U, accepted['job_id'])['job']
+    assert status['status'] == 'done' and status['progress'] == 1.0
+    assert all(status['stages'][s]['status'] == 'done' for s in up.STAGES)
+    assert all('ms' in status['stages'][s] for s in up.STAGES)
+
+    (user, filename, markdown, metadata, structured), = pipeline.calls.indexed
+    assert (user, filename, markdown, structured) == (U, 'transcript.pdf', '# Profile', {'gpa_weighted': 4.0})
+    assert metadata['gcs_url'] == f'gs://bucket/{U}/transcript.pdf'
+
+
+def test_gemini_stages_run_concurrently(pipeline):
+    up.submit_upload(U, 'transcript.pdf', PDF)
+    result, = pipeline.queue.drain(timeout=10)
+    assert result['success'] is True  # the barrier would have timed out if serial
+    assert len(pipeline.calls.gemini_threads) == 2
+
+
+def test_duplicate_bytes_are_skipped(pipeline):
+    first = up.submit_upload(U, 'transcript.pdf', PDF)
+    pipeline.queue.drain(timeout=10)
+    again = up.submit_upload(U, 'transcript (1).pdf', PDF)
+    assert again['duplicate'] is True and again['job_id'] == first['job_id']
+    assert again['status'] == 'done'
+    assert pipeline.calls.uploads == ['transcript.pdf']
+    assert len(pipeline.calls.indexed) == 1
+
+
+def test_failed_job_can_be_retried_by_reuploading(pipeline, monkeypatch):
+    def boom(*a):
+        raise RuntimeError('parse error')
+    monkeypatch.setattr(up, 'extract_text_from_file_content', boom)
+    job_id = up.submit_upload(U, 'transcript.pdf', PDF)['job_id']
+    pipeline.queue.drain(timeout=10)
+    job = up.get_upload_status(U, job_id)['job']
+    assert job['status'] == 'failed' and job['stages']['extract']['status'] == 'failed'
+    assert job['stages']['index']['status'] == 'pending'
+
+    monkeypatch.setattr(up, 'extract_text_from_file_content', lambda c, f, u: 'GPA 4.0')
+    again = up.submit_upload(U, 'transcript.pdf', PDF)
+    assert again['duplicate'] is False
+    pipeline.queue.drain(timeout=10)
+    assert up.get_upload_status(U, job_id)['job']['status'] == 'done'
+
+
+def test_stale_running_job_is_not_a_duplicate(pipeline):
+    job_id = up.submit_upload(U, 'transcript.pdf', PDF)['job_id']
+    pipeline.queue.drain(timeout=10)
+    old = (datetime.now(timezone.utc) - timedelta(seconds=up.JOB_STALE_S + 60)).isoformat()
+    pipeline.db.update_upload_job(U, job_id, {'status': 'running', 'updated_at': old})
+    assert up.submit_upload(U, 'transcript.pdf', PDF)['duplicate'] is False
+    pipeline.queue.drain(timeout=10)
+    assert len(pipeline.calls.indexed) == 2
+
+
+def test_redelivered_task_does_not_reindex(pipeline):
+    job_id = up.submit_upload(U, 'transcript.pdf', PDF)['job_id']
+    pipeline.queue.drain(timeout=10)
+    assert up.run_upload_job(U, job_id)['success'] is True
+    assert len(pipeline.calls.indexed) == 1
+
+
+def test_worker_reads_the_stored_file_when_not_handed_bytes(pipeline, monkeypatch):
+    seen = []
+    monkeypatch.setattr(up, 'download_file_from_gcs',
+                        lambda u, f: {'success': True, 'file_content': PDF})
+    monkeypatch.setattr(up, 'extract_text_from_file_content', lambda c, f, u: seen.append(c) or 'text')
+    up.set_queue(types.SimpleNamespace(submit=lambda *a: None))  # a Tasks-like queue
+    job_id = up.submit_upload(U, 'transcript.pdf', PDF)['job_id']
+    assert up.run_upload_job(U, job_id)['success'] is True
+    assert seen == [PDF]
+
+
+def test_unknown_job_status(pipeline):
+    assert up.get_upload_status(U, 'nope')['success'] is False
+
+
+def test_deployed_instance_without_a_queue_refuses_uploads(pipeline, monkeypatch):
+    monkeypatch.setenv('K_SERVICE', 'profile-manager-v2')
+    monkeypatch.delenv('UPLOAD_TASKS_QUEUE', raising=False)
+    up.set_queue(None)
+    out = up.submit_upload(U, 'transcript.pdf', PDF)
+    assert out['success'] is False and 'not configured' in out['error']
+    assert pipeline.calls.indexed == []
+
+
+def test_configured_queue_is_cloud_tasks(monkeypatch):
+    monkeypatch.setenv('UPLOAD_TASKS_QUEUE', 'projects/p/locations/r/queues/q')
+    monkeypatch.setenv('UPLOAD_WORKER_URL', 'https://pm.example/')
+    up.set_queue(None)
+    try:
+        queue = up.get_queue()
+        assert isinstance(queue, up.CloudTasksQueue) and queue.worker_url == 'https://pm.example'
+    finally:
+        up.set_queue(None)
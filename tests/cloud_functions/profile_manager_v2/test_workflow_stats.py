@@ -1,33 +1,41 @@
-"""workflow_stats: the cross-user Popular Workflows aggregate. Atomic count
-increment per save + top-N-by-count read. Firestore is stubbed in conftest; a
-small in-memory fake models the root collection, Increment, and order_by."""
+"""workflow_stats: the cross-user Popular Workflows aggregate. Runs are
+queued (Cloud Tasks in production, a stand-in here) and the task handler
+writes them as Increments onto sharded counters; the rollup folds pending
+shards into the root docs and reads the top-N with the ordered query; reads
+serve a cached snapshot of it. Firestore is stubbed in
+conftest; a small in-memory fake models paths, Increment merges, batches,
+transactions, the ordered query and the shard collection_group query."""
 
-import google.cloud.firestore as _fs
+import json
+from unittest.mock import patch
 
-# conftest stubs the firestore module; give it an Increment marker our fake applies.
-_fs.Increment = lambda n: ("INC", n)
-if not hasattr(_fs, "Query"):
-    _fs.Query = type("Query", (), {"DESCENDING": "DESCENDING"})
-else:
-    _fs.Query.DESCENDING = "DESCENDING"
+import pytest
 
-from firestore_db import FirestoreDB  # noqa: E402
+import firestore_db
+import workflow_stats as ws
+from firestore_db import FirestoreDB
+
+# The firestore module firestore_db actually bound (other test files may have
+# swapped the stub in sys.modules since), for its Increment sentinel.
+_fs = firestore_db.firestore
 
 
 class _Snap:
-    def __init__(self, d):
+    def __init__(self, d, reference=None):
         self._d = d
+        self.exists = d is not None
+        self.reference = reference
 
     def to_dict(self):
-        return dict(self._d)
+        return dict(self._d) if self._d is not None else None
 
 
 def _apply(cur, data):
     """Mirror Firestore set(merge=True): apply Increment sentinels and merge
     nested maps (so weeks['YYYY-Www']: INC accrues into the existing map)."""
     for k, v in data.items():
-        if isinstance(v, tuple) and v and v[0] == "INC":
-            cur[k] = cur.get(k, 0) + v[1]
+        if isinstance(v, _fs.Increment):
+            cur[k] = cur.get(k, 0) + v.value
         elif isinstance(v, dict):
             sub = dict(cur.get(k) or {})
             _apply(sub, v)
@@ -37,49 +45,108 @@ def _apply(cur, data):
     return cur
 
 
-class _StatDoc:
-    def __init__(self, store, sid):
-        self.store, self.sid = store, sid
+class _Doc:
+    def __init__(self, root, path):
+        self.root, self.path = root, path
+
+    def collection(self, name):
+        return _Coll(self.root, f"{self.path}/{name}")
+
+    def get(self):
+        self.root.reads += 1
+        return _Snap(self.root.store.get(self.path), self)
 
     def set(self, data, merge=False):
-        cur = dict(self.store.get(self.sid, {})) if merge else {}
-        self.store[self.sid] = _apply(cur, data)
+        self.root.writes += 1
+        cur = dict(self.root.store.get(self.path, {})) if merge else {}
+        self.root.store[self.path] = _apply(cur, data)
+
+    def update(self, data):
+        self.root.writes += 1
+        self.root.store[self.path] = {**self.root.store[self.path], **data}
 
 
-class _StatColl:
-    def __init__(self, store):
-        self.store = store
-        self._field = None
-        self._desc = False
-        self._n = None
+class _Coll:
+    def __init__(self, root, path):
+        self.root, self.path = root, path
+        self._order, self._limit = None, None
 
-    def document(self, sid):
-        return _StatDoc(self.store, sid)
+    def document(self, doc_id):
+        return _Doc(self.root, f"{self.path}/{doc_id}")
 
     def order_by(self, field, direction=None):
-        self._field = field
-        # Compare against whatever firestore_db's firestore.Query.DESCENDING
-        # resolves to (the same stubbed module), not a hardcoded string — other
-        # test packages stub google.cloud.firestore with a different value.
-        self._desc = direction == getattr(getattr(_fs, "Query", None), "DESCENDING", "DESCENDING")
+        self._order = (field, direction == _fs.Query.DESCENDING)
         return self
 
     def limit(self, n):
-        self._n = n
+        self._limit = n
         return self
 
     def stream(self):
-        items = sorted(self.store.values(), key=lambda d: d.get(self._field, 0), reverse=self._desc)
-        return [_Snap(d) for d in items[: self._n if self._n else len(items)]]
+        prefix = self.path + "/"
+        snaps = [_Snap(d, _Doc(self.root, p)) for p, d in sorted(self.root.store.items())
+                 if p.startswith(prefix) and "/" not in p[len(prefix):]]
+        if self._order:
+            field, desc = self._order
+            snaps.sort(key=lambda snap: snap.to_dict().get(field, 0), reverse=desc)
+        self.root.reads += len(snaps[:self._limit])
+        return snaps[:self._limit]
+
+
+class _Group:
+    """collection_group over the shards; where() is the rollup's count > 0
+    (the conftest FieldFilter stub doesn't keep its arguments)."""
+
+    def __init__(self, root, name, pending_only=False):
+        self.root, self.name, self.pending_only = root, name, pending_only
+
+    def where(self, filter=None):
+        return _Group(self.root, self.name, pending_only=True)
+
+    def stream(self):
+        snaps = [_Snap(d, _Doc(self.root, p)) for p, d in sorted(self.root.store.items())
+                 if p.split("/")[-2] == self.name and (not self.pending_only or d.get("count", 0) > 0)]
+        self.root.reads += len(snaps)
+        return snaps
+
+
+class _Batch:
+    def __init__(self, root):
+        self.root, self.ops = root, []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref.set, data, merge))
+
+    def update(self, ref, data):
+        self.ops.append((lambda d, merge: ref.update(d), data, False))
+
+    def commit(self):
+        self.root.commits += 1
+        for op, data, merge in self.ops:
+            op(data, merge=merge)
+
+
+class _Txn(_Batch):
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
 
 
 class _Root:
     def __init__(self):
-        self.store = {}
+        self.store, self.reads, self.writes, self.commits = {}, 0, 0, 0
 
     def collection(self, name):
-        assert name == "workflow_stats"
-        return _StatColl(self.store)
+        assert name in ("workflow_stats", "workflow_stats_snapshot")
+        return _Coll(self, name)
+
+    def collection_group(self, name):
+        return _Group(self, name)
+
+    def batch(self):
+        return _Batch(self)
+
+    def transaction(self):
+        return _Txn(self)
 
 
 def _db():
@@ -88,46 +155,80 @@ def _db():
     return db
 
 
-def test_upsert_increments_count_and_keeps_metadata():
+def _run(sig, count=1, week="2026-W20", updated_at="2026-05-12T00:00:00"):
+    return {sig: {"tools": sig.split(">"), "kind": "comparison", "count": count,
+                  "weeks": {week: count}, "updated_at": updated_at}}
+
+
+def _shards(db, sig):
+    prefix = f"workflow_stats/{sig}/workflow_stat_shards/"
+    return {p[len(prefix):]: d for p, d in db.db.store.items() if p.startswith(prefix)}
+
+
+# ---- FirestoreDB: sharded counters + rollup ----------------------------------
+
+
+def test_runs_increment_a_shard_and_keep_metadata():
     db = _db()
     sig = "get_profile>get_fit_analysis"
-    assert db.upsert_workflow_stat(sig, ["get_profile", "get_fit_analysis"], "comparison") is True
-    db.upsert_workflow_stat(sig, ["get_profile", "get_fit_analysis"], "comparison")
-    rec = db.db.store[sig]
-    assert rec["count"] == 2                       # atomic increment accrues
-    assert rec["tools"] == ["get_profile", "get_fit_analysis"]
-    assert rec["kind"] == "comparison" and rec["signature"] == sig
+    assert db.add_workflow_stat_runs(_run(sig, 2), shards=1) is True
+    db.add_workflow_stat_runs(_run(sig, 3), shards=1)
+    (shard,) = _shards(db, sig).values()
+    assert shard["count"] == 5                          # atomic increments accrue
+    assert shard["weeks"] == {"2026-W20": 5}
+    assert shard["tools"] == ["get_profile", "get_fit_analysis"]
+    assert shard["kind"] == "comparison" and shard["signature"] == sig
+    assert "workflow_stats/" + sig not in db.db.store   # the hot root doc is never written
 
 
-def test_get_popular_returns_top_by_count_desc():
+def test_runs_spread_across_shards_in_one_batch():
     db = _db()
-    for _ in range(3):
-        db.upsert_workflow_stat("a>b", ["a", "b"], "comparison")
-    db.upsert_workflow_stat("c>d", ["c", "d"], "timeline")
+    for _ in range(40):
+        db.add_workflow_stat_runs({**_run("a>b"), **_run("c>d")}, shards=10)
+    assert db.db.commits == 40                          # one batch per flush
+    assert len(_shards(db, "a>b")) > 1
+    assert sum(s["count"] for s in _shards(db, "a>b").values()) == 40
+
+
+def test_get_popular_folds_shards_into_legacy_totals():
+    db = _db()
+    db.db.store["workflow_stats/a>b"] = {"signature": "a>b", "tools": ["a", "b"], "kind": "note",
+                                         "count": 2, "weeks": {"2026-W19": 2}, "updated_at": "2026-05-01"}
+    db.add_workflow_stat_runs(_run("a>b", 2), shards=1)
+    db.add_workflow_stat_runs(_run("c>d", 3), shards=1)
     top = db.get_popular_workflows(limit=10)
     assert [w["signature"] for w in top] == ["a>b", "c>d"]   # most-run first
-    assert top[0]["count"] == 3
+    assert top[0]["count"] == 4
+    assert top[0]["weeks"] == {"2026-W19": 2, "2026-W20": 2}
+    assert top[0]["kind"] == "comparison"                     # newest metadata wins
+    assert db.db.store["workflow_stats/c>d"]["count"] == 3     # the root now holds the total
+    assert all(s["count"] == 0 and s["weeks"] == {} for s in _shards(db, "a>b").values())
+
+    # Folded runs are not counted again, and only new runs are folded next time.
+    db.add_workflow_stat_runs(_run("c>d", 2), shards=1)
+    top = db.get_popular_workflows(limit=1)
+    assert [(w["signature"], w["count"]) for w in top] == [("c>d", 5)]
 
 
-def test_upsert_accrues_current_week_bucket():
+def test_rollup_reads_pending_shards_and_the_top_n_only():
     db = _db()
-    sig = "get_profile>get_fit_analysis"
-    db.upsert_workflow_stat(sig, ["get_profile", "get_fit_analysis"], "comparison")
-    db.upsert_workflow_stat(sig, ["get_profile", "get_fit_analysis"], "comparison")
-    weeks = db.db.store[sig]["weeks"]
-    # Both runs land in (whatever) the current ISO week — one bucket, count 2.
-    assert len(weeks) == 1
-    assert sum(weeks.values()) == 2
-    # Bucket key is the same 'YYYY-Www' shape the frontend computes.
-    (key,) = weeks.keys()
-    assert key.startswith("20") and "-W" in key
+    for i in range(30):
+        db.add_workflow_stat_runs(_run(f"s{i:02d}>x", i + 1), shards=1)
+    db.get_popular_workflows(limit=5)                           # first fold: 30 pending shards
+
+    db.add_workflow_stat_runs(_run("s00>x", 100), shards=1)
+    reads = db.db.reads
+    top = db.get_popular_workflows(limit=5)
+    # 1 pending shard (query) + root and shard (fold transaction) + 5 roots.
+    assert db.db.reads - reads == 1 + 2 + 5
+    assert top[0]["signature"] == "s00>x" and top[0]["count"] == 101
 
 
 def test_get_popular_trims_weeks_to_recent_window():
     db = _db()
     # Seed a doc that has been popular for a year (52 week buckets).
     weeks = {f"2025-W{w:02d}": w for w in range(1, 53)}
-    db.db.store["x>y"] = {
+    db.db.store["workflow_stats/x>y"] = {
         "signature": "x>y", "tools": ["x", "y"], "kind": "note",
         "count": sum(weeks.values()), "weeks": dict(weeks), "updated_at": "2025-12-31",
     }
@@ -135,4 +236,141 @@ def test_get_popular_trims_weeks_to_recent_window():
     trimmed = top[0]["weeks"]
     assert len(trimmed) == 8                                  # bounded payload
     assert set(trimmed) == {f"2025-W{w:02d}" for w in range(45, 53)}  # newest kept
-    assert db.db.store["x>y"]["count"] == sum(weeks.values())  # read doesn't mutate the count
+    assert db.db.store["workflow_stats/x>y"]["count"] == sum(weeks.values())  # read doesn't mutate
+
+
+# ---- workflow_stats: queue, task handler, snapshot ---------------------------
+
+
+class _Tasks:
+    """Cloud-Tasks-like queue: holds the submitted payloads until delivered."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, runs):
+        self.tasks.append(json.loads(json.dumps(runs)))  # what the task body carries
+
+    def deliver(self):
+        results = [ws.apply_runs(runs) for runs in self.tasks]
+        self.tasks = []
+        return results
+
+
+@pytest.fixture
+def env(monkeypatch):
+    ws.reset()
+    db = _db()
+    jobs, tasks = [], _Tasks()
+    monkeypatch.setattr(ws, "_spawn", jobs.append)
+    ws.set_queue(tasks)
+    with patch.object(ws, "get_db", return_value=db):
+        yield db, jobs, tasks
+    ws.reset()
+
+
+def _total(db, sig):
+    return sum(s["count"] for s in _shards(db, sig).values())
+
+
+def test_record_queues_the_run_without_touching_firestore(env):
+    db, jobs, tasks = env
+    for _ in range(3):
+        assert ws.record("a>b", ["a", "b"], "comparison") is True
+    assert db.db.store == {} and db.db.writes == 0 and jobs == []
+    assert len(tasks.tasks) == 3 and ws.stats()["recorded"] == 3
+
+
+def test_delivered_runs_increment_the_shards(env):
+    db, _, tasks = env
+    for _ in range(3):
+        ws.record("a>b", ["a", "b"], "comparison")
+    ws.record("c>d", ["c", "d"])
+    assert tasks.deliver() == [True] * 4
+    assert _total(db, "a>b") == 3 and _total(db, "c>d") == 1
+    shard = next(iter(_shards(db, "a>b").values()))
+    (week,) = shard["weeks"]
+    assert week.startswith("20") and "-W" in week          # the frontend's isoWeekKey shape
+    assert shard["kind"] == "comparison" and ws.stats()["applied"] == 4
+
+
+def test_failed_write_is_reported_so_the_task_retries(env):
+    db, _, tasks = env
+    ws.record("a>b", ["a", "b"])
+    with patch.object(db, "add_workflow_stat_runs", return_value=False):
+        assert ws.apply_runs(tasks.tasks[0]) is False
+    assert tasks.deliver() == [True]                        # the retry lands
+    assert _total(db, "a>b") == 1 and ws.stats()["apply_failures"] == 1
+
+
+def test_malformed_runs_are_dropped_not_retried(env):
+    db, _, _ = env
+    bad = {"a/b": _run("x>y")["x>y"], "c>d": {"count": "1", "weeks": {}, "tools": []}}
+    assert ws.apply_runs(bad) is True
+    assert db.db.writes == 0
+
+
+def test_queue_failure_never_fails_the_save(env):
+    _, _, tasks = env
+    tasks.submit = lambda runs: (_ for _ in ()).throw(RuntimeError("503"))
+    assert ws.record("a>b", ["a", "b"]) is False
+    assert ws.stats()["dropped"] == 1
+
+
+def test_deployed_instance_without_a_queue_drops_runs(env, monkeypatch):
+    db, jobs, _ = env
+    monkeypatch.setenv("K_SERVICE", "profile-manager-v2")
+    monkeypatch.delenv("WORKFLOW_STATS_TASKS_QUEUE", raising=False)
+    ws.set_queue(None)
+    assert ws.record("a>b", ["a", "b"]) is False
+    assert db.db.writes == 0 and jobs == [] and ws.stats()["dropped"] == 1
+
+
+def test_configured_queue_is_cloud_tasks(monkeypatch):
+    monkeypatch.setenv("WORKFLOW_STATS_TASKS_QUEUE", "projects/p/locations/r/queues/q")
+    monkeypatch.setenv("WORKFLOW_STATS_WORKER_URL", "https://pm.example/")
+    ws.set_queue(None)
+    try:
+        queue = ws.get_queue()
+        assert isinstance(queue, ws.CloudTasksQueue) and queue.worker_url == "https://pm.example"
+    finally:
+        ws.set_queue(None)
+
+
+def test_local_queue_applies_runs_off_the_caller(env, monkeypatch):
+    db, _, _ = env
+    monkeypatch.delenv("K_SERVICE", raising=False)
+    monkeypatch.delenv("WORKFLOW_STATS_TASKS_QUEUE", raising=False)
+    ws.set_queue(None)
+    ws.record("a>b", ["a", "b"])
+    assert ws.get_queue().drain(timeout=5) == [True]
+    assert _total(db, "a>b") == 1
+
+
+def test_first_read_builds_the_snapshot_then_serves_it(env):
+    db, jobs, _ = env
+    db.add_workflow_stat_runs(_run("a>b", 3), shards=1)
+    db.add_workflow_stat_runs(_run("c>d", 1), shards=1)
+
+    assert [w["signature"] for w in ws.popular(limit=1)] == ["a>b"]
+    assert db.db.store["workflow_stats_snapshot/top"]["workflows"][0]["count"] == 3
+
+    reads = db.db.reads
+    with patch.object(db, "get_popular_workflows") as rollup:
+        assert len(ws.popular(limit=10)) == 2
+    rollup.assert_not_called()
+    assert db.db.reads == reads and jobs == []              # instance cache
+
+
+def test_stale_snapshot_is_served_while_refreshing_in_background(env, monkeypatch):
+    db, jobs, _ = env
+    db.db.store["workflow_stats_snapshot/top"] = {
+        "workflows": [{"signature": "old>one", "count": 9}], "generated_at": "2026-01-01T00:00:00"}
+    db.add_workflow_stat_runs(_run("a>b", 3), shards=1)
+
+    assert ws.popular()[0]["signature"] == "old>one"
+    assert ws.popular()[0]["signature"] == "old>one"
+    assert jobs == [ws._background_refresh]                 # single flight
+    jobs.pop()()
+    assert ws.popular()[0]["signature"] == "a>b"
+    assert ws.stats()["snapshot_refreshes"] == 1
@@ -1,13 +1,13 @@
 """
 Test setup for the QA agent.
 
-Stubs the heavy Google libraries (firestore, firebase-admin, generativeai)
+Stubs the heavy Google libraries (firestore, firebase-admin, genai)
 so the agent's logic can be unit-tested without provisioning credentials,
 network, or actual Cloud SDKs.
 
 The qa_agent module imports its way down through firestore_store →
-google.cloud.firestore, auth → firebase_admin, and corpus →
-google.generativeai. We stub each at the module level before any test
+google.cloud.firestore, auth → firebase_admin, and llm_gateway →
+google.genai. We stub each at the module level before any test
 imports the qa_agent package.
 """
 
@@ -15,6 +15,8 @@ import sys
 import types
 from pathlib import Path
 
+import pytest
+
 # Source on sys.path so `import auth, corpus, runner` etc. work as if
 # we were inside the function bundle.
 SOURCE_DIR = Path(__file__).resolve().parents[3] / 'cloud_functions' / 'qa_agent'
@@ -148,20 +150,38 @@ _fa_auth.create_custom_token = _create_custom_token
 _ensure_module('firebase_admin.credentials')
 
 
-# --- Stub google.generativeai -------------------------------------------------
-_genai = _ensure_module('google.generativeai')
-_genai.configure = lambda *_a, **_k: None
-
+# --- Stub google.genai -------------------------------------------------------
+# llm_gateway's pooled clients; a call that reaches the SDK gets empty text.
+_genai = _ensure_module('google.genai')
 
-class _StubModel:
-    def __init__(self, *_a, **_k):
-        pass
 
+class _StubModels:
     def generate_content(self, *_a, **_k):
         return types.SimpleNamespace(text='')
 
 
-_genai.GenerativeModel = _StubModel
+class _StubClient:
+    def __init__(self, *_a, **_k):
+        self.models = _StubModels()
+
+
+if not hasattr(_genai, 'Client'):  # another service's conftest may own the stub
+    _genai.Client = _StubClient
+
+
+@pytest.fixture
+def gemini_model(monkeypatch):
+    """Serve llm_gateway's single-model calls from a GenerativeModel-shaped
+    class: ``install(Model)`` makes each call ``Model(model).generate_content(contents)``."""
+    import llm_gateway
+
+    def install(model_cls):
+        class _Models:
+            def generate_content(self, *, model, contents, config=None):
+                return model_cls(model).generate_content(contents)
+
+        monkeypatch.setattr(llm_gateway, 'client', lambda api_key=None: types.SimpleNamespace(models=_Models()))
+    return install
 
 
 # --- Stub functions_framework -----------------------------------------------
@@ -113,9 +113,8 @@ def test_generate_variation_falls_back_when_no_api_key(monkeypatch):
     assert v['gpa_delta'] == 0.0
 
 
-def test_generate_variation_falls_back_on_invalid_json(monkeypatch):
+def test_generate_variation_falls_back_on_invalid_json(monkeypatch, gemini_model):
     monkeypatch.setenv('GEMINI_API_KEY', 'fake')
-    import google.generativeai as genai
 
     class _BadModel:
         def __init__(self, *_a, **_k):
@@ -125,7 +124,7 @@ def test_generate_variation_falls_back_on_invalid_json(monkeypatch):
                 text = 'not json'
             return R()
 
-    monkeypatch.setattr(genai, 'GenerativeModel', _BadModel)
+    gemini_model(_BadModel)
     archetype = {
         'id': 'x',
         'description': 'd',
@@ -137,9 +136,8 @@ def test_generate_variation_falls_back_on_invalid_json(monkeypatch):
     assert v['intended_major'] == 'Bio'
 
 
-def test_generate_variation_strips_code_fences(monkeypatch):
+def test_generate_variation_strips_code_fences(monkeypatch, gemini_model):
     monkeypatch.setenv('GEMINI_API_KEY', 'fake')
-    import google.generativeai as genai
 
     class _Model:
         def __init__(self, *_a, **_k):
@@ -154,7 +152,7 @@ def test_generate_variation_strips_code_fences(monkeypatch):
                 )
             return R()
 
-    monkeypatch.setattr(genai, 'GenerativeModel', _Model)
+    gemini_model(_Model)
     archetype = {
         'id': 'x',
         'description': 'd',
@@ -168,9 +166,8 @@ def test_generate_variation_strips_code_fences(monkeypatch):
     assert v['gpa_delta'] == 0.1
 
 
-def test_generate_variation_clamps_gpa_delta(monkeypatch):
+def test_generate_variation_clamps_gpa_delta(monkeypatch, gemini_model):
     monkeypatch.setenv('GEMINI_API_KEY', 'fake')
-    import google.generativeai as genai
 
     class _Model:
         def __init__(self, *_a, **_k):
@@ -180,7 +177,7 @@ def test_generate_variation_clamps_gpa_delta(monkeypatch):
                 text = '{"student_name": "X Y", "intended_major": "M", "extra_interest": "", "gpa_delta": 5.0}'
             return R()
 
-    monkeypatch.setattr(genai, 'GenerativeModel', _Model)
+    gemini_model(_Model)
     archetype = {
         'id': 'x',
         'description': 'd',
@@ -100,3 +100,93 @@ class TestFetchGroundTruth:
         )
         assert truth["broken"] == {}
         assert truth["ok"]["name"] == "OK"
+
+
+class TestBatchedCachedTruth:
+    """The default path: one KB batch call for every uncached college,
+    cached across scenarios and runs, revalidated by (data_year,
+    last_updated) once the TTL lapses."""
+
+    @pytest.fixture
+    def gt(self):
+        import ground_truth
+        ground_truth.reset_cache()
+        yield ground_truth
+        ground_truth.reset_cache()
+
+    @staticmethod
+    def _kb(records):
+        calls = []
+
+        def batch(ids):
+            calls.append(list(ids))
+            return {cid: dict(records[cid]) for cid in ids if cid in records}
+
+        return batch, calls
+
+    def test_one_batch_call_for_all_colleges(self, gt):
+        batch, calls = self._kb({
+            "mit": {"university_id": "mit", "official_name": "MIT", "data_year": 2026},
+            "duke": {"university_id": "duke", "official_name": "Duke", "data_year": 2026},
+        })
+        truth = gt.fetch_ground_truth(["mit", "duke", "nope"], kb_batch_client=batch)
+        assert calls == [["mit", "duke", "nope"]]
+        assert truth["mit"]["name"] == "MIT" and truth["duke"]["name"] == "Duke"
+        assert truth["nope"] == {}
+
+    def test_later_scenarios_and_runs_hit_the_cache(self, gt):
+        batch, calls = self._kb({"mit": {"university_id": "mit", "official_name": "MIT"}})
+        gt.fetch_ground_truth(["mit"], kb_batch_client=batch, now=lambda: 100.0)
+        truth = gt.fetch_ground_truth(["mit"], kb_batch_client=batch, now=lambda: 200.0)
+        assert calls == [["mit"]] and truth["mit"]["name"] == "MIT"
+
+    def test_misses_are_not_cached(self, gt):
+        records = {}
+        batch, calls = self._kb(records)
+        assert gt.fetch_ground_truth(["mit"], kb_batch_client=batch) == {"mit": {}}
+        records["mit"] = {"university_id": "mit", "official_name": "MIT"}
+        assert gt.fetch_ground_truth(["mit"], kb_batch_client=batch)["mit"]["name"] == "MIT"
+        assert len(calls) == 2
+
+    def test_expired_entry_is_replaced_only_when_version_moves(self, gt):
+        records = {"mit": {"university_id": "mit", "official_name": "MIT",
+                           "data_year": 2026, "last_updated": "t1"}}
+        batch, calls = self._kb(records)
+        first = gt.fetch_ground_truth(["mit"], kb_batch_client=batch, now=lambda: 0.0)["mit"]
+        later = gt.TRUTH_TTL_S + 1.0
+        same = gt.fetch_ground_truth(["mit"], kb_batch_client=batch, now=lambda: later)["mit"]
+        assert same is first and len(calls) == 2
+
+        records["mit"].update(official_name="Massachusetts Institute of Technology",
+                              last_updated="t2")
+        moved = gt.fetch_ground_truth(["mit"], kb_batch_client=batch,
+                                      now=lambda: 2 * later)["mit"]
+        assert moved["name"] == "Massachusetts Institute of Technology"
+
+    def test_batch_failure_is_a_miss_for_every_college(self, gt):
+        def batch(ids):
+            raise RuntimeError("kb timeout")
+
+        assert gt.fetch_ground_truth(["a", "b"], kb_batch_client=batch) == {"a": {}, "b": {}}
+
+    def test_http_batch_record_is_flattened_and_keyed_by_requested_id(self, gt, monkeypatch):
+        class _Resp:
+            status_code = 200
+
+            def json(self):
+                return {"success": True, "universities": [{
+                    "university_id": "university_of_southern_california",
+                    "official_name": "USC",
+                    "resolved_from": "usc",
+                    "profile": {"supplemental_essays": [{"required": True}, {}],
+                                "official_name": "stale"},
+                }]}
+
+        posted = []
+        monkeypatch.setattr(gt.requests, "post",
+                            lambda url, json, timeout: posted.append(json) or _Resp(),
+                            raising=False)
+        truth = gt.fetch_ground_truth(["usc"], kb_url="https://kb.example")
+        assert posted == [{"university_ids": ["usc"]}]
+        assert truth["usc"]["name"] == "USC"
+        assert truth["usc"]["essays_required"] == 1 and truth["usc"]["essays_total"] == 2
@@ -0,0 +1,218 @@
+"""Latency load-test mode (loadtest.py): HDR histogram, open-loop replay
+against local stub services, the /run {"type": "loadtest"} report, and
+regression detection in narratives.build_summary."""
+
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse
+
+import pytest
+
+import loadtest
+import narratives
+import runner
+
+
+# ---- Local stub services ---------------------------------------------------
+
+
+class _StubServices:
+    """One ThreadingHTTPServer standing in for profile_manager_v2,
+    counselor_agent and the KB. Every path answers 200 with a small
+    JSON body after `delays[path]` seconds."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.hits = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                path = urlparse(self.path).path
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"null") if length else None
+                stub.hits.append((self.command, path, body))
+                time.sleep(stub.delays.get(path, 0))
+                payload = json.dumps({"success": True, "ok": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *_a):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def paths(self, method=None):
+        return [p for m, p, _b in self.hits if method in (None, m)]
+
+
+def _http_poster(url, body=None, *, method="POST", params=None, timeout=30, **_auth):
+    """runner._post's contract over urllib — other test modules stub the
+    `requests` package in sys.modules for the whole session."""
+    if params:
+        url = f"{url}?{urlencode(params)}"
+    data = json.dumps(body).encode() if method == "POST" else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return {"status_code": resp.status, "response_json": json.loads(resp.read())}
+
+
+@pytest.fixture
+def stub_services():
+    services = _StubServices()
+    yield services
+    services.server.shutdown()
+
+
+def _cfg(base, email="duser8531+qa1@gmail.com"):
+    return runner.RunConfig(
+        profile_manager_url=f"{base}/pm", counselor_agent_url=f"{base}/ca",
+        admin_token="admin", id_token="tok", test_user_email=email,
+        knowledge_base_url=f"{base}/kb",
+    )
+
+
+SCENARIO = {
+    "id": "fit_selective_band",
+    "profile_template": {"gpa": 3.85, "graduation_year": 2026},
+    "colleges_template": ["university_of_washington"],
+    "fit_target_college": "university_of_washington",
+}
+
+
+# ---- Histogram -------------------------------------------------------------
+
+
+class TestLatencyHistogram:
+    def test_percentiles_hold_two_significant_figures(self):
+        hist = loadtest.LatencyHistogram()
+        for value in range(1, 10001):
+            hist.record(value)
+        for pct, exact in ((50, 5000), (95, 9500), (99, 9900)):
+            assert abs(hist.percentile(pct) - exact) / exact < 0.01
+        assert hist.percentile(100) == 10000
+        assert hist.to_dict()["min_ms"] == 1 and hist.to_dict()["mean_ms"] == 5000
+
+    def test_small_values_are_exact_and_empty_is_none(self):
+        hist = loadtest.LatencyHistogram()
+        assert hist.percentile(50) is None
+        for value in (3, 7, 7, 120):
+            hist.record(value)
+        assert hist.percentile(50) == 7 and hist.percentile(99) == 120
+
+
+# ---- Request plan + replay -------------------------------------------------
+
+
+def test_requests_cover_each_endpoint_the_scenario_can_exercise():
+    specs = loadtest.build_requests(SCENARIO, _cfg("http://x"))
+    assert [s["endpoint"] for s in specs] == [
+        "get-college-list", "compute-single-fit", "search", "work-feed"]
+    no_colleges = dict(SCENARIO, colleges_template=[], fit_target_college=None)
+    assert [s["endpoint"] for s in loadtest.build_requests(no_colleges, _cfg("http://x"))] \
+        == ["work-feed"]
+
+
+def test_settings_are_defaulted_and_clamped():
+    assert loadtest.clamp_settings({}) == {"rps": 2.0, "concurrency": 8, "duration_s": 60}
+    out = loadtest.clamp_settings({"rps": 10_000, "concurrency": "x", "duration_s": 9999})
+    assert out == {"rps": loadtest.MAX_RPS, "concurrency": 8,
+                   "duration_s": loadtest.MAX_DURATION_S}
+
+
+def test_replay_against_stub_services_records_per_endpoint_percentiles(stub_services):
+    stub_services.delays["/ca/work-feed"] = 0.05
+    result = loadtest.run_loadtest([SCENARIO], [_cfg(stub_services.url)],
+                                   rps=40, concurrency=4, duration_s=0.5,
+                                   poster=_http_poster)
+    latency = result["latency"]
+    assert result["seeded"] is True and result["requests_planned"] == 20
+    assert set(latency) == set(loadtest.ENDPOINTS)
+    assert sum(s["count"] for s in latency.values()) == 20
+    assert latency["work-feed"]["p50_ms"] >= 50
+    assert all(s["passed"] and s["errors"] == 0 for s in latency.values())
+    # Seeded before the replay (credits cover the 5 planned fits), cleared after.
+    posts = stub_services.paths("POST")
+    assert posts[0] == "/pm/clear-test-data" and posts[-1] == "/pm/clear-test-data"
+    credits = next(b for _m, p, b in stub_services.hits if p == "/pm/add-credits")
+    assert credits["credits"] == 5
+
+
+def test_open_loop_latency_counts_queueing_behind_a_slow_pool(stub_services):
+    # One worker, 100ms responses, 20 req/s offered: requests queue, and
+    # measuring from the scheduled send time makes that visible.
+    stub_services.delays["/ca/work-feed"] = 0.1
+    specs = loadtest.build_requests({"id": "x"}, _cfg(stub_services.url),
+                                    endpoints=("work-feed",))
+    results = loadtest.replay(specs, rps=20, concurrency=1, duration_s=0.5,
+                              poster=_http_poster)
+    stats = loadtest.summarize(results)["work-feed"]
+    assert stats["count"] == 10
+    assert stats["max_ms"] >= 500
+
+
+def test_over_budget_and_erroring_endpoints_fail(monkeypatch):
+    monkeypatch.setitem(loadtest.P95_BUDGET_MS, "work-feed", 10)
+    hist = loadtest.LatencyHistogram()
+    for value in (5, 50, 60):
+        hist.record(value)
+    ok = loadtest.LatencyHistogram()
+    ok.record(1)
+    out = loadtest.summarize({"work-feed": {"histogram": hist, "errors": 0},
+                              "search": {"histogram": ok, "errors": 1}})
+    assert out["work-feed"]["passed"] is False and out["work-feed"]["p95_budget_ms"] == 10
+    assert out["search"]["passed"] is False and out["search"]["error_rate"] == 1.0
+
+
+# ---- narratives.build_summary ----------------------------------------------
+
+
+def _loadtest_run(i, p95, passed=True):
+    return {
+        "run_id": f"lt{i}", "type": "loadtest",
+        "started_at": f"2026-10-{10 + i:02d}T00:00:00+00:00",
+        "summary": {"total": 1, "pass": int(passed), "fail": int(not passed)},
+        "scenarios": [],
+        "latency": {"work-feed": {"p50_ms": p95 // 2, "p95_ms": p95, "p99_ms": p95,
+                                  "passed": passed}},
+    }
+
+
+class TestLatencySummary:
+    def test_regression_against_median_baseline_is_flagged(self):
+        runs = [_loadtest_run(i, p95) for i, p95 in enumerate((400, 420, 380, 900))]
+        latency = narratives.build_summary(runs)["latency"]
+        assert latency["run_id"] == "lt3"
+        assert latency["endpoints"]["work-feed"]["baseline_p95_ms"] == 400
+        assert latency["regressions"] == ["work-feed"]
+        runs.append({"run_id": "r1", "started_at": "2026-10-13T01:00:00+00:00",
+                     "summary": {"total": 1, "pass": 1, "fail": 0}, "scenarios": []})
+        summary = narratives.build_summary(runs, gemini_key=None)
+        assert "work-feed p95 900ms (baseline 400ms)" in summary["narrative"]
+
+    def test_small_absolute_moves_are_not_regressions(self):
+        runs = [_loadtest_run(0, 20), _loadtest_run(1, 40)]
+        assert narratives.build_summary(runs)["latency"]["regressions"] == []
+
+    def test_load_tests_stay_out_of_pass_rates(self):
+        runs = [_loadtest_run(0, 400, passed=False), {
+            "run_id": "r1", "started_at": "2026-10-11T00:00:00+00:00",
+            "summary": {"total": 1, "pass": 1, "fail": 0}, "scenarios": [],
+        }]
+        summary = narratives.build_summary(runs)
+        assert summary["pass_rate_recent"] == 100
+        assert summary["latency"]["over_budget"] == ["work-feed"]
+
+    def test_no_load_tests_means_empty_latency(self):
+        assert narratives.build_summary([])["latency"] == {}
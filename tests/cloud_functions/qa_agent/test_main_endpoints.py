@@ -503,7 +503,7 @@ class TestSummaryEndpoint:
                 for i in range(5)
             ]
 
-        monkeypatch.setattr(firestore_store, "list_recent_runs", fake_list)
+        monkeypatch.setattr(firestore_store, "list_run_digests", fake_list)
         monkeypatch.setattr(narratives, "build_summary", lambda runs, **k: {
             "narrative": "All systems green for 5 days running.",
             "pass_rate_7d": 100,
@@ -853,6 +853,123 @@ class TestRunHandlerRunningDoc:
         assert running["surfaces_covered"] == ["profile"]
 
 
+# ---- /run executes scenarios concurrently, one synthetic user each -------
+
+
+class TestRunParallelScenarios:
+    def _stub(self, qa_main, monkeypatch, delay=0.2):
+        import threading, time as _time
+        import auth, corpus, firestore_store, runner, narratives, synthesizer
+        monkeypatch.setattr(corpus, "load_archetypes", lambda *a, **k: [
+            {"id": f"scen_{c}", "description": c, "surfaces_covered": [], "tests": []}
+            for c in "abc"
+        ])
+        monkeypatch.setattr(corpus, "select_scenarios",
+                            lambda archetypes, history, n: archetypes[:n])
+        monkeypatch.setattr(corpus, "generate_variation", lambda a, **k: {})
+        monkeypatch.setattr(corpus, "apply_variation", lambda a, v: a)
+        monkeypatch.setattr(firestore_store, "load_history", lambda *a, **k: {})
+        monkeypatch.setattr(firestore_store, "list_recent_runs", lambda *a, **k: [])
+        monkeypatch.setattr(firestore_store, "update_history", lambda *a, **k: None)
+        writes = []
+        monkeypatch.setattr(firestore_store, "write_report",
+                            lambda run_id, payload: writes.append(payload))
+        monkeypatch.setattr(synthesizer, "synthesize_scenarios", lambda **k: [])
+        monkeypatch.setattr(auth, "get_id_token",
+                            lambda uid, *a, **k: f"token-for-{uid}")
+        seen, active = [], {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def _run(scenario, cfg, **_k):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+                seen.append((scenario["id"], cfg.test_user_email, cfg.id_token))
+            _time.sleep(delay)
+            with lock:
+                active["now"] -= 1
+            return {"scenario_id": scenario["id"], "passed": True,
+                    "duration_ms": int(delay * 1000), "steps": []}
+
+        monkeypatch.setattr(runner, "run_scenario", _run)
+        monkeypatch.setattr(narratives, "build_plan", lambda *a, **k: {
+            "narrative": "p", "rationale": "rotation", "coverage": {}})
+        monkeypatch.setattr(narratives, "build_outcome", lambda *a, **k: {
+            "narrative": "o", "verdict": "all_pass", "first_look_at": []})
+        return writes, seen, active
+
+    def _run(self, qa_main, body):
+        req = _FakeRequest(method="POST", path="/run",
+                           headers={"X-Admin-Token": "test-admin-token"},
+                           body=body)
+        return _resp_payload(qa_main.qa_agent(req))
+
+    def test_scenarios_run_concurrently_as_isolated_users(self, qa_main, monkeypatch):
+        import time as _time
+        writes, seen, active = self._stub(qa_main, monkeypatch)
+        t0 = _time.monotonic()
+        status, body = self._run(qa_main, {"count": 3})
+        elapsed = _time.monotonic() - t0
+        assert status == 200 and body["summary"] == {"total": 3, "pass": 3, "fail": 0}
+        assert active["peak"] == 3 and elapsed < 0.5
+        users = {email: token for _id, email, token in seen}
+        assert set(users) == {f"duser8531+qa{i}@gmail.com" for i in (1, 2, 3)}
+        assert len(set(users.values())) == 3
+        # Report keeps pick order regardless of completion order.
+        final = writes[-1]
+        assert final["status"] == "complete"
+        assert [r["scenario_id"] for r in final["scenarios"]] == ["scen_a", "scen_b", "scen_c"]
+
+    def test_single_worker_runs_serially(self, qa_main, monkeypatch):
+        _writes, _seen, active = self._stub(qa_main, monkeypatch, delay=0.01)
+        status, body = self._run(qa_main, {"count": 3, "workers": 1})
+        assert status == 200 and body["summary"]["total"] == 3
+        assert active["peak"] == 1
+
+    def test_token_failure_releases_lock_before_any_scenario(self, qa_main, monkeypatch):
+        import auth
+        writes, seen, _active = self._stub(qa_main, monkeypatch)
+
+        def _boom(uid, *a, **k):
+            if uid.endswith("qa2"):
+                raise RuntimeError("mint failed")
+            return "tok"
+        monkeypatch.setattr(auth, "get_id_token", _boom)
+        status, body = self._run(qa_main, {"count": 3})
+        assert body["success"] is False and "mint failed" in body["error"]
+        assert seen == []
+        assert writes[-1]["status"] == "complete"
+
+
+class TestRunLoadtest:
+    def test_loadtest_run_writes_percentiles_into_the_report(self, qa_main, monkeypatch):
+        import loadtest
+        writes, _seen, _active = TestRunParallelScenarios()._stub(qa_main, monkeypatch)
+        calls = {}
+
+        def _fake(scenarios, cfgs, **kwargs):
+            calls.update(kwargs, ids=[s["id"] for s in scenarios],
+                         emails=[c.test_user_email for c in cfgs])
+            return {"seeded": True, "requests_planned": 40, "latency": {
+                "work-feed": {"p50_ms": 80, "p95_ms": 200, "p99_ms": 300, "passed": True},
+                "search": {"p50_ms": 90, "p95_ms": 4000, "p99_ms": 5000, "passed": False},
+            }}
+        monkeypatch.setattr(loadtest, "run_loadtest", _fake)
+
+        status, body = TestRunParallelScenarios()._run(qa_main, {
+            "type": "loadtest", "scenarios": ["scen_b", "scen_c"],
+            "rps": 4, "duration_s": 10, "endpoints": ["search", "work-feed", "bogus"],
+        })
+        assert status == 200 and body["summary"] == {"total": 2, "pass": 1, "fail": 1}
+        assert calls["ids"] == ["scen_b", "scen_c"]
+        assert calls["emails"] == ["duser8531+qa1@gmail.com", "duser8531+qa2@gmail.com"]
+        assert calls["rps"] == 4.0 and calls["endpoints"] == ["search", "work-feed"]
+        report = writes[-1]
+        assert report["type"] == "loadtest" and report["status"] == "complete"
+        assert report["scenarios"] == [] and report["latency"]["search"]["p95_ms"] == 4000
+        assert report["loadtest"]["scenario_ids"] == ["scen_b", "scen_c"]
+
+
 # ---- Feedback id collection -----------------------------------------------
 #
 # Bug repro: synthesizer LLM occasionally emits feedback_id as a JSON
@@ -8,8 +8,8 @@ workflow rule. They should fail with ImportError until narratives.py
 exists, then with AssertionError until each function behaves as
 specified, then pass.
 
-LLM calls are stubbed at the module level (google.generativeai already
-stubbed in conftest). Each test exercises the deterministic-fallback
+LLM calls are stubbed through conftest's gemini_model fixture (google.genai
+is stubbed in conftest). Each test exercises the deterministic-fallback
 path AND the happy LLM path where the stub returns a known string.
 """
 
@@ -149,9 +149,8 @@ class TestBuildPlan:
         # naming at least one scenario id.
         assert any(a["id"] in result["narrative"] for a in archetypes)
 
-    def test_uses_llm_when_key_provided(self, archetypes, history, monkeypatch):
+    def test_uses_llm_when_key_provided(self, archetypes, history, monkeypatch, gemini_model):
         import narratives
-        import google.generativeai as genai
 
         class _Model:
             def __init__(self, *_a, **_k):
@@ -162,7 +161,7 @@ class TestBuildPlan:
                     text = "Run targets the roadmap surface across two scenarios."
                 return R()
 
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
         result = narratives.build_plan(archetypes, history, gemini_key="fake-key")
         assert "roadmap surface" in result["narrative"]
 
@@ -196,9 +195,8 @@ class TestBuildOutcome:
         # Fallback should mention the failing scenario by id.
         assert "senior_fall_application_crunch" in result["narrative"]
 
-    def test_uses_llm_when_key_provided(self, failing_report, monkeypatch):
+    def test_uses_llm_when_key_provided(self, failing_report, monkeypatch, gemini_model):
         import narratives
-        import google.generativeai as genai
 
         class _Model:
             def __init__(self, *_a, **_k):
@@ -209,7 +207,7 @@ class TestBuildOutcome:
                     text = "The roadmap endpoint regressed — response status changed to 500."
                 return R()
 
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
         result = narratives.build_outcome(failing_report, gemini_key="fake-key")
         assert "regressed" in result["narrative"]
 
@@ -424,11 +422,10 @@ class TestSummaryNarrativeTracksRecentN:
         # blended 30-day rate (~75%).
         assert "100" in narrative
 
-    def test_llm_prompt_includes_recent_n_signal(self, monkeypatch):
+    def test_llm_prompt_includes_recent_n_signal(self, monkeypatch, gemini_model):
         """When the LLM is available, the prompt must include the
         recent-N rate + window so the generated narrative leads with it."""
         import narratives
-        import google.generativeai as genai
 
         captured = {}
 
@@ -441,7 +438,7 @@ class TestSummaryNarrativeTracksRecentN:
                     text = "ok"
                 return R()
 
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
         runs = self._runs_recent_all_pass_30d_mixed()
         narratives.build_summary(runs, recent_n=20, gemini_key="fake-key")
         prompt = captured.get("prompt", "")
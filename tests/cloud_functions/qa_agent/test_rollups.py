@@ -0,0 +1,130 @@
+"""Dashboard rollups (firestore_store): finished run reports are folded
+into one qa_rollups/recent_runs doc of compact digests, and the summary /
+coverage / resolved-issues / chat builders read those instead of full
+reports."""
+
+import copy
+
+import chat
+import coverage
+import firestore_store
+import narratives
+import resolved_issues
+
+
+class _Snap:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class _Doc:
+    def __init__(self, db, path):
+        self.db, self.path = db, path
+
+    def get(self):
+        self.db.reads.append(self.path)
+        return _Snap(self.db.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        self.db.docs[self.path] = copy.deepcopy(data)
+
+
+class _Collection:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+
+    def document(self, doc_id):
+        return _Doc(self.db, f"{self.name}/{doc_id}")
+
+
+class _DB:
+    def __init__(self):
+        self.docs, self.reads = {}, []
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+
+ROLLUP = "qa_rollups/recent_runs"
+
+
+def _report(i, *, passed=True, status="complete", message="slow " * 100):
+    step_ok = {"name": "roadmap", "passed": True, "request": {"big": "x" * 500},
+               "assertions": [{"name": "2xx", "passed": True, "message": ""}]}
+    step_bad = {"name": "work_feed", "passed": False, "response_excerpt": "y" * 500,
+                "assertions": [{"name": "2xx", "passed": True, "message": ""},
+                               {"name": "latency", "passed": False, "message": message}]}
+    return {
+        "run_id": f"run_{i}", "status": status, "trigger": "manual",
+        "started_at": f"2026-10-{i + 1:02d}T00:00:00+00:00",
+        "summary": {"total": 1, "pass": int(passed), "fail": int(not passed)},
+        "test_plan": {"narrative": "long plan"},
+        "scenarios": [{
+            "scenario_id": "junior_spring", "passed": passed,
+            "surfaces_covered": ["profile", "roadmap"], "tests": ["roadmap renders"],
+            "colleges_template": ["mit"], "description": "desc",
+            "steps": [step_ok] + ([] if passed else [step_bad]),
+        }],
+    }
+
+
+def test_finished_reports_are_folded_into_the_rollup():
+    db = _DB()
+    firestore_store.write_report("run_0", _report(0, status="running"), db=db)
+    assert ROLLUP not in db.docs
+    firestore_store.write_report("run_0", _report(0, passed=False), db=db)
+    digest, = db.docs[ROLLUP]["runs"]
+    scen, = digest["scenarios"]
+    assert "test_plan" not in digest and "description" not in scen
+    step, = scen["steps"]
+    assert step["name"] == "work_feed" and "response_excerpt" not in step
+    assert step["assertions"] == [{"passed": False, "message": ("slow " * 100)[:300]}]
+
+
+def test_rollup_is_newest_first_deduped_and_capped(monkeypatch):
+    monkeypatch.setattr(firestore_store, "ROLLUP_RUNS", 3)
+    db = _DB()
+    for i in (2, 0, 4, 1, 3):
+        firestore_store.write_report(f"run_{i}", _report(i), db=db)
+    firestore_store.write_report("run_4", _report(4, passed=False), db=db)
+    runs = db.docs[ROLLUP]["runs"]
+    assert [r["run_id"] for r in runs] == ["run_4", "run_3", "run_2"]
+    assert runs[0]["summary"]["fail"] == 1
+
+
+def test_rollup_failure_never_fails_the_report_write(monkeypatch):
+    db = _DB()
+    monkeypatch.setattr(firestore_store, "_add_to_rollup",
+                        lambda *a: (_ for _ in ()).throw(RuntimeError("quota")))
+    firestore_store.write_report("run_0", _report(0), db=db)
+    assert db.docs["qa_runs/run_0"]["run_id"] == "run_0"
+
+
+def test_reads_are_one_doc_and_cold_start_backfills(monkeypatch):
+    db = _DB()
+    reports = [_report(1, passed=False), _report(0), _report(2, status="running")]
+    monkeypatch.setattr(firestore_store, "list_recent_runs", lambda limit, db: reports)
+    first = firestore_store.list_run_digests(limit=30, db=db)
+    assert [d["run_id"] for d in first] == ["run_1", "run_0"]
+    monkeypatch.setattr(firestore_store, "list_recent_runs",
+                        lambda *a, **k: (_ for _ in ()).throw(AssertionError("full scan")))
+    db.reads.clear()
+    assert firestore_store.list_run_digests(limit=1, db=db) == first[:1]
+    assert db.reads == [ROLLUP]
+
+
+def test_builders_agree_on_digests_and_full_reports():
+    # Failure messages within the digest's 300-char cap.
+    reports = [_report(i, passed=i % 2 == 0, message=f"took {i}s") for i in range(6)][::-1]
+    digests = [firestore_store.digest_run(r) for r in reports]
+    assert coverage.build_coverage(digests) == coverage.build_coverage(reports)
+    assert resolved_issues.build_resolved_issues(digests) == \
+        resolved_issues.build_resolved_issues(reports)
+    full, rolled = narratives.build_summary(reports), narratives.build_summary(digests)
+    assert {k: full[k] for k in ("pass_rate_recent", "surfaces")} == \
+        {k: rolled[k] for k in ("pass_rate_recent", "surfaces")}
+    assert chat._format_run_context(digests) == chat._format_run_context(reports)
@@ -149,9 +149,8 @@ class TestSynthesizeScenarios:
         # No key → returns empty list (caller fills with static).
         assert result == []
 
-    def test_falls_back_on_malformed_json(self, monkeypatch):
+    def test_falls_back_on_malformed_json(self, monkeypatch, gemini_model):
         import synthesizer
-        import google.generativeai as genai
 
         class _Model:
             def __init__(self, *_a, **_k):
@@ -162,7 +161,7 @@ class TestSynthesizeScenarios:
                     text = "totally not json"
                 return R()
 
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
         result = synthesizer.synthesize_scenarios(
             n=2,
             history=self._hist(),
@@ -173,11 +172,10 @@ class TestSynthesizeScenarios:
         )
         assert result == []
 
-    def test_returns_only_valid_scenarios(self, monkeypatch):
+    def test_returns_only_valid_scenarios(self, monkeypatch, gemini_model):
         """LLM returns 2 scenarios, 1 has bad college id — only 1
         scenario returned."""
         import synthesizer
-        import google.generativeai as genai
 
         good_scenario = {
             "id": "synth_a",
@@ -210,7 +208,7 @@ class TestSynthesizeScenarios:
                     text = payload
                 return R()
 
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
         result = synthesizer.synthesize_scenarios(
             n=2,
             history=self._hist(),
@@ -324,11 +322,10 @@ class TestFeedbackInPrompt:
         # feedback_id so applied_count can be credited.
         assert "feedback_id" in prompt
 
-    def test_synthesize_scenarios_passes_feedback_through(self, monkeypatch):
+    def test_synthesize_scenarios_passes_feedback_through(self, monkeypatch, gemini_model):
         """End-to-end: synthesize_scenarios receives feedback_items and
         the prompt fed to Gemini contains them."""
         import synthesizer
-        import google.generativeai as genai
         captured = {}
 
         class _Model:
@@ -339,7 +336,7 @@ class TestFeedbackInPrompt:
                 class R:
                     text = '{"scenarios": []}'
                 return R()
-        monkeypatch.setattr(genai, "GenerativeModel", _Model)
+        gemini_model(_Model)
 
         synthesizer.synthesize_scenarios(
             n=1,
@@ -0,0 +1,73 @@
+"""Synthetic QA users (synthetic_users.py) and the per-uid token cache in
+auth.py that lets every scenario of a run sign in as its own account."""
+
+import pytest
+
+import auth
+import synthetic_users
+
+
+@pytest.fixture(autouse=True)
+def _fresh_tokens():
+    auth.reset_cache()
+    yield
+    auth.reset_cache()
+
+
+class _UserNotFound(Exception):
+    pass
+
+
+@pytest.fixture
+def fake_firebase(monkeypatch):
+    from firebase_admin import auth as fa
+    users, created, exchanged = {"base-uid-qa1": {}}, [], []
+
+    def _get_user(uid):
+        if uid not in users:
+            raise _UserNotFound(uid)
+        return users[uid]
+
+    def _create_user(**kwargs):
+        created.append(kwargs)
+        users[kwargs["uid"]] = kwargs
+
+    monkeypatch.setattr(fa, "UserNotFoundError", _UserNotFound, raising=False)
+    monkeypatch.setattr(fa, "get_user", _get_user, raising=False)
+    monkeypatch.setattr(fa, "create_user", _create_user, raising=False)
+
+    def _exchange(custom, _key):
+        exchanged.append(custom)
+        return auth.IdTokenBundle(id_token=f"id:{custom}", refresh_token="",
+                                  expires_at=auth._now() + 3600)
+    monkeypatch.setattr(auth, "exchange_for_id_token", _exchange)
+    return created, exchanged
+
+
+def test_slot_users_are_plus_aliases_of_the_base_account():
+    user = synthetic_users.for_slot("base-uid", "duser8531@gmail.com", 2)
+    assert user == synthetic_users.SyntheticUser("base-uid-qa2", "duser8531+qa2@gmail.com")
+    assert synthetic_users.alias_email("x+old@example.com", 1) == "x+qa1@example.com"
+
+
+def test_slot_users_require_a_base_uid():
+    with pytest.raises(RuntimeError):
+        synthetic_users.for_slot("", "duser8531@gmail.com", 1)
+
+
+def test_provision_creates_missing_accounts_with_a_verified_email(fake_firebase):
+    created, _exchanged = fake_firebase
+    for slot in (1, 2):
+        synthetic_users.provision(
+            synthetic_users.for_slot("base-uid", "duser8531@gmail.com", slot), "key")
+    assert created == [{"uid": "base-uid-qa2", "email": "duser8531+qa2@gmail.com",
+                        "email_verified": True}]
+
+
+def test_tokens_are_cached_per_uid(fake_firebase):
+    _created, exchanged = fake_firebase
+    a = auth.get_id_token("uid-a", "key")
+    b = auth.get_id_token("uid-b", "key")
+    assert a != b
+    assert auth.get_id_token("uid-a", "key") == a
+    assert exchanged == ["custom-token-for-uid-a", "custom-token-for-uid-b"]
@@ -4,6 +4,7 @@ from datetime import datetime
 
 import pytest
 
+import service_tokens
 import stratia_client as sc
 
 
@@ -762,7 +763,7 @@ def test_missing_runtime_credentials_degrade_to_no_header(captured, monkeypatch,
     # Local dev has no metadata server: fetch raises, headers omitted, the
     # request still goes out (backend AUTH_MODE decides what that means).
     # The raise is mocked — the real fallback would wait out network retries.
-    sc._svc_token_cache.clear()
+    service_tokens.reset_cache()
     import types as _types, sys as _sys
 
     def _boom(request, audience):
@@ -783,7 +784,7 @@ def test_missing_runtime_credentials_degrade_to_no_header(captured, monkeypatch,
 
 def test_service_token_is_cached_per_audience(monkeypatch, real_svc_auth_headers):
     real = real_svc_auth_headers
-    sc._svc_token_cache.clear()
+    service_tokens.reset_cache()
     calls = []
 
     def fake_fetch(request, audience):
@@ -807,7 +808,7 @@ def test_service_token_is_cached_per_audience(monkeypatch, real_svc_auth_headers
     h2 = real(url)
     assert h1 == h2 and h1["Authorization"].startswith("Bearer tok-")
     assert len(calls) == 1              # second call served from cache
-    sc._svc_token_cache.clear()
+    service_tokens.reset_cache()
 
 
 # --- #303: global major catalog ------------------------------------------------
@@ -0,0 +1,149 @@
+"""Unit tests for scripts/ingest_universities.py — pacing, retries and the
+bulk-ingest client path (HTTP is faked; no network)."""
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO / "scripts"))
+
+# The script puts the KB function dir (which has its own main.py) on
+# sys.path[0] to import versioning; undo that so later suites' plain
+# `import main` still resolves to their own function.
+_saved_path = list(sys.path)
+import ingest_universities as m  # noqa: E402
+sys.path[:] = _saved_path
+
+
+class _Resp:
+    def __init__(self, status, body, headers=None):
+        self.status_code = status
+        self._body = body
+        self.headers = headers or {}
+        self.text = json.dumps(body)
+        self.ok = status < 400
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(m.time, "sleep", slept.append)
+    return slept
+
+
+def _args(**kw):
+    defaults = dict(url="http://kb", retries=2, workers=2, bulk_size=2, merge_with_current=False, force=False)
+    defaults.update(kw)
+    return types.SimpleNamespace(**defaults)
+
+
+class TestRateLimiter:
+    def test_spaces_requests_across_callers(self, monkeypatch, no_sleep):
+        clock = [100.0]
+        monkeypatch.setattr(m.time, "monotonic", lambda: clock[0])
+        limiter = m.RateLimiter(rps=4)
+        for _ in range(3):
+            limiter.acquire()
+        assert no_sleep == [0.25, 0.5]
+
+    def test_pause_holds_everyone_back(self, monkeypatch, no_sleep):
+        monkeypatch.setattr(m.time, "monotonic", lambda: 50.0)
+        limiter = m.RateLimiter()
+        limiter.pause(3)
+        limiter.acquire()
+        assert no_sleep == [3.0]
+
+    def test_unlimited_never_sleeps(self, no_sleep):
+        limiter = m.RateLimiter(0)
+        for _ in range(5):
+            limiter.acquire()
+        assert no_sleep == []
+
+
+class TestPostWithRetries:
+    def test_retries_throttling_then_succeeds(self, monkeypatch, no_sleep):
+        replies = iter([_Resp(429, {}, {"Retry-After": "2"}), _Resp(200, {"success": True})])
+        monkeypatch.setattr(m.requests, "post", lambda *a, **k: next(replies))
+        resp, body, error, attempts = m.post_with_retries("u", {}, {}, m.RateLimiter(), retries=3)
+        assert (resp.status_code, body, error, attempts) == (200, {"success": True}, None, 2)
+        assert 2.0 in no_sleep
+
+    def test_gives_up_after_retries(self, monkeypatch, no_sleep):
+        monkeypatch.setattr(m.requests, "post", lambda *a, **k: _Resp(503, {"error": "busy"}))
+        resp, body, error, attempts = m.post_with_retries("u", {}, {}, m.RateLimiter(), retries=2)
+        assert resp.status_code == 503 and attempts == 3
+
+    def test_client_errors_are_not_retried(self, monkeypatch, no_sleep):
+        calls = []
+        monkeypatch.setattr(m.requests, "post",
+                            lambda *a, **k: calls.append(1) or _Resp(400, {"error": "bad"}))
+        _, _, _, attempts = m.post_with_retries("u", {}, {}, m.RateLimiter(), retries=3)
+        assert attempts == 1 and len(calls) == 1
+
+    def test_network_error_reported_after_retries(self, monkeypatch, no_sleep):
+        def boom(*a, **k):
+            raise m.requests.ConnectionError("down")
+        monkeypatch.setattr(m.requests, "post", boom)
+        resp, body, error, attempts = m.post_with_retries("u", {}, {}, m.RateLimiter(), retries=1)
+        assert resp is None and "down" in error and attempts == 2
+
+
+class TestRunBulk:
+    def test_chunks_and_maps_per_school_results(self, monkeypatch, no_sleep):
+        payloads = []
+
+        def fake_post(url, json=None, headers=None, timeout=None):
+            payloads.append(json)
+            return _Resp(200, {
+                "results": [{"success": p["_id"] != "bad", "year": 2026,
+                             "promoted_to_current": True, "available_years": [2026],
+                             "prepare_ms": 1.0, "error": "nope"} for p in json["profiles"]],
+                "timing": {"write_ms": 5},
+            })
+        monkeypatch.setattr(m.requests, "post", fake_post)
+        ready = [(Path(f"{uid}.json"), {"_id": uid}) for uid in ("a", "b", "bad")]
+        lines = []
+        timings = m.run_bulk(ready, 2026, _args(), {}, m.RateLimiter(), lines.append)
+
+        assert sorted(len(p["profiles"]) for p in payloads) == [1, 2]
+        assert all(p["action"] == "bulk-ingest" and p["year"] == 2026 for p in payloads)
+        by_id = {t["university_id"]: t for t in timings}
+        assert by_id["a"]["status"] == "ok" and by_id["bad"]["status"] == "failed"
+        assert by_id["a"]["server_batch_timing"] == {"write_ms": 5}
+        assert any(line.startswith("  FAIL  bad.json") for line in lines)
+
+    def test_old_server_without_bulk_endpoint_aborts(self, monkeypatch, no_sleep):
+        calls = []
+        monkeypatch.setattr(m.requests, "post", lambda *a, **k: calls.append(1) or _Resp(
+            400, {"error": "Invalid request. Provide 'query' for search or 'profile' for ingest."}))
+        ready = [(Path(f"{i}.json"), {"_id": str(i)}) for i in range(6)]
+        timings = m.run_bulk(ready, 2026, _args(workers=1), {}, m.RateLimiter(), lambda _: None)
+        assert all(t["status"] == "failed" for t in timings)
+        assert len(calls) == 1  # remaining chunks skipped
+
+
+class TestRunSingle:
+    def test_pre_versioning_server_aborts(self, monkeypatch, no_sleep):
+        calls = []
+        monkeypatch.setattr(m.requests, "post",
+                            lambda *a, **k: calls.append(1) or _Resp(200, {"success": True}))
+        ready = [(Path(f"{i}.json"), {"_id": str(i)}) for i in range(4)]
+        timings = m.run_single(ready, 2026, _args(workers=1), {}, m.RateLimiter(), lambda _: None)
+        assert len(calls) == 1
+        assert [t["status"] for t in timings] == ["failed"] * 4
+
+    def test_unchanged_schools_are_reported_as_same(self, monkeypatch, no_sleep):
+        monkeypatch.setattr(m.requests, "post", lambda *a, **k: _Resp(200, {
+            "success": True, "year": 2026, "unchanged": True,
+            "promoted_to_current": True, "available_years": [2026]}))
+        lines = []
+        timings = m.run_single([(Path("a.json"), {"_id": "a"})], 2026, _args(),
+                               {}, m.RateLimiter(), lines.append)
+        assert lines[0].startswith("  same  a.json")
+        assert timings[0]["status"] == "ok" and timings[0]["unchanged"] is True